@@ -0,0 +1,170 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""A content-addressed store of compressed blobs.
+
+Blobs are files keyed by the hexadecimal SHA-256 digest of their contents, and
+compressed with zlib. They are stored under the root directory of the store, in
+subdirectories named after the first two characters of their digest (e.g.,
+<root>/ab/abcd....z). Blobs are written to a temporary file which is renamed, so
+several writers (e.g., VMs sharing the store over NFS) can add the same blob
+concurrently, and a blob which already exists is not written again.
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+import zlib
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+
+class Error(Exception):
+  pass
+
+
+class BlobStoreError(Error):
+  pass
+
+
+class BlobStore(object):
+  """A content-addressed store of compressed blobs."""
+
+  _EXTENSION = '.z'
+  _COMPRESSION_LEVEL = 6
+
+  def __init__(self, root):
+    """Constructor.
+
+    Args:
+      root: The root directory of the store. It is created if it does not
+            exist.
+
+    Raises:
+      BlobStoreError: If the root directory cannot be created.
+    """
+
+    self._root = root
+    try:
+      if not os.path.isdir(root):
+        os.makedirs(root)
+    except OSError as err:
+      if not os.path.isdir(root):
+        raise BlobStoreError('Could not create blob store %s: %s'
+                             % (root, err))
+
+  def GetPath(self, digest):
+    """Get the path of a blob, given its digest."""
+
+    return os.path.join(self._root, digest[:2], digest + BlobStore._EXTENSION)
+
+  def Contains(self, digest):
+    """Determine if the store contains a blob, given its digest."""
+
+    return os.path.exists(self.GetPath(digest))
+
+  def Put(self, contents, digest=None):
+    """Add a blob to the store, unless it is already in it.
+
+    Args:
+      contents: The contents of the blob.
+      digest: The hexadecimal SHA-256 digest of the contents, if it is known.
+
+    Returns:
+      The digest of the blob.
+
+    Raises:
+      BlobStoreError: If the blob cannot be written.
+    """
+
+    if digest is None:
+      digest = hashlib.sha256(contents).hexdigest()
+    path = self.GetPath(digest)
+    if os.path.exists(path):
+      return digest
+
+    directory = os.path.dirname(path)
+    temp_path = None
+    try:
+      if not os.path.isdir(directory):
+        try:
+          os.mkdir(directory)
+        except OSError:
+          # Another writer may have created it.
+          if not os.path.isdir(directory):
+            raise
+      (temp_file, temp_path) = tempfile.mkstemp(prefix='.', suffix='.tmp',
+                                                dir=directory)
+      with os.fdopen(temp_file, 'wb') as blob_file:
+        blob_file.write(zlib.compress(contents, BlobStore._COMPRESSION_LEVEL))
+      os.chmod(temp_path, 0644)
+      os.rename(temp_path, path)
+    except (IOError, OSError) as err:
+      if temp_path is not None and os.path.exists(temp_path):
+        os.remove(temp_path)
+      raise BlobStoreError('Could not write blob %s: %s' % (path, err))
+    return digest
+
+  def Get(self, digest):
+    """Get the contents of a blob.
+
+    Args:
+      digest: The hexadecimal SHA-256 digest of the blob.
+
+    Returns:
+      The contents of the blob.
+
+    Raises:
+      BlobStoreError: If the blob cannot be read or is corrupted.
+    """
+
+    path = self.GetPath(digest)
+    try:
+      with open(path, 'rb') as blob_file:
+        contents = zlib.decompress(blob_file.read())
+    except (IOError, OSError, zlib.error) as err:
+      raise BlobStoreError('Could not read blob %s: %s' % (path, err))
+    if hashlib.sha256(contents).hexdigest() != digest:
+      raise BlobStoreError('Blob %s does not match its digest.' % path)
+    return contents
+
+
+def GetFileContents(file_state, blob_store):
+  """Get the contents recorded in a file state.
+
+  Args:
+    file_state: A wheelbarrow_pb2.FileState.
+    blob_store: The BlobStore of the results, or None.
+
+  Returns:
+    The contents, or None if no contents were recorded.
+
+  Raises:
+    BlobStoreError: If the contents are in a blob which cannot be read.
+  """
+
+  if file_state.HasField('contents'):
+    return file_state.contents
+  if file_state.HasField('contents_sha256'):
+    if blob_store is None:
+      raise BlobStoreError('Contents %s are in a blob store, but none was '
+                           'given.' % file_state.contents_sha256)
+    return blob_store.Get(file_state.contents_sha256)
+  return None
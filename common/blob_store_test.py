@@ -0,0 +1,86 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Tests for the blob store."""
+
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from common import blob_store
+from common import wheelbarrow_pb2
+
+
+class BlobStoreTest(unittest.TestCase):
+  def setUp(self):
+    self.tmp_dir = tempfile.mkdtemp()
+    self.store = blob_store.BlobStore(os.path.join(self.tmp_dir, 'blobs'))
+    self.contents = 'contents\n' * 100
+    self.digest = hashlib.sha256(self.contents).hexdigest()
+
+  def testPutAndGet(self):
+    self.assertFalse(self.store.Contains(self.digest))
+    self.assertEqual(self.digest, self.store.Put(self.contents))
+    self.assertTrue(self.store.Contains(self.digest))
+    self.assertEqual(self.contents, self.store.Get(self.digest))
+    # The blob is compressed, and no temporary file is left.
+    path = self.store.GetPath(self.digest)
+    self.assertLess(os.path.getsize(path), len(self.contents))
+    self.assertEqual([os.path.basename(path)],
+                     os.listdir(os.path.dirname(path)))
+
+  def testPutExistingBlob(self):
+    self.store.Put(self.contents, self.digest)
+    path = self.store.GetPath(self.digest)
+    os.utime(path, (0, 0))
+    self.assertEqual(self.digest, self.store.Put(self.contents, self.digest))
+    self.assertEqual(0, os.path.getmtime(path))
+
+  def testGetMissingBlob(self):
+    self.assertRaises(blob_store.BlobStoreError, self.store.Get, self.digest)
+
+  def testGetCorruptedBlob(self):
+    self.store.Put('other contents', self.digest)
+    self.assertRaises(blob_store.BlobStoreError, self.store.Get, self.digest)
+
+  def testGetFileContents(self):
+    file_state = wheelbarrow_pb2.FileState()
+    file_state.trigger = wheelbarrow_pb2.INSTALL
+    self.assertIsNone(blob_store.GetFileContents(file_state, self.store))
+    file_state.contents = 'inline'
+    self.assertEqual('inline',
+                     blob_store.GetFileContents(file_state, self.store))
+    file_state.ClearField('contents')
+    file_state.contents_sha256 = self.store.Put(self.contents)
+    self.assertEqual(self.contents,
+                     blob_store.GetFileContents(file_state, self.store))
+    self.assertRaises(blob_store.BlobStoreError, blob_store.GetFileContents,
+                      file_state, None)
+
+  def tearDown(self):
+    shutil.rmtree(self.tmp_dir)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,216 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Instrumentation of the resources used by triggers and analyses.
+
+Code which processes files, reads file contents or spawns subprocesses reports
+it with the Record*() functions. Counts are kept per thread, so that analyses
+running concurrently are measured separately. Work done on behalf of a thread
+by helper threads (e.g., the workers of a thread pool) is attributed to it by
+running the work with RunWithCounters().
+
+A ResourceMeter measures the wall time, the CPU time and the counts of the
+current thread between two points. System-wide memory is read with GetMemInfo().
+"""
+
+import os
+import resource
+import sys
+import threading
+import time
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from common import wheelbarrow_pb2
+
+# The resource module of Python 2 does not define RUSAGE_THREAD, which is 1 on
+# Linux. Elsewhere, the CPU time of the whole process is used.
+_RUSAGE_THREAD = getattr(resource, 'RUSAGE_THREAD',
+                         1 if sys.platform.startswith('linux') else
+                         resource.RUSAGE_SELF)
+
+_local = threading.local()
+
+
+class Counters(object):
+  """Counts of the work done by a thread and its helpers."""
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self.files_processed = 0
+    self.bytes_read = 0
+    self.subprocesses = 0
+    # The CPU time of helper threads, in seconds.
+    self.helper_cpu_time = 0.0
+
+  def Add(self, files_processed=0, bytes_read=0, subprocesses=0,
+          helper_cpu_time=0.0):
+    with self._lock:
+      self.files_processed += files_processed
+      self.bytes_read += bytes_read
+      self.subprocesses += subprocesses
+      self.helper_cpu_time += helper_cpu_time
+
+  def Snapshot(self):
+    with self._lock:
+      return (self.files_processed, self.bytes_read, self.subprocesses,
+              self.helper_cpu_time)
+
+
+def GetCounters():
+  """Get the counters of the current thread."""
+
+  counters = getattr(_local, 'counters', None)
+  if counters is None:
+    counters = _local.counters = Counters()
+  return counters
+
+
+def RecordFileProcessed():
+  GetCounters().Add(files_processed=1)
+
+
+def RecordBytesRead(byte_count):
+  GetCounters().Add(bytes_read=byte_count)
+
+
+def RecordSubprocess():
+  GetCounters().Add(subprocesses=1)
+
+
+def RunWithCounters(counters, function, *args):
+  """Run a function in a helper thread, on behalf of another thread.
+
+  Args:
+    counters: The Counters of the thread on whose behalf the function is run.
+    function: A function.
+    *args: The arguments of the function.
+
+  Returns:
+    The result of the function.
+  """
+
+  previous_counters = getattr(_local, 'counters', None)
+  _local.counters = counters
+  start_cpu_time = GetThreadCpuTime()
+  try:
+    return function(*args)
+  finally:
+    counters.Add(helper_cpu_time=GetThreadCpuTime() - start_cpu_time)
+    _local.counters = previous_counters
+
+
+def GetThreadCpuTime():
+  """Get the user and system time of the current thread, in seconds."""
+
+  usage = resource.getrusage(_RUSAGE_THREAD)
+  return usage.ru_utime + usage.ru_stime
+
+
+def GetMemInfo(path='/proc/meminfo'):
+  """Get the memory statistics of the system.
+
+  Args:
+    path: The path to the meminfo file.
+
+  Returns:
+    A map from field names (e.g., 'MemAvailable') to values in kilobytes, which
+    is empty if the file could not be read.
+  """
+
+  mem_info = {}
+  try:
+    with open(path) as mem_info_file:
+      for line in mem_info_file:
+        fields = line.split()
+        if len(fields) >= 2 and fields[1].isdigit():
+          mem_info[fields[0].rstrip(':')] = int(fields[1])
+  except IOError:
+    pass
+  return mem_info
+
+
+def GetMemoryUsed(path='/proc/meminfo'):
+  """Get the memory in use in the system, which cannot be reclaimed.
+
+  Args:
+    path: The path to the meminfo file.
+
+  Returns:
+    The memory in use in kilobytes, or None if it is unknown.
+  """
+
+  mem_info = GetMemInfo(path)
+  if 'MemTotal' not in mem_info or 'MemAvailable' not in mem_info:
+    return None
+  return mem_info['MemTotal'] - mem_info['MemAvailable']
+
+
+class ResourceMeter(object):
+  """Measures the resources used by a thread.
+
+  The meter can be read from another thread while it is running, e.g., to
+  record the usage of an interrupted analysis. The CPU time is only measured
+  when the meter is read from the thread which started it.
+
+  Attributes:
+    _include_children: Whether to include the CPU time of the subprocesses
+                       waited for.
+    _thread: The thread which started the meter.
+    _counters: The Counters of that thread.
+    _start: The (wall time, CPU time, counts) measurements at the start.
+  """
+
+  def __init__(self, include_children=False):
+    self._include_children = include_children
+    self._thread = None
+    self._counters = None
+    self._start = None
+
+  def Start(self):
+    self._thread = threading.current_thread()
+    self._counters = GetCounters()
+    self._start = (time.time(), self._GetCpuTime(), self._counters.Snapshot())
+
+  def Read(self):
+    """Read the meter.
+
+    Returns:
+      A ResourceUsage message with the resources used since Start() was called.
+    """
+
+    (start_wall_time, start_cpu_time, start_counts) = self._start
+    (files_processed, bytes_read, subprocesses, helper_cpu_time) = [
+        count - start_count for (count, start_count)
+        in zip(self._counters.Snapshot(), start_counts)]
+    usage = wheelbarrow_pb2.ResourceUsage()
+    usage.wall_time = time.time() - start_wall_time
+    if threading.current_thread() is self._thread:
+      usage.cpu_time = self._GetCpuTime() - start_cpu_time + helper_cpu_time
+    usage.files_processed = files_processed
+    usage.bytes_read = bytes_read
+    usage.subprocesses = subprocesses
+    return usage
+
+  def _GetCpuTime(self):
+    cpu_time = GetThreadCpuTime()
+    if self._include_children:
+      usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+      cpu_time += usage.ru_utime + usage.ru_stime
+    return cpu_time
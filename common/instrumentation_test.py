@@ -0,0 +1,109 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Tests for instrumentation."""
+
+import os.path
+import sys
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+import tempfile
+import threading
+import unittest
+
+from common import instrumentation
+from common.utils import LoadFileToString
+
+
+class InstrumentationTest(unittest.TestCase):
+
+  def testCountersArePerThread(self):
+    instrumentation.RecordFileProcessed()
+    other_counts = []
+
+    def RecordInOtherThread():
+      instrumentation.RecordBytesRead(10)
+      other_counts.append(instrumentation.GetCounters().Snapshot())
+
+    counts = instrumentation.GetCounters().Snapshot()
+    thread = threading.Thread(target=RecordInOtherThread)
+    thread.start()
+    thread.join()
+    self.assertEqual([(0, 10, 0, 0.0)], other_counts)
+    self.assertEqual(counts, instrumentation.GetCounters().Snapshot())
+
+  def testRunWithCounters(self):
+    counters = instrumentation.Counters()
+
+    def RecordInHelperThread():
+      instrumentation.RunWithCounters(counters,
+                                      instrumentation.RecordSubprocess)
+      instrumentation.RecordSubprocess()
+
+    thread = threading.Thread(target=RecordInHelperThread)
+    thread.start()
+    thread.join()
+    self.assertEqual(1, counters.subprocesses)
+
+  def testResourceMeter(self):
+    meter = instrumentation.ResourceMeter()
+    meter.Start()
+    instrumentation.RecordFileProcessed()
+    LoadFileToString(__file__)
+    # Spin a little so that some CPU time is used.
+    sum(xrange(100000))
+    usage = meter.Read()
+    self.assertEqual(1, usage.files_processed)
+    self.assertEqual(os.path.getsize(__file__), usage.bytes_read)
+    self.assertEqual(0, usage.subprocesses)
+    self.assertTrue(usage.wall_time > 0)
+    self.assertTrue(usage.HasField('cpu_time'))
+    self.assertFalse(usage.interrupted)
+
+  def testResourceMeterReadFromOtherThread(self):
+    meter = instrumentation.ResourceMeter()
+    meter.Start()
+    instrumentation.RecordSubprocess()
+    usages = []
+    thread = threading.Thread(target=lambda: usages.append(meter.Read()))
+    thread.start()
+    thread.join()
+    self.assertEqual(1, usages[0].subprocesses)
+    self.assertFalse(usages[0].HasField('cpu_time'))
+
+  def testGetMemoryUsed(self):
+    (file_descriptor, path) = tempfile.mkstemp()
+    os.write(file_descriptor, 'MemTotal:        2048 kB\n'
+             'MemFree:          512 kB\n'
+             'MemAvailable:    1536 kB\n'
+             'HugePages_Total:    0\n')
+    os.close(file_descriptor)
+    try:
+      self.assertEqual({'MemTotal': 2048, 'MemFree': 512,
+                        'MemAvailable': 1536, 'HugePages_Total': 0},
+                       instrumentation.GetMemInfo(path))
+      self.assertEqual(512, instrumentation.GetMemoryUsed(path))
+    finally:
+      os.remove(path)
+    self.assertEqual(None, instrumentation.GetMemoryUsed(path))
+
+
+if __name__ == '__main__':
+  unittest.main()
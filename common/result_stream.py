@@ -0,0 +1,392 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Streams of application results.
+
+An application result can be very large (e.g., when file contents are
+recorded), so it is not built and serialized as a single protobuf. It is
+written as a stream of wheelbarrow_pb2.ResultRecord messages instead, each
+prefixed with its length as a varint, which are appended as results are
+produced:
+
+  - A record with the package, when the stream is opened.
+  - For each analysis result, a record with the analysis result without its
+    results, followed by one record per wheelbarrow_pb2.Result.
+  - A record with the final package and the timings.
+
+Readers process one record at a time, so that neither side has to hold the
+whole application result. Result streams have the extension EXTENSION, and are
+written to a temporary file which is renamed when the stream is closed.
+"""
+
+import glob
+import os
+import sys
+import tempfile
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from common import wheelbarrow_pb2
+from google.protobuf.message import DecodeError
+from google.protobuf.message import EncodeError
+
+
+EXTENSION = '.rec'
+# The extension of the temporary files of streams which are being written.
+TEMP_EXTENSION = '.tmp'
+# The extensions of the files of result directories which are not application
+# results: pending package descriptors, checkpoints and temporary files.
+_NON_RESULT_EXTENSIONS = ('.pending', '.checkpoint', TEMP_EXTENSION)
+
+
+class Error(Exception):
+  pass
+
+
+class ResultStreamError(Error):
+  pass
+
+
+def IsResultStream(file_path):
+  """Determine if a file is a result stream, given its path."""
+
+  return file_path.endswith(EXTENSION)
+
+
+def GetResultFilePaths(result_dir):
+  """Get the paths to the application result files of a result directory.
+
+  Args:
+    result_dir: A directory containing application result files.
+
+  Returns:
+    The sorted list of the paths to the application result files, either result
+    streams or ApplicationResult protobufs.
+  """
+
+  return [file_path
+          for file_path in sorted(glob.glob(os.path.join(result_dir, '*')))
+          if not file_path.endswith(_NON_RESULT_EXTENSIONS)
+          and os.path.isfile(file_path)]
+
+
+def GetTemporaryFilePaths(file_path):
+  """Get the paths to the temporary files of the writers of a result stream.
+
+  Args:
+    file_path: The path to a result stream.
+
+  Returns:
+    A list of paths.
+  """
+
+  return glob.glob('%s.*%s' % (file_path, TEMP_EXTENSION))
+
+
+def MergeResultRecord(record, application_result):
+  """Merge a result record into an application result.
+
+  Args:
+    record: A wheelbarrow_pb2.ResultRecord.
+    application_result: A wheelbarrow_pb2.ApplicationResult.
+
+  Raises:
+    ResultStreamError: If the record has a result but no analysis result was
+                       started.
+  """
+
+  if record.HasField('package'):
+    application_result.package.CopyFrom(record.package)
+  if record.HasField('analysis_result'):
+    application_result.analysis_results.add().MergeFrom(
+        record.analysis_result)
+  if record.HasField('result'):
+    if not application_result.analysis_results:
+      raise ResultStreamError('Result record before any analysis result.')
+    application_result.analysis_results[-1].results.add().MergeFrom(
+        record.result)
+  if record.HasField('timing'):
+    application_result.timing.CopyFrom(record.timing)
+
+
+def ReadResultRecords(file_path):
+  """Read the records of a result stream.
+
+  Args:
+    file_path: The path to a result stream.
+
+  Yields:
+    wheelbarrow_pb2.ResultRecord messages.
+
+  Raises:
+    ResultStreamError: If the stream cannot be read or is truncated.
+  """
+
+  try:
+    with open(file_path, 'rb') as stream_file:
+      while True:
+        length = _ReadVarint(stream_file)
+        if length is None:
+          return
+        data = stream_file.read(length)
+        if len(data) != length:
+          raise ResultStreamError('Truncated record in result stream %s.'
+                                  % file_path)
+        record = wheelbarrow_pb2.ResultRecord()
+        try:
+          record.MergeFromString(data)
+        except DecodeError as err:
+          raise ResultStreamError('Could not decode record in result stream '
+                                  '%s: %s' % (file_path, err))
+        yield record
+  except (IOError, OSError) as err:
+    raise ResultStreamError('Could not read result stream %s: %s'
+                            % (file_path, err))
+
+
+def ReadResults(file_path, application_result):
+  """Read the results of a result stream, one at a time.
+
+  Everything but the results (the package, the timings and the analysis results
+  without their results) is merged into application_result as it is read.
+
+  Args:
+    file_path: The path to a result stream.
+    application_result: A wheelbarrow_pb2.ApplicationResult.
+
+  Yields:
+    (analysis name, wheelbarrow_pb2.Result) tuples.
+
+  Raises:
+    ResultStreamError: If the stream cannot be read or is invalid.
+  """
+
+  analysis_name = None
+  for record in ReadResultRecords(file_path):
+    result = None
+    if record.HasField('result'):
+      if analysis_name is None:
+        raise ResultStreamError('Result record before any analysis result in '
+                                'result stream %s.' % file_path)
+      result = record.result
+      record.ClearField('result')
+    if record.HasField('analysis_result'):
+      analysis_name = record.analysis_result.analysis_name
+    MergeResultRecord(record, application_result)
+    if result is not None:
+      yield (analysis_name, result)
+
+
+def ParseResultStreamWithoutResults(file_path, application_result):
+  """Parse a result stream into an application result, skipping the results.
+
+  This reads the package and the timings without holding the results.
+
+  Args:
+    file_path: The path to a result stream.
+    application_result: A wheelbarrow_pb2.ApplicationResult.
+
+  Raises:
+    ResultStreamError: If the stream cannot be read or is invalid.
+  """
+
+  for _ in ReadResults(file_path, application_result):
+    pass
+
+
+def ParseResultStream(file_path, application_result):
+  """Parse a whole result stream into an application result.
+
+  Args:
+    file_path: The path to a result stream.
+    application_result: A wheelbarrow_pb2.ApplicationResult.
+
+  Raises:
+    ResultStreamError: If the stream cannot be read or is invalid.
+  """
+
+  for record in ReadResultRecords(file_path):
+    MergeResultRecord(record, application_result)
+
+
+class ResultRecordWriter(object):
+  """Base class for writers of result records."""
+
+  def WriteRecord(self, record):
+    """Write a record.
+
+    Args:
+      record: A wheelbarrow_pb2.ResultRecord.
+    """
+
+    raise NotImplementedError()
+
+  def Reset(self):
+    """Discard all the records written so far."""
+
+    raise NotImplementedError()
+
+  def Close(self):
+    pass
+
+  def WritePackage(self, package, timing=None):
+    """Write the package of the result, and optionally the timings.
+
+    Args:
+      package: A wheelbarrow_pb2.Package.
+      timing: A wheelbarrow_pb2.Timing or None.
+    """
+
+    record = wheelbarrow_pb2.ResultRecord()
+    record.package.CopyFrom(package)
+    if timing is not None:
+      record.timing.CopyFrom(timing)
+    self.WriteRecord(record)
+
+  def WriteAnalysisResult(self, analysis_result):
+    """Write an analysis result, with one record per result.
+
+    Args:
+      analysis_result: A wheelbarrow_pb2.AnalysisResult.
+    """
+
+    record = wheelbarrow_pb2.ResultRecord()
+    record.analysis_result.analysis_name = analysis_result.analysis_name
+    if analysis_result.HasField('truncated'):
+      record.analysis_result.truncated = analysis_result.truncated
+    self.WriteRecord(record)
+    for result in analysis_result.results:
+      record = wheelbarrow_pb2.ResultRecord()
+      record.result.CopyFrom(result)
+      self.WriteRecord(record)
+
+
+class ResultStreamWriter(ResultRecordWriter):
+  """A writer of result streams."""
+
+  def __init__(self, file_path):
+    """Constructor.
+
+    Args:
+      file_path: The path to the result stream. The stream is written to a
+                 temporary file next to it until it is closed. Each writer has
+                 its own temporary file, so that writers of the same stream
+                 (e.g., a VM whose lease expired and the VM which analyzes the
+                 package again) do not write to the same file.
+
+    Raises:
+      ResultStreamError: If the stream cannot be created.
+    """
+
+    self._file_path = file_path
+    try:
+      (fd, self._temp_path) = tempfile.mkstemp(
+          suffix=TEMP_EXTENSION, prefix='%s.' % os.path.basename(file_path),
+          dir=os.path.dirname(file_path) or '.')
+      # mkstemp() only lets the owner read the file, but the host reads the
+      # streams written by guests.
+      os.fchmod(fd, 0644)
+      self._file = os.fdopen(fd, 'wb')
+    except (IOError, OSError) as err:
+      raise ResultStreamError('Could not create result stream %s: %s'
+                              % (file_path, err))
+
+  def WriteRecord(self, record):
+    try:
+      data = record.SerializePartialToString()
+      self._file.write(_EncodeVarint(len(data)))
+      self._file.write(data)
+    except (IOError, OSError, EncodeError) as err:
+      raise ResultStreamError('Could not write to result stream %s: %s'
+                              % (self._temp_path, err))
+
+  def Reset(self):
+    try:
+      self._file.seek(0)
+      self._file.truncate()
+    except (IOError, OSError) as err:
+      raise ResultStreamError('Could not reset result stream %s: %s'
+                              % (self._temp_path, err))
+
+  def Close(self):
+    """Close the stream and move it to its final path."""
+
+    if self._file.closed:
+      return
+    try:
+      self._file.close()
+      os.rename(self._temp_path, self._file_path)
+    except (IOError, OSError) as err:
+      raise ResultStreamError('Could not close result stream %s: %s'
+                              % (self._file_path, err))
+
+
+class ResultMerger(ResultRecordWriter):
+  """A writer which merges records into an application result in memory.
+
+  This is used when results are written in ASCII format, which cannot be
+  streamed.
+  """
+
+  def __init__(self):
+    self.application_result = wheelbarrow_pb2.ApplicationResult()
+
+  def WriteRecord(self, record):
+    MergeResultRecord(record, self.application_result)
+
+  def Reset(self):
+    self.application_result.Clear()
+
+
+def _EncodeVarint(value):
+  """Encode a non-negative integer as a varint."""
+
+  data = []
+  while value > 0x7f:
+    data.append(chr(0x80 | (value & 0x7f)))
+    value >>= 7
+  data.append(chr(value))
+  return ''.join(data)
+
+
+def _ReadVarint(stream_file):
+  """Read a varint from a file.
+
+  Args:
+    stream_file: A file object.
+
+  Returns:
+    The integer, or None at the end of the file.
+
+  Raises:
+    ResultStreamError: If the file ends in the middle of the varint.
+  """
+
+  value = 0
+  shift = 0
+  while True:
+    byte = stream_file.read(1)
+    if not byte:
+      if shift:
+        raise ResultStreamError('Truncated record length in result stream.')
+      return None
+    value |= (ord(byte) & 0x7f) << shift
+    if not ord(byte) & 0x80:
+      return value
+    shift += 7
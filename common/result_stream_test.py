@@ -0,0 +1,176 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Tests for result streams."""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from common import result_stream
+from common import utils
+from common import wheelbarrow_pb2
+
+
+class ResultStreamTest(unittest.TestCase):
+  def setUp(self):
+    self.tmp_dir = tempfile.mkdtemp()
+    self.stream_path = os.path.join(self.tmp_dir,
+                                    'package%s' % result_stream.EXTENSION)
+    self.application_result = self._CreateApplicationResult()
+
+  def testWriteAndParseResultStream(self):
+    self._WriteStream(self.application_result)
+    self.assertEqual([os.path.basename(self.stream_path)],
+                     os.listdir(self.tmp_dir))
+
+    parsed_result = wheelbarrow_pb2.ApplicationResult()
+    self.assertTrue(utils.ParseFileToProtobuf(self.stream_path, parsed_result))
+    self.assertEqual(self.application_result, parsed_result)
+
+  def testReadResults(self):
+    self._WriteStream(self.application_result)
+
+    partial_result = wheelbarrow_pb2.ApplicationResult()
+    results = list(result_stream.ReadResults(self.stream_path, partial_result))
+    self.assertEqual(
+        [('analysis1', self.application_result.analysis_results[0].results[0]),
+         ('analysis1', self.application_result.analysis_results[0].results[1]),
+         ('analysis2', self.application_result.analysis_results[1].results[0])],
+        results)
+    self.assertEqual(self.application_result.package, partial_result.package)
+    self.assertEqual(self.application_result.timing, partial_result.timing)
+    self.assertEqual(['analysis1', 'analysis2'],
+                     [analysis_result.analysis_name for analysis_result
+                      in partial_result.analysis_results])
+    self.assertTrue(partial_result.analysis_results[1].truncated)
+    self.assertFalse(partial_result.analysis_results[0].results)
+
+  def testResetDiscardsRecords(self):
+    writer = result_stream.ResultStreamWriter(self.stream_path)
+    writer.WriteAnalysisResult(self.application_result.analysis_results[0])
+    writer.Reset()
+    writer.WritePackage(self.application_result.package)
+    writer.Close()
+
+    parsed_result = wheelbarrow_pb2.ApplicationResult()
+    result_stream.ParseResultStream(self.stream_path, parsed_result)
+    self.assertEqual(self.application_result.package, parsed_result.package)
+    self.assertFalse(parsed_result.analysis_results)
+
+  def testParseTruncatedResultStream(self):
+    self._WriteStream(self.application_result)
+    with open(self.stream_path, 'rb') as stream_file:
+      data = stream_file.read()
+    with open(self.stream_path, 'wb') as stream_file:
+      stream_file.write(data[:-1])
+
+    self.assertRaises(result_stream.ResultStreamError,
+                      result_stream.ParseResultStream, self.stream_path,
+                      wheelbarrow_pb2.ApplicationResult())
+    self.assertFalse(utils.ParseFileToProtobuf(
+        self.stream_path, wheelbarrow_pb2.ApplicationResult()))
+
+  def testWritersHaveTheirOwnTemporaryFiles(self):
+    writer1 = result_stream.ResultStreamWriter(self.stream_path)
+    writer2 = result_stream.ResultStreamWriter(self.stream_path)
+    writer1.WritePackage(self.application_result.package)
+    writer2.WriteAnalysisResult(self.application_result.analysis_results[0])
+    self.assertEqual(
+        2, len(result_stream.GetTemporaryFilePaths(self.stream_path)))
+    writer1.Close()
+    self.assertEqual(
+        1, len(result_stream.GetTemporaryFilePaths(self.stream_path)))
+
+    parsed_result = wheelbarrow_pb2.ApplicationResult()
+    result_stream.ParseResultStream(self.stream_path, parsed_result)
+    self.assertEqual(self.application_result.package, parsed_result.package)
+    self.assertFalse(parsed_result.analysis_results)
+    writer2.Close()
+
+  def testGetResultFilePaths(self):
+    self._WriteStream(self.application_result)
+    for file_name in ('package.dat', 'other.rec.tmp', 'other.dat.pending',
+                      'other.checkpoint'):
+      open(os.path.join(self.tmp_dir, file_name), 'w').close()
+    os.mkdir(os.path.join(self.tmp_dir, 'blobs'))
+
+    self.assertEqual([os.path.join(self.tmp_dir, 'package.dat'),
+                      self.stream_path],
+                     result_stream.GetResultFilePaths(self.tmp_dir))
+
+  def testResultMerger(self):
+    merger = result_stream.ResultMerger()
+    self._WriteRecords(merger, self.application_result)
+    self.assertEqual(self.application_result, merger.application_result)
+
+  def _WriteStream(self, application_result):
+    writer = result_stream.ResultStreamWriter(self.stream_path)
+    self._WriteRecords(writer, application_result)
+    writer.Close()
+
+  @staticmethod
+  def _WriteRecords(writer, application_result):
+    initial_package = wheelbarrow_pb2.Package()
+    initial_package.CopyFrom(application_result.package)
+    initial_package.status = wheelbarrow_pb2.Package.PROCESSING
+    writer.WritePackage(initial_package)
+    for analysis_result in application_result.analysis_results:
+      writer.WriteAnalysisResult(analysis_result)
+    writer.WritePackage(application_result.package, application_result.timing)
+
+  @staticmethod
+  def _CreateApplicationResult():
+    application_result = wheelbarrow_pb2.ApplicationResult()
+    package = application_result.package
+    package.name = 'test'
+    package.version = '1.0'
+    package.architecture = 'amd64'
+    package.section = 'test'
+    package.status = wheelbarrow_pb2.Package.DONE
+    package.analysis_attempts = 1
+    analysis_result = application_result.analysis_results.add()
+    analysis_result.analysis_name = 'analysis1'
+    for path in ('/etc/a', '/etc/b'):
+      file_result = analysis_result.results.add().file_system_results.add()
+      file_result.type = wheelbarrow_pb2.ADD
+      file_result.path = path
+      file_result.file_type = wheelbarrow_pb2.FileResult.TEXT
+      file_result.states.add().contents = 'x' * 300
+    analysis_result = application_result.analysis_results.add()
+    analysis_result.analysis_name = 'analysis2'
+    analysis_result.truncated = True
+    network_result = analysis_result.results.add().network_results.add()
+    network_result.type = wheelbarrow_pb2.DESCRIPTIVE
+    network_result.states.add().local_port = '22'
+    trigger_timing = application_result.timing.triggers.add()
+    trigger_timing.trigger = wheelbarrow_pb2.INSTALL
+    trigger_timing.usage.wall_time = 1.5
+    return application_result
+
+  def tearDown(self):
+    shutil.rmtree(self.tmp_dir)
+
+
+if __name__ == '__main__':
+  unittest.main()
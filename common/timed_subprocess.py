@@ -31,6 +31,8 @@ import sys
 WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
 sys.path.append(WHEELBARROW_HOME)
 
+from common import instrumentation
+
 
 class TimedSubprocess(object):
   """The TimedSubprocess class runs a process with a timeout.
@@ -83,6 +85,7 @@ class TimedSubprocess(object):
     except (OSError, ValueError) as err:
       logging.error('Unable to run command %s: %s', args, err)
       return False
+    instrumentation.RecordSubprocess()
     signal.signal(signal.SIGALRM, self.AlarmHandler)
     # Set timer and let the process run.
     signal.alarm(self._timeout)
@@ -19,17 +19,26 @@
 #     limitations under the License.
 """Common utility functions."""
 
+import hashlib
 import logging
 import os
 import sys
+import threading
 
 WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
 sys.path.append(WHEELBARROW_HOME)
 
+from common import instrumentation
+from common import result_stream
 from google.protobuf import text_format
 from google.protobuf.message import DecodeError
 from google.protobuf.message import EncodeError
 
+# Size of the chunks read when computing file digests.
+_DIGEST_CHUNK_SIZE = 1 << 20
+# Per-thread reusable buffer for computing file digests.
+_digest_buffers = threading.local()
+
 
 def LoadFileToString(file_path, file_size_limit=-1):
   """Load the contents of a file to a string.
@@ -56,12 +65,55 @@ def LoadFileToString(file_path, file_size_limit=-1):
     in_file = open(file_path)
     file_contents_string = in_file.read(file_size_limit)
     in_file.close()
+    instrumentation.RecordBytesRead(len(file_contents_string))
     return file_contents_string
   except (IOError, OSError) as err:
     logging.error('Unable to read file %s to string: %s', file_path, err)
     return None
 
 
+def ComputeFileDigests(file_path, hash_names, chunk_size=_DIGEST_CHUNK_SIZE):
+  """Compute several digests of a file in a single pass.
+
+  The file is read in fixed-size chunks into a per-thread buffer that is reused
+  across calls, and every digest is updated from the same chunk. Memory usage is
+  therefore bounded regardless of the file size.
+
+  Args:
+    file_path: A file path.
+    hash_names: A list of hashlib algorithm names (e.g., 'sha256').
+    chunk_size: The size of the chunks read from the file.
+
+  Returns:
+    A tuple with the hexadecimal digests of the file, in the same order as
+    hash_names, if all goes well, None otherwise.
+  """
+
+  buffer_bytes = getattr(_digest_buffers, 'buffer', None)
+  if buffer_bytes is None or len(buffer_bytes) != chunk_size:
+    buffer_bytes = bytearray(chunk_size)
+    _digest_buffers.buffer = buffer_bytes
+  buffer_view = memoryview(buffer_bytes)
+  hash_instances = [hashlib.new(hash_name) for hash_name in hash_names]
+  byte_count = 0
+  try:
+    with open(file_path, 'rb') as in_file:
+      while True:
+        read_size = in_file.readinto(buffer_bytes)
+        if not read_size:
+          break
+        byte_count += read_size
+        chunk = buffer_view[:read_size]
+        for hash_instance in hash_instances:
+          hash_instance.update(chunk)
+  except (IOError, OSError) as err:
+    logging.error('Unable to compute digests for file %s: %s', file_path, err)
+    return None
+  finally:
+    instrumentation.RecordBytesRead(byte_count)
+  return tuple(hash_instance.hexdigest() for hash_instance in hash_instances)
+
+
 def ParseFileToProtobuf(file_path, protobuf, file_size_limit=-1, text=None):
   """Parse a file containing a protobuf.
 
@@ -72,10 +124,23 @@ def ParseFileToProtobuf(file_path, protobuf, file_size_limit=-1, text=None):
                      for no limit.
     text: True if the file contains an ASCII protobuf.
 
+  Result streams (see common.result_stream) are parsed into an
+  ApplicationResult, one record at a time. The size limit and format do not
+  apply to them.
+
   Returns:
     True if the protobuf was read correctly.
   """
 
+  if result_stream.IsResultStream(file_path):
+    try:
+      result_stream.ParseResultStream(file_path, protobuf)
+      return True
+    except result_stream.Error as err:
+      logging.error('Error while parsing result stream %s: %s', file_path,
+                    err)
+      return False
+
   if text is None:
     text = not file_path.endswith('.dat')
   file_contents_string = LoadFileToString(file_path, file_size_limit)
@@ -29,6 +29,7 @@ import os.path
 import shutil
 
 
+import hashlib
 import mox
 import unittest
 import logging
@@ -82,6 +83,28 @@ class UtilsTest(unittest.TestCase):
     self.assertIsNone(result)
     self.mox.VerifyAll()
 
+  def testComputeFileDigestsWithSuccess(self):
+    contents = 'This is a simple string test.'
+    result = utils.ComputeFileDigests(self.simple_string_file,
+                                      ['md5', 'sha256'])
+    self.assertEqual(result, (hashlib.md5(contents).hexdigest(),
+                              hashlib.sha256(contents).hexdigest()))
+
+  def testComputeFileDigestsWithSmallChunks(self):
+    contents = 'This is a simple string test.'
+    result = utils.ComputeFileDigests(self.simple_string_file, ['sha1'], 4)
+    self.assertEqual(result, (hashlib.sha1(contents).hexdigest(),))
+
+  def testComputeFileDigestsWithNonexistentFile(self):
+    bad_file_name = os.path.join(self.base_dir, 'no_file_by_this_name')
+    logging.error('Unable to compute digests for file %s: %s', bad_file_name,
+                  mox.IgnoreArg())
+    self.mox.ReplayAll()
+
+    result = utils.ComputeFileDigests(bad_file_name, ['sha256'])
+    self.assertIsNone(result)
+    self.mox.VerifyAll()
+
   def testParseFileToProtobufWithGoodAnalysisFile(self):
     expected_descriptor = wheelbarrow_pb2.AnalysisDescriptor()
     expected_descriptor.name = 'check_permissions'
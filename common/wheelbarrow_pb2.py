@@ -11,7 +11,7 @@ from google.protobuf import descriptor_pb2
 DESCRIPTOR = descriptor.FileDescriptor(
   name='wheelbarrow.proto',
   package='wheelbarrow_common',
-  serialized_pb='\n\x11wheelbarrow.proto\x12\x12wheelbarrow_common\"\xd1\x02\n\x07Package\x12\x0c\n\x04name\x18\x01 \x02(\t\x12\x0f\n\x07version\x18\x02 \x02(\t\x12\x14\n\x0c\x61rchitecture\x18\x03 \x02(\t\x12\x0f\n\x07section\x18\x04 \x02(\t\x12\x13\n\x0b\x64\x65scription\x18\x05 \x01(\t\x12\x39\n\x06status\x18\x06 \x02(\x0e\x32).wheelbarrow_common.Package.PackageStatus\x12\x19\n\x11\x61nalysis_attempts\x18\x07 \x02(\x05\x12\x12\n\nrepository\x18\x08 \x01(\t\x12\x16\n\x0e\x61nalysis_start\x18\t \x01(\x03\x12\x14\n\x0c\x61nalysis_end\x18\n \x01(\x03\x12\r\n\x05\x65rror\x18\x0b \x01(\t\"D\n\rPackageStatus\x12\r\n\tAVAILABLE\x10\x00\x12\n\n\x06\x46\x41ILED\x10\x01\x12\x0e\n\nPROCESSING\x10\x02\x12\x08\n\x04\x44ONE\x10\x03\"\x87\x04\n\x12\x41nalysisDescriptor\x12\x0c\n\x04name\x18\x01 \x02(\t\x12\x13\n\x0b\x64\x65scription\x18\x02 \x02(\t\x12\x0e\n\x06module\x18\x03 \x02(\t\x12\x10\n\x08\x63\x61tegory\x18\x04 \x02(\t\x12\x42\n\targuments\x18\x05 \x03(\x0b\x32/.wheelbarrow_common.AnalysisDescriptor.Argument\x12\x39\n\x14\x64\x65scriptive_triggers\x18\x06 \x03(\x0e\x32\x1b.wheelbarrow_common.Trigger\x12\x43\n\ndiff_pairs\x18\x07 \x03(\x0b\x32/.wheelbarrow_common.AnalysisDescriptor.DiffPair\x12\r\n\x05suite\x18\x08 \x01(\t\x1at\n\x08\x41rgument\x12\x1b\n\x13prepend_extract_dir\x18\x01 \x01(\x08\x12\x13\n\x0bstring_args\x18\x02 \x03(\t\x12\x1b\n\x13recursive_file_walk\x18\x03 \x01(\x08\x12\x19\n\x11\x65xcluded_patterns\x18\x04 \x03(\t\x1a\x63\n\x08\x44iffPair\x12+\n\x06\x62\x65\x66ore\x18\x01 \x02(\x0e\x32\x1b.wheelbarrow_common.Trigger\x12*\n\x05\x61\x66ter\x18\x02 \x02(\x0e\x32\x1b.wheelbarrow_common.Trigger\"\xdc\x02\n\tFileState\x12,\n\x07trigger\x18\x01 \x02(\x0e\x32\x1b.wheelbarrow_common.Trigger\x12\x13\n\x0bpermissions\x18\x02 \x01(\t\x12\x10\n\x08\x63ontents\x18\x03 \x01(\x0c\x12\x14\n\x0c\x64\x65pendencies\x18\x04 \x01(\t\x12K\n\x12hardening_features\x18\x05 \x01(\x0b\x32/.wheelbarrow_common.FileState.HardeningFeatures\x12\x0b\n\x03md5\x18\x06 \x01(\x0c\x12\x0c\n\x04sha1\x18\x07 \x01(\x0c\x12\x0e\n\x06sha256\x18\x08 \x01(\x0c\x12\x15\n\rcreation_time\x18\t \x01(\x04\x12\x18\n\x10last_access_time\x18\n \x01(\x04\x12\x17\n\x0flast_write_time\x18\x0b \x01(\x04\x1a\"\n\x11HardeningFeatures\x12\r\n\x05relro\x18\x01 \x01(\t\"\xec\x01\n\nFileResult\x12,\n\x04type\x18\x01 \x02(\x0e\x32\x1e.wheelbarrow_common.ResultType\x12\x0c\n\x04path\x18\x02 \x02(\t\x12:\n\tfile_type\x18\x03 \x02(\x0e\x32\'.wheelbarrow_common.FileResult.FileType\x12-\n\x06states\x18\x04 \x03(\x0b\x32\x1d.wheelbarrow_common.FileState\"7\n\x08\x46ileType\x12\n\n\x06\x42INARY\x10\x00\x12\n\n\x06SCRIPT\x10\x01\x12\x08\n\x04TEXT\x10\x02\x12\t\n\x05OTHER\x10\x03\"\xf8\x01\n\x0cNetworkState\x12,\n\x07trigger\x18\x01 \x02(\x0e\x32\x1b.wheelbarrow_common.Trigger\x12\x18\n\x10local_ip4address\x18\x02 \x01(\t\x12\x18\n\x10local_ip6address\x18\x03 \x01(\t\x12\x12\n\nlocal_port\x18\x04 \x01(\t\x12\x1a\n\x12\x66oreign_ip4address\x18\x05 \x01(\t\x12\x1a\n\x12\x66oreign_ip6address\x18\x06 \x01(\t\x12\x14\n\x0c\x66oreign_port\x18\x07 \x01(\t\x12\x0e\n\x06is_udp\x18\x08 \x01(\x08\x12\x14\n\x0cprocess_path\x18\t \x01(\t\"o\n\rNetworkResult\x12,\n\x04type\x18\x01 \x02(\x0e\x32\x1e.wheelbarrow_common.ResultType\x12\x30\n\x06states\x18\x02 \x03(\x0b\x32 .wheelbarrow_common.NetworkState\"\xa7\x01\n\x0cProcessState\x12,\n\x07trigger\x18\x01 \x02(\x0e\x32\x1b.wheelbarrow_common.Trigger\x12\x37\n\x06\x61\x63tion\x18\x02 \x01(\x0e\x32\'.wheelbarrow_common.ProcessState.Action\"0\n\x06\x41\x63tion\x12\x0b\n\x07STARTED\x10\x00\x12\r\n\tRESTARTED\x10\x01\x12\n\n\x06KILLED\x10\x02\"}\n\rProcessResult\x12,\n\x04type\x18\x01 \x02(\x0e\x32\x1e.wheelbarrow_common.ResultType\x12\x0c\n\x04path\x18\x02 \x02(\t\x12\x30\n\x06states\x18\x03 \x03(\x0b\x32 .wheelbarrow_common.ProcessState\";\n\x0bMemoryState\x12,\n\x07trigger\x18\x01 \x02(\x0e\x32\x1b.wheelbarrow_common.Trigger\"m\n\x0cMemoryResult\x12,\n\x04type\x18\x01 \x02(\x0e\x32\x1e.wheelbarrow_common.ResultType\x12/\n\x06states\x18\x02 \x03(\x0b\x32\x1f.wheelbarrow_common.MemoryState\"\xb0\x02\n\x06Result\x12\x37\n\x0fpackage_results\x18\x01 \x03(\x0b\x32\x1e.wheelbarrow_common.FileResult\x12;\n\x13\x66ile_system_results\x18\x02 \x03(\x0b\x32\x1e.wheelbarrow_common.FileResult\x12:\n\x0fnetwork_results\x18\x03 \x03(\x0b\x32!.wheelbarrow_common.NetworkResult\x12:\n\x0fprocess_results\x18\x04 \x03(\x0b\x32!.wheelbarrow_common.ProcessResult\x12\x38\n\x0ememory_results\x18\x05 \x03(\x0b\x32 .wheelbarrow_common.MemoryResult\"T\n\x0e\x41nalysisResult\x12\x15\n\ranalysis_name\x18\x01 \x02(\t\x12+\n\x07results\x18\x02 \x03(\x0b\x32\x1a.wheelbarrow_common.Result\"\x7f\n\x11\x41pplicationResult\x12,\n\x07package\x18\x01 \x02(\x0b\x32\x1b.wheelbarrow_common.Package\x12<\n\x10\x61nalysis_results\x18\x02 \x03(\x0b\x32\".wheelbarrow_common.AnalysisResult\"U\n\x16\x42\x61tchPackageDescriptor\x12\x12\n\nname_regex\x18\x01 \x02(\t\x12\x14\n\x0c\x61rchitecture\x18\x02 \x01(\t\x12\x11\n\tmax_count\x18\x03 \x01(\x05\"q\n\x11NfsAnalysisConfig\x12\x11\n\tinput_dir\x18\x01 \x02(\t\x12\x12\n\noutput_dir\x18\x02 \x02(\t\x12\x0f\n\x07log_dir\x18\x03 \x02(\t\x12\x13\n\x0btext_output\x18\x06 \x02(\x08\x12\x0f\n\x07timeout\x18\x07 \x02(\x05\"\xcd\x01\n\x1e\x46ileResultScoreDictionaryEntry\x12\x15\n\ranalysis_name\x18\x01 \x01(\t\x12\x13\n\x0bresult_name\x18\x02 \x01(\t\x12\x0c\n\x04path\x18\x03 \x01(\t\x12\x33\n\x0bresult_type\x18\x04 \x01(\x0e\x32\x1e.wheelbarrow_common.ResultType\x12-\n\x06states\x18\x05 \x03(\x0b\x32\x1d.wheelbarrow_common.FileState\x12\r\n\x05score\x18\x06 \x02(\r\"1\n\x0bResultScore\x12\x13\n\x0bresult_name\x18\x01 \x02(\t\x12\r\n\x05score\x18\x02 \x02(\x05\"t\n\x15PackageLevelFileScore\x12\x0c\n\x04path\x18\x01 \x02(\t\x12\x36\n\rresult_scores\x18\x02 \x03(\x0b\x32\x1f.wheelbarrow_common.ResultScore\x12\x15\n\roverall_score\x18\x03 \x01(\x05\"?\n\x19PackageLevelAnalysisScore\x12\x13\n\x0bresult_name\x18\x01 \x02(\t\x12\r\n\x05score\x18\x02 \x01(\x05\"\xf0\x01\n\x14\x44\x65tailedPackageScore\x12,\n\x07package\x18\x01 \x02(\x0b\x32\x1b.wheelbarrow_common.Package\x12\x45\n\x12\x66ile_result_scores\x18\x02 \x03(\x0b\x32).wheelbarrow_common.PackageLevelFileScore\x12L\n\x15overall_result_scores\x18\x03 \x03(\x0b\x32-.wheelbarrow_common.PackageLevelAnalysisScore\x12\x15\n\rpackage_score\x18\x04 \x02(\x05*q\n\x07Trigger\x12\x0b\n\x07\x45XTRACT\x10\x00\x12\x0b\n\x07INSTALL\x10\x01\x12\x11\n\rSTART_SERVICE\x10\x02\x12\x10\n\x0cSTOP_SERVICE\x10\x03\x12\x10\n\x0cRUN_BINARIES\x10\x04\x12\n\n\x06REMOVE\x10\x05\x12\t\n\x05PURGE\x10\x06*K\n\nResultType\x12\x0b\n\x07NO_TYPE\x10\x00\x12\x07\n\x03\x41\x44\x44\x10\x01\x12\n\n\x06\x44\x45LETE\x10\x02\x12\n\n\x06\x43HANGE\x10\x03\x12\x0f\n\x0b\x44\x45SCRIPTIVE\x10\x04')
+  serialized_pb='\n\x11wheelbarrow.proto\x12\x12wheelbarrow_common\"\xe9\x02\n\x07Package\x12\x0c\n\x04name\x18\x01 \x02(\t\x12\x0f\n\x07version\x18\x02 \x02(\t\x12\x14\n\x0c\x61rchitecture\x18\x03 \x02(\t\x12\x0f\n\x07section\x18\x04 \x02(\t\x12\x13\n\x0b\x64\x65scription\x18\x05 \x01(\t\x12\x39\n\x06status\x18\x06 \x02(\x0e\x32).wheelbarrow_common.Package.PackageStatus\x12\x19\n\x11\x61nalysis_attempts\x18\x07 \x02(\x05\x12\x12\n\nrepository\x18\x08 \x01(\t\x12\x16\n\x0e\x61nalysis_start\x18\t \x01(\x03\x12\x14\n\x0c\x61nalysis_end\x18\n \x01(\x03\x12\r\n\x05\x65rror\x18\x0b \x01(\t\x12\x16\n\x0einstalled_size\x18\x0c \x01(\x04\"D\n\rPackageStatus\x12\r\n\tAVAILABLE\x10\x00\x12\n\n\x06\x46\x41ILED\x10\x01\x12\x0e\n\nPROCESSING\x10\x02\x12\x08\n\x04\x44ONE\x10\x03\"\xde\x05\n\x12\x41nalysisDescriptor\x12\x0c\n\x04name\x18\x01 \x02(\t\x12\x13\n\x0b\x64\x65scription\x18\x02 \x02(\t\x12\x0e\n\x06module\x18\x03 \x02(\t\x12\x10\n\x08\x63\x61tegory\x18\x04 \x02(\t\x12\x42\n\targuments\x18\x05 \x03(\x0b\x32/.wheelbarrow_common.AnalysisDescriptor.Argument\x12\x39\n\x14\x64\x65scriptive_triggers\x18\x06 \x03(\x0e\x32\x1b.wheelbarrow_common.Trigger\x12\x43\n\ndiff_pairs\x18\x07 \x03(\x0b\x32/.wheelbarrow_common.AnalysisDescriptor.DiffPair\x12\r\n\x05suite\x18\x08 \x01(\t\x12\x0f\n\x07workers\x18\t \x01(\r\x12\x41\n\x08\x65xecutor\x18\n \x01(\x0e\x32/.wheelbarrow_common.AnalysisDescriptor.Executor\x12\x1c\n\x14incremental_snapshot\x18\x0b \x01(\x08\x12\x1a\n\x12max_recorded_paths\x18\x0c \x01(\r\x12\x18\n\x10immutable_inputs\x18\r \x01(\x08\x1at\n\x08\x41rgument\x12\x1b\n\x13prepend_extract_dir\x18\x01 \x01(\x08\x12\x13\n\x0bstring_args\x18\x02 \x03(\t\x12\x1b\n\x13recursive_file_walk\x18\x03 \x01(\x08\x12\x19\n\x11\x65xcluded_patterns\x18\x04 \x03(\t\x1a\x63\n\x08\x44iffPair\x12+\n\x06\x62\x65\x66ore\x18\x01 \x02(\x0e\x32\x1b.wheelbarrow_common.Trigger\x12*\n\x05\x61\x66ter\x18\x02 \x02(\x0e\x32\x1b.wheelbarrow_common.Trigger\"-\n\x08\x45xecutor\x12\x0f\n\x0bTHREAD_POOL\x10\x00\x12\x10\n\x0cPROCESS_POOL\x10\x01\"\xf5\x02\n\tFileState\x12,\n\x07trigger\x18\x01 \x02(\x0e\x32\x1b.wheelbarrow_common.Trigger\x12\x13\n\x0bpermissions\x18\x02 \x01(\t\x12\x10\n\x08\x63ontents\x18\x03 \x01(\x0c\x12\x14\n\x0c\x64\x65pendencies\x18\x04 \x01(\t\x12K\n\x12hardening_features\x18\x05 \x01(\x0b\x32/.wheelbarrow_common.FileState.HardeningFeatures\x12\x0b\n\x03md5\x18\x06 \x01(\x0c\x12\x0c\n\x04sha1\x18\x07 \x01(\x0c\x12\x0e\n\x06sha256\x18\x08 \x01(\x0c\x12\x15\n\rcreation_time\x18\t \x01(\x04\x12\x18\n\x10last_access_time\x18\n \x01(\x04\x12\x17\n\x0flast_write_time\x18\x0b \x01(\x04\x12\x17\n\x0f\x63ontents_sha256\x18\x0c \x01(\t\x1a\"\n\x11HardeningFeatures\x12\r\n\x05relro\x18\x01 \x01(\t\"\xec\x01\n\nFileResult\x12,\n\x04type\x18\x01 \x02(\x0e\x32\x1e.wheelbarrow_common.ResultType\x12\x0c\n\x04path\x18\x02 \x02(\t\x12:\n\tfile_type\x18\x03 \x02(\x0e\x32\'.wheelbarrow_common.FileResult.FileType\x12-\n\x06states\x18\x04 \x03(\x0b\x32\x1d.wheelbarrow_common.FileState\"7\n\x08\x46ileType\x12\n\n\x06\x42INARY\x10\x00\x12\n\n\x06SCRIPT\x10\x01\x12\x08\n\x04TEXT\x10\x02\x12\t\n\x05OTHER\x10\x03\"\xf8\x01\n\x0cNetworkState\x12,\n\x07trigger\x18\x01 \x02(\x0e\x32\x1b.wheelbarrow_common.Trigger\x12\x18\n\x10local_ip4address\x18\x02 \x01(\t\x12\x18\n\x10local_ip6address\x18\x03 \x01(\t\x12\x12\n\nlocal_port\x18\x04 \x01(\t\x12\x1a\n\x12\x66oreign_ip4address\x18\x05 \x01(\t\x12\x1a\n\x12\x66oreign_ip6address\x18\x06 \x01(\t\x12\x14\n\x0c\x66oreign_port\x18\x07 \x01(\t\x12\x0e\n\x06is_udp\x18\x08 \x01(\x08\x12\x14\n\x0cprocess_path\x18\t \x01(\t\"o\n\rNetworkResult\x12,\n\x04type\x18\x01 \x02(\x0e\x32\x1e.wheelbarrow_common.ResultType\x12\x30\n\x06states\x18\x02 \x03(\x0b\x32 .wheelbarrow_common.NetworkState\"\xa7\x01\n\x0cProcessState\x12,\n\x07trigger\x18\x01 \x02(\x0e\x32\x1b.wheelbarrow_common.Trigger\x12\x37\n\x06\x61\x63tion\x18\x02 \x01(\x0e\x32\'.wheelbarrow_common.ProcessState.Action\"0\n\x06\x41\x63tion\x12\x0b\n\x07STARTED\x10\x00\x12\r\n\tRESTARTED\x10\x01\x12\n\n\x06KILLED\x10\x02\"}\n\rProcessResult\x12,\n\x04type\x18\x01 \x02(\x0e\x32\x1e.wheelbarrow_common.ResultType\x12\x0c\n\x04path\x18\x02 \x02(\t\x12\x30\n\x06states\x18\x03 \x03(\x0b\x32 .wheelbarrow_common.ProcessState\";\n\x0bMemoryState\x12,\n\x07trigger\x18\x01 \x02(\x0e\x32\x1b.wheelbarrow_common.Trigger\"m\n\x0cMemoryResult\x12,\n\x04type\x18\x01 \x02(\x0e\x32\x1e.wheelbarrow_common.ResultType\x12/\n\x06states\x18\x02 \x03(\x0b\x32\x1f.wheelbarrow_common.MemoryState\"\xb0\x02\n\x06Result\x12\x37\n\x0fpackage_results\x18\x01 \x03(\x0b\x32\x1e.wheelbarrow_common.FileResult\x12;\n\x13\x66ile_system_results\x18\x02 \x03(\x0b\x32\x1e.wheelbarrow_common.FileResult\x12:\n\x0fnetwork_results\x18\x03 \x03(\x0b\x32!.wheelbarrow_common.NetworkResult\x12:\n\x0fprocess_results\x18\x04 \x03(\x0b\x32!.wheelbarrow_common.ProcessResult\x12\x38\n\x0ememory_results\x18\x05 \x03(\x0b\x32 .wheelbarrow_common.MemoryResult\"g\n\x0e\x41nalysisResult\x12\x15\n\ranalysis_name\x18\x01 \x02(\t\x12+\n\x07results\x18\x02 \x03(\x0b\x32\x1a.wheelbarrow_common.Result\x12\x11\n\ttruncated\x18\x03 \x01(\x08\"\xa1\x01\n\rResourceUsage\x12\x11\n\twall_time\x18\x01 \x01(\x01\x12\x10\n\x08\x63pu_time\x18\x02 \x01(\x01\x12\x17\n\x0f\x66iles_processed\x18\x03 \x01(\x04\x12\x12\n\nbytes_read\x18\x04 \x01(\x04\x12\x14\n\x0csubprocesses\x18\x05 \x01(\r\x12\x13\n\x0binterrupted\x18\x06 \x01(\x08\x12\x13\n\x0bmemory_used\x18\x07 \x01(\x04\"o\n\rTriggerTiming\x12,\n\x07trigger\x18\x01 \x02(\x0e\x32\x1b.wheelbarrow_common.Trigger\x12\x30\n\x05usage\x18\x02 \x02(\x0b\x32!.wheelbarrow_common.ResourceUsage\"\x87\x01\n\x0e\x41nalysisTiming\x12\x15\n\ranalysis_name\x18\x01 \x02(\t\x12,\n\x07trigger\x18\x02 \x02(\x0e\x32\x1b.wheelbarrow_common.Trigger\x12\x30\n\x05usage\x18\x03 \x02(\x0b\x32!.wheelbarrow_common.ResourceUsage\"s\n\x06Timing\x12\x33\n\x08triggers\x18\x01 \x03(\x0b\x32!.wheelbarrow_common.TriggerTiming\x12\x34\n\x08\x61nalyses\x18\x02 \x03(\x0b\x32\".wheelbarrow_common.AnalysisTiming\"\xab\x01\n\x11\x41pplicationResult\x12,\n\x07package\x18\x01 \x02(\x0b\x32\x1b.wheelbarrow_common.Package\x12<\n\x10\x61nalysis_results\x18\x02 \x03(\x0b\x32\".wheelbarrow_common.AnalysisResult\x12*\n\x06timing\x18\x03 \x01(\x0b\x32\x1a.wheelbarrow_common.Timing\"\xd1\x01\n\x0cResultRecord\x12,\n\x07package\x18\x01 \x01(\x0b\x32\x1b.wheelbarrow_common.Package\x12;\n\x0f\x61nalysis_result\x18\x02 \x01(\x0b\x32\".wheelbarrow_common.AnalysisResult\x12*\n\x06result\x18\x03 \x01(\x0b\x32\x1a.wheelbarrow_common.Result\x12*\n\x06timing\x18\x04 \x01(\x0b\x32\x1a.wheelbarrow_common.Timing\"U\n\x16\x42\x61tchPackageDescriptor\x12\x12\n\nname_regex\x18\x01 \x02(\t\x12\x14\n\x0c\x61rchitecture\x18\x02 \x01(\t\x12\x11\n\tmax_count\x18\x03 \x01(\x05\"\xc6\x01\n\x11NfsAnalysisConfig\x12\x11\n\tinput_dir\x18\x01 \x02(\t\x12\x12\n\noutput_dir\x18\x02 \x02(\t\x12\x0f\n\x07log_dir\x18\x03 \x02(\t\x12\x13\n\x0btext_output\x18\x06 \x02(\x08\x12\x0f\n\x07timeout\x18\x07 \x02(\x05\x12\x19\n\x11\x62\x61seline_manifest\x18\x08 \x01(\t\x12\x0e\n\x06resume\x18\t \x01(\x08\x12\x16\n\x0elease_duration\x18\n \x01(\x05\x12\x10\n\x08\x62lob_dir\x18\x0b \x01(\t\"\xcc\x01\n\x11\x42\x61selineFileEntry\x12\x0c\n\x04path\x18\x01 \x02(\t\x12\x0c\n\x04mode\x18\x02 \x02(\r\x12\x0e\n\x06\x64\x65vice\x18\x03 \x02(\x04\x12\r\n\x05inode\x18\x04 \x02(\x04\x12\x0c\n\x04size\x18\x05 \x02(\x03\x12\x10\n\x08mtime_ns\x18\x06 \x02(\x03\x12\x10\n\x08\x63time_ns\x18\x07 \x02(\x03\x12\x0e\n\x06sha256\x18\x08 \x01(\t\x12:\n\tfile_type\x18\t \x01(\x0e\x32\'.wheelbarrow_common.FileResult.FileType\"n\n\x10\x42\x61selineManifest\x12\r\n\x05image\x18\x01 \x01(\t\x12\x13\n\x0bimage_mtime\x18\x02 \x01(\x03\x12\x36\n\x07\x65ntries\x18\x03 \x03(\x0b\x32%.wheelbarrow_common.BaselineFileEntry\"\xcd\x01\n\x1e\x46ileResultScoreDictionaryEntry\x12\x15\n\ranalysis_name\x18\x01 \x01(\t\x12\x13\n\x0bresult_name\x18\x02 \x01(\t\x12\x0c\n\x04path\x18\x03 \x01(\t\x12\x33\n\x0bresult_type\x18\x04 \x01(\x0e\x32\x1e.wheelbarrow_common.ResultType\x12-\n\x06states\x18\x05 \x03(\x0b\x32\x1d.wheelbarrow_common.FileState\x12\r\n\x05score\x18\x06 \x02(\r\"1\n\x0bResultScore\x12\x13\n\x0bresult_name\x18\x01 \x02(\t\x12\r\n\x05score\x18\x02 \x02(\x05\"t\n\x15PackageLevelFileScore\x12\x0c\n\x04path\x18\x01 \x02(\t\x12\x36\n\rresult_scores\x18\x02 \x03(\x0b\x32\x1f.wheelbarrow_common.ResultScore\x12\x15\n\roverall_score\x18\x03 \x01(\x05\"?\n\x19PackageLevelAnalysisScore\x12\x13\n\x0bresult_name\x18\x01 \x02(\t\x12\r\n\x05score\x18\x02 \x01(\x05\"\xf0\x01\n\x14\x44\x65tailedPackageScore\x12,\n\x07package\x18\x01 \x02(\x0b\x32\x1b.wheelbarrow_common.Package\x12\x45\n\x12\x66ile_result_scores\x18\x02 \x03(\x0b\x32).wheelbarrow_common.PackageLevelFileScore\x12L\n\x15overall_result_scores\x18\x03 \x03(\x0b\x32-.wheelbarrow_common.PackageLevelAnalysisScore\x12\x15\n\rpackage_score\x18\x04 \x02(\x05*q\n\x07Trigger\x12\x0b\n\x07\x45XTRACT\x10\x00\x12\x0b\n\x07INSTALL\x10\x01\x12\x11\n\rSTART_SERVICE\x10\x02\x12\x10\n\x0cSTOP_SERVICE\x10\x03\x12\x10\n\x0cRUN_BINARIES\x10\x04\x12\n\n\x06REMOVE\x10\x05\x12\t\n\x05PURGE\x10\x06*K\n\nResultType\x12\x0b\n\x07NO_TYPE\x10\x00\x12\x07\n\x03\x41\x44\x44\x10\x01\x12\n\n\x06\x44\x45LETE\x10\x02\x12\n\n\x06\x43HANGE\x10\x03\x12\x0f\n\x0b\x44\x45SCRIPTIVE\x10\x04')
 
 _TRIGGER = descriptor.EnumDescriptor(
   name='Trigger',
@@ -50,8 +50,8 @@ _TRIGGER = descriptor.EnumDescriptor(
   ],
   containing_type=None,
   options=None,
-  serialized_start=3735,
-  serialized_end=3848,
+  serialized_start=5212,
+  serialized_end=5325,
 )
 
 
@@ -84,8 +84,8 @@ _RESULTTYPE = descriptor.EnumDescriptor(
   ],
   containing_type=None,
   options=None,
-  serialized_start=3850,
-  serialized_end=3925,
+  serialized_start=5327,
+  serialized_end=5402,
 )
 
 
@@ -128,8 +128,29 @@ _PACKAGE_PACKAGESTATUS = descriptor.EnumDescriptor(
   ],
   containing_type=None,
   options=None,
-  serialized_start=311,
-  serialized_end=379,
+  serialized_start=335,
+  serialized_end=403,
+)
+
+_ANALYSISDESCRIPTOR_EXECUTOR = descriptor.EnumDescriptor(
+  name='Executor',
+  full_name='wheelbarrow_common.AnalysisDescriptor.Executor',
+  filename=None,
+  file=DESCRIPTOR,
+  values=[
+    descriptor.EnumValueDescriptor(
+      name='THREAD_POOL', index=0, number=0,
+      options=None,
+      type=None),
+    descriptor.EnumValueDescriptor(
+      name='PROCESS_POOL', index=1, number=1,
+      options=None,
+      type=None),
+  ],
+  containing_type=None,
+  options=None,
+  serialized_start=1095,
+  serialized_end=1140,
 )
 
 _FILERESULT_FILETYPE = descriptor.EnumDescriptor(
@@ -157,8 +178,8 @@ _FILERESULT_FILETYPE = descriptor.EnumDescriptor(
   ],
   containing_type=None,
   options=None,
-  serialized_start=1436,
-  serialized_end=1491,
+  serialized_start=1700,
+  serialized_end=1755,
 )
 
 _PROCESSSTATE_ACTION = descriptor.EnumDescriptor(
@@ -182,8 +203,8 @@ _PROCESSSTATE_ACTION = descriptor.EnumDescriptor(
   ],
   containing_type=None,
   options=None,
-  serialized_start=1977,
-  serialized_end=2025,
+  serialized_start=2241,
+  serialized_end=2289,
 )
 
 
@@ -271,6 +292,13 @@ _PACKAGE = descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       options=None),
+    descriptor.FieldDescriptor(
+      name='installed_size', full_name='wheelbarrow_common.Package.installed_size', index=11,
+      number=12, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
   ],
   extensions=[
   ],
@@ -282,7 +310,7 @@ _PACKAGE = descriptor.Descriptor(
   is_extendable=False,
   extension_ranges=[],
   serialized_start=42,
-  serialized_end=379,
+  serialized_end=403,
 )
 
 
@@ -330,8 +358,8 @@ _ANALYSISDESCRIPTOR_ARGUMENT = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=684,
-  serialized_end=800,
+  serialized_start=876,
+  serialized_end=992,
 )
 
 _ANALYSISDESCRIPTOR_DIFFPAIR = descriptor.Descriptor(
@@ -364,8 +392,8 @@ _ANALYSISDESCRIPTOR_DIFFPAIR = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=802,
-  serialized_end=901,
+  serialized_start=994,
+  serialized_end=1093,
 )
 
 _ANALYSISDESCRIPTOR = descriptor.Descriptor(
@@ -431,17 +459,53 @@ _ANALYSISDESCRIPTOR = descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       options=None),
+    descriptor.FieldDescriptor(
+      name='workers', full_name='wheelbarrow_common.AnalysisDescriptor.workers', index=8,
+      number=9, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='executor', full_name='wheelbarrow_common.AnalysisDescriptor.executor', index=9,
+      number=10, type=14, cpp_type=8, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='incremental_snapshot', full_name='wheelbarrow_common.AnalysisDescriptor.incremental_snapshot', index=10,
+      number=11, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='max_recorded_paths', full_name='wheelbarrow_common.AnalysisDescriptor.max_recorded_paths', index=11,
+      number=12, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='immutable_inputs', full_name='wheelbarrow_common.AnalysisDescriptor.immutable_inputs', index=12,
+      number=13, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
   ],
   extensions=[
   ],
   nested_types=[_ANALYSISDESCRIPTOR_ARGUMENT, _ANALYSISDESCRIPTOR_DIFFPAIR, ],
   enum_types=[
+    _ANALYSISDESCRIPTOR_EXECUTOR,
   ],
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=382,
-  serialized_end=901,
+  serialized_start=406,
+  serialized_end=1140,
 )
 
 
@@ -468,8 +532,8 @@ _FILESTATE_HARDENINGFEATURES = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=1218,
-  serialized_end=1252,
+  serialized_start=1482,
+  serialized_end=1516,
 )
 
 _FILESTATE = descriptor.Descriptor(
@@ -556,6 +620,13 @@ _FILESTATE = descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       options=None),
+    descriptor.FieldDescriptor(
+      name='contents_sha256', full_name='wheelbarrow_common.FileState.contents_sha256', index=11,
+      number=12, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=unicode("", "utf-8"),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
   ],
   extensions=[
   ],
@@ -565,8 +636,8 @@ _FILESTATE = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=904,
-  serialized_end=1252,
+  serialized_start=1143,
+  serialized_end=1516,
 )
 
 
@@ -615,8 +686,8 @@ _FILERESULT = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=1255,
-  serialized_end=1491,
+  serialized_start=1519,
+  serialized_end=1755,
 )
 
 
@@ -699,8 +770,8 @@ _NETWORKSTATE = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=1494,
-  serialized_end=1742,
+  serialized_start=1758,
+  serialized_end=2006,
 )
 
 
@@ -734,8 +805,8 @@ _NETWORKRESULT = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=1744,
-  serialized_end=1855,
+  serialized_start=2008,
+  serialized_end=2119,
 )
 
 
@@ -770,8 +841,8 @@ _PROCESSSTATE = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=1858,
-  serialized_end=2025,
+  serialized_start=2122,
+  serialized_end=2289,
 )
 
 
@@ -812,8 +883,8 @@ _PROCESSRESULT = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=2027,
-  serialized_end=2152,
+  serialized_start=2291,
+  serialized_end=2416,
 )
 
 
@@ -840,8 +911,8 @@ _MEMORYSTATE = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=2154,
-  serialized_end=2213,
+  serialized_start=2418,
+  serialized_end=2477,
 )
 
 
@@ -875,8 +946,8 @@ _MEMORYRESULT = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=2215,
-  serialized_end=2324,
+  serialized_start=2479,
+  serialized_end=2588,
 )
 
 
@@ -931,8 +1002,8 @@ _RESULT = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=2327,
-  serialized_end=2631,
+  serialized_start=2591,
+  serialized_end=2895,
 )
 
 
@@ -957,6 +1028,195 @@ _ANALYSISRESULT = descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       options=None),
+    descriptor.FieldDescriptor(
+      name='truncated', full_name='wheelbarrow_common.AnalysisResult.truncated', index=2,
+      number=3, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  options=None,
+  is_extendable=False,
+  extension_ranges=[],
+  serialized_start=2897,
+  serialized_end=3000,
+)
+
+
+_RESOURCEUSAGE = descriptor.Descriptor(
+  name='ResourceUsage',
+  full_name='wheelbarrow_common.ResourceUsage',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    descriptor.FieldDescriptor(
+      name='wall_time', full_name='wheelbarrow_common.ResourceUsage.wall_time', index=0,
+      number=1, type=1, cpp_type=5, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='cpu_time', full_name='wheelbarrow_common.ResourceUsage.cpu_time', index=1,
+      number=2, type=1, cpp_type=5, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='files_processed', full_name='wheelbarrow_common.ResourceUsage.files_processed', index=2,
+      number=3, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='bytes_read', full_name='wheelbarrow_common.ResourceUsage.bytes_read', index=3,
+      number=4, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='subprocesses', full_name='wheelbarrow_common.ResourceUsage.subprocesses', index=4,
+      number=5, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='interrupted', full_name='wheelbarrow_common.ResourceUsage.interrupted', index=5,
+      number=6, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='memory_used', full_name='wheelbarrow_common.ResourceUsage.memory_used', index=6,
+      number=7, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  options=None,
+  is_extendable=False,
+  extension_ranges=[],
+  serialized_start=3003,
+  serialized_end=3164,
+)
+
+
+_TRIGGERTIMING = descriptor.Descriptor(
+  name='TriggerTiming',
+  full_name='wheelbarrow_common.TriggerTiming',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    descriptor.FieldDescriptor(
+      name='trigger', full_name='wheelbarrow_common.TriggerTiming.trigger', index=0,
+      number=1, type=14, cpp_type=8, label=2,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='usage', full_name='wheelbarrow_common.TriggerTiming.usage', index=1,
+      number=2, type=11, cpp_type=10, label=2,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  options=None,
+  is_extendable=False,
+  extension_ranges=[],
+  serialized_start=3166,
+  serialized_end=3277,
+)
+
+
+_ANALYSISTIMING = descriptor.Descriptor(
+  name='AnalysisTiming',
+  full_name='wheelbarrow_common.AnalysisTiming',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    descriptor.FieldDescriptor(
+      name='analysis_name', full_name='wheelbarrow_common.AnalysisTiming.analysis_name', index=0,
+      number=1, type=9, cpp_type=9, label=2,
+      has_default_value=False, default_value=unicode("", "utf-8"),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='trigger', full_name='wheelbarrow_common.AnalysisTiming.trigger', index=1,
+      number=2, type=14, cpp_type=8, label=2,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='usage', full_name='wheelbarrow_common.AnalysisTiming.usage', index=2,
+      number=3, type=11, cpp_type=10, label=2,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  options=None,
+  is_extendable=False,
+  extension_ranges=[],
+  serialized_start=3280,
+  serialized_end=3415,
+)
+
+
+_TIMING = descriptor.Descriptor(
+  name='Timing',
+  full_name='wheelbarrow_common.Timing',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    descriptor.FieldDescriptor(
+      name='triggers', full_name='wheelbarrow_common.Timing.triggers', index=0,
+      number=1, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='analyses', full_name='wheelbarrow_common.Timing.analyses', index=1,
+      number=2, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
   ],
   extensions=[
   ],
@@ -966,8 +1226,8 @@ _ANALYSISRESULT = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=2633,
-  serialized_end=2717,
+  serialized_start=3417,
+  serialized_end=3532,
 )
 
 
@@ -992,6 +1252,62 @@ _APPLICATIONRESULT = descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       options=None),
+    descriptor.FieldDescriptor(
+      name='timing', full_name='wheelbarrow_common.ApplicationResult.timing', index=2,
+      number=3, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  options=None,
+  is_extendable=False,
+  extension_ranges=[],
+  serialized_start=3535,
+  serialized_end=3706,
+)
+
+
+_RESULTRECORD = descriptor.Descriptor(
+  name='ResultRecord',
+  full_name='wheelbarrow_common.ResultRecord',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    descriptor.FieldDescriptor(
+      name='package', full_name='wheelbarrow_common.ResultRecord.package', index=0,
+      number=1, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='analysis_result', full_name='wheelbarrow_common.ResultRecord.analysis_result', index=1,
+      number=2, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='result', full_name='wheelbarrow_common.ResultRecord.result', index=2,
+      number=3, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='timing', full_name='wheelbarrow_common.ResultRecord.timing', index=3,
+      number=4, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
   ],
   extensions=[
   ],
@@ -1001,8 +1317,8 @@ _APPLICATIONRESULT = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=2719,
-  serialized_end=2846,
+  serialized_start=3709,
+  serialized_end=3918,
 )
 
 
@@ -1043,8 +1359,8 @@ _BATCHPACKAGEDESCRIPTOR = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=2848,
-  serialized_end=2933,
+  serialized_start=3920,
+  serialized_end=4005,
 )
 
 
@@ -1090,6 +1406,34 @@ _NFSANALYSISCONFIG = descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       options=None),
+    descriptor.FieldDescriptor(
+      name='baseline_manifest', full_name='wheelbarrow_common.NfsAnalysisConfig.baseline_manifest', index=5,
+      number=8, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=unicode("", "utf-8"),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='resume', full_name='wheelbarrow_common.NfsAnalysisConfig.resume', index=6,
+      number=9, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='lease_duration', full_name='wheelbarrow_common.NfsAnalysisConfig.lease_duration', index=7,
+      number=10, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='blob_dir', full_name='wheelbarrow_common.NfsAnalysisConfig.blob_dir', index=8,
+      number=11, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=unicode("", "utf-8"),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
   ],
   extensions=[
   ],
@@ -1099,8 +1443,134 @@ _NFSANALYSISCONFIG = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=2935,
-  serialized_end=3048,
+  serialized_start=4008,
+  serialized_end=4206,
+)
+
+
+_BASELINEFILEENTRY = descriptor.Descriptor(
+  name='BaselineFileEntry',
+  full_name='wheelbarrow_common.BaselineFileEntry',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    descriptor.FieldDescriptor(
+      name='path', full_name='wheelbarrow_common.BaselineFileEntry.path', index=0,
+      number=1, type=9, cpp_type=9, label=2,
+      has_default_value=False, default_value=unicode("", "utf-8"),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='mode', full_name='wheelbarrow_common.BaselineFileEntry.mode', index=1,
+      number=2, type=13, cpp_type=3, label=2,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='device', full_name='wheelbarrow_common.BaselineFileEntry.device', index=2,
+      number=3, type=4, cpp_type=4, label=2,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='inode', full_name='wheelbarrow_common.BaselineFileEntry.inode', index=3,
+      number=4, type=4, cpp_type=4, label=2,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='size', full_name='wheelbarrow_common.BaselineFileEntry.size', index=4,
+      number=5, type=3, cpp_type=2, label=2,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='mtime_ns', full_name='wheelbarrow_common.BaselineFileEntry.mtime_ns', index=5,
+      number=6, type=3, cpp_type=2, label=2,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='ctime_ns', full_name='wheelbarrow_common.BaselineFileEntry.ctime_ns', index=6,
+      number=7, type=3, cpp_type=2, label=2,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='sha256', full_name='wheelbarrow_common.BaselineFileEntry.sha256', index=7,
+      number=8, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=unicode("", "utf-8"),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='file_type', full_name='wheelbarrow_common.BaselineFileEntry.file_type', index=8,
+      number=9, type=14, cpp_type=8, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  options=None,
+  is_extendable=False,
+  extension_ranges=[],
+  serialized_start=4209,
+  serialized_end=4413,
+)
+
+
+_BASELINEMANIFEST = descriptor.Descriptor(
+  name='BaselineManifest',
+  full_name='wheelbarrow_common.BaselineManifest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    descriptor.FieldDescriptor(
+      name='image', full_name='wheelbarrow_common.BaselineManifest.image', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=unicode("", "utf-8"),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='image_mtime', full_name='wheelbarrow_common.BaselineManifest.image_mtime', index=1,
+      number=2, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    descriptor.FieldDescriptor(
+      name='entries', full_name='wheelbarrow_common.BaselineManifest.entries', index=2,
+      number=3, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  options=None,
+  is_extendable=False,
+  extension_ranges=[],
+  serialized_start=4415,
+  serialized_end=4525,
 )
 
 
@@ -1162,8 +1632,8 @@ _FILERESULTSCOREDICTIONARYENTRY = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=3051,
-  serialized_end=3256,
+  serialized_start=4528,
+  serialized_end=4733,
 )
 
 
@@ -1197,8 +1667,8 @@ _RESULTSCORE = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=3258,
-  serialized_end=3307,
+  serialized_start=4735,
+  serialized_end=4784,
 )
 
 
@@ -1239,8 +1709,8 @@ _PACKAGELEVELFILESCORE = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=3309,
-  serialized_end=3425,
+  serialized_start=4786,
+  serialized_end=4902,
 )
 
 
@@ -1274,8 +1744,8 @@ _PACKAGELEVELANALYSISSCORE = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=3427,
-  serialized_end=3490,
+  serialized_start=4904,
+  serialized_end=4967,
 )
 
 
@@ -1323,8 +1793,8 @@ _DETAILEDPACKAGESCORE = descriptor.Descriptor(
   options=None,
   is_extendable=False,
   extension_ranges=[],
-  serialized_start=3493,
-  serialized_end=3733,
+  serialized_start=4970,
+  serialized_end=5210,
 )
 
 _PACKAGE.fields_by_name['status'].enum_type = _PACKAGE_PACKAGESTATUS
@@ -1336,6 +1806,8 @@ _ANALYSISDESCRIPTOR_DIFFPAIR.containing_type = _ANALYSISDESCRIPTOR;
 _ANALYSISDESCRIPTOR.fields_by_name['arguments'].message_type = _ANALYSISDESCRIPTOR_ARGUMENT
 _ANALYSISDESCRIPTOR.fields_by_name['descriptive_triggers'].enum_type = _TRIGGER
 _ANALYSISDESCRIPTOR.fields_by_name['diff_pairs'].message_type = _ANALYSISDESCRIPTOR_DIFFPAIR
+_ANALYSISDESCRIPTOR.fields_by_name['executor'].enum_type = _ANALYSISDESCRIPTOR_EXECUTOR
+_ANALYSISDESCRIPTOR_EXECUTOR.containing_type = _ANALYSISDESCRIPTOR;
 _FILESTATE_HARDENINGFEATURES.containing_type = _FILESTATE;
 _FILESTATE.fields_by_name['trigger'].enum_type = _TRIGGER
 _FILESTATE.fields_by_name['hardening_features'].message_type = _FILESTATE_HARDENINGFEATURES
@@ -1360,8 +1832,21 @@ _RESULT.fields_by_name['network_results'].message_type = _NETWORKRESULT
 _RESULT.fields_by_name['process_results'].message_type = _PROCESSRESULT
 _RESULT.fields_by_name['memory_results'].message_type = _MEMORYRESULT
 _ANALYSISRESULT.fields_by_name['results'].message_type = _RESULT
+_TRIGGERTIMING.fields_by_name['trigger'].enum_type = _TRIGGER
+_TRIGGERTIMING.fields_by_name['usage'].message_type = _RESOURCEUSAGE
+_ANALYSISTIMING.fields_by_name['trigger'].enum_type = _TRIGGER
+_ANALYSISTIMING.fields_by_name['usage'].message_type = _RESOURCEUSAGE
+_TIMING.fields_by_name['triggers'].message_type = _TRIGGERTIMING
+_TIMING.fields_by_name['analyses'].message_type = _ANALYSISTIMING
 _APPLICATIONRESULT.fields_by_name['package'].message_type = _PACKAGE
 _APPLICATIONRESULT.fields_by_name['analysis_results'].message_type = _ANALYSISRESULT
+_APPLICATIONRESULT.fields_by_name['timing'].message_type = _TIMING
+_RESULTRECORD.fields_by_name['package'].message_type = _PACKAGE
+_RESULTRECORD.fields_by_name['analysis_result'].message_type = _ANALYSISRESULT
+_RESULTRECORD.fields_by_name['result'].message_type = _RESULT
+_RESULTRECORD.fields_by_name['timing'].message_type = _TIMING
+_BASELINEFILEENTRY.fields_by_name['file_type'].enum_type = _FILERESULT_FILETYPE
+_BASELINEMANIFEST.fields_by_name['entries'].message_type = _BASELINEFILEENTRY
 _FILERESULTSCOREDICTIONARYENTRY.fields_by_name['result_type'].enum_type = _RESULTTYPE
 _FILERESULTSCOREDICTIONARYENTRY.fields_by_name['states'].message_type = _FILESTATE
 _PACKAGELEVELFILESCORE.fields_by_name['result_scores'].message_type = _RESULTSCORE
@@ -1380,9 +1865,16 @@ DESCRIPTOR.message_types_by_name['MemoryState'] = _MEMORYSTATE
 DESCRIPTOR.message_types_by_name['MemoryResult'] = _MEMORYRESULT
 DESCRIPTOR.message_types_by_name['Result'] = _RESULT
 DESCRIPTOR.message_types_by_name['AnalysisResult'] = _ANALYSISRESULT
+DESCRIPTOR.message_types_by_name['ResourceUsage'] = _RESOURCEUSAGE
+DESCRIPTOR.message_types_by_name['TriggerTiming'] = _TRIGGERTIMING
+DESCRIPTOR.message_types_by_name['AnalysisTiming'] = _ANALYSISTIMING
+DESCRIPTOR.message_types_by_name['Timing'] = _TIMING
 DESCRIPTOR.message_types_by_name['ApplicationResult'] = _APPLICATIONRESULT
+DESCRIPTOR.message_types_by_name['ResultRecord'] = _RESULTRECORD
 DESCRIPTOR.message_types_by_name['BatchPackageDescriptor'] = _BATCHPACKAGEDESCRIPTOR
 DESCRIPTOR.message_types_by_name['NfsAnalysisConfig'] = _NFSANALYSISCONFIG
+DESCRIPTOR.message_types_by_name['BaselineFileEntry'] = _BASELINEFILEENTRY
+DESCRIPTOR.message_types_by_name['BaselineManifest'] = _BASELINEMANIFEST
 DESCRIPTOR.message_types_by_name['FileResultScoreDictionaryEntry'] = _FILERESULTSCOREDICTIONARYENTRY
 DESCRIPTOR.message_types_by_name['ResultScore'] = _RESULTSCORE
 DESCRIPTOR.message_types_by_name['PackageLevelFileScore'] = _PACKAGELEVELFILESCORE
@@ -1479,12 +1971,42 @@ class AnalysisResult(message.Message):
   
   # @@protoc_insertion_point(class_scope:wheelbarrow_common.AnalysisResult)
 
+class ResourceUsage(message.Message):
+  __metaclass__ = reflection.GeneratedProtocolMessageType
+  DESCRIPTOR = _RESOURCEUSAGE
+  
+  # @@protoc_insertion_point(class_scope:wheelbarrow_common.ResourceUsage)
+
+class TriggerTiming(message.Message):
+  __metaclass__ = reflection.GeneratedProtocolMessageType
+  DESCRIPTOR = _TRIGGERTIMING
+  
+  # @@protoc_insertion_point(class_scope:wheelbarrow_common.TriggerTiming)
+
+class AnalysisTiming(message.Message):
+  __metaclass__ = reflection.GeneratedProtocolMessageType
+  DESCRIPTOR = _ANALYSISTIMING
+  
+  # @@protoc_insertion_point(class_scope:wheelbarrow_common.AnalysisTiming)
+
+class Timing(message.Message):
+  __metaclass__ = reflection.GeneratedProtocolMessageType
+  DESCRIPTOR = _TIMING
+  
+  # @@protoc_insertion_point(class_scope:wheelbarrow_common.Timing)
+
 class ApplicationResult(message.Message):
   __metaclass__ = reflection.GeneratedProtocolMessageType
   DESCRIPTOR = _APPLICATIONRESULT
   
   # @@protoc_insertion_point(class_scope:wheelbarrow_common.ApplicationResult)
 
+class ResultRecord(message.Message):
+  __metaclass__ = reflection.GeneratedProtocolMessageType
+  DESCRIPTOR = _RESULTRECORD
+  
+  # @@protoc_insertion_point(class_scope:wheelbarrow_common.ResultRecord)
+
 class BatchPackageDescriptor(message.Message):
   __metaclass__ = reflection.GeneratedProtocolMessageType
   DESCRIPTOR = _BATCHPACKAGEDESCRIPTOR
@@ -1497,6 +2019,18 @@ class NfsAnalysisConfig(message.Message):
   
   # @@protoc_insertion_point(class_scope:wheelbarrow_common.NfsAnalysisConfig)
 
+class BaselineFileEntry(message.Message):
+  __metaclass__ = reflection.GeneratedProtocolMessageType
+  DESCRIPTOR = _BASELINEFILEENTRY
+  
+  # @@protoc_insertion_point(class_scope:wheelbarrow_common.BaselineFileEntry)
+
+class BaselineManifest(message.Message):
+  __metaclass__ = reflection.GeneratedProtocolMessageType
+  DESCRIPTOR = _BASELINEMANIFEST
+  
+  # @@protoc_insertion_point(class_scope:wheelbarrow_common.BaselineManifest)
+
 class FileResultScoreDictionaryEntry(message.Message):
   __metaclass__ = reflection.GeneratedProtocolMessageType
   DESCRIPTOR = _FILERESULTSCOREDICTIONARYENTRY
@@ -29,7 +29,9 @@ import sys
 WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
 sys.path.append(WHEELBARROW_HOME)
 
-from guest.argument_preprocessor import PreprocessArgument
+from common.instrumentation import ResourceMeter
+from guest.analysis_checkpoint import AnalysisCheckpoint
+from guest.path_expansion_service import PathExpansionService
 from guest.triggers import TriggerManager
 
 
@@ -63,12 +65,48 @@ class Analysis(object):
     _descriptor: The descriptor for this analysis.
     _triggers: A list of triggers after which this analysis should be run.
     _module: The module to be executed after each trigger.
+    _timings: A list of (trigger, ResourceUsage) tuples for completed runs.
+    _current_run: A (trigger, ResourceMeter) tuple for the run in progress, or
+                  None.
+    _completed_triggers: The triggers after which the analysis completed.
   """
 
   def __init__(self, descriptor, triggers, module):
     self._descriptor = descriptor
     self._triggers = triggers
     self._module = module
+    self._timings = []
+    self._current_run = None
+    self._completed_triggers = set()
+
+  def GetName(self):
+    return self._descriptor.name
+
+  def RunsAfter(self, trigger):
+    """Determine if this analysis should be run after a given trigger."""
+
+    return trigger in self._triggers
+
+  def HasImmutableInputs(self):
+    """Determine if the inputs of this analysis do not change after triggers.
+
+    Such an analysis can run while later triggers are being executed.
+    """
+
+    return self._descriptor.immutable_inputs
+
+  def GetArguments(self):
+    """Get the arguments of this analysis, as described by its descriptor."""
+
+    return self._descriptor.arguments
+
+  def GetSuite(self):
+    """Get the name of the suite of this analysis, or None if it has none.
+
+    The analyses of a suite share their file results.
+    """
+
+    return self._descriptor.suite or None
 
   def RunAnalysis(self, trigger):
     """Run the analysis after a given trigger if appropriate.
@@ -77,19 +115,75 @@ class Analysis(object):
       trigger: The latest trigger performed by the broker.
     """
 
-    if trigger in self._triggers:
+    if self.RunsAfter(trigger):
+      if self._RestoreFromCheckpoint(trigger):
+        return
       logging.info('Running analysis %s for trigger %d', self._descriptor.name,
                    trigger)
-      for argument in self._descriptor.arguments:
-        try:
-          argument = PreprocessArgument(argument,
-                                        TriggerManager.GetPackageExtractDir())
-          self._module.RunAnalysis(trigger, argument, self._descriptor.suite)
-        except RecoverableAnalysisError as e:
-          logging.error('Analysis error while running %s: %s',
-                        self._descriptor.name, e)
-
-  def AddResults(self, application_result):
+      meter = ResourceMeter()
+      meter.Start()
+      self._current_run = (trigger, meter)
+      try:
+        for argument in self._descriptor.arguments:
+          try:
+            argument = PathExpansionService.ExpandArgument(
+                argument, TriggerManager.GetPackageExtractDir(),
+                self._descriptor.workers)
+            self._module.RunAnalysis(trigger, argument, self._descriptor.suite)
+          except RecoverableAnalysisError as e:
+            logging.error('Analysis error while running %s: %s',
+                          self._descriptor.name, e)
+      finally:
+        self._timings.append((trigger, meter.Read()))
+        self._current_run = None
+      self._completed_triggers.add(trigger)
+      state = self._module.GetTriggerState(trigger)
+      if state is not None:
+        AnalysisCheckpoint.Record(self._descriptor.name, trigger, state)
+
+  def _RestoreFromCheckpoint(self, trigger):
+    """Restore the state of the analysis after a trigger from the checkpoint.
+
+    Args:
+      trigger: A trigger.
+
+    Returns:
+      True if the state was restored and the analysis does not need to be run.
+    """
+
+    state = AnalysisCheckpoint.GetState(self._descriptor.name, trigger)
+    if state is None:
+      return False
+    logging.info('Restoring analysis %s for trigger %d from checkpoint',
+                 self._descriptor.name, trigger)
+    self._module.RestoreTriggerState(trigger, state, self._descriptor.suite)
+    self._completed_triggers.add(trigger)
+    return True
+
+  def AddTimings(self, timing):
+    """Add the resource usage of the runs of this analysis to a Timing message.
+
+    A run which is still in progress (e.g., because the analysis timed out) is
+    added with its interrupted flag set.
+
+    Args:
+      timing: A wheelbarrow_pb2.Timing message.
+    """
+
+    current_run = self._current_run
+    usages = list(self._timings)
+    if current_run is not None:
+      (trigger, meter) = current_run
+      usage = meter.Read()
+      usage.interrupted = True
+      usages.append((trigger, usage))
+    for (trigger, usage) in usages:
+      analysis_timing = timing.analyses.add()
+      analysis_timing.analysis_name = self._descriptor.name
+      analysis_timing.trigger = trigger
+      analysis_timing.usage.CopyFrom(usage)
+
+  def AddResults(self, application_result, completed_triggers_only=False):
     """Add individual results to an ApplicationResult object.
 
     This function adds all results for all descriptive and diff analyses. Due to
@@ -101,14 +195,24 @@ class Analysis(object):
     Args:
       application_result: The ApplicationResult object for the application
                           under test.
+      completed_triggers_only: True if only the results for triggers after
+                               which the analysis completed should be added,
+                               e.g., because the analysis timed out.
     """
 
     analysis_result = application_result.analysis_results.add()
     analysis_result.analysis_name = self._descriptor.name
 
+    completed_triggers = set(self._completed_triggers)
     for trigger in self._descriptor.descriptive_triggers:
+      if completed_triggers_only and trigger not in completed_triggers:
+        continue
       self._module.AddDescriptiveResults(trigger, analysis_result)
     for diff_pair in self._descriptor.diff_pairs:
+      if completed_triggers_only and not (
+          diff_pair.before in completed_triggers
+          and diff_pair.after in completed_triggers):
+        continue
       self._module.AddDiffResults(diff_pair, analysis_result)
 
     if not analysis_result.results:
@@ -0,0 +1,183 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Checkpoints of the per-trigger state of analyses.
+
+The state recorded by each analysis after each trigger is appended to a
+checkpoint file as soon as the analysis completes. If the broker does not get
+to write its application result (e.g., because the VM was killed by the host),
+a later run of the broker on the same package can resume from the checkpoint:
+analyses which were recorded for a trigger restore their state instead of being
+run again.
+
+Records are serialized with marshal, which handles the dictionaries, lists,
+tuples and strings kept by analyzers. A record which was only partially written
+when the broker was interrupted is ignored.
+"""
+
+import logging
+import marshal
+import os
+import sys
+import threading
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+
+class AnalysisCheckpoint(object):
+  """A checkpoint file shared by all the analyses of a broker run."""
+
+  # The first record of a checkpoint file.
+  _HEADER = ('wheelbarrow-checkpoint', 1)
+
+  _lock = threading.Lock()
+  _path = None
+  _file = None
+  # Map from (analysis name, trigger) tuples to the states loaded when resuming.
+  _states = {}
+
+  @staticmethod
+  def Open(path, resume):
+    """Open a checkpoint file.
+
+    Args:
+      path: The path to the checkpoint file.
+      resume: True if the states recorded by a previous run should be loaded
+              and kept, False if the file should be started over.
+    """
+
+    with AnalysisCheckpoint._lock:
+      states = AnalysisCheckpoint._Load(path) if resume else {}
+      if states:
+        logging.info('Resuming from %d analysis states in checkpoint %s.',
+                     len(states), path)
+      # Rewrite the loaded states, so that new records are not appended after
+      # a partially written one.
+      temp_path = '%s.tmp' % path
+      try:
+        checkpoint_file = open(temp_path, 'wb')
+        checkpoint_file.write(marshal.dumps(AnalysisCheckpoint._HEADER))
+        for ((analysis_name, trigger), state) in states.iteritems():
+          checkpoint_file.write(marshal.dumps((analysis_name, trigger, state)))
+        checkpoint_file.flush()
+        os.rename(temp_path, path)
+      except (IOError, OSError) as err:
+        logging.error('Could not create checkpoint file %s: %s', path, err)
+        return
+      AnalysisCheckpoint._path = path
+      AnalysisCheckpoint._file = checkpoint_file
+      AnalysisCheckpoint._states = states
+
+  @staticmethod
+  def GetState(analysis_name, trigger):
+    """Get the state of an analysis after a trigger, as loaded when resuming.
+
+    Args:
+      analysis_name: The name of an analysis.
+      trigger: A trigger.
+
+    Returns:
+      The recorded state, or None if there is none.
+    """
+
+    return AnalysisCheckpoint._states.get((analysis_name, trigger))
+
+  @staticmethod
+  def Record(analysis_name, trigger, state):
+    """Record the state of an analysis after a trigger.
+
+    The record is on disk when this returns. This does nothing if no checkpoint
+    file is open.
+
+    Args:
+      analysis_name: The name of an analysis.
+      trigger: A trigger.
+      state: A value which can be serialized with marshal.
+    """
+
+    with AnalysisCheckpoint._lock:
+      checkpoint_file = AnalysisCheckpoint._file
+      if checkpoint_file is None:
+        return
+      try:
+        checkpoint_file.write(marshal.dumps((analysis_name, trigger, state)))
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+      except ValueError as err:
+        logging.error('Could not checkpoint analysis %s for trigger %d: %s',
+                      analysis_name, trigger, err)
+      except (IOError, OSError) as err:
+        logging.error('Could not write to checkpoint file %s: %s',
+                      AnalysisCheckpoint._path, err)
+
+  @staticmethod
+  def Close(remove):
+    """Close the checkpoint file.
+
+    This does not take the lock, since it may be called from a signal handler
+    while the main thread holds it.
+
+    Args:
+      remove: True if the checkpoint file should be removed, e.g., because the
+              application result was written.
+    """
+
+    checkpoint_file = AnalysisCheckpoint._file
+    path = AnalysisCheckpoint._path
+    AnalysisCheckpoint._file = None
+    AnalysisCheckpoint._path = None
+    AnalysisCheckpoint._states = {}
+    if checkpoint_file is None:
+      return
+    checkpoint_file.close()
+    if remove:
+      try:
+        os.remove(path)
+      except OSError as err:
+        logging.error('Could not remove checkpoint file %s: %s', path, err)
+
+  @staticmethod
+  def _Load(path):
+    """Load the states recorded in a checkpoint file.
+
+    Args:
+      path: The path to a checkpoint file.
+
+    Returns:
+      A map from (analysis name, trigger) tuples to states.
+    """
+
+    states = {}
+    try:
+      checkpoint_file = open(path, 'rb')
+    except IOError:
+      logging.info('There is no checkpoint to resume from at %s.', path)
+      return states
+    with checkpoint_file:
+      try:
+        if marshal.load(checkpoint_file) != AnalysisCheckpoint._HEADER:
+          logging.error('Ignoring invalid checkpoint file %s.', path)
+          return states
+        while True:
+          (analysis_name, trigger, state) = marshal.load(checkpoint_file)
+          states[(analysis_name, trigger)] = state
+      except (EOFError, ValueError, TypeError):
+        # The end of the file, or a partially written record.
+        pass
+    return states
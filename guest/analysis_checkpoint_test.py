@@ -0,0 +1,130 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Analysis checkpoint test."""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from common import wheelbarrow_pb2
+from guest.analysis_checkpoint import AnalysisCheckpoint
+
+
+class AnalysisCheckpointTest(unittest.TestCase):
+  def setUp(self):
+    self.tmp_dir = tempfile.mkdtemp()
+    self.path = os.path.join(self.tmp_dir, 'package.checkpoint')
+    self.state = ({'/bin/ls': ('0755', 'root')},
+                  {'/bin/ls': wheelbarrow_pb2.FileResult.BINARY})
+
+  def tearDown(self):
+    AnalysisCheckpoint.Close(False)
+    shutil.rmtree(self.tmp_dir)
+
+  def testResume(self):
+    AnalysisCheckpoint.Open(self.path, False)
+    AnalysisCheckpoint.Record('permissions', wheelbarrow_pb2.EXTRACT,
+                              self.state)
+    AnalysisCheckpoint.Close(False)
+
+    AnalysisCheckpoint.Open(self.path, True)
+    self.assertEqual(self.state, AnalysisCheckpoint.GetState(
+        'permissions', wheelbarrow_pb2.EXTRACT))
+    self.assertEqual(None, AnalysisCheckpoint.GetState(
+        'permissions', wheelbarrow_pb2.INSTALL))
+    AnalysisCheckpoint.Record('permissions', wheelbarrow_pb2.INSTALL, {})
+    AnalysisCheckpoint.Close(False)
+
+    AnalysisCheckpoint.Open(self.path, True)
+    self.assertEqual(self.state, AnalysisCheckpoint.GetState(
+        'permissions', wheelbarrow_pb2.EXTRACT))
+    self.assertEqual({}, AnalysisCheckpoint.GetState(
+        'permissions', wheelbarrow_pb2.INSTALL))
+
+  def testOpenWithoutResumeStartsOver(self):
+    AnalysisCheckpoint.Open(self.path, False)
+    AnalysisCheckpoint.Record('permissions', wheelbarrow_pb2.EXTRACT,
+                              self.state)
+    AnalysisCheckpoint.Close(False)
+
+    AnalysisCheckpoint.Open(self.path, False)
+    self.assertEqual(None, AnalysisCheckpoint.GetState(
+        'permissions', wheelbarrow_pb2.EXTRACT))
+    AnalysisCheckpoint.Close(False)
+    AnalysisCheckpoint.Open(self.path, True)
+    self.assertEqual(None, AnalysisCheckpoint.GetState(
+        'permissions', wheelbarrow_pb2.EXTRACT))
+
+  def testResumeIgnoresPartialRecord(self):
+    AnalysisCheckpoint.Open(self.path, False)
+    AnalysisCheckpoint.Record('permissions', wheelbarrow_pb2.EXTRACT,
+                              self.state)
+    AnalysisCheckpoint.Record('permissions', wheelbarrow_pb2.INSTALL,
+                              self.state)
+    AnalysisCheckpoint.Close(False)
+    with open(self.path, 'r+b') as checkpoint_file:
+      checkpoint_file.truncate(os.path.getsize(self.path) - 5)
+
+    AnalysisCheckpoint.Open(self.path, True)
+    self.assertEqual(self.state, AnalysisCheckpoint.GetState(
+        'permissions', wheelbarrow_pb2.EXTRACT))
+    self.assertEqual(None, AnalysisCheckpoint.GetState(
+        'permissions', wheelbarrow_pb2.INSTALL))
+    # New records are not appended after the partial one.
+    AnalysisCheckpoint.Record('checksums', wheelbarrow_pb2.INSTALL, {})
+    AnalysisCheckpoint.Close(False)
+    AnalysisCheckpoint.Open(self.path, True)
+    self.assertEqual({}, AnalysisCheckpoint.GetState(
+        'checksums', wheelbarrow_pb2.INSTALL))
+
+  def testResumeWithoutCheckpoint(self):
+    AnalysisCheckpoint.Open(self.path, True)
+    self.assertEqual(None, AnalysisCheckpoint.GetState(
+        'permissions', wheelbarrow_pb2.EXTRACT))
+    self.assertTrue(os.path.exists(self.path))
+
+  def testRecordUnserializableState(self):
+    AnalysisCheckpoint.Open(self.path, False)
+    AnalysisCheckpoint.Record('permissions', wheelbarrow_pb2.EXTRACT, object())
+    AnalysisCheckpoint.Record('permissions', wheelbarrow_pb2.INSTALL, {})
+    AnalysisCheckpoint.Close(False)
+    AnalysisCheckpoint.Open(self.path, True)
+    self.assertEqual(None, AnalysisCheckpoint.GetState(
+        'permissions', wheelbarrow_pb2.EXTRACT))
+    self.assertEqual({}, AnalysisCheckpoint.GetState(
+        'permissions', wheelbarrow_pb2.INSTALL))
+
+  def testCloseAndRemove(self):
+    AnalysisCheckpoint.Open(self.path, False)
+    AnalysisCheckpoint.Close(True)
+    self.assertFalse(os.path.exists(self.path))
+
+  def testRecordWithoutCheckpoint(self):
+    AnalysisCheckpoint.Record('permissions', wheelbarrow_pb2.EXTRACT,
+                              self.state)
+    self.assertEqual([], os.listdir(self.tmp_dir))
+
+
+if __name__ == '__main__':
+  unittest.main()
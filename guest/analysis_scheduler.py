@@ -0,0 +1,135 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Schedule analyses after triggers.
+
+By default, every analysis runs after a trigger and before the next trigger, so
+that it sees the state of the system at the trigger boundary. Analyses whose
+inputs do not change after the triggers they run at (e.g., analyses of the
+extracted package) can instead run in the background, while later triggers are
+executed.
+"""
+
+from multiprocessing.pool import ThreadPool
+import os
+import sys
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+# How long to block at a time while waiting for a background analysis, in
+# seconds. Waiting without a timeout would delay signal handlers (e.g., the
+# broker timeout) until the analysis completes.
+_WAIT_TIMEOUT = 1
+
+
+class AnalysisScheduler(object):
+  """Runs analyses after triggers, in the background when it is safe.
+
+  Analyses with immutable inputs run on worker threads, one at a time per
+  analysis. The other analyses run in the calling thread at trigger boundaries.
+  Background analyses are waited for before a trigger which uses analysis
+  results is run and before results are collected.
+
+  Attributes:
+    _analyses: The list of analyses.
+    _workers: The number of worker threads.
+    _pool: A thread pool, created when first needed.
+    _pending_results: A map from analyses to the AsyncResult of their latest
+                      background run.
+  """
+
+  def __init__(self, analyses):
+    self._analyses = analyses
+    self._workers = max(1, len([analysis for analysis in analyses
+                                if analysis.HasImmutableInputs()]))
+    self._pool = None
+    self._pending_results = {}
+
+  def RunAnalyses(self, trigger):
+    """Run the analyses after a trigger, or start running them.
+
+    Args:
+      trigger: The trigger that was just run.
+
+    Raises:
+      FatalAnalysisError: An analysis failed, possibly in the background.
+    """
+
+    for analysis in self._analyses:
+      if not analysis.RunsAfter(trigger):
+        continue
+      if analysis.HasImmutableInputs():
+        # Runs of the same analysis should not overlap.
+        self._WaitForAnalysis(analysis)
+        self._pending_results[analysis] = self._GetPool().apply_async(
+            analysis.RunAnalysis, (trigger,))
+      else:
+        analysis.RunAnalysis(trigger)
+
+  def PrepareTrigger(self, trigger):
+    """Prepare for a trigger to be run.
+
+    Args:
+      trigger: The Trigger about to be run.
+
+    Raises:
+      FatalAnalysisError: A background analysis failed.
+    """
+
+    if trigger.UsesAnalysisResults():
+      self.Wait()
+
+  def Wait(self):
+    """Wait for all background analyses to complete.
+
+    Raises:
+      FatalAnalysisError: A background analysis failed.
+    """
+
+    for analysis in self._pending_results.keys():
+      self._WaitForAnalysis(analysis)
+
+  def Close(self):
+    """Stop the worker threads, without waiting for background analyses."""
+
+    if self._pool is not None:
+      self._pool.terminate()
+      self._pool = None
+    self._pending_results = {}
+
+  def _WaitForAnalysis(self, analysis):
+    """Wait for the background run of an analysis to complete, if any.
+
+    Args:
+      analysis: An analysis.
+
+    Raises:
+      FatalAnalysisError: The background run failed.
+    """
+
+    pending_result = self._pending_results.pop(analysis, None)
+    if pending_result is not None:
+      while not pending_result.ready():
+        pending_result.wait(_WAIT_TIMEOUT)
+      pending_result.get()
+
+  def _GetPool(self):
+    if self._pool is None:
+      self._pool = ThreadPool(self._workers)
+    return self._pool
@@ -0,0 +1,110 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Analysis scheduler test."""
+
+import os
+import sys
+import threading
+import unittest
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from common import wheelbarrow_pb2
+from guest import triggers
+from guest.analysis import FatalAnalysisError
+from guest.analysis_scheduler import AnalysisScheduler
+
+
+class FakeAnalysis(object):
+  """An analysis recording the triggers it runs after."""
+
+  def __init__(self, immutable_inputs, triggers_to_run_after, release=None,
+               error=None):
+    self.runs = []
+    self._immutable_inputs = immutable_inputs
+    self._triggers = triggers_to_run_after
+    self._release = release
+    self._error = error
+
+  def RunsAfter(self, trigger):
+    return trigger in self._triggers
+
+  def HasImmutableInputs(self):
+    return self._immutable_inputs
+
+  def RunAnalysis(self, trigger):
+    if self._release is not None:
+      self._release.wait()
+    if self._error is not None:
+      raise self._error
+    self.runs.append((trigger, threading.current_thread().name))
+
+
+class AnalysisSchedulerTest(unittest.TestCase):
+  def setUp(self):
+    self.release = threading.Event()
+    self.background_analysis = FakeAnalysis(
+        True, [wheelbarrow_pb2.EXTRACT, wheelbarrow_pb2.INSTALL], self.release)
+    self.foreground_analysis = FakeAnalysis(
+        False, [wheelbarrow_pb2.EXTRACT, wheelbarrow_pb2.INSTALL])
+    self.scheduler = AnalysisScheduler([self.background_analysis,
+                                        self.foreground_analysis])
+
+  def testRunAnalyses(self):
+    self.scheduler.RunAnalyses(wheelbarrow_pb2.EXTRACT)
+    self.scheduler.RunAnalyses(wheelbarrow_pb2.PURGE)
+    self.assertEqual([], self.background_analysis.runs)
+    self.assertEqual(
+        [(wheelbarrow_pb2.EXTRACT, threading.current_thread().name)],
+        self.foreground_analysis.runs)
+    self.release.set()
+    self.scheduler.RunAnalyses(wheelbarrow_pb2.INSTALL)
+    self.scheduler.Wait()
+    self.assertEqual([wheelbarrow_pb2.EXTRACT, wheelbarrow_pb2.INSTALL],
+                     [trigger for (trigger, _)
+                      in self.background_analysis.runs])
+    self.assertNotIn(threading.current_thread().name,
+                     [thread for (_, thread)
+                      in self.background_analysis.runs])
+
+  def testPrepareTrigger(self):
+    self.scheduler.RunAnalyses(wheelbarrow_pb2.EXTRACT)
+    self.scheduler.PrepareTrigger(triggers.Install())
+    self.assertEqual([], self.background_analysis.runs)
+    self.release.set()
+    self.scheduler.PrepareTrigger(triggers.RunBinaries())
+    self.assertEqual(1, len(self.background_analysis.runs))
+
+  def testWaitWithError(self):
+    self.release.set()
+    failing_analysis = FakeAnalysis(True, [wheelbarrow_pb2.EXTRACT],
+                                    error=FatalAnalysisError('error'))
+    scheduler = AnalysisScheduler([failing_analysis])
+    scheduler.RunAnalyses(wheelbarrow_pb2.EXTRACT)
+    self.assertRaises(FatalAnalysisError, scheduler.Wait)
+    scheduler.Close()
+
+  def tearDown(self):
+    self.release.set()
+    self.scheduler.Close()
+
+
+if __name__ == '__main__':
+  unittest.main()
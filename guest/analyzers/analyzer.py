@@ -32,6 +32,18 @@ class Analyzer(object):
   to a file).
   """
 
+  def Configure(self, descriptor):
+    """Configure the analyzer from its analysis descriptor.
+
+    By default, this does nothing. Subclasses can override it to read options
+    from the descriptor.
+
+    Args:
+      descriptor: The AnalysisDescriptor of the analysis using this analyzer.
+    """
+
+    pass
+
   def RunAnalysis(self, trigger, argument, suite):
     """Run the analysis.
 
@@ -64,3 +76,31 @@ class Analyzer(object):
     """
 
     raise NotImplementedError
+
+  def GetTriggerState(self, trigger):
+    """Get the state recorded by the analyzer after a trigger, for checkpoints.
+
+    By default, checkpoints are not supported.
+
+    Args:
+      trigger: A trigger after which the analysis was run.
+
+    Returns:
+      A value which can be serialized with marshal, or None if the state cannot
+      be checkpointed.
+    """
+
+    return None
+
+  def RestoreTriggerState(self, trigger, state, suite):
+    """Restore the state of the analyzer after a trigger from a checkpoint.
+
+    This replaces running the analysis after the trigger.
+
+    Args:
+      trigger: A trigger.
+      state: A state returned by GetTriggerState().
+      suite: The suite the analysis is a part of, if any.
+    """
+
+    raise NotImplementedError
@@ -0,0 +1,218 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""A journal of structural file system changes between triggers.
+
+The journal watches system directories recursively with inotify and records the
+directories whose entries were created, deleted or moved. Changes are stamped
+with a generation number, which is incremented after each trigger. This lets
+analyses reuse the file lists they walked at a previous trigger for directory
+trees that did not change structurally.
+
+Only structural changes are recorded. Writes through shared memory mappings do
+not generate inotify events, so file contents and attributes are still checked
+using stat tuples.
+
+If the inotify event queue overflows or a watch cannot be added (e.g., because
+of the max_user_watches limit), the journal becomes invalid and every directory
+tree is reported as changed, which falls back to full rescans.
+"""
+
+import logging
+import os
+import sys
+import threading
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+import pyinotify
+
+from guest.analyzers.inotify_notifier import DrainableNotifier
+
+
+class ChangeJournal(object):
+  """A journal of structural changes under a set of watched directories."""
+
+  _MASK = (pyinotify.IN_CREATE | pyinotify.IN_DELETE | pyinotify.IN_MOVED_FROM
+           | pyinotify.IN_MOVED_TO | pyinotify.IN_DELETE_SELF
+           | pyinotify.IN_MOVE_SELF)
+
+  _lock = threading.Lock()
+  _watch_manager = None
+  _notifier = None
+  _valid = False
+  _generation = 0
+  # Canonical paths of the watched directories.
+  _watched_roots = set()
+  # Map from canonical directory paths to the last generation in which their
+  # entries changed.
+  _structural_changes = {}
+
+  @staticmethod
+  def Start(roots):
+    """Start watching directories.
+
+    Args:
+      roots: A list of directory paths. Paths which are not directories are
+             ignored.
+    """
+
+    with ChangeJournal._lock:
+      ChangeJournal._watch_manager = pyinotify.WatchManager()
+      ChangeJournal._notifier = DrainableNotifier(
+          ChangeJournal._watch_manager, ChangeJournal._RecordEvent,
+          ChangeJournal._lock)
+      ChangeJournal._valid = True
+      ChangeJournal._generation = 0
+      ChangeJournal._watched_roots = set()
+      ChangeJournal._structural_changes = {}
+      for root in set(os.path.realpath(root) for root in roots):
+        if not os.path.isdir(root):
+          continue
+        ChangeJournal._AddWatch(root)
+        ChangeJournal._watched_roots.add(root)
+      ChangeJournal._notifier.Start()
+
+  @staticmethod
+  def Sync():
+    """Record all pending events and start a new generation.
+
+    This should be called after each trigger. All the changes made before the
+    call are recorded when it returns.
+
+    Returns:
+      The new generation.
+    """
+
+    with ChangeJournal._lock:
+      if ChangeJournal._notifier is not None:
+        ChangeJournal._notifier.Drain()
+      ChangeJournal._generation += 1
+      return ChangeJournal._generation
+
+  @staticmethod
+  def GetGeneration():
+    """Get the current generation."""
+
+    return ChangeJournal._generation
+
+  @staticmethod
+  def IsWatching(path):
+    """Determine if a path is a watched directory and changes are journaled.
+
+    Args:
+      path: A path.
+
+    Returns:
+      True if changes under the path are reliably journaled.
+    """
+
+    return (ChangeJournal._valid
+            and os.path.realpath(path) in ChangeJournal._watched_roots)
+
+  @staticmethod
+  def HasStructuralChangesSince(root, generation):
+    """Determine if entries were added or removed under a directory.
+
+    Args:
+      root: A directory path.
+      generation: A generation number.
+
+    Returns:
+      True if some directory under root (including root itself) had entries
+      created, deleted or moved during or after the given generation, or if
+      this cannot be determined.
+    """
+
+    if not ChangeJournal.IsWatching(root):
+      return True
+    root = os.path.realpath(root)
+    prefix = os.path.join(root, '')
+    with ChangeJournal._lock:
+      ChangeJournal._notifier.Drain()
+      if not ChangeJournal._valid:
+        return True
+      for (path, change_generation) in (
+          ChangeJournal._structural_changes.iteritems()):
+        if (change_generation >= generation
+            and (path == root or path.startswith(prefix))):
+          return True
+    return False
+
+  @staticmethod
+  def Close():
+    """Stop watching directories.
+
+    This does not take the lock, since it may be called from a signal handler
+    while the main thread holds it.
+    """
+
+    if ChangeJournal._notifier is None:
+      return
+    ChangeJournal._valid = False
+    ChangeJournal._notifier.Stop()
+
+  @staticmethod
+  def _AddWatch(path):
+    """Watch a directory tree, and invalidate the journal if this fails.
+
+    Args:
+      path: A directory path.
+    """
+
+    watch_descriptors = ChangeJournal._watch_manager.add_watch(
+        path, ChangeJournal._MASK, rec=True)
+    if [wd for wd in watch_descriptors.itervalues() if wd < 0]:
+      logging.warning('Could not watch all directories under %s. Changes will '
+                      'not be journaled.', path)
+      ChangeJournal._valid = False
+
+  @staticmethod
+  def _RecordEvent(event):
+    """Record an inotify event.
+
+    Args:
+      event: A pyinotify.Event.
+    """
+
+    if event.mask & pyinotify.IN_Q_OVERFLOW:
+      logging.warning('Inotify event queue overflow. Changes will not be '
+                      'journaled.')
+      ChangeJournal._valid = False
+      return
+    if event.mask & pyinotify.IN_IGNORED:
+      return
+    if event.path.endswith('-unknown-path'):
+      # A watched directory was moved outside of the watched trees.
+      ChangeJournal._valid = False
+      return
+    path = event.pathname
+    if event.dir and (event.mask & pyinotify.IN_CREATE
+                      or (event.mask & pyinotify.IN_MOVED_TO
+                          and not hasattr(event, 'src_pathname'))):
+      # Watch new directories. Directories moved within the watched trees are
+      # already watched, and pyinotify updates their paths. Anything created in
+      # a new directory before it is watched is covered by the change to the
+      # new directory itself.
+      ChangeJournal._AddWatch(path)
+    generation = ChangeJournal._generation
+    ChangeJournal._structural_changes[os.path.dirname(path)] = generation
+    if event.dir or event.mask & (pyinotify.IN_DELETE_SELF
+                                  | pyinotify.IN_MOVE_SELF):
+      ChangeJournal._structural_changes[path] = generation
@@ -19,14 +19,11 @@
 #     limitations under the License.
 """Checksum analyzer."""
 
-import hashlib
 import os.path
 import sys
 WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
 sys.path.append(WHEELBARROW_HOME)
 
-from common.utils import LoadFileToString
-from guest.analysis import RecoverableAnalysisError
 from guest.analyzers.file_analyzer import FileAnalyzer
 
 
@@ -43,14 +40,8 @@ class ChecksumAnalyzer(FileAnalyzer):
       A tuple with the MD5, SHA-1 and SHA-256 hashes of the input file.
     """
 
-    contents = LoadFileToString(file_path)
-    if not contents:
-      raise RecoverableAnalysisError('Could not load file %s for hashing.'
-                                     % file_path)
-    md5hash = FileAnalyzer._ComputeStringHash(contents, hashlib.md5)
-    sha1hash = FileAnalyzer._ComputeStringHash(contents, hashlib.sha1)
-    sha256hash = FileAnalyzer._ComputeStringHash(contents, hashlib.sha256)
-    return (md5hash, sha1hash, sha256hash)
+    return FileAnalyzer._ComputeFileHashes(file_path,
+                                           ('md5', 'sha1', 'sha256'))
 
   def AddDescriptiveResults(self, trigger, analysis_result):
     descriptive_result = self._GetAnalysisResultForTrigger(trigger)
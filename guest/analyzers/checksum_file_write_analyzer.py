@@ -31,6 +31,7 @@ from common import wheelbarrow_pb2
 from common.utils import LoadFileToString
 from guest.analysis import RecoverableAnalysisError
 from guest.analyzers.file_analyzer import FileAnalyzer
+from guest.blob_uploader import BlobUploader
 
 
 class ChecksumFileWriteAnalyzer(FileAnalyzer):
@@ -38,7 +39,8 @@ class ChecksumFileWriteAnalyzer(FileAnalyzer):
 
   This analyzer checks for modifications in a file by comparing file checksums.
   It can also record the file contents if instantiated with the record_contents
-  argument set to True.
+  argument set to True. If the host provides a blob store, the contents are
+  uploaded to it when they are read, and results reference them by digest.
   """
 
   def __init__(self, record_contents):
@@ -53,12 +55,33 @@ class ChecksumFileWriteAnalyzer(FileAnalyzer):
     self._record_contents = record_contents
 
   def _PerformAnalysis(self, file_path):
+    if not self._record_contents:
+      (checksum,) = FileAnalyzer._ComputeFileHashes(file_path, ('sha256',))
+      return (checksum, None)
     contents = LoadFileToString(file_path)
     if contents is None:
       raise RecoverableAnalysisError('Could not load file %s for hashing.'
                                      % file_path)
     checksum = FileAnalyzer._ComputeStringHash(contents, hashlib.sha256)
-    return (checksum, contents) if self._record_contents else (checksum, None)
+    if BlobUploader.Upload(contents, checksum):
+      # Only keep the digest of uploaded contents.
+      return (checksum, None)
+    return (checksum, contents)
+
+  @staticmethod
+  def _SetContents(state, result):
+    """Set the recorded contents of a file state.
+
+    Args:
+      state: A wheelbarrow_pb2.FileState.
+      result: A (checksum, contents) tuple, where contents is None if they are
+              in the blob store.
+    """
+
+    if result[1] is None:
+      state.contents_sha256 = result[0]
+    else:
+      state.contents = result[1]
 
   def AddDescriptiveResults(self, trigger, analysis_result):
     # A descriptive result does not make sense if the contents are not recorded.
@@ -69,7 +92,7 @@ class ChecksumFileWriteAnalyzer(FileAnalyzer):
     for (path, result) in descriptive_result.iteritems():
       res = self._PrepareDescriptiveFileResult(path, analysis_result, trigger)
       if self._record_contents:
-        res.states[0].contents = result[1]
+        ChecksumFileWriteAnalyzer._SetContents(res.states[0], result)
 
   def AddDiffResults(self, diff_pair, analysis_result):
     """Get the diff result of this analysis."""
@@ -81,24 +104,29 @@ class ChecksumFileWriteAnalyzer(FileAnalyzer):
                                            wheelbarrow_pb2.ADD, diff_pair)
       result.states[1].sha256 = diff_result.after[key][0]
       if self._record_contents:
-        result.states[1].contents = diff_result.after[key][1]
+        ChecksumFileWriteAnalyzer._SetContents(result.states[1],
+                                               diff_result.after[key])
 
     for key in diff_result.removed_keys:
       result = self._PrepareDiffFileResult(key, analysis_result,
                                            wheelbarrow_pb2.DELETE, diff_pair)
       result.states[0].sha256 = diff_result.before[key][0]
       if self._record_contents:
-        result.states[0].contents = diff_result.before[key][1]
+        ChecksumFileWriteAnalyzer._SetContents(result.states[0],
+                                               diff_result.before[key])
 
     for key in diff_result.common_keys:
       if diff_result.before[key][0] != diff_result.after[key][0]:
         result = self._PrepareDiffFileResult(key, analysis_result,
                                              wheelbarrow_pb2.CHANGE, diff_pair)
-        result.states[0].contents = diff_result.before[key][0]
-        result.states[1].contents = diff_result.after[key][0]
         if self._record_contents:
-          result.states[0].contents = diff_result.before[key][1]
-          result.states[1].contents = diff_result.after[key][1]
+          ChecksumFileWriteAnalyzer._SetContents(result.states[0],
+                                                 diff_result.before[key])
+          ChecksumFileWriteAnalyzer._SetContents(result.states[1],
+                                                 diff_result.after[key])
+        else:
+          result.states[0].contents = diff_result.before[key][0]
+          result.states[1].contents = diff_result.after[key][0]
 
 
 class RecordingChecksumFileWriteAnalyzer(ChecksumFileWriteAnalyzer):
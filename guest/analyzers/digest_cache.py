@@ -0,0 +1,142 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""A content-addressed cache for file digests."""
+
+import logging
+import os
+import stat
+import sys
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from common.utils import ComputeFileDigests
+
+
+class DigestCache(object):
+  """A cache for file digests, shared by all file analyzers in a broker run.
+
+  Digests are keyed by the (mode, device, inode, size, mtime, ctime) tuple of a
+  file, so that a file is only read and hashed once across analyzers and
+  triggers as long as it is not modified. Only regular, non-empty files are
+  cached: files such as the ones in /proc report a size of 0 and their contents
+  can change without any change to their stat tuple.
+  """
+
+  _digests = {}
+
+  @staticmethod
+  def GetDigests(file_path, hash_names):
+    """Get the digests of a file.
+
+    Args:
+      file_path: The path to a file.
+      hash_names: A list of hashlib algorithm names (e.g., 'sha256').
+
+    Returns:
+      A tuple with the hexadecimal digests of the file, in the same order as
+      hash_names, or None if the file could not be read.
+    """
+
+    try:
+      stat_key = DigestCache.GetStatKey(os.stat(file_path))
+    except OSError as err:
+      logging.error('Could not stat file %s: %s', file_path, err)
+      return None
+
+    cached_digests = (DigestCache._digests.get(stat_key, {})
+                      if DigestCache._IsCacheable(stat_key) else {})
+    missing_hash_names = [hash_name for hash_name in hash_names
+                          if hash_name not in cached_digests]
+    if not missing_hash_names:
+      return tuple(cached_digests[hash_name] for hash_name in hash_names)
+
+    missing_digests = ComputeFileDigests(file_path, missing_hash_names)
+    if missing_digests is None:
+      return None
+    digests = dict(cached_digests)
+    digests.update(zip(missing_hash_names, missing_digests))
+
+    # Only cache the digests if the file did not change while we were reading
+    # it.
+    if DigestCache._IsCacheable(stat_key):
+      try:
+        if DigestCache.GetStatKey(os.stat(file_path)) == stat_key:
+          DigestCache._digests[stat_key] = digests
+      except OSError:
+        pass
+    return tuple(digests[hash_name] for hash_name in hash_names)
+
+  @staticmethod
+  def AddDigests(stat_key, digests):
+    """Add known digests to the cache.
+
+    This is used to seed the cache, e.g., from a baseline manifest.
+
+    Args:
+      stat_key: The stat key of a file, as returned by GetStatKey().
+      digests: A map from hashlib algorithm names to hexadecimal digests.
+    """
+
+    if DigestCache._IsCacheable(stat_key):
+      DigestCache._digests.setdefault(stat_key, {}).update(digests)
+
+  @staticmethod
+  def GetStatKey(stat_result):
+    """Get the key identifying the contents of a file, given its stat result.
+
+    Args:
+      stat_result: The result of os.stat() on a file.
+
+    Returns:
+      A tuple (mode, device, inode, size, mtime, ctime), with times in
+      nanoseconds.
+    """
+
+    return (stat_result.st_mode, stat_result.st_dev,
+            stat_result.st_ino, stat_result.st_size,
+            DigestCache._GetNanoseconds(stat_result, 'st_mtime'),
+            DigestCache._GetNanoseconds(stat_result, 'st_ctime'))
+
+  @staticmethod
+  def Clear():
+    """Clear the cache."""
+
+    DigestCache._digests = {}
+
+  @staticmethod
+  def _IsCacheable(stat_key):
+    return stat.S_ISREG(stat_key[0]) and stat_key[3] > 0
+
+  @staticmethod
+  def _GetNanoseconds(stat_result, field_name):
+    """Get a time from a stat result, in nanoseconds.
+
+    Args:
+      stat_result: The result of os.stat() on a file.
+      field_name: The name of a time field (e.g., 'st_mtime').
+
+    Returns:
+      The time in nanoseconds.
+    """
+
+    nanoseconds = getattr(stat_result, '%s_ns' % field_name, None)
+    if nanoseconds is None:
+      nanoseconds = int(getattr(stat_result, field_name) * 1e9)
+    return nanoseconds
@@ -0,0 +1,126 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Executors for running file analyses in parallel.
+
+An executor applies a function to every item of a list and returns the results
+in the same order as the input, regardless of the order in which the items are
+processed. This lets file analyzers merge results deterministically.
+"""
+
+import functools
+import multiprocessing
+import multiprocessing.pool
+import os.path
+import sys
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from common import instrumentation
+from common import wheelbarrow_pb2
+
+
+class FileAnalysisExecutor(object):
+  """Base class for executors. Items are processed serially."""
+
+  def Map(self, function, items):
+    """Apply a function to a list of items.
+
+    Args:
+      function: A function taking a single argument.
+      items: An iterable of items.
+
+    Returns:
+      The list of results, in the same order as the input items.
+    """
+
+    return [function(item) for item in items]
+
+
+class ThreadPoolFileAnalysisExecutor(FileAnalysisExecutor):
+  """An executor using a pool of threads, for I/O-bound analyses.
+
+  The work done by the threads of the pool is instrumented on behalf of the
+  thread calling Map().
+  """
+
+  def __init__(self, workers):
+    self._workers = workers
+    self._pool = None
+
+  def Map(self, function, items):
+    # The pool is created lazily, since most analyzers are never run.
+    if self._pool is None:
+      self._pool = multiprocessing.pool.ThreadPool(self._workers)
+    return self._pool.map(
+        functools.partial(instrumentation.RunWithCounters,
+                          instrumentation.GetCounters(), function), items)
+
+
+# The function applied by the workers of a process pool. It is set in the worker
+# processes by the pool initializer, so that it does not have to be pickled.
+_worker_function = None
+
+
+def _InitializeWorker(function):
+  global _worker_function
+  _worker_function = function
+
+
+def _CallWorkerFunction(item):
+  return _worker_function(item)
+
+
+class ProcessPoolFileAnalysisExecutor(FileAnalysisExecutor):
+  """An executor using a pool of processes, for CPU-bound analyses.
+
+  A new pool is forked for each call to Map(), so that the workers see the
+  current state of the analyzer. Items and results have to be picklable. Any
+  state that the function modifies (e.g., caches and instrumentation counts) is
+  not propagated back to the parent process.
+  """
+
+  def __init__(self, workers):
+    self._workers = workers
+
+  def Map(self, function, items):
+    pool = multiprocessing.Pool(self._workers, _InitializeWorker, (function,))
+    try:
+      return pool.map(_CallWorkerFunction, items)
+    finally:
+      pool.close()
+      pool.join()
+
+
+def MakeFileAnalysisExecutor(descriptor):
+  """Make the file analysis executor requested by an analysis descriptor.
+
+  Args:
+    descriptor: An AnalysisDescriptor.
+
+  Returns:
+    A FileAnalysisExecutor.
+  """
+
+  if descriptor.workers <= 1:
+    return FileAnalysisExecutor()
+  elif descriptor.executor == wheelbarrow_pb2.AnalysisDescriptor.PROCESS_POOL:
+    return ProcessPoolFileAnalysisExecutor(descriptor.workers)
+  else:
+    return ThreadPoolFileAnalysisExecutor(descriptor.workers)
@@ -24,14 +24,19 @@ It encapsulates utilities specific to file analyses.
 
 import os.path
 import logging
-import subprocess
+import stat
 import sys
 WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
 sys.path.append(WHEELBARROW_HOME)
 
 
+from common import instrumentation
 from common import wheelbarrow_pb2
 from guest import analysis
+from guest.analyzers.digest_cache import DigestCache
+from guest.analyzers.file_analysis_executor import FileAnalysisExecutor
+from guest.analyzers.file_analysis_executor import MakeFileAnalysisExecutor
+from guest.analyzers.file_type_classifier import FileTypeClassifier
 from guest.analyzers.trigger_map_analyzer import TriggerMapAnalyzer
 from guest.file_result_suite_manager import FileResultSuiteManager
 
@@ -49,6 +54,15 @@ class FileAnalyzer(TriggerMapAnalyzer):
     super(FileAnalyzer, self).__init__()
     self._file_types = {}
     self._analysis_suite = FileAnalyzer._NO_SUITE
+    self._executor = FileAnalysisExecutor()
+    self._incremental_snapshot = False
+    # Map from file paths to (stat key, analysis result) pairs, for incremental
+    # snapshots.
+    self._snapshot = {}
+
+  def Configure(self, descriptor):
+    self._executor = MakeFileAnalysisExecutor(descriptor)
+    self._incremental_snapshot = descriptor.incremental_snapshot
 
   def RunAnalysis(self, trigger, argument, suite):
     """Run a standard file analysis.
@@ -60,6 +74,15 @@ class FileAnalyzer(TriggerMapAnalyzer):
     analyzing the contents of an extracted package under /tmp/[blah]/[rel_path],
     it associates the result with [rel_path].
 
+    Files are analyzed by the executor configured in the analysis descriptor,
+    possibly in parallel. Results are merged in the order of the argument. A
+    file for which a RecoverableAnalysisError is raised is skipped.
+
+    In incremental snapshot mode, the stat tuple of each file is recorded along
+    with its analysis result, and a file is only analyzed again if its stat
+    tuple changed since the previous trigger. Results are the same as with a
+    full rescan.
+
     Args:
       trigger: The trigger after which the analysis is performed.
       argument: An analyzer argument.
@@ -67,15 +90,120 @@ class FileAnalyzer(TriggerMapAnalyzer):
     """
 
     self._analysis_suite = suite
+    argument = list(argument)
+    stat_keys = self._GetSnapshotStatKeys(argument)
+    pending_argument = [
+        (file_path, rel_path) for (file_path, rel_path) in argument
+        if not self._IsInSnapshot(file_path, stat_keys.get(file_path))]
+    file_results = dict(zip(
+        [file_path for (file_path, _) in pending_argument],
+        self._executor.Map(self._AnalyzeFile,
+                           [(file_path, rel_path not in self._file_types)
+                            for (file_path, rel_path) in pending_argument])))
     analysis_result = {}
     for (file_path, rel_path) in argument:
-      analysis_result[rel_path] = self._PerformAnalysis(file_path)
-      self._RecordFileType(file_path, rel_path)
+      if file_path in file_results:
+        file_result = file_results[file_path]
+        if file_result is None:
+          continue
+        (analysis_result[rel_path], file_type) = file_result
+        if file_type is not None:
+          self._file_types[rel_path] = file_type
+        if file_path in stat_keys:
+          self._snapshot[file_path] = (stat_keys[file_path],
+                                       analysis_result[rel_path])
+      else:
+        analysis_result[rel_path] = self._snapshot[file_path][1]
       if (suite == 'package'
           and self._GetFileType(rel_path) == wheelbarrow_pb2.FileResult.BINARY):
         FileAnalyzer._package_binaries.add(rel_path)
     self._AddAnalysisResult(trigger, analysis_result)
 
+  def GetTriggerState(self, trigger):
+    """Get the analysis results after a trigger, with the types of the files."""
+
+    analysis_result = self._analysis_results.get(trigger)
+    if analysis_result is None:
+      return None
+    file_types = dict((rel_path, self._file_types[rel_path])
+                      for rel_path in analysis_result
+                      if rel_path in self._file_types)
+    return (analysis_result, file_types)
+
+  def RestoreTriggerState(self, trigger, state, suite):
+    (analysis_result, file_types) = state
+    self._analysis_suite = suite
+    self._file_types.update(file_types)
+    if suite == 'package':
+      FileAnalyzer._package_binaries.update(
+          rel_path for (rel_path, file_type) in file_types.iteritems()
+          if file_type == wheelbarrow_pb2.FileResult.BINARY)
+    self._AddAnalysisResult(trigger, analysis_result)
+
+  def _GetSnapshotStatKeys(self, argument):
+    """Get the stat keys of the files in an argument, for incremental snapshots.
+
+    Only regular, non-empty files are considered, since the stat tuple of other
+    files (e.g., files in /proc) does not reflect changes to their contents.
+
+    Args:
+      argument: A list of pairs (file path, relative path).
+
+    Returns:
+      A map from file paths to stat keys. It is empty if incremental snapshots
+      are not enabled.
+    """
+
+    stat_keys = {}
+    if not self._incremental_snapshot:
+      return stat_keys
+    for (file_path, _) in argument:
+      try:
+        stat_result = os.stat(file_path)
+      except OSError:
+        continue
+      if stat.S_ISREG(stat_result.st_mode) and stat_result.st_size > 0:
+        stat_keys[file_path] = DigestCache.GetStatKey(stat_result)
+    return stat_keys
+
+  def _IsInSnapshot(self, file_path, stat_key):
+    """Determine if a file is unchanged since its last analysis.
+
+    Args:
+      file_path: The path to a file.
+      stat_key: The current stat key of the file, or None.
+
+    Returns:
+      True if the previous analysis result of the file can be reused.
+    """
+
+    return (stat_key is not None and file_path in self._snapshot
+            and self._snapshot[file_path][0] == stat_key)
+
+  def _AnalyzeFile(self, file_analysis_item):
+    """Analyze a single file.
+
+    This is the unit of work given to the executor.
+
+    Args:
+      file_analysis_item: A pair (file path, True if the file type should be
+                          determined).
+
+    Returns:
+      A pair (analysis result, file type or None), or None if the file could not
+      be analyzed.
+    """
+
+    (file_path, determine_file_type) = file_analysis_item
+    instrumentation.RecordFileProcessed()
+    try:
+      return (self._PerformAnalysis(file_path),
+              FileAnalyzer._DetermineFileType(file_path)
+              if determine_file_type else None)
+    except analysis.RecoverableAnalysisError as e:
+      logging.error('Could not analyze file %s: %s', file_path, e)
+      return None
+
   @staticmethod
   def GetBinaries():
     """Get the list of binaries in the packages."""
@@ -135,24 +263,15 @@ class FileAnalyzer(TriggerMapAnalyzer):
       The type of the file.
 
     Raises:
-      RecoverableAnalysisError if something went wrong when executing file.
+      RecoverableAnalysisError if the file could not be read.
     """
 
-    file_output = None
     try:
-      file_output = subprocess.check_output(['/usr/bin/file', file_name])
-    except (subprocess.CalledProcessError, OSError, ValueError) as e:
-      logging.error('Could not execute file on %s: %s', file_name, e)
+      return FileTypeClassifier.ClassifyFile(file_name)
+    except (IOError, OSError) as e:
+      logging.error('Could not read file header of %s: %s', file_name, e)
       raise analysis.RecoverableAnalysisError('Could not determine file type '
-                                              'for %s', file_name)
-    if 'shell script' in file_output:
-      return wheelbarrow_pb2.FileResult.SCRIPT
-    elif 'ELF' in file_output:
-      return wheelbarrow_pb2.FileResult.BINARY
-    elif 'text' in file_output:
-      return wheelbarrow_pb2.FileResult.TEXT
-    else:
-      return wheelbarrow_pb2.FileResult.OTHER
+                                              'for %s' % file_name)
 
   def _PrepareDiffFileResult(self, path, analysis_result, result_type,
                              diff_pair):
@@ -281,3 +400,28 @@ class FileAnalyzer(TriggerMapAnalyzer):
     hash_instance = hash_function()
     hash_instance.update(string)
     return hash_instance.hexdigest()
+
+  @staticmethod
+  def _ComputeFileHashes(file_path, hash_names):
+    """Compute the hashes of a file.
+
+    The hashes are looked up in and added to the digest cache, so that a file is
+    only hashed once per broker run as long as it does not change.
+
+    Args:
+      file_path: The path to a file.
+      hash_names: A list of hashlib algorithm names (e.g., 'sha256').
+
+    Returns:
+      A tuple with the hashes of the input file, in the same order as
+      hash_names.
+
+    Raises:
+      RecoverableAnalysisError if the file could not be read.
+    """
+
+    digests = DigestCache.GetDigests(file_path, hash_names)
+    if digests is None:
+      raise analysis.RecoverableAnalysisError('Could not load file %s for '
+                                              'hashing.' % file_path)
+    return digests
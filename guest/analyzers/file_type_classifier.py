@@ -0,0 +1,146 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""In-process file type classification.
+
+This classifier mirrors the way FileAnalyzer used to map the output of
+/usr/bin/file to file types, without forking a process for every file. It only
+looks at a file header:
+  - files starting with the ELF magic number are binaries,
+  - files starting with a shebang line for a shell are scripts,
+  - files with no binary control characters in their header are text files,
+  - everything else, including empty files, symbolic links and special files,
+    is classified as other.
+"""
+
+import os
+import stat
+import sys
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from common import instrumentation
+from common import wheelbarrow_pb2
+from guest.analyzers.digest_cache import DigestCache
+
+
+class FileTypeClassifier(object):
+  """A file type classifier based on file headers."""
+
+  # Number of bytes examined by the text heuristic.
+  _HEADER_SIZE = 64 * 1024
+  _ELF_MAGIC = '\x7fELF'
+  _SHEBANG = '#!'
+  # The interpreters for which file reports a "shell script".
+  _SHELLS = frozenset(['sh', 'bash', 'csh', 'tcsh', 'ksh'])
+  # Control characters which do not appear in text files, following the
+  # heuristic used by file.
+  _BINARY_CHARACTERS = ''.join(
+      chr(c) for c in range(0x20) if c not in (0x07, 0x08, 0x09, 0x0a, 0x0b,
+                                               0x0c, 0x0d, 0x1b)) + '\x7f'
+  # Map from stat keys to known file types (e.g., from a baseline manifest).
+  _known_file_types = {}
+
+  @staticmethod
+  def ClassifyFile(file_path):
+    """Classify a file.
+
+    Symbolic links are not followed, consistently with file.
+
+    Args:
+      file_path: The path to a file.
+
+    Returns:
+      The FileResult file type of the file.
+
+    Raises:
+      IOError or OSError if the file cannot be read.
+    """
+
+    stat_result = os.lstat(file_path)
+    if not stat.S_ISREG(stat_result.st_mode):
+      return wheelbarrow_pb2.FileResult.OTHER
+    file_type = FileTypeClassifier._known_file_types.get(
+        DigestCache.GetStatKey(stat_result))
+    if file_type is not None:
+      return file_type
+    with open(file_path, 'rb') as in_file:
+      header = in_file.read(FileTypeClassifier._HEADER_SIZE)
+    instrumentation.RecordBytesRead(len(header))
+    return FileTypeClassifier.ClassifyHeader(header)
+
+  @staticmethod
+  def AddKnownFileType(stat_key, file_type):
+    """Record the type of a file, so that it does not have to be read again.
+
+    Args:
+      stat_key: The stat key of a regular file, as returned by
+                DigestCache.GetStatKey().
+      file_type: The FileResult file type of the file.
+    """
+
+    FileTypeClassifier._known_file_types[stat_key] = file_type
+
+  @staticmethod
+  def ClassifyHeader(header):
+    """Classify the contents of a regular file given its header.
+
+    Args:
+      header: The first bytes of a file.
+
+    Returns:
+      The FileResult file type corresponding to the header.
+    """
+
+    if not header:
+      return wheelbarrow_pb2.FileResult.OTHER
+    if header.startswith(FileTypeClassifier._ELF_MAGIC):
+      return wheelbarrow_pb2.FileResult.BINARY
+    is_text = (len(header.translate(None, FileTypeClassifier._BINARY_CHARACTERS))
+               == len(header))
+    if (header.startswith(FileTypeClassifier._SHEBANG) and is_text and
+        FileTypeClassifier._GetInterpreter(header) in
+        FileTypeClassifier._SHELLS):
+      return wheelbarrow_pb2.FileResult.SCRIPT
+    if is_text:
+      return wheelbarrow_pb2.FileResult.TEXT
+    return wheelbarrow_pb2.FileResult.OTHER
+
+  @staticmethod
+  def _GetInterpreter(header):
+    """Get the name of the interpreter in a shebang line.
+
+    Args:
+      header: A file header starting with a shebang.
+
+    Returns:
+      The base name of the interpreter (e.g., 'bash'), or None if there is none.
+      For '#!/usr/bin/env <interpreter>', the name of the interpreter is
+      returned.
+    """
+
+    shebang_line = header[len(FileTypeClassifier._SHEBANG):].split('\n', 1)[0]
+    words = shebang_line.split()
+    if not words:
+      return None
+    interpreter = os.path.basename(words[0])
+    if interpreter == 'env':
+      arguments = [word for word in words[1:] if not word.startswith('-')]
+      return os.path.basename(arguments[0]) if arguments else None
+    return interpreter
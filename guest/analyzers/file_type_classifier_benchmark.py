@@ -0,0 +1,113 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Compare the in-process file type classifier with forking /usr/bin/file.
+
+     Usage: %s
+       [-r|--roots <comma-separated list of directories to walk>]
+       [-n|--max_files <maximum number of files to classify>]
+"""
+
+import gflags
+import os
+import subprocess
+import sys
+import time
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from common import wheelbarrow_pb2
+from guest.analyzers.file_type_classifier import FileTypeClassifier
+
+
+FLAGS = gflags.FLAGS
+
+gflags.DEFINE_list('roots', ['/bin', '/etc', '/usr/lib'], 'The directories '
+                   'containing the files to classify.', short_name='r')
+gflags.DEFINE_integer('max_files', 5000, 'The maximum number of files to '
+                      'classify.', short_name='n')
+
+
+def ClassifyFileWithFork(file_path):
+  """Classify a file by forking /usr/bin/file, as FileAnalyzer used to."""
+
+  file_output = subprocess.check_output(['/usr/bin/file', file_path])
+  if 'shell script' in file_output:
+    return wheelbarrow_pb2.FileResult.SCRIPT
+  elif 'ELF' in file_output:
+    return wheelbarrow_pb2.FileResult.BINARY
+  elif 'text' in file_output:
+    return wheelbarrow_pb2.FileResult.TEXT
+  else:
+    return wheelbarrow_pb2.FileResult.OTHER
+
+
+def ListFiles(roots, max_files):
+  """List up to max_files readable regular files under some directories."""
+
+  file_paths = []
+  for root in roots:
+    for (dir_path, _, file_names) in os.walk(root):
+      for file_name in file_names:
+        file_path = os.path.join(dir_path, file_name)
+        if os.path.isfile(file_path) and os.access(file_path, os.R_OK):
+          file_paths.append(file_path)
+          if len(file_paths) >= max_files:
+            return file_paths
+  return file_paths
+
+
+def TimeClassifier(classifier, file_paths):
+  """Classify files and return the results and the elapsed time."""
+
+  start = time.time()
+  file_types = [classifier(file_path) for file_path in file_paths]
+  return (file_types, time.time() - start)
+
+
+def main(argv):
+  argv = FLAGS(argv)
+  file_paths = ListFiles(FLAGS.roots, FLAGS.max_files)
+  if not file_paths:
+    print 'No files to classify.'
+    return 1
+
+  (fork_types, fork_time) = TimeClassifier(ClassifyFileWithFork, file_paths)
+  (classifier_types, classifier_time) = TimeClassifier(
+      FileTypeClassifier.ClassifyFile, file_paths)
+
+  print 'Classified %d files.' % len(file_paths)
+  for (name, elapsed) in (('/usr/bin/file', fork_time),
+                          ('FileTypeClassifier', classifier_time)):
+    print '%-20s %8.3f s %10.1f files/s' % (name, elapsed,
+                                            len(file_paths) / elapsed)
+  mismatches = [(file_path, fork_type, classifier_type)
+                for (file_path, fork_type, classifier_type)
+                in zip(file_paths, fork_types, classifier_types)
+                if fork_type != classifier_type]
+  print '%d mismatches.' % len(mismatches)
+  for (file_path, fork_type, classifier_type) in mismatches:
+    print '  %s: file says %s, classifier says %s' % (
+        file_path, wheelbarrow_pb2.FileResult.FileType.Name(fork_type),
+        wheelbarrow_pb2.FileResult.FileType.Name(classifier_type))
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv))
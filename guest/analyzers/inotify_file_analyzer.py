@@ -26,6 +26,7 @@ sys.path.append(WHEELBARROW_HOME)
 
 
 from common import wheelbarrow_pb2
+from guest import analysis
 from guest.analyzers.file_analyzer import FileAnalyzer
 from guest.analyzers.inotify_manager import InotifyManager
 
@@ -40,8 +41,15 @@ class InotifyFileAnalyzer(FileAnalyzer):
   def __init__(self):
     self._inotify_manager = InotifyManager()
     self._watched_paths = set()
+    # Triggers after which some events had been dropped.
+    self._truncated_triggers = set()
     super(InotifyFileAnalyzer, self).__init__()
 
+  def Configure(self, descriptor):
+    super(InotifyFileAnalyzer, self).Configure(descriptor)
+    if descriptor.HasField('max_recorded_paths'):
+      InotifyManager.SetMaxRecordedPaths(descriptor.max_recorded_paths)
+
   def _GetEventNames(self):
     """Get the names of the inotify events that are being watched.
 
@@ -82,14 +90,29 @@ class InotifyFileAnalyzer(FileAnalyzer):
       return
     snapshot = self._inotify_manager.GetAffectedPaths(event_names)
     self._analysis_results[trigger] = snapshot
-    for path in snapshot.elements():
-      self._RecordFileType(path, path)
+    if self._inotify_manager.IsTruncated():
+      self._truncated_triggers.add(trigger)
+    for path in snapshot:
+      # The file may have been deleted since the snapshot was taken. Its type
+      # cannot be read any more, which should not prevent recording the types
+      # of the other paths.
+      try:
+        self._RecordFileType(path, path)
+      except analysis.RecoverableAnalysisError:
+        self._file_types[path] = wheelbarrow_pb2.FileResult.OTHER
+
+  def GetTriggerState(self, unused_trigger):
+    # Event counts are relative to when the paths started being watched in this
+    # broker run, so they cannot be restored in another run.
+    return None
 
   def AddDiffResults(self, diff_pair, analysis_result):
     before = self._GetAnalysisResultForTrigger(diff_pair.before)
     after = self._GetAnalysisResultForTrigger(diff_pair.after)
 
     affected_files = after - before
+    if diff_pair.after in self._truncated_triggers:
+      analysis_result.truncated = True
     for path in affected_files:
       self._PrepareDiffFileResult(path, analysis_result, wheelbarrow_pb2.ADD,
                                   diff_pair)
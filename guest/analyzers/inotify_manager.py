@@ -19,41 +19,94 @@
 #     limitations under the License.
 """Inotify manager."""
 
+import array
 from collections import Counter
 import os.path
-import time
+import sys
+import threading
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
 
 import pyinotify
 
+from guest.analyzers.inotify_notifier import DrainableNotifier
+
 
 class RecordingProcessEvent(pyinotify.ProcessEvent):
-  """Class to process an event by recording which path was affected by it."""
+  """Class to process an event by recording which path was affected by it.
 
-  def __init__(self):
+  Events are processed in the notifier thread, so recording them is kept cheap:
+  paths are interned and identified by the watch descriptor and name of the
+  events, no system call is made per event, and counts are kept in arrays
+  indexed by path identifiers. At most max_paths distinct paths are recorded.
+  Events on further paths are dropped and the store is marked as truncated.
+
+  Attributes:
+    max_paths: The maximum number of distinct paths recorded.
+    _paths: A list of recorded paths, indexed by path identifiers.
+    _path_ids: A map from paths to path identifiers.
+    _watch_path_ids: A map from watch descriptors to maps from event names (file
+                     names relative to the watched path) to path identifiers.
+    _affected_paths: A map from event names to arrays of event counts, indexed
+                     by path identifiers.
+    _truncated: Whether some events were dropped.
+  """
+
+  DEFAULT_MAX_PATHS = 100000
+
+  def __init__(self, max_paths=DEFAULT_MAX_PATHS):
+    self.max_paths = max_paths
+    self._paths = []
+    self._path_ids = {}
+    self._watch_path_ids = {}
     self._affected_paths = {}
+    self._truncated = False
 
   # We have to override this function, but the naming style is not right.
   def process_default(self, event):   # pylint: disable=g-bad-name
     """Process an event.
 
     Each file that is affected has a counter which measures how many times it
-    was affected by an event. This function increments that counter.
+    was affected by an event. This function increments that counter. Events on
+    directories are ignored.
 
     Args:
       event: A pyinotify.Event.
     """
 
-    path = (event.path if os.path.isfile(event.path)
-            else os.path.join(event.path, event.name))
-    if os.path.isfile(path):
-      event_name = event.maskname
-      if event_name not in self._affected_paths:
-        self._affected_paths[event_name] = Counter()
-      self._affected_paths[event_name][path] += 1
+    if event.mask & pyinotify.IN_Q_OVERFLOW:
+      self._truncated = True
+      return
+    if event.mask & pyinotify.IN_IGNORED:
+      # The watch descriptor was removed and may be reused for another path.
+      self._watch_path_ids.pop(event.wd, None)
+      return
+    if event.mask & pyinotify.IN_ISDIR:
+      return
+
+    names = self._watch_path_ids.get(event.wd)
+    if names is None:
+      names = self._watch_path_ids[event.wd] = {}
+    path_id = names.get(event.name)
+    if path_id is None:
+      path_id = self._InternPath(event.pathname)
+      if path_id is None:
+        return
+      names[event.name] = path_id
+
+    counts = self._affected_paths.get(event.maskname)
+    if counts is None:
+      counts = self._affected_paths[event.maskname] = array.array('L')
+    if path_id >= len(counts):
+      counts.extend([0] * (len(self._paths) - len(counts)))
+    counts[path_id] += 1
 
   def GetAffectedPaths(self, event_name):
     """Get a counter for the paths affected by an event.
 
+    Paths which are not regular files are left out, including paths which do
+    not exist any more.
+
     Args:
       event_name: The name of an inotify event, as a string.
 
@@ -62,7 +115,38 @@ class RecordingProcessEvent(pyinotify.ProcessEvent):
       that unaffected paths are not in the counter.
     """
 
-    return self._affected_paths.get(event_name)
+    counts = self._affected_paths.get(event_name)
+    if counts is None:
+      return None
+    return Counter(dict(
+        (self._paths[path_id], count) for (path_id, count) in enumerate(counts)
+        if count and os.path.isfile(self._paths[path_id])))
+
+  def IsTruncated(self):
+    """Determine if some events were dropped."""
+
+    return self._truncated
+
+  def _InternPath(self, path):
+    """Get the identifier of a path, assigning one if needed.
+
+    Args:
+      path: A path.
+
+    Returns:
+      The identifier of the path, or None if the maximum number of paths was
+      reached.
+    """
+
+    path_id = self._path_ids.get(path)
+    if path_id is None:
+      if len(self._paths) >= self.max_paths:
+        self._truncated = True
+        return None
+      path_id = len(self._paths)
+      self._paths.append(path)
+      self._path_ids[path] = path_id
+    return path_id
 
 
 class InotifyManager(object):
@@ -71,22 +155,25 @@ class InotifyManager(object):
   _process_event = None
   _watch_manager = None
   _notifier = None
+  _lock = threading.Lock()
+  # The maximum number of recorded paths requested by analyses, if any.
+  _max_paths = None
 
   def __init__(self):
     if InotifyManager._process_event is None:
       InotifyManager._process_event = RecordingProcessEvent()
       InotifyManager._watch_manager = pyinotify.WatchManager()
-      InotifyManager._notifier = pyinotify.ThreadedNotifier(
-          self._watch_manager, self._process_event)
-      InotifyManager._notifier.start()
+      InotifyManager._notifier = DrainableNotifier(
+          self._watch_manager, self._process_event, InotifyManager._lock)
+      InotifyManager._notifier.Start()
 
   @staticmethod
   def GetAffectedPaths(event_names):
     """Read the counters of affected paths.
 
-    The ThreadedNotifier that we use periodically polls the inotify file
-    descriptor in a separate thread. We wait a bit to make sure that the other
-    thread picks up the latest events.
+    Events are read in a separate thread. Before reading the counters, all the
+    events queued so far are drained, so that every event caused before the call
+    is counted.
 
     Args:
       event_names: A list of inotify event names (list of strings).
@@ -96,15 +183,41 @@ class InotifyManager(object):
       a given event.
     """
 
-    time.sleep(0.1)
     result = Counter()
-    for event_name in event_names:
-      counter_for_one_event = InotifyManager._process_event.GetAffectedPaths(
-          event_name)
-      if counter_for_one_event is not None:
-        result += counter_for_one_event
+    with InotifyManager._lock:
+      InotifyManager._notifier.Drain()
+      for event_name in event_names:
+        counter_for_one_event = InotifyManager._process_event.GetAffectedPaths(
+            event_name)
+        if counter_for_one_event is not None:
+          result += counter_for_one_event
     return result
 
+  @staticmethod
+  def IsTruncated():
+    """Determine if some events were dropped because of the path cap."""
+
+    with InotifyManager._lock:
+      InotifyManager._notifier.Drain()
+      return InotifyManager._process_event.IsTruncated()
+
+  @staticmethod
+  def SetMaxRecordedPaths(max_paths):
+    """Set the maximum number of distinct paths recorded.
+
+    The recorded paths are shared by all inotify analyses, so the largest
+    maximum requested is used.
+
+    Args:
+      max_paths: A number of paths.
+    """
+
+    with InotifyManager._lock:
+      if (InotifyManager._max_paths is None
+          or max_paths > InotifyManager._max_paths):
+        InotifyManager._max_paths = max_paths
+        InotifyManager._process_event.max_paths = max_paths
+
   @staticmethod
   def StartWatchingPath(path, event_names, recursive=True):
     """Start watching a path.
@@ -116,13 +229,21 @@ class InotifyManager(object):
                  be watched as well.
     """
 
-    InotifyManager._watch_manager.add_watch(
-        path, InotifyManager._MakeMaskFromEventNames(event_names),
-        rec=recursive)
+    with InotifyManager._lock:
+      InotifyManager._watch_manager.add_watch(
+          path, InotifyManager._MakeMaskFromEventNames(event_names),
+          rec=recursive)
 
   @staticmethod
   def Close():
-    InotifyManager._notifier.stop()
+    """Stop watching paths, so that a new manager can be created."""
+
+    if InotifyManager._notifier is not None:
+      InotifyManager._notifier.Stop()
+    InotifyManager._process_event = None
+    InotifyManager._watch_manager = None
+    InotifyManager._notifier = None
+    InotifyManager._max_paths = None
 
   @staticmethod
   def _MakeMaskFromEventNames(event_names):
@@ -0,0 +1,100 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""An inotify notifier whose pending events can be drained on demand."""
+
+import select
+import threading
+
+import pyinotify
+
+
+class DrainableNotifier(pyinotify.Notifier):
+  """A notifier which reads events in the background and can be drained.
+
+  Inotify events are queued when the system call which causes them returns.
+  Draining the inotify file descriptor until it is empty therefore processes
+  every event caused before the drain started, without waiting for the
+  background thread to catch up.
+
+  Events are processed with a lock held, both in the background thread and when
+  draining, so that callers holding the lock see a consistent state.
+
+  Attributes:
+    _lock: The lock held while processing events.
+    _poll_timeout: How long the background thread waits for events before
+                   checking whether it should stop, in seconds.
+    _stopping: An event set when the notifier is stopped.
+    _reader_thread: The background thread.
+  """
+
+  def __init__(self, watch_manager, default_proc_fun, lock, poll_timeout=0.1):
+    pyinotify.Notifier.__init__(self, watch_manager, default_proc_fun)
+    self._lock = lock
+    self._poll_timeout = poll_timeout
+    self._stopping = threading.Event()
+    self._reader_thread = threading.Thread(target=self._ReadEvents)
+    self._reader_thread.daemon = True
+
+  def Start(self):
+    """Start reading events in the background."""
+
+    self._reader_thread.start()
+
+  def Drain(self):
+    """Process all queued events, without blocking.
+
+    The caller should hold the lock.
+    """
+
+    while self.check_events(timeout=0):
+      self.read_events()
+      self.process_events()
+
+  def Stop(self):
+    """Stop reading events and close the inotify file descriptor.
+
+    This does not take the lock, since it may be called from a signal handler
+    while the interrupted thread holds it. The background thread is given a
+    bounded amount of time to exit.
+    """
+
+    self._stopping.set()
+    if self._reader_thread.is_alive():
+      self._reader_thread.join(self._poll_timeout * 10)
+    self.stop()
+
+  def _ReadEvents(self):
+    """Read events until the notifier is stopped.
+
+    Events are read in the background so that the kernel event queue does not
+    overflow between drains. The thread waits on the file descriptor with
+    select() rather than with the poll object of the notifier, which is only
+    used with the lock held.
+    """
+
+    fd = self._watch_manager.get_fd()
+    while not self._stopping.is_set():
+      (readable, _, _) = select.select([fd], [], [], self._poll_timeout)
+      if readable:
+        with self._lock:
+          # The events may have been drained while waiting for the lock, and
+          # reading an empty inotify file descriptor fails.
+          if not self._stopping.is_set():
+            self.Drain()
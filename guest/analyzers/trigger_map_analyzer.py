@@ -41,6 +41,12 @@ class TriggerMapAnalyzer(Analyzer):
   def __init__(self):
     self._analysis_results = {}
 
+  def GetTriggerState(self, trigger):
+    return self._analysis_results.get(trigger)
+
+  def RestoreTriggerState(self, trigger, state, unused_suite):
+    self._analysis_results[trigger] = state
+
   def _AddAnalysisResult(self, trigger, result):
     """Add an analysis result.
 
@@ -0,0 +1,102 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Change journal test."""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from guest.analyzers.change_journal import ChangeJournal
+
+
+class ChangeJournalTest(unittest.TestCase):
+  def setUp(self):
+    self.tmp_dir = tempfile.mkdtemp()
+    self.watched_dir = os.path.join(self.tmp_dir, 'watched')
+    self.sub_dir = os.path.join(self.watched_dir, 'sub_dir')
+    os.makedirs(self.sub_dir)
+    self.file_path = os.path.join(self.sub_dir, 'file')
+    ChangeJournalTest._WriteFile(self.file_path)
+    ChangeJournal.Start([self.watched_dir, os.path.join(self.tmp_dir, 'none')])
+    self.generation = ChangeJournal.Sync()
+
+  def testIsWatching(self):
+    self.assertTrue(ChangeJournal.IsWatching(self.watched_dir))
+    self.assertTrue(ChangeJournal.IsWatching(self.watched_dir + '/'))
+    self.assertFalse(ChangeJournal.IsWatching(self.sub_dir))
+    self.assertFalse(ChangeJournal.IsWatching(self.tmp_dir))
+
+  def testHasStructuralChangesSinceWithNoChange(self):
+    # Modifying a file is not a structural change.
+    ChangeJournalTest._WriteFile(self.file_path)
+    ChangeJournal.Sync()
+    self.assertFalse(ChangeJournal.HasStructuralChangesSince(
+        self.watched_dir, self.generation))
+
+  def testHasStructuralChangesSinceWithNewFile(self):
+    ChangeJournalTest._WriteFile(os.path.join(self.sub_dir, 'new_file'))
+    self.assertTrue(ChangeJournal.HasStructuralChangesSince(
+        self.watched_dir, self.generation))
+    next_generation = ChangeJournal.Sync()
+    self.assertFalse(ChangeJournal.HasStructuralChangesSince(
+        self.watched_dir, next_generation))
+
+  def testHasStructuralChangesSinceWithDeletedFile(self):
+    os.remove(self.file_path)
+    self.assertTrue(ChangeJournal.HasStructuralChangesSince(
+        self.watched_dir, self.generation))
+
+  def testHasStructuralChangesSinceWithNewDirectory(self):
+    new_dir = os.path.join(self.sub_dir, 'new_dir')
+    os.mkdir(new_dir)
+    next_generation = ChangeJournal.Sync()
+    # Changes in the new directory are journaled.
+    ChangeJournalTest._WriteFile(os.path.join(new_dir, 'new_file'))
+    self.assertTrue(ChangeJournal.HasStructuralChangesSince(
+        self.watched_dir, next_generation))
+
+  def testHasStructuralChangesSinceWithMovedDirectory(self):
+    moved_dir = os.path.join(self.watched_dir, 'moved_dir')
+    os.rename(self.sub_dir, moved_dir)
+    next_generation = ChangeJournal.Sync()
+    os.remove(os.path.join(moved_dir, 'file'))
+    self.assertTrue(ChangeJournal.HasStructuralChangesSince(
+        self.watched_dir, next_generation))
+
+  def testHasStructuralChangesSinceWithUnwatchedPath(self):
+    self.assertTrue(ChangeJournal.HasStructuralChangesSince(
+        self.tmp_dir, self.generation))
+
+  def tearDown(self):
+    ChangeJournal.Close()
+    shutil.rmtree(self.tmp_dir)
+
+  @staticmethod
+  def _WriteFile(file_path):
+    with open(file_path, 'w') as f:
+      f.write('test')
+
+
+if __name__ == '__main__':
+  unittest.main()
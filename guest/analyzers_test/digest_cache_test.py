@@ -0,0 +1,110 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Digest cache test."""
+
+import hashlib
+import mox
+import os
+import sys
+import tempfile
+import unittest
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+
+from guest.analyzers import digest_cache
+from guest.analyzers.digest_cache import DigestCache
+
+
+class DigestCacheTest(unittest.TestCase):
+  def setUp(self):
+    self.mox = mox.Mox()
+    DigestCache.Clear()
+    (file_descriptor, self.file_path) = tempfile.mkstemp()
+    os.close(file_descriptor)
+    self.contents = 'test contents'
+    self.WriteFile(self.contents)
+
+  def testGetDigests(self):
+    digests = DigestCache.GetDigests(self.file_path, ('md5', 'sha256'))
+    self.assertEqual(digests, (hashlib.md5(self.contents).hexdigest(),
+                               hashlib.sha256(self.contents).hexdigest()))
+
+  def testGetDigestsReadsFileOnce(self):
+    self.mox.StubOutWithMock(digest_cache, 'ComputeFileDigests')
+    digest_cache.ComputeFileDigests(self.file_path, ['sha256']).AndReturn(
+        ('digest',))
+    self.mox.ReplayAll()
+    first_digests = DigestCache.GetDigests(self.file_path, ('sha256',))
+    second_digests = DigestCache.GetDigests(self.file_path, ('sha256',))
+    self.mox.VerifyAll()
+    self.assertEqual(first_digests, second_digests)
+
+  def testGetDigestsWithMissingHash(self):
+    self.mox.StubOutWithMock(digest_cache, 'ComputeFileDigests')
+    digest_cache.ComputeFileDigests(self.file_path, ['sha256']).AndReturn(
+        ('sha256_digest',))
+    digest_cache.ComputeFileDigests(self.file_path, ['sha1']).AndReturn(
+        ('sha1_digest',))
+    self.mox.ReplayAll()
+    DigestCache.GetDigests(self.file_path, ('sha256',))
+    digests = DigestCache.GetDigests(self.file_path, ('sha1', 'sha256'))
+    self.mox.VerifyAll()
+    self.assertEqual(digests, ('sha1_digest', 'sha256_digest'))
+
+  def testGetDigestsWithModifiedFile(self):
+    DigestCache.GetDigests(self.file_path, ('sha256',))
+    new_contents = 'new test contents'
+    self.WriteFile(new_contents)
+    self.assertEqual(DigestCache.GetDigests(self.file_path, ('sha256',)),
+                     (hashlib.sha256(new_contents).hexdigest(),))
+
+  def testGetDigestsWithEmptyFile(self):
+    self.WriteFile('')
+    self.mox.StubOutWithMock(digest_cache, 'ComputeFileDigests')
+    digest_cache.ComputeFileDigests(self.file_path, ['sha256']).AndReturn(
+        ('digest',))
+    digest_cache.ComputeFileDigests(self.file_path, ['sha256']).AndReturn(
+        ('digest',))
+    self.mox.ReplayAll()
+    DigestCache.GetDigests(self.file_path, ('sha256',))
+    digests = DigestCache.GetDigests(self.file_path, ('sha256',))
+    self.mox.VerifyAll()
+    self.assertEqual(digests, ('digest',))
+
+  def testGetDigestsWithBadFileName(self):
+    self.assertEqual(
+        DigestCache.GetDigests(self.file_path + '_bad', ('sha256',)), None)
+
+  def WriteFile(self, contents):
+    with open(self.file_path, 'w') as f:
+      f.write(contents)
+    # Make sure that the modification is visible even on file systems with a
+    # coarse timestamp granularity.
+    os.utime(self.file_path, (0, len(contents)))
+
+  def tearDown(self):
+    self.mox.UnsetStubs()
+    self.mox.ResetAll()
+    os.remove(self.file_path)
+
+
+if __name__ == '__main__':
+  unittest.main()
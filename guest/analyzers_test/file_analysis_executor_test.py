@@ -0,0 +1,72 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""File analysis executor test."""
+
+import os
+import sys
+import unittest
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+
+from common import wheelbarrow_pb2
+from guest.analyzers import file_analysis_executor
+
+
+def Square(item):
+  return item * item
+
+
+class FileAnalysisExecutorTest(unittest.TestCase):
+  def setUp(self):
+    self.items = range(100)
+    self.expected_results = [item * item for item in self.items]
+
+  def testSerialMap(self):
+    executor = file_analysis_executor.FileAnalysisExecutor()
+    self.assertEqual(executor.Map(Square, self.items), self.expected_results)
+
+  def testThreadPoolMap(self):
+    executor = file_analysis_executor.ThreadPoolFileAnalysisExecutor(4)
+    self.assertEqual(executor.Map(Square, self.items), self.expected_results)
+    # The pool is reused across calls.
+    self.assertEqual(executor.Map(Square, self.items), self.expected_results)
+
+  def testProcessPoolMap(self):
+    executor = file_analysis_executor.ProcessPoolFileAnalysisExecutor(2)
+    self.assertEqual(executor.Map(Square, self.items), self.expected_results)
+
+  def testMakeFileAnalysisExecutor(self):
+    descriptor = wheelbarrow_pb2.AnalysisDescriptor()
+    self.assertEqual(
+        type(file_analysis_executor.MakeFileAnalysisExecutor(descriptor)),
+        file_analysis_executor.FileAnalysisExecutor)
+    descriptor.workers = 4
+    self.assertEqual(
+        type(file_analysis_executor.MakeFileAnalysisExecutor(descriptor)),
+        file_analysis_executor.ThreadPoolFileAnalysisExecutor)
+    descriptor.executor = wheelbarrow_pb2.AnalysisDescriptor.PROCESS_POOL
+    self.assertEqual(
+        type(file_analysis_executor.MakeFileAnalysisExecutor(descriptor)),
+        file_analysis_executor.ProcessPoolFileAnalysisExecutor)
+
+
+if __name__ == '__main__':
+  unittest.main()
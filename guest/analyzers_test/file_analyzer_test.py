@@ -24,6 +24,7 @@ import logging
 import mox
 import os
 import sys
+import tempfile
 import unittest
 WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
 sys.path.append(WHEELBARROW_HOME)
@@ -60,6 +61,90 @@ class FileAnalyzerTest(unittest.TestCase):
         file_analyzer._GetAnalysisResultForTrigger(trigger)[self.script],
         out)
 
+  def testRunAnalysisWithRecoverableAnalysisError(self):
+    trigger = wheelbarrow_pb2.EXTRACT
+    bad_file_name = os.path.join(self.base_dir, 'bad_file_name')
+    self.mox.StubOutWithMock(FileAnalyzer, '_PerformAnalysis')
+    self.mox.StubOutWithMock(logging, 'error')
+    file_analyzer = FileAnalyzer()
+    file_analyzer._PerformAnalysis(bad_file_name).AndRaise(
+        analysis.RecoverableAnalysisError('test'))
+    logging.error('Could not analyze file %s: %s', bad_file_name,
+                  mox.IgnoreArg())
+    file_analyzer._PerformAnalysis(self.script).AndReturn('test')
+    self.mox.ReplayAll()
+
+    argument = [(bad_file_name, bad_file_name), (self.script, self.script)]
+    file_analyzer.RunAnalysis(trigger, argument, '')
+    self.mox.VerifyAll()
+    self.assertEqual(file_analyzer._GetAnalysisResultForTrigger(trigger),
+                     {self.script: 'test'})
+
+  def testRunAnalysisWithThreadPool(self):
+    trigger = wheelbarrow_pb2.EXTRACT
+    descriptor = wheelbarrow_pb2.AnalysisDescriptor()
+    descriptor.workers = 4
+    self.mox.stubs.Set(FileAnalyzer, '_PerformAnalysis',
+                       lambda unused_self, file_path: file_path)
+    file_analyzer = FileAnalyzer()
+    file_analyzer.Configure(descriptor)
+
+    argument = [(self.script, '%s_%d' % (self.script, i)) for i in range(20)]
+    file_analyzer.RunAnalysis(trigger, argument, '')
+    self.assertEqual(file_analyzer._GetAnalysisResultForTrigger(trigger),
+                     dict((rel_path, self.script)
+                          for (_, rel_path) in argument))
+    self.assertEqual(file_analyzer._GetFileType(argument[0][1]),
+                     wheelbarrow_pb2.FileResult.SCRIPT)
+
+  def testRunAnalysisWithIncrementalSnapshot(self):
+    descriptor = wheelbarrow_pb2.AnalysisDescriptor()
+    descriptor.incremental_snapshot = True
+    (file_descriptor, file_path) = tempfile.mkstemp()
+    os.write(file_descriptor, 'test')
+    os.close(file_descriptor)
+    self.mox.StubOutWithMock(FileAnalyzer, '_PerformAnalysis')
+    file_analyzer = FileAnalyzer()
+    file_analyzer.Configure(descriptor)
+    file_analyzer._PerformAnalysis(file_path).AndReturn('before')
+    file_analyzer._PerformAnalysis(file_path).AndReturn('after')
+    self.mox.ReplayAll()
+
+    argument = [(file_path, file_path)]
+    file_analyzer.RunAnalysis(wheelbarrow_pb2.EXTRACT, argument, '')
+    # The file is unchanged, so it is not analyzed again.
+    file_analyzer.RunAnalysis(wheelbarrow_pb2.INSTALL, argument, '')
+    os.utime(file_path, (0, 0))
+    file_analyzer.RunAnalysis(wheelbarrow_pb2.REMOVE, argument, '')
+    os.remove(file_path)
+    self.mox.VerifyAll()
+    for (trigger, result) in ((wheelbarrow_pb2.EXTRACT, 'before'),
+                              (wheelbarrow_pb2.INSTALL, 'before'),
+                              (wheelbarrow_pb2.REMOVE, 'after')):
+      self.assertEqual(file_analyzer._GetAnalysisResultForTrigger(trigger),
+                       {file_path: result})
+
+  def testRestoreTriggerState(self):
+    trigger = wheelbarrow_pb2.EXTRACT
+    self.mox.StubOutWithMock(FileAnalyzer, '_PerformAnalysis')
+    file_analyzer = FileAnalyzer()
+    file_analyzer._PerformAnalysis(self.script).AndReturn('test')
+    self.mox.ReplayAll()
+
+    file_analyzer.RunAnalysis(trigger, [(self.script, 'script')], 'package')
+    self.mox.VerifyAll()
+    state = file_analyzer.GetTriggerState(trigger)
+    self.assertEqual(None,
+                     file_analyzer.GetTriggerState(wheelbarrow_pb2.INSTALL))
+
+    restored_analyzer = FileAnalyzer()
+    restored_analyzer.RestoreTriggerState(trigger, state, 'package')
+    self.assertEqual({'script': 'test'},
+                     restored_analyzer._GetAnalysisResultForTrigger(trigger))
+    self.assertEqual(wheelbarrow_pb2.FileResult.SCRIPT,
+                     restored_analyzer._GetFileType('script'))
+    self.assertEqual('package', restored_analyzer._analysis_suite)
+
   def testRunAnalysisWithNotImplementedPerformAnalysis(self):
     argument = [(self.test_path, self.test_path)]
     analyzer = FileAnalyzer()
@@ -84,7 +169,7 @@ class FileAnalyzerTest(unittest.TestCase):
   def testDetermineFileTypeWithBadFileName(self):
     file_name = os.path.join(self.base_dir, 'bad_file_name')
     self.mox.StubOutWithMock(logging, 'error')
-    logging.error('Could not execute file on %s: %s', file_name,
+    logging.error('Could not read file header of %s: %s', file_name,
                   mox.IgnoreArg())
     self.mox.ReplayAll()
     self.assertRaises(analysis.RecoverableAnalysisError,
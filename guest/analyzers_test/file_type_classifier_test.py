@@ -0,0 +1,96 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""File type classifier test."""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+
+from common import wheelbarrow_pb2
+from guest.analyzers.file_type_classifier import FileTypeClassifier
+
+
+TEST_PATH = 'guest/analyzers_test/test_data'
+
+
+class FileTypeClassifierTest(unittest.TestCase):
+  def setUp(self):
+    self.base_dir = os.path.join(WHEELBARROW_HOME, TEST_PATH)
+    self.tmp_dir = tempfile.mkdtemp()
+
+  def testClassifyHeaderWithElf(self):
+    self.CheckHeader('\x7fELF\x02\x01\x01\x00',
+                     wheelbarrow_pb2.FileResult.BINARY)
+
+  def testClassifyHeaderWithShellScript(self):
+    self.CheckHeader('#!/bin/sh\necho test\n',
+                     wheelbarrow_pb2.FileResult.SCRIPT)
+    self.CheckHeader('#! /bin/bash -e\n', wheelbarrow_pb2.FileResult.SCRIPT)
+    self.CheckHeader('#!/usr/bin/env -i bash\n',
+                     wheelbarrow_pb2.FileResult.SCRIPT)
+
+  def testClassifyHeaderWithOtherScript(self):
+    # file reports "Python script, ASCII text executable".
+    self.CheckHeader('#!/usr/bin/python\nprint 1\n',
+                     wheelbarrow_pb2.FileResult.TEXT)
+    self.CheckHeader('#!\n', wheelbarrow_pb2.FileResult.TEXT)
+
+  def testClassifyHeaderWithText(self):
+    self.CheckHeader('Some text.\n', wheelbarrow_pb2.FileResult.TEXT)
+    self.CheckHeader('Caf\xc3\xa9\r\n\t\x1b[0m', wheelbarrow_pb2.FileResult.TEXT)
+
+  def testClassifyHeaderWithOther(self):
+    self.CheckHeader('', wheelbarrow_pb2.FileResult.OTHER)
+    self.CheckHeader('\x7f\x00\x01F', wheelbarrow_pb2.FileResult.OTHER)
+    self.CheckHeader('#!/bin/sh\n\x00', wheelbarrow_pb2.FileResult.OTHER)
+
+  def testClassifyFile(self):
+    self.assertEqual(
+        FileTypeClassifier.ClassifyFile(os.path.join(self.base_dir, 'script')),
+        wheelbarrow_pb2.FileResult.SCRIPT)
+
+  def testClassifyFileWithSymbolicLink(self):
+    link_path = os.path.join(self.tmp_dir, 'link')
+    os.symlink(os.path.join(self.base_dir, 'script'), link_path)
+    self.assertEqual(FileTypeClassifier.ClassifyFile(link_path),
+                     wheelbarrow_pb2.FileResult.OTHER)
+
+  def testClassifyFileWithDirectory(self):
+    self.assertEqual(FileTypeClassifier.ClassifyFile(self.tmp_dir),
+                     wheelbarrow_pb2.FileResult.OTHER)
+
+  def testClassifyFileWithBadFileName(self):
+    self.assertRaises(OSError, FileTypeClassifier.ClassifyFile,
+                      os.path.join(self.tmp_dir, 'bad_file_name'))
+
+  def CheckHeader(self, header, file_type):
+    self.assertEqual(FileTypeClassifier.ClassifyHeader(header), file_type)
+
+  def tearDown(self):
+    shutil.rmtree(self.tmp_dir)
+
+
+if __name__ == '__main__':
+  unittest.main()
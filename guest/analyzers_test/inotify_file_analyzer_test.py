@@ -33,6 +33,7 @@ from collections import Counter
 from common import test_utils
 from common import wheelbarrow_pb2
 from guest.analyzers import inotify_file_analyzer
+from guest.analyzers import inotify_manager
 
 
 TEST_PATH = 'guest/analyzers_test/test_data'
@@ -60,7 +61,6 @@ class InotifyFileAnalyzerTest(unittest.TestCase):
     argument2 = (self.base_dir, self.base_dir)
     file_analyzer.RunAnalysis(self.trigger2, [argument2], None)
     InotifyFileAnalyzerTest._GenerateOpenAndAccessEvents(self.test_path, 9)
-    time.sleep(1)
     file_analyzer.RunAnalysis(self.trigger3, [argument], None)
     snapshot1 = file_analyzer._GetAnalysisResultForTrigger(self.trigger1)
     snapshot2 = file_analyzer._GetAnalysisResultForTrigger(self.trigger2)
@@ -69,6 +69,37 @@ class InotifyFileAnalyzerTest(unittest.TestCase):
     self._CheckCounterResult(snapshot2, self.test_path, 1)
     self._CheckCounterResult(snapshot3, self.test_path, 20)
 
+  def testRunAnalysisWithDeletedFile(self):
+    file_analyzer = inotify_file_analyzer.InotifyFileReadModifyMoveAnalyzer()
+    argument = (self.tmp_dir, self.tmp_dir)
+    file_analyzer.RunAnalysis(self.trigger1, [argument], None)
+    test_path = os.path.join(self.tmp_dir, self.test_file_name)
+    shutil.copyfile(self.test_path, test_path)
+    os.remove(test_path)
+    file_analyzer.RunAnalysis(self.trigger3, [argument], None)
+    self.assertEqual(
+        file_analyzer._GetAnalysisResultForTrigger(self.trigger3), Counter())
+    analysis_result = wheelbarrow_pb2.AnalysisResult()
+    analysis_result.analysis_name = 'test'
+    diff_pair = wheelbarrow_pb2.AnalysisDescriptor.DiffPair()
+    diff_pair.before = self.trigger1
+    diff_pair.after = self.trigger3
+    file_analyzer.AddDiffResults(diff_pair, analysis_result)
+    self.assertEqual(len(analysis_result.results), 0)
+
+  def testRunAnalysisWithFileDeletedAfterSnapshot(self):
+    # A file may be deleted between the time the snapshot is taken and the time
+    # its type is recorded.
+    deleted_path = os.path.join(self.tmp_dir, 'deleted_file')
+    file_analyzer = inotify_file_analyzer.InotifyFileReadModifyMoveAnalyzer()
+    file_analyzer._inotify_manager.GetAffectedPaths = (
+        lambda unused_event_names: Counter({deleted_path: 1,
+                                            self.test_path: 1}))
+    file_analyzer.RunAnalysis(self.trigger1, [], None)
+    self.assertEqual(file_analyzer._GetFileType(deleted_path),
+                     wheelbarrow_pb2.FileResult.OTHER)
+    self.assertIn(self.test_path, file_analyzer._file_types)
+
   def testAddDiffResults(self):
     reference_file_name = os.path.join(
         WHEELBARROW_HOME, TEST_PATH, 'inotify_file_analyzer_diff_results')
@@ -90,10 +121,26 @@ class InotifyFileAnalyzerTest(unittest.TestCase):
         self, analysis_result, reference_file_name,
         wheelbarrow_pb2.AnalysisResult())
 
+  def testAddDiffResultsWithTruncatedResults(self):
+    file_analyzer = inotify_file_analyzer.InotifyFileAnalyzer()
+    file_analyzer._analysis_results[self.trigger1] = Counter()
+    file_analyzer._analysis_results[self.trigger3] = Counter()
+    file_analyzer._truncated_triggers.add(self.trigger3)
+    analysis_result = wheelbarrow_pb2.AnalysisResult()
+    analysis_result.analysis_name = 'test'
+    diff_pair = wheelbarrow_pb2.AnalysisDescriptor.DiffPair()
+    diff_pair.before = self.trigger1
+    diff_pair.after = self.trigger3
+    file_analyzer.AddDiffResults(diff_pair, analysis_result)
+    self.assertTrue(analysis_result.truncated)
+
   def testGetEventNames(self):
     file_analyzer = inotify_file_analyzer.InotifyFileAnalyzer()
     self.assertRaises(NotImplementedError, file_analyzer._GetEventNames)
 
+  def tearDown(self):
+    inotify_manager.InotifyManager.Close()
+
   def _CheckCounterResult(self, counter, key, count):
     self.assertIn(key, counter)
     self.assertEqual(counter[key], count)
@@ -77,6 +77,55 @@ class InotifyManagerTest(unittest.TestCase):
     affected_paths = manager.GetAffectedPaths(['IN_ACCESS', 'IN_OPEN'])
     self._CheckCounterResult(affected_paths, test_path, 2)
 
+  def testGetAffectedPathsWithManyEvents(self):
+    manager = inotify_manager.InotifyManager()
+    manager.StartWatchingPath(self.tmp_dir, ['IN_CLOSE_WRITE'])
+    test_paths = [os.path.join(self.tmp_dir, 'file_%d' % i)
+                  for i in xrange(100)]
+    for test_path in test_paths:
+      with open(test_path, 'w') as test_file:
+        test_file.write('test')
+    affected_paths = manager.GetAffectedPaths(['IN_CLOSE_WRITE'])
+    self.assertEqual(len(affected_paths), len(test_paths))
+    for test_path in test_paths:
+      self._CheckCounterResult(affected_paths, test_path, 1)
+
+  def testGetAffectedPathsWithDirectoryEvents(self):
+    manager = inotify_manager.InotifyManager()
+    manager.StartWatchingPath(self.tmp_dir, ['IN_CREATE'], recursive=False)
+    os.mkdir(os.path.join(self.tmp_dir, 'test_subdir'))
+    test_path = os.path.join(self.tmp_dir, self.test_file_name)
+    shutil.copyfile(self.test_path, test_path)
+    affected_paths = manager.GetAffectedPaths(['IN_CREATE'])
+    self.assertEqual(affected_paths, {test_path: 1})
+    self.assertFalse(manager.IsTruncated())
+
+  def testGetAffectedPathsWithDeletedFile(self):
+    manager = inotify_manager.InotifyManager()
+    manager.StartWatchingPath(self.tmp_dir, ['IN_CLOSE_WRITE', 'IN_DELETE'])
+    test_path = os.path.join(self.tmp_dir, self.test_file_name)
+    deleted_path = os.path.join(self.tmp_dir, 'deleted_file')
+    shutil.copyfile(self.test_path, test_path)
+    shutil.copyfile(self.test_path, deleted_path)
+    os.remove(deleted_path)
+    affected_paths = manager.GetAffectedPaths(['IN_CLOSE_WRITE', 'IN_DELETE'])
+    self.assertEqual(affected_paths, {test_path: 1})
+
+  def testGetAffectedPathsWithMaxRecordedPaths(self):
+    manager = inotify_manager.InotifyManager()
+    manager.SetMaxRecordedPaths(10)
+    manager.SetMaxRecordedPaths(5)
+    manager.StartWatchingPath(self.tmp_dir, ['IN_CLOSE_WRITE'])
+    for i in xrange(20):
+      with open(os.path.join(self.tmp_dir, 'file_%d' % i), 'w') as test_file:
+        test_file.write('test')
+    affected_paths = manager.GetAffectedPaths(['IN_CLOSE_WRITE'])
+    self.assertEqual(len(affected_paths), 10)
+    self.assertTrue(manager.IsTruncated())
+
+  def tearDown(self):
+    inotify_manager.InotifyManager.Close()
+
   def _CheckCounterResult(self, counter, key, count):
     self.assertIn(key, counter)
     self.assertEqual(counter[key], count)
@@ -0,0 +1,76 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Drainable notifier test."""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+import pyinotify
+
+from guest.analyzers.inotify_notifier import DrainableNotifier
+
+
+class DrainableNotifierTest(unittest.TestCase):
+  def setUp(self):
+    self.tmp_dir = tempfile.mkdtemp()
+    self.events = []
+    self.watch_manager = pyinotify.WatchManager()
+    self.watch_manager.add_watch(self.tmp_dir, pyinotify.IN_CREATE)
+    self.notifier = DrainableNotifier(self.watch_manager, self.events.append,
+                                      threading.Lock())
+
+  def testDrain(self):
+    self._CreateFile('file')
+    self.notifier.Drain()
+    self.assertEqual(['file'], [event.name for event in self.events])
+    self.notifier.Drain()
+    self.assertEqual(1, len(self.events))
+
+  def testDrainWithReaderThread(self):
+    self.notifier.Start()
+    for i in xrange(100):
+      self._CreateFile('file_%d' % i)
+    with self.notifier._lock:
+      self.notifier.Drain()
+      self.assertEqual(100, len(self.events))
+
+  def testStop(self):
+    self.notifier.Start()
+    self.notifier.Stop()
+    self.assertFalse(self.notifier._reader_thread.is_alive())
+    # Stopping twice is harmless.
+    self.notifier.Stop()
+
+  def tearDown(self):
+    self.notifier.Stop()
+    shutil.rmtree(self.tmp_dir)
+
+  def _CreateFile(self, file_name):
+    open(os.path.join(self.tmp_dir, file_name), 'w').close()
+
+
+if __name__ == '__main__':
+  unittest.main()
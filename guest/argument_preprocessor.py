@@ -33,40 +33,151 @@ import sys
 WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
 sys.path.append(WHEELBARROW_HOME)
 
+from guest.tree_walker import WalkFiles
 
-def PreprocessArgument(argument, extract_dir):
+# Regular expression tokens which may look past the text they match.
+_UNPRUNABLE_PATTERN_TOKENS = ('$', '\\Z', '\\b', '\\B', '(?=', '(?!', '(?<')
+
+
+def PreprocessArgument(argument, extract_dir, workers=1):
   """Preprocess an analysis argument.
 
   Args:
     argument: An analysis argument.
     extract_dir: The directory where the package is extracted.
+    workers: The number of threads walking each directory tree.
+
+  Yields:
+    The (file path, relative path) pairs of the analyzer argument.
+  """
+
+  for path_argument in argument.string_args:
+    for file_path_pair in PreprocessPathArgument(argument, path_argument,
+                                                 extract_dir, workers):
+      yield file_path_pair
+
+
+def PreprocessPathArgument(argument, path_argument, extract_dir, workers=1):
+  """Preprocess a single path of an analysis argument.
+
+  Directories whose files would all be excluded by the excluded patterns of the
+  argument are not walked.
+
+  Args:
+    argument: An analysis argument.
+    path_argument: One of the string arguments of the analysis argument.
+    extract_dir: The directory where the package is extracted.
+    workers: The number of threads walking each directory tree.
+
+  Yields:
+    The (file path, relative path) pairs of the analyzer argument corresponding
+    to the path.
+  """
+
+  if not argument.recursive_file_walk:
+    for expanded_path_argument in ExpandPathArgument(argument, path_argument,
+                                                     extract_dir):
+      yield (expanded_path_argument, expanded_path_argument)
+    return
+
+  file_paths = WalkPathArgument(argument, path_argument, extract_dir,
+                                MakeDirectoryFilter(argument, extract_dir),
+                                workers)
+  for file_path_pair in MakeFilePathPairs(argument, file_paths, extract_dir):
+    yield file_path_pair
+
+
+def ExpandPathArgument(argument, path_argument, extract_dir):
+  """Expand the wildcards in a path of an analysis argument.
+
+  Args:
+    argument: An analysis argument.
+    path_argument: One of the string arguments of the analysis argument.
+    extract_dir: The directory where the package is extracted.
 
   Returns:
-    An analyzer argument.
+    A list of paths.
+  """
+
+  prefix = extract_dir if argument.prepend_extract_dir else ''
+  return glob.glob(os.path.join(prefix, path_argument))
+
+
+def WalkPathArgument(argument, path_argument, extract_dir, prune=None,
+                     workers=1):
+  """Walk the directory trees designated by a path of an analysis argument.
+
+  Args:
+    argument: An analysis argument.
+    path_argument: One of the string arguments of the analysis argument.
+    extract_dir: The directory where the package is extracted.
+    prune: A function which takes a directory path and returns True if the
+           directory should not be walked, or None.
+    workers: The number of threads walking each directory tree.
+
+  Yields:
+    The paths of the regular files in the trees, excluded or not.
+  """
+
+  for expanded_path_argument in ExpandPathArgument(argument, path_argument,
+                                                   extract_dir):
+    for file_path in WalkFiles(codecs.encode(expanded_path_argument, 'utf-8'),
+                               prune, workers):
+      yield file_path
+
+
+def MakeFilePathPairs(argument, file_paths, extract_dir):
+  """Pair file paths with their relative paths, leaving out excluded files.
+
+  Args:
+    argument: An analysis argument.
+    file_paths: An iterable of file paths.
+    extract_dir: The directory where the package is extracted.
+
+  Yields:
+    The (file path, relative path) pairs of the files which are not excluded by
+    the argument.
   """
 
   has_prefix = argument.prepend_extract_dir
-  prefix = extract_dir if has_prefix else ''
-  file_paths = []
   excluded_patterns = None
   if argument.excluded_patterns:
     excluded_patterns = re.compile('|'.join(argument.excluded_patterns))
+  for file_path in file_paths:
+    rel_path = (os.path.relpath(file_path, extract_dir) if has_prefix
+                else file_path)
+    if excluded_patterns and excluded_patterns.match(rel_path):
+      continue
+    yield (file_path, rel_path)
 
-  for path_argument in argument.string_args:
-    complete_path_argument = os.path.join(prefix, path_argument)
-    expanded_path_arguments = glob.glob(complete_path_argument)
-    for expanded_path_argument in expanded_path_arguments:
-      if argument.recursive_file_walk:
-        for (dir_path, _, file_names) in os.walk(codecs.encode(expanded_path_argument, 'utf-8')):
-          for file_name in file_names:
-            file_path = os.path.join(dir_path, file_name)
-            if os.path.isfile(file_path):
-              rel_path = (os.path.relpath(file_path, prefix) if has_prefix
-                          else file_path)
-              if excluded_patterns and excluded_patterns.match(rel_path):
-                continue
-              file_paths.append((file_path, rel_path))
-      else:
-        file_paths.append((expanded_path_argument, expanded_path_argument))
-
-  return file_paths
+
+def MakeDirectoryFilter(argument, extract_dir):
+  """Make a function telling which directories only contain excluded files.
+
+  Excluded patterns are matched at the beginning of relative paths. If a pattern
+  matches the beginning of '<directory>/', it matches the relative path of every
+  file under the directory, unless it looks past the matched text. Patterns
+  which may do so (with anchors, word boundaries or lookarounds) are not used.
+
+  Args:
+    argument: An analysis argument.
+    extract_dir: The directory where the package is extracted.
+
+  Returns:
+    A function which takes a directory path and returns True if every file
+    under the directory is excluded, or None if no directory can be excluded.
+  """
+
+  prunable_patterns = [
+      pattern for pattern in argument.excluded_patterns
+      if not any(token in pattern for token in _UNPRUNABLE_PATTERN_TOKENS)]
+  if not prunable_patterns:
+    return None
+  directory_patterns = re.compile('|'.join(prunable_patterns))
+  prefix = extract_dir if argument.prepend_extract_dir else ''
+
+  def Prune(dir_path):
+    rel_dir_path = os.path.relpath(dir_path, prefix) if prefix else dir_path
+    return directory_patterns.match(os.path.join(rel_dir_path, '')) is not None
+
+  return Prune
@@ -0,0 +1,89 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Argument preprocessor test."""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from common import wheelbarrow_pb2
+from guest import argument_preprocessor
+
+
+class ArgumentPreprocessorTest(unittest.TestCase):
+  def setUp(self):
+    self.tmp_dir = tempfile.mkdtemp()
+    for dir_path in ['a/b', 'excluded/c']:
+      os.makedirs(os.path.join(self.tmp_dir, dir_path))
+    for file_path in ['1', 'a/2', 'a/b/3', 'excluded/4', 'excluded/c/5']:
+      open(os.path.join(self.tmp_dir, file_path), 'w').close()
+    self.argument = wheelbarrow_pb2.AnalysisDescriptor.Argument()
+    self.argument.recursive_file_walk = True
+
+  def testPreprocessArgument(self):
+    self.argument.string_args.append(os.path.join(self.tmp_dir, 'a*'))
+    self.argument.string_args.append(os.path.join(self.tmp_dir, 'excluded'))
+    file_paths = [os.path.join(self.tmp_dir, file_path)
+                  for file_path in ['a/2', 'a/b/3', 'excluded/4',
+                                    'excluded/c/5']]
+    self.assertEqual(
+        [(file_path, file_path) for file_path in file_paths],
+        list(argument_preprocessor.PreprocessArgument(self.argument, '')))
+
+  def testPreprocessArgumentWithExtractDir(self):
+    self.argument.prepend_extract_dir = True
+    self.argument.string_args.append('')
+    self.argument.excluded_patterns.append('excluded/c')
+    self.argument.excluded_patterns.append('a/2')
+    file_paths = sorted(argument_preprocessor.PreprocessArgument(
+        self.argument, self.tmp_dir, 2))
+    self.assertEqual(
+        [(os.path.join(self.tmp_dir, rel_path), rel_path)
+         for rel_path in ['1', 'a/b/3', 'excluded/4']], file_paths)
+
+  def testMakeDirectoryFilter(self):
+    self.argument.prepend_extract_dir = True
+    self.argument.excluded_patterns.extend(
+        ['excluded/c', '/a$', 'a/b/.*', 'a/\\b', '[a-z]+/x'])
+    prune = argument_preprocessor.MakeDirectoryFilter(self.argument,
+                                                      self.tmp_dir)
+    self.assertTrue(prune(os.path.join(self.tmp_dir, 'excluded/c')))
+    self.assertTrue(prune(os.path.join(self.tmp_dir, 'excluded/cd')))
+    self.assertTrue(prune(os.path.join(self.tmp_dir, 'a/b')))
+    self.assertTrue(prune(os.path.join(self.tmp_dir, 'a/x')))
+    self.assertFalse(prune(os.path.join(self.tmp_dir, 'excluded')))
+    self.assertFalse(prune(os.path.join(self.tmp_dir, 'a')))
+    self.assertFalse(prune(os.path.join(self.tmp_dir, 'a/c')))
+
+  def testMakeDirectoryFilterWithUnprunablePatterns(self):
+    self.argument.excluded_patterns.extend(['/a$', 'a(?!b)', '/a\\Z'])
+    self.assertIsNone(argument_preprocessor.MakeDirectoryFilter(
+        self.argument, self.tmp_dir))
+
+  def tearDown(self):
+    shutil.rmtree(self.tmp_dir)
+
+
+if __name__ == '__main__':
+  unittest.main()
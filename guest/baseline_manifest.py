@@ -0,0 +1,169 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Baseline manifest of the system files in a VM image.
+
+Every VM starts from the same image, so the state of the system files before
+any package is analyzed is the same for all packages. The manifest records the
+stat tuple, SHA-256 hash and type of these files once per image. At analysis
+time, it seeds the digest cache and the file type classifier, so that only files
+whose stat tuple differs from the manifest are read again.
+
+     Usage: %s
+       --output <path to the output manifest>
+"""
+
+import gflags
+import glob
+import logging
+import os
+import stat
+import sys
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from common import wheelbarrow_pb2
+from common.utils import ComputeFileDigests
+from common.utils import ParseFileToProtobuf
+from common.utils import WriteProtobufToFile
+from guest.analyzers.digest_cache import DigestCache
+from guest.analyzers.file_type_classifier import FileTypeClassifier
+from guest.argument_preprocessor import PreprocessArgument
+
+
+FLAGS = gflags.FLAGS
+
+gflags.DEFINE_string('output', None, 'The path to the output manifest.')
+
+
+_ANALYSIS_DESCRIPTORS_PATH = WHEELBARROW_HOME + '/guest/analyses/*'
+_BASELINE_CATEGORY = 'file_system'
+
+
+def GetBaselineFilePaths(descriptors_path=_ANALYSIS_DESCRIPTORS_PATH):
+  """Get the paths of the system files walked by file system analyses.
+
+  Args:
+    descriptors_path: A globbable path to analysis descriptors.
+
+  Returns:
+    A sorted list of file paths.
+  """
+
+  file_paths = set()
+  for descriptor_path in glob.glob(descriptors_path):
+    descriptor = wheelbarrow_pb2.AnalysisDescriptor()
+    if (os.path.isdir(descriptor_path)
+        or not ParseFileToProtobuf(descriptor_path, descriptor, -1, True)):
+      continue
+    if descriptor.category != _BASELINE_CATEGORY:
+      continue
+    for argument in descriptor.arguments:
+      if argument.recursive_file_walk and not argument.prepend_extract_dir:
+        file_paths.update(file_path for (file_path, _)
+                          in PreprocessArgument(argument, ''))
+  return sorted(file_paths)
+
+
+def BuildBaselineManifest(file_paths):
+  """Build a baseline manifest.
+
+  Only regular files are recorded.
+
+  Args:
+    file_paths: A list of file paths.
+
+  Returns:
+    A wheelbarrow_pb2.BaselineManifest.
+  """
+
+  manifest = wheelbarrow_pb2.BaselineManifest()
+  for file_path in file_paths:
+    try:
+      stat_result = os.lstat(file_path)
+      if not stat.S_ISREG(stat_result.st_mode):
+        continue
+      file_type = FileTypeClassifier.ClassifyFile(file_path)
+    except (IOError, OSError) as err:
+      logging.warning('Could not add %s to the baseline manifest: %s',
+                      file_path, err)
+      continue
+    digests = ComputeFileDigests(file_path, ['sha256'])
+    if digests is None:
+      continue
+    entry = manifest.entries.add()
+    entry.path = file_path
+    (entry.mode, entry.device, entry.inode, entry.size, entry.mtime_ns,
+     entry.ctime_ns) = DigestCache.GetStatKey(stat_result)
+    entry.sha256 = digests[0]
+    entry.file_type = file_type
+  return manifest
+
+
+def LoadBaselineManifest(manifest):
+  """Seed the digest cache and the file type classifier with a manifest.
+
+  Args:
+    manifest: A wheelbarrow_pb2.BaselineManifest.
+  """
+
+  for entry in manifest.entries:
+    stat_key = (entry.mode, entry.device, entry.inode, entry.size,
+                entry.mtime_ns, entry.ctime_ns)
+    if entry.HasField('sha256'):
+      DigestCache.AddDigests(stat_key, {'sha256': entry.sha256})
+    if entry.HasField('file_type'):
+      FileTypeClassifier.AddKnownFileType(stat_key, entry.file_type)
+  logging.info('Loaded %d baseline manifest entries.', len(manifest.entries))
+
+
+def LoadBaselineManifestFromFile(manifest_path):
+  """Load a baseline manifest from a file.
+
+  Args:
+    manifest_path: The path to a binary wheelbarrow_pb2.BaselineManifest.
+
+  Returns:
+    True if the manifest was loaded.
+  """
+
+  manifest = wheelbarrow_pb2.BaselineManifest()
+  if not ParseFileToProtobuf(manifest_path, manifest, -1, False):
+    logging.error('Could not load baseline manifest %s.', manifest_path)
+    return False
+  LoadBaselineManifest(manifest)
+  return True
+
+
+def main(argv):
+  argv = FLAGS(argv)
+  logging.root.setLevel(logging.INFO)
+  if not FLAGS.output:
+    logging.error('No output path was specified.')
+    return 1
+  manifest = BuildBaselineManifest(GetBaselineFilePaths())
+  logging.info('Writing %d baseline manifest entries to %s.',
+               len(manifest.entries), FLAGS.output)
+  if not WriteProtobufToFile(manifest, FLAGS.output, False):
+    return 1
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv))
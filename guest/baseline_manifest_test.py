@@ -0,0 +1,103 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Baseline manifest test."""
+
+import hashlib
+import mox
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+
+from common import wheelbarrow_pb2
+from guest import baseline_manifest
+from guest.analyzers import digest_cache
+from guest.analyzers.digest_cache import DigestCache
+from guest.analyzers.file_type_classifier import FileTypeClassifier
+
+
+class BaselineManifestTest(unittest.TestCase):
+  def setUp(self):
+    self.tmp_dir = tempfile.mkdtemp()
+    self.script_path = os.path.join(self.tmp_dir, 'script')
+    self.script_contents = '#!/bin/sh\necho test\n'
+    with open(self.script_path, 'w') as f:
+      f.write(self.script_contents)
+    self.link_path = os.path.join(self.tmp_dir, 'link')
+    os.symlink(self.script_path, self.link_path)
+    DigestCache.Clear()
+    self.mox = mox.Mox()
+
+  def testGetBaselineFilePaths(self):
+    descriptor_dir = os.path.join(self.tmp_dir, 'analyses')
+    os.mkdir(descriptor_dir)
+    with open(os.path.join(descriptor_dir, 'system'), 'w') as f:
+      f.write('name: "system" description: "" module: "" '
+              'category: "file_system" '
+              'arguments { string_args: "%s" recursive_file_walk: true '
+              'excluded_patterns: ".*/analyses/.*" }' % self.tmp_dir)
+    with open(os.path.join(descriptor_dir, 'package'), 'w') as f:
+      f.write('name: "package" description: "" module: "" '
+              'category: "package" '
+              'arguments { string_args: "/" recursive_file_walk: true }')
+    self.assertEqual(
+        baseline_manifest.GetBaselineFilePaths(
+            os.path.join(descriptor_dir, '*')),
+        [self.link_path, self.script_path])
+
+  def testBuildBaselineManifest(self):
+    manifest = baseline_manifest.BuildBaselineManifest(
+        [self.link_path, self.script_path])
+    self.assertEqual(len(manifest.entries), 1)
+    entry = manifest.entries[0]
+    self.assertEqual(entry.path, self.script_path)
+    self.assertEqual(entry.size, len(self.script_contents))
+    self.assertEqual(entry.sha256,
+                     hashlib.sha256(self.script_contents).hexdigest())
+    self.assertEqual(entry.file_type, wheelbarrow_pb2.FileResult.SCRIPT)
+
+  def testLoadBaselineManifest(self):
+    manifest = baseline_manifest.BuildBaselineManifest([self.script_path])
+    manifest.entries[0].sha256 = 'baseline'
+    manifest.entries[0].file_type = wheelbarrow_pb2.FileResult.BINARY
+    baseline_manifest.LoadBaselineManifest(manifest)
+    # The file should not be read again.
+    self.mox.StubOutWithMock(digest_cache, 'ComputeFileDigests')
+    self.mox.ReplayAll()
+    self.assertEqual(DigestCache.GetDigests(self.script_path, ['sha256']),
+                     ('baseline',))
+    self.assertEqual(FileTypeClassifier.ClassifyFile(self.script_path),
+                     wheelbarrow_pb2.FileResult.BINARY)
+    self.mox.VerifyAll()
+
+  def tearDown(self):
+    self.mox.UnsetStubs()
+    self.mox.ResetAll()
+    DigestCache.Clear()
+    FileTypeClassifier._known_file_types = {}
+    shutil.rmtree(self.tmp_dir)
+
+
+if __name__ == '__main__':
+  unittest.main()
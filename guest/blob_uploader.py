@@ -0,0 +1,101 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Upload of recorded file contents to the blob store of the host.
+
+When the host provides a blob store, recorded file contents are uploaded to it
+as soon as they are read, and results reference them by digest. Since many
+packages change the same files, most contents are already in the store and are
+not sent again. The digests of the blobs known to be in the store are kept, so
+that the store is only checked once per blob.
+"""
+
+import logging
+import os
+import sys
+import threading
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from common import blob_store
+
+
+class BlobUploader(object):
+  """An uploader of file contents, shared by all analyzers in a broker run."""
+
+  _lock = threading.Lock()
+  _store = None
+  # The digests of the blobs which are known to be in the store.
+  _stored_digests = set()
+
+  @staticmethod
+  def Open(blob_dir):
+    """Start uploading contents to a blob store.
+
+    Args:
+      blob_dir: The root directory of the blob store.
+    """
+
+    try:
+      store = blob_store.BlobStore(blob_dir)
+    except blob_store.Error as err:
+      logging.error('Could not open blob store. File contents will be '
+                    'recorded in results: %s', err)
+      return
+    with BlobUploader._lock:
+      BlobUploader._store = store
+      BlobUploader._stored_digests = set()
+
+  @staticmethod
+  def IsOpen():
+    return BlobUploader._store is not None
+
+  @staticmethod
+  def Upload(contents, digest):
+    """Upload file contents to the blob store.
+
+    Args:
+      contents: The contents of a file.
+      digest: The hexadecimal SHA-256 digest of the contents.
+
+    Returns:
+      True if the contents are in the blob store, False if they should be
+      recorded in results instead.
+    """
+
+    store = BlobUploader._store
+    if store is None:
+      return False
+    with BlobUploader._lock:
+      if digest in BlobUploader._stored_digests:
+        return True
+    try:
+      store.Put(contents, digest)
+    except blob_store.Error as err:
+      logging.error('Could not upload file contents: %s', err)
+      return False
+    with BlobUploader._lock:
+      BlobUploader._stored_digests.add(digest)
+    return True
+
+  @staticmethod
+  def Close():
+    with BlobUploader._lock:
+      BlobUploader._store = None
+      BlobUploader._stored_digests = set()
@@ -24,6 +24,7 @@
        [--textout]
        [--nfs <path to NFS configuration file>]
        [--package <name of an application package>]
+       [--resume]
 """
 
 from collections import namedtuple
@@ -38,14 +39,23 @@ WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
 sys.path.append(WHEELBARROW_HOME)
 
 
+from common import result_stream
 from common import wheelbarrow_pb2
+from common.utils import ParseFileToProtobuf
 from common.utils import WriteProtobufToFile
 from guest import broker_initializer
 from guest import deb_triggers
 from guest.analysis import FatalAnalysisError
+from guest.analysis_checkpoint import AnalysisCheckpoint
+from guest.analysis_scheduler import AnalysisScheduler
 from guest.analyzers.inotify_manager import InotifyManager
+from guest.baseline_manifest import LoadBaselineManifestFromFile
+from guest.blob_uploader import BlobUploader
+from guest.file_result_suite_manager import FileResultSuiteManager
 from guest.file_system_analysis_loader import FileSystemAnalysisLoader
+from guest.lease_renewer import LeaseRenewer
 from guest.nfs_broker_initializer import NfsBrokerInitializer
+from guest.path_expansion_service import PathExpansionService
 from guest.triggers import TriggerError
 
 
@@ -54,12 +64,14 @@ FLAGS = gflags.FLAGS
 gflags.DEFINE_string('outdir', './', 'The output directory for the analysis '
                      'results.', short_name='o')
 gflags.DEFINE_boolean('textout', False, 'Activate text output for analysis '
-                      'results. By default, the results are output to a binary '
-                      'protocol buffer.', short_name='t')
+                      'results. By default, the results are streamed to a '
+                      'binary result stream.', short_name='t')
 gflags.DEFINE_string('nfs', "/mnt/broker/analysis.config", 'The path to an NFS '
                      'config file.', short_name='n')
 gflags.DEFINE_string('package', None, 'The name of an application package to be'
                      ' analyzed.', short_name='p')
+gflags.DEFINE_boolean('resume', False, 'Resume the analysis from the checkpoint '
+                      'left by a previous run on the same package.')
 
 
 _ANALYSIS_DESCRIPTORS_PATH = WHEELBARROW_HOME + '/guest/analyses/*'
@@ -78,7 +90,13 @@ class Broker(object):
   """An analysis broker."""
 
   def __init__(self):
+    # The package and timings of the result. Analysis results are written to
+    # the result writer as they are produced.
     self._application_result = wheelbarrow_pb2.ApplicationResult()
+    self._result_writer = None
+    self._analyses = []
+    self._trigger_manager = None
+    self._lease_renewer = None
 
   def StartAnalysis(self):
     """Start the analysis.
@@ -96,6 +114,7 @@ class Broker(object):
 
     package_descriptor = self._context.package_descriptor
     self._application_result.package.CopyFrom(package_descriptor)
+    self._StartLeaseRenewal()
 
     signal.signal(signal.SIGALRM, self.AlarmHandler)
     signal.alarm(self._GetTimeout())
@@ -115,37 +134,66 @@ class Broker(object):
 
     logging.info('Starting analysis.')
 
+    self._LoadBaselineManifest()
+    self._OpenBlobStore()
     analysis_loaders = Broker._PrepareAnalysisLoaders()
     analyses = Broker._LoadAnalyses(analysis_loaders)
+    self._analyses = analyses
+    PathExpansionService.Start([argument for analysis in analyses
+                                for argument in analysis.GetArguments()])
 
+    scheduler = AnalysisScheduler(analyses)
     error = None
     try:
       trigger_manager = deb_triggers.DebTriggerManager()
+      self._trigger_manager = trigger_manager
       trigger_manager.SetUpTriggersAndMetadata(self._application_result.package)
+      self._OpenCheckpoint()
       while True:
-        current_trigger = trigger_manager.RunNextTrigger()
+        current_trigger = trigger_manager.RunNextTrigger(
+            scheduler.PrepareTrigger)
         if current_trigger is None:
           break
-        for analysis in analyses:
-          analysis.RunAnalysis(current_trigger)
+        PathExpansionService.StartEpoch()
+        scheduler.RunAnalyses(current_trigger)
+      scheduler.Wait()
     except (FatalAnalysisError, TriggerError) as err:
       logging.error('Error while running triggers and analyses: %s', err)
       error = str(err)
       if not error:
         # Bad situation: we have an error but we don't know what it is.
         error = 'Unknown error.'
+    finally:
+      scheduler.Close()
 
     if not error:
       try:
-        for analysis in analyses:
-          analysis.AddResults(self._application_result)
+        self._WriteAnalysisResults()
       except FatalAnalysisError as err:
         logging.error('Error while adding analysis results: %s', err)
         error = str(err)
         return error
+      except result_stream.Error as err:
+        logging.error('Error while writing analysis results: %s', err)
+        error = 'Could not write analysis results: %s' % err
+        return error
 
     return error
 
+  def _LoadBaselineManifest(self):
+    """Load the baseline manifest of the VM image, if there is one."""
+
+    config = getattr(self._context, 'config', None)
+    if config is not None and config.HasField('baseline_manifest'):
+      LoadBaselineManifestFromFile(config.baseline_manifest)
+
+  def _OpenBlobStore(self):
+    """Upload recorded file contents to the blob store of the host, if any."""
+
+    config = getattr(self._context, 'config', None)
+    if config is not None and config.HasField('blob_dir'):
+      BlobUploader.Open(config.blob_dir)
+
   def _Initialize(self):
     """Initialize the analysis and set the analysis context.
 
@@ -171,6 +219,16 @@ class Broker(object):
       logging.error('No package was specified.')
       raise broker_initializer.Error('No package was specified.')
 
+  def _StartLeaseRenewal(self):
+    """Start renewing the lease on the package, if the host uses leases."""
+
+    config = getattr(self._context, 'config', None)
+    if config is None or not config.HasField('lease_duration'):
+      return
+    self._lease_renewer = LeaseRenewer(self._context.pending_descriptor_path,
+                                       config.lease_duration)
+    self._lease_renewer.Start()
+
   def _GetTimeout(self):
     """Get the analysis timeout using the analysis context.
 
@@ -194,18 +252,76 @@ class Broker(object):
     """
 
     Broker._FinalizeApplicationResult(self._application_result.package, error)
-    context_type = type(self._context).__name__
-    (out_dir, text_out) = ((self._context.config.output_dir,
-                            self._context.config.text_output)
-                           if context_type == 'nfs'
-                           else (FLAGS.outdir, FLAGS.textout))
+    self._AddTimings()
+    (out_dir, text_out) = self._GetOutputSettings()
     self._WriteApplicationResultToFile(out_dir, text_out)
-    if context_type == 'nfs':
-      os.remove(self._context.pending_descriptor_path)
+    # The checkpoint is kept after a failure, so that the analysis can be
+    # resumed.
+    AnalysisCheckpoint.Close(not error)
+    if type(self._context).__name__ == 'nfs':
+      if self._lease_renewer is not None:
+        self._lease_renewer.Stop()
+      self._ReleaseLease()
     InotifyManager.Close()
+    PathExpansionService.Close()
+    BlobUploader.Close()
     if error:
       raise BrokerError(error)
 
+  def _ReleaseLease(self):
+    """Remove the pending descriptor of the package, if it is still ours.
+
+    The host returns the package to the queue when the lease expires, in which
+    case the pending descriptor is removed or belongs to a later attempt of the
+    analysis. The host ignores the results of earlier attempts.
+    """
+
+    path = self._context.pending_descriptor_path
+    pending_descriptor = wheelbarrow_pb2.Package()
+    if not os.path.exists(path):
+      logging.warning('The lease on the package expired.')
+    elif not ParseFileToProtobuf(path, pending_descriptor, -1, False):
+      logging.error('Could not read pending descriptor %s.', path)
+    elif (pending_descriptor.analysis_attempts
+          != self._application_result.package.analysis_attempts):
+      logging.warning('The lease on the package expired and the package is '
+                      'being analyzed again.')
+    else:
+      try:
+        os.remove(path)
+      except OSError as err:
+        logging.warning('Could not remove pending descriptor %s: %s', path,
+                        err)
+
+  def _GetOutputSettings(self):
+    """Get the output directory and format of the application result.
+
+    Returns:
+      A tuple (output directory, True if the output should be in ASCII text).
+    """
+
+    if type(self._context).__name__ == 'nfs':
+      return (self._context.config.output_dir,
+              self._context.config.text_output)
+    return (FLAGS.outdir, FLAGS.textout)
+
+  def _GetResultFileName(self):
+    """Get the base name of the application result file."""
+
+    return ('%s-%s-%s' % (self._application_result.package.name,
+                          self._application_result.package.version,
+                          self._application_result.package.architecture))
+
+  def _OpenCheckpoint(self):
+    """Open the checkpoint file of the package, next to its result file."""
+
+    (out_dir, _) = self._GetOutputSettings()
+    config = getattr(self._context, 'config', None)
+    resume = FLAGS.resume or (config is not None and config.resume)
+    AnalysisCheckpoint.Open(
+        os.path.join(out_dir, '%s.checkpoint' % self._GetResultFileName()),
+        resume)
+
   @staticmethod
   def _PrepareAnalysisLoaders():
     """Prepare analysis loaders.
@@ -254,33 +370,153 @@ class Broker(object):
       package_descriptor.status = wheelbarrow_pb2.Package.DONE
     package_descriptor.analysis_end = int(time.time())
 
+  def _AddTimings(self):
+    """Add the resource usage of triggers and analyses to the result.
+
+    This is also called when the analysis times out, in which case the trigger
+    or analyses that were interrupted are marked as such.
+    """
+
+    timing = self._application_result.timing
+    timing.Clear()
+    if self._trigger_manager is not None:
+      self._trigger_manager.AddTimings(timing)
+    for analysis in self._analyses:
+      analysis.AddTimings(timing)
+
+  def _GetResultWriter(self):
+    """Get the writer of the application result, creating it if needed.
+
+    Binary results are streamed to a result stream as they are produced. ASCII
+    results cannot be streamed, so they are merged in memory and written when
+    the analysis is finalized.
+
+    Returns:
+      A result_stream.ResultRecordWriter.
+
+    Raises:
+      result_stream.Error: If the result stream cannot be created.
+    """
+
+    if self._result_writer is None:
+      (out_dir, text_out) = self._GetOutputSettings()
+      if text_out:
+        self._result_writer = result_stream.ResultMerger()
+      else:
+        self._result_writer = result_stream.ResultStreamWriter(
+            os.path.join(out_dir, self._GetResultFileName()
+                         + result_stream.EXTENSION))
+    return self._result_writer
+
+  def _WriteAnalysisResults(self, completed_triggers_only=False,
+                            skip_failed_analyses=False):
+    """Write the results of the analyses, replacing any written before.
+
+    The analyses of a suite share file results, so they add their results
+    together. The results of each suite or analysis are written and released
+    before the next ones are added.
+
+    Args:
+      completed_triggers_only: True if only the results for triggers after
+                               which the analyses completed should be written.
+      skip_failed_analyses: True if the results of an analysis which cannot be
+                            added or written should be skipped, whatever the
+                            error, instead of stopping the writing.
+
+    Raises:
+      FatalAnalysisError: If results cannot be added.
+      result_stream.Error: If results cannot be written.
+    """
+
+    writer = self._GetResultWriter()
+    writer.Reset()
+    writer.WritePackage(self._application_result.package)
+    suites = {}
+    analysis_groups = []
+    for analysis in self._analyses:
+      suite = analysis.GetSuite()
+      if suite is None:
+        analysis_groups.append((None, [analysis]))
+      elif suite in suites:
+        suites[suite].append(analysis)
+      else:
+        suites[suite] = [analysis]
+        analysis_groups.append((suite, suites[suite]))
+
+    for (suite, analyses) in analysis_groups:
+      if suite is not None:
+        FileResultSuiteManager.RemoveSuite(suite)
+      application_result = wheelbarrow_pb2.ApplicationResult()
+      for analysis in analyses:
+        result_count = len(application_result.analysis_results)
+        try:
+          analysis.AddResults(application_result, completed_triggers_only)
+        except Exception as err:  # pylint: disable=broad-except
+          if not skip_failed_analyses:
+            raise
+          logging.error('Skipping the results of analysis %s: %s',
+                        analysis.GetName(), err)
+          del application_result.analysis_results[result_count:]
+      for analysis_result in application_result.analysis_results:
+        try:
+          writer.WriteAnalysisResult(analysis_result)
+        except Exception as err:  # pylint: disable=broad-except
+          if not skip_failed_analyses:
+            raise
+          logging.error('Could not write the results of analysis %s: %s',
+                        analysis_result.analysis_name, err)
+      if suite is not None:
+        FileResultSuiteManager.RemoveSuite(suite)
+
   def _WriteApplicationResultToFile(self, out_dir, text_out):
-    """Write a wheelbarrow_pb2.ApplicationResult to a file.
+    """Finish writing the wheelbarrow_pb2.ApplicationResult to a file.
 
     Args:
       out_dir: A directory where the output should be written.
       text_out: True if the file should be written in ASCII text, False if it
-      should be written in binary.
+      should be written as a binary result stream.
     """
 
     logging.info('Writing application result to file.')
-    out_file_name = ('%s-%s-%s'
-                     % (self._application_result.package.name,
-                        self._application_result.package.version,
-                        self._application_result.package.architecture))
-    out_file_path = os.path.join(out_dir, out_file_name)
-    if not WriteProtobufToFile(self._application_result, out_file_path,
-                               text_out, True):
-      logging.error('Could not write application result file %s.',
-                    out_file_path)
+    try:
+      writer = self._GetResultWriter()
+      writer.WritePackage(self._application_result.package,
+                          self._application_result.timing)
+      writer.Close()
+    except result_stream.Error as err:
+      logging.error('Could not write application result: %s', err)
+      return
+    if text_out:
+      out_file_path = os.path.join(out_dir, self._GetResultFileName())
+      if not WriteProtobufToFile(writer.application_result, out_file_path,
+                                 True, True):
+        logging.error('Could not write application result file %s.',
+                      out_file_path)
 
   def AlarmHandler(self, unused_signalnum, unused_frame):
-    """Handle a sigalrm signal by recording the timeout to the result file."""
+    """Handle a sigalrm signal by recording the timeout to the result file.
+
+    The results of the analyses for the triggers which were completed are still
+    recorded.
+    """
 
     error = 'Analysis timed out.'
     logging.error(error)
+    self._AddPartialResults()
     self._Finalize(error)
 
+  def _AddPartialResults(self):
+    """Add the results of analyses for the triggers that were completed.
+
+    This runs in the alarm handler, before the analysis is finalized, so errors
+    are logged and the results of the analyses which failed are skipped.
+    """
+
+    try:
+      self._WriteAnalysisResults(True, True)
+    except Exception as err:  # pylint: disable=broad-except
+      logging.error('Error while writing partial analysis results: %s', err)
+
 
 def main(argv):
   logging.root.setLevel(logging.INFO)
@@ -77,3 +77,13 @@ class FileResultSuiteManager(object):
     if trigger_or_diff_pair_str not in suite_result:
       suite_result[trigger_or_diff_pair_str] = {}
     suite_result[trigger_or_diff_pair_str][path] = result
+
+  @staticmethod
+  def RemoveSuite(suite_name):
+    """Remove the file results of a suite, once they were written.
+
+    Args:
+      suite_name: The name of a suite.
+    """
+
+    FileResultSuiteManager._suite_results.pop(suite_name, None)
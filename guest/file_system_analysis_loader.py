@@ -93,6 +93,7 @@ class FileSystemAnalysisLoader(AnalysisLoader):
           logging.error('%s is not an Analyzer in analysis %s',
                         descriptor.module, descriptor_file_name)
           continue
+        analyzer.Configure(descriptor)
         analyses.append(Analysis(descriptor, triggers, analyzer))
     return analyses
 
@@ -26,6 +26,8 @@ import sys
 WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
 sys.path.append(WHEELBARROW_HOME)
 
+from common import instrumentation
+
 
 class Error(Exception):
   pass
@@ -59,6 +61,7 @@ def ExecuteCommandAndMatch(cmd, pattern):
   """
 
   out = None
+  instrumentation.RecordSubprocess()
   try:
     out = subprocess.check_output(cmd, stderr=subprocess.STDOUT)
   except (subprocess.CalledProcessError, OSError, ValueError) as err:
@@ -0,0 +1,76 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Renewal of the lease on a package claimed from the NFS work queue."""
+
+import logging
+import os
+import sys
+import threading
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+
+class LeaseRenewer(object):
+  """Periodically renews the lease on a claimed package.
+
+  The lease is the pending descriptor of the package. The host considers that
+  the lease expired, and returns the package to the queue, when the pending
+  descriptor was not modified for the lease duration. The lease is renewed
+  several times per lease duration by updating the modification time of the
+  pending descriptor. Setting the time to the current time lets the NFS server
+  use its own clock, which is also the one of the host.
+  """
+
+  # The number of renewals per lease duration.
+  _RENEWALS_PER_LEASE = 3
+
+  def __init__(self, pending_descriptor_path, lease_duration):
+    """Constructor.
+
+    Args:
+      pending_descriptor_path: The path to the pending descriptor.
+      lease_duration: The lease duration, in seconds.
+    """
+
+    self._path = pending_descriptor_path
+    self._interval = float(lease_duration) / LeaseRenewer._RENEWALS_PER_LEASE
+    self._stop = threading.Event()
+    self._thread = None
+
+  def Start(self):
+    self._thread = threading.Thread(target=self._RenewLease)
+    self._thread.daemon = True
+    self._thread.start()
+
+  def Stop(self):
+    """Stop renewing the lease.
+
+    This does not wait for the renewal thread, since it may be called from a
+    signal handler.
+    """
+
+    self._stop.set()
+
+  def _RenewLease(self):
+    while not self._stop.wait(self._interval):
+      try:
+        os.utime(self._path, None)
+      except OSError as err:
+        logging.error('Could not renew lease on %s: %s', self._path, err)
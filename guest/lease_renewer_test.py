@@ -0,0 +1,59 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Lease renewer test."""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from guest.lease_renewer import LeaseRenewer
+
+
+class LeaseRenewerTest(unittest.TestCase):
+  def setUp(self):
+    (file_descriptor, self.path) = tempfile.mkstemp()
+    os.close(file_descriptor)
+    os.utime(self.path, (0, 0))
+
+  def tearDown(self):
+    os.remove(self.path)
+
+  def testRenewLease(self):
+    lease_renewer = LeaseRenewer(self.path, 0.03)
+    lease_renewer.Start()
+    time.sleep(0.1)
+    lease_renewer.Stop()
+    self.assertTrue(os.stat(self.path).st_mtime > 0)
+
+  def testStop(self):
+    lease_renewer = LeaseRenewer(self.path, 0.3)
+    lease_renewer.Start()
+    lease_renewer.Stop()
+    lease_renewer._thread.join(1)
+    self.assertFalse(lease_renewer._thread.is_alive())
+    self.assertEqual(0, os.stat(self.path).st_mtime)
+
+
+if __name__ == '__main__':
+  unittest.main()
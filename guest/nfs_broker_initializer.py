@@ -20,7 +20,6 @@
 """An NFS broker initializer."""
 
 
-import glob
 import logging
 import os
 import sys
@@ -94,10 +93,14 @@ class NfsBrokerInitializer(broker_initializer.BrokerInitializer):
     return config
 
   def _MakePendingPackageDescriptor(self, config):
-    """Find a package and generate and write a pending package descriptor.
+    """Claim a package and write a pending package descriptor for it.
 
-    Before starting an analysis, a "pending" package descriptor is written to
-    the NFS share so that other VMs do not analyze the same package.
+    A package is claimed by atomically renaming its descriptor from the input
+    directory to a "pending" descriptor in the output directory, so that other
+    VMs do not analyze the same package. The pending descriptor is a lease on
+    the package: the host returns the package to the queue if it is not
+    renewed (see LeaseRenewer). The host keeps only a few descriptors in the
+    input directory, so listing it is cheap.
 
     Args:
       config: A wheelbarrow_pb2.NfsAnalysisConfig for this analysis.
@@ -106,77 +109,43 @@ class NfsBrokerInitializer(broker_initializer.BrokerInitializer):
       The wheelbarrow_pb2.Package for this analysis.
 
     Raises:
-      NoPackageError if no package could be found and locked.
+      NoPackageError if no package could be found and claimed.
     """
 
-    path = os.path.join(config.input_dir, '*')
-    package_descriptors = glob.glob(path)
-    descriptor_count = len(package_descriptors)
-    logging.info('Found %d packages.', descriptor_count)
-    if descriptor_count == 0:
-      raise broker_initializer.NoPackageError('No package found for analysis in'
-                                              '%s.' % path)
-    for package_descriptor_path in package_descriptors:
-      # Lock the package descriptor before even trying to read it.
-      # If we read before locking, another broker might have already locked and
-      # deleted the descriptor, resulting in a read error.
-      descriptor_file = self._LockPendingDescriptor(config,
-                                                    package_descriptor_path)
-      if not descriptor_file:
-        # The pending descriptor file could not be created.
+    try:
+      file_names = sorted(os.listdir(config.input_dir))
+    except OSError as err:
+      raise broker_initializer.NoPackageError(
+          'Could not list NFS input directory %s: %s' % (config.input_dir, err))
+    # Hidden files are descriptors which the host is still writing.
+    file_names = [file_name for file_name in file_names
+                  if not file_name.startswith('.')]
+    logging.info('Found %d packages.', len(file_names))
+    for file_name in file_names:
+      pending_descriptor_path = os.path.join(config.output_dir,
+                                             '%s.pending' % file_name)
+      try:
+        os.rename(os.path.join(config.input_dir, file_name),
+                  pending_descriptor_path)
+      except OSError:
+        # Another VM claimed the package first.
         continue
+      self._pending_descriptor_path = pending_descriptor_path
       package_descriptor = NfsBrokerInitializer._LoadPackageDescriptorFromFile(
-          package_descriptor_path)
-      NfsBrokerInitializer._WriteToPendingDescriptorFile(package_descriptor,
-                                                         descriptor_file)
-      # Remove the package from the list of packages to be processed.
-      os.remove(package_descriptor_path)
-      if os.path.exists(package_descriptor_path):
-        logging.error('Could not remove file %s.', package_descriptor_path)
+          pending_descriptor_path, not file_name.endswith('.dat'))
+      NfsBrokerInitializer._WriteToPendingDescriptorFile(
+          package_descriptor, pending_descriptor_path)
       return package_descriptor
-    # Not a single package could be locked.
     raise broker_initializer.NoPackageError('No package found for analysis in '
                                             'NFS input directory.')
 
-  def _LockPendingDescriptor(self, config, descriptor_path):
-    """Lock a package by atomically writing a pending descriptor for it.
-
-    This function guarantees that a package will only be analyzed by the
-    current VM. It atomically writes a pending descriptor file if the file does
-    not already exist. It returns a file descriptor, which should be closed by
-    the caller.
-
-    Args:
-      config: The wheelbarrow_pb2.NfsAnalysisConfig for this package.
-      descriptor_path: The path to the input wheelbarrow_pb2.Package.
-
-    Returns:
-      The file descriptor of the written pending descriptor if all goes well,
-      None otherwise.
-    """
-
-    self._pending_descriptor_path = os.path.join(
-        config.output_dir, '%s.pending' % os.path.basename(descriptor_path))
-    if os.path.exists(self._pending_descriptor_path):
-      return None
-    try:
-      descriptor_file = os.open(self._pending_descriptor_path,
-                                os.O_CREAT | os.O_EXCL | os.O_WRONLY)
-      return descriptor_file
-    except OSError as e:
-      logging.warning('Could not create pending descriptor file %s: %s',
-                      self._pending_descriptor_path, e)
-      return None
-
   @staticmethod
-  def _WriteToPendingDescriptorFile(descriptor, pending_descriptor_file):
+  def _WriteToPendingDescriptorFile(descriptor, pending_descriptor_path):
     """Write a pending package descriptor (wheelbarrow_pb2.Package) to file.
 
-    This method closes the file descriptor after writing to the file.
-
     Args:
       descriptor: A wheelbarrow_pb2.Package.
-      pending_descriptor_file: A file descriptor.
+      pending_descriptor_path: The path to the pending descriptor.
 
     Raises:
       InitializationError if a file operation goes wrong.
@@ -185,15 +154,15 @@ class NfsBrokerInitializer(broker_initializer.BrokerInitializer):
     descriptor.status = wheelbarrow_pb2.Package.PROCESSING
     descriptor.analysis_attempts += 1
     try:
-      os.write(pending_descriptor_file, descriptor.SerializePartialToString())
-      os.close(pending_descriptor_file)
-    except (OSError, EncodeError) as e:
+      with open(pending_descriptor_path, 'wb') as pending_descriptor_file:
+        pending_descriptor_file.write(descriptor.SerializePartialToString())
+    except (IOError, EncodeError) as e:
       logging.error('Could not write to pending package descriptor: %s', e)
       raise broker_initializer.InitializationError('Could not write to pending'
                                                    'package descriptor.')
 
   @staticmethod
-  def _LoadPackageDescriptorFromFile(path):
+  def _LoadPackageDescriptorFromFile(path, text=None):
     """Load a package descriptor from a file.
 
     Args:
@@ -201,6 +170,7 @@ class NfsBrokerInitializer(broker_initializer.BrokerInitializer):
             or binary format. A text format protobuf is assumed to have
             extension .txt, whereas a binary format protobuf is assumed to have
             extension .dat.
+      text: True if the file is in text format, or None to use its extension.
 
     Returns:
       A wheelbarrow_pb2.Package.
@@ -211,7 +181,7 @@ class NfsBrokerInitializer(broker_initializer.BrokerInitializer):
     """
 
     package_descriptor = wheelbarrow_pb2.Package()
-    if ParseFileToProtobuf(path, package_descriptor):
+    if ParseFileToProtobuf(path, package_descriptor, -1, text):
       return package_descriptor
     else:
       error = 'Could not load and parse package descriptor file %s.' % path
@@ -0,0 +1,96 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""NFS broker initializer test."""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from common import wheelbarrow_pb2
+from common.utils import ParseFileToProtobuf
+from common.utils import WriteProtobufToFile
+from guest import broker_initializer
+from guest.nfs_broker_initializer import NfsBrokerInitializer
+
+
+class NfsBrokerInitializerTest(unittest.TestCase):
+  def setUp(self):
+    self.tmp_dir = tempfile.mkdtemp()
+    self.config = wheelbarrow_pb2.NfsAnalysisConfig()
+    self.config.input_dir = os.path.join(self.tmp_dir, 'in')
+    self.config.output_dir = os.path.join(self.tmp_dir, 'out')
+    os.mkdir(self.config.input_dir)
+    os.mkdir(self.config.output_dir)
+    self.initializer = NfsBrokerInitializer(None)
+
+  def tearDown(self):
+    shutil.rmtree(self.tmp_dir)
+
+  def _WriteDescriptor(self, name, text):
+    package = wheelbarrow_pb2.Package()
+    package.name = name
+    package.version = '1.0'
+    package.architecture = 'amd64'
+    package.status = wheelbarrow_pb2.Package.AVAILABLE
+    package.analysis_attempts = 1
+    WriteProtobufToFile(package, os.path.join(self.config.input_dir, name),
+                        text, True)
+
+  def testMakePendingPackageDescriptor(self):
+    self._WriteDescriptor('a', False)
+    self._WriteDescriptor('b', True)
+
+    package = self.initializer._MakePendingPackageDescriptor(self.config)
+    self.assertEqual('a', package.name)
+    self.assertEqual(wheelbarrow_pb2.Package.PROCESSING, package.status)
+    self.assertEqual(2, package.analysis_attempts)
+    pending_path = os.path.join(self.config.output_dir, 'a.dat.pending')
+    self.assertEqual(pending_path, self.initializer._pending_descriptor_path)
+    pending_package = wheelbarrow_pb2.Package()
+    self.assertTrue(ParseFileToProtobuf(pending_path, pending_package, -1,
+                                        False))
+    self.assertEqual(package, pending_package)
+    self.assertEqual(['b.txt'], os.listdir(self.config.input_dir))
+
+    package = self.initializer._MakePendingPackageDescriptor(self.config)
+    self.assertEqual('b', package.name)
+    self.assertEqual([], os.listdir(self.config.input_dir))
+
+  def testMakePendingPackageDescriptorWithHiddenDescriptor(self):
+    # The host writes descriptors under a hidden name before renaming them.
+    self._WriteDescriptor('.a', False)
+
+    self.assertRaises(broker_initializer.NoPackageError,
+                      self.initializer._MakePendingPackageDescriptor,
+                      self.config)
+    self.assertEqual(['.a.dat'], os.listdir(self.config.input_dir))
+
+  def testMakePendingPackageDescriptorWithoutPackage(self):
+    self.assertRaises(broker_initializer.NoPackageError,
+                      self.initializer._MakePendingPackageDescriptor,
+                      self.config)
+
+
+if __name__ == '__main__':
+  unittest.main()
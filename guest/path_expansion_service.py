@@ -0,0 +1,188 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""A service expanding analysis arguments, shared by all analyses.
+
+Several analyses walk the same directory trees (e.g., the system file content
+and permission analyses both walk /etc, and the package analyses both walk the
+extracted package). The service walks each tree once per trigger at most and
+shares the list of files among the analyses which registered it. Each analysis
+then applies its own excluded patterns to the list.
+
+A walk of a system directory is reused at later triggers as long as the change
+journal reports no structural changes under it. Walks of the extracted package
+are only reused until the next trigger.
+"""
+
+import os
+import sys
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from guest.analyzers.change_journal import ChangeJournal
+from guest.argument_preprocessor import MakeDirectoryFilter
+from guest.argument_preprocessor import MakeFilePathPairs
+from guest.argument_preprocessor import PreprocessArgument
+from guest.argument_preprocessor import WalkPathArgument
+
+
+class PathExpansionService(object):
+  """Expands analysis arguments, sharing walks of the same trees.
+
+  Walks are keyed by (prepend_extract_dir, path argument) pairs, so analyses
+  share a walk when they use the same path argument. A directory is only pruned
+  from a shared walk if all the analyses sharing it exclude every file in it.
+  """
+
+  # Map from walk keys to the list of registered arguments walking them.
+  _arguments = {}
+  # Map from walk keys to (epoch, extract dir, file paths) tuples.
+  _walks = {}
+  # The current epoch, i.e., the change journal generation of the current
+  # trigger.
+  _epoch = 0
+
+  @staticmethod
+  def Start(arguments):
+    """Register the arguments of all analyses and start the change journal.
+
+    Only recursive arguments can share walks. Other arguments are expanded
+    without caching.
+
+    Args:
+      arguments: A list of analysis arguments.
+    """
+
+    PathExpansionService._arguments = {}
+    PathExpansionService._walks = {}
+    for argument in arguments:
+      if not argument.recursive_file_walk:
+        continue
+      for path_argument in argument.string_args:
+        PathExpansionService._arguments.setdefault(
+            PathExpansionService._GetWalkKey(argument, path_argument),
+            []).append(argument)
+    ChangeJournal.Start([path_argument for (prepend_extract_dir, path_argument)
+                         in PathExpansionService._arguments
+                         if not prepend_extract_dir])
+    PathExpansionService._epoch = ChangeJournal.GetGeneration()
+
+  @staticmethod
+  def StartEpoch():
+    """Start a new epoch. This should be called after each trigger."""
+
+    PathExpansionService._epoch = ChangeJournal.Sync()
+
+  @staticmethod
+  def ExpandArgument(argument, extract_dir, workers=1):
+    """Expand an analysis argument.
+
+    Args:
+      argument: An analysis argument.
+      extract_dir: The directory where the package is extracted.
+      workers: The number of threads walking each directory tree.
+
+    Returns:
+      An analyzer argument, as an iterable of (file path, relative path) pairs.
+    """
+
+    if not PathExpansionService._IsRegistered(argument):
+      return PreprocessArgument(argument, extract_dir, workers)
+
+    file_path_pairs = []
+    for path_argument in argument.string_args:
+      file_paths = PathExpansionService._GetWalk(argument, path_argument,
+                                                 extract_dir, workers)
+      file_path_pairs.extend(MakeFilePathPairs(argument, file_paths,
+                                               extract_dir))
+    return file_path_pairs
+
+  @staticmethod
+  def Close():
+    """Stop the change journal and drop all walks."""
+
+    ChangeJournal.Close()
+    PathExpansionService._arguments = {}
+    PathExpansionService._walks = {}
+
+  @staticmethod
+  def _GetWalk(argument, path_argument, extract_dir, workers):
+    """Get the files under a path argument, walking its trees if needed.
+
+    Args:
+      argument: A registered analysis argument.
+      path_argument: One of the string arguments of the analysis argument.
+      extract_dir: The directory where the package is extracted.
+      workers: The number of threads walking each directory tree.
+
+    Returns:
+      The list of paths of the regular files under the path argument.
+    """
+
+    key = PathExpansionService._GetWalkKey(argument, path_argument)
+    if key in PathExpansionService._walks:
+      (epoch, walk_extract_dir, file_paths) = PathExpansionService._walks[key]
+      if argument.prepend_extract_dir:
+        is_valid = (epoch == PathExpansionService._epoch
+                    and walk_extract_dir == extract_dir)
+      else:
+        is_valid = (epoch == PathExpansionService._epoch
+                    or not ChangeJournal.HasStructuralChangesSince(
+                        path_argument, epoch))
+      if is_valid:
+        return file_paths
+
+    # The epoch may change during the walk if this runs in the background.
+    epoch = PathExpansionService._epoch
+    prune = PathExpansionService._MakeSharedDirectoryFilter(key, extract_dir)
+    file_paths = list(WalkPathArgument(argument, path_argument, extract_dir,
+                                       prune, workers))
+    PathExpansionService._walks[key] = (epoch, extract_dir, file_paths)
+    return file_paths
+
+  @staticmethod
+  def _MakeSharedDirectoryFilter(key, extract_dir):
+    """Make a function telling which directories all the sharers exclude.
+
+    Args:
+      key: A walk key.
+      extract_dir: The directory where the package is extracted.
+
+    Returns:
+      A function which takes a directory path and returns True if every
+      registered argument walking the key excludes every file under the
+      directory, or None if no directory can be excluded.
+    """
+
+    prunes = [MakeDirectoryFilter(argument, extract_dir)
+              for argument in PathExpansionService._arguments[key]]
+    if None in prunes:
+      return None
+    return lambda dir_path: all(prune(dir_path) for prune in prunes)
+
+  @staticmethod
+  def _IsRegistered(argument):
+    return argument.recursive_file_walk and all(
+        argument in PathExpansionService._arguments.get(
+            PathExpansionService._GetWalkKey(argument, path_argument), [])
+        for path_argument in argument.string_args)
+
+  @staticmethod
+  def _GetWalkKey(argument, path_argument):
+    return (argument.prepend_extract_dir, path_argument)
@@ -0,0 +1,123 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Path expansion service test."""
+
+import mox
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from common import wheelbarrow_pb2
+from guest import path_expansion_service
+from guest.argument_preprocessor import PreprocessArgument
+from guest.path_expansion_service import PathExpansionService
+
+
+class PathExpansionServiceTest(unittest.TestCase):
+  def setUp(self):
+    self.mox = mox.Mox()
+    self.tmp_dir = tempfile.mkdtemp()
+    self.system_dir = os.path.join(self.tmp_dir, 'system')
+    self.extract_dir = os.path.join(self.tmp_dir, 'extract')
+    for dir_path in ['system/a', 'system/excluded', 'extract/b']:
+      os.makedirs(os.path.join(self.tmp_dir, dir_path))
+    for file_path in ['system/1', 'system/a/2', 'system/excluded/3',
+                      'extract/b/4']:
+      self._CreateFile(file_path)
+    self.excluding_argument = self._MakeArgument(self.system_dir)
+    self.excluding_argument.excluded_patterns.append(
+        os.path.join(self.system_dir, 'excluded'))
+    self.system_argument = self._MakeArgument(self.system_dir)
+    self.package_argument = self._MakeArgument('')
+    self.package_argument.prepend_extract_dir = True
+
+    self.walked_path_arguments = []
+    walk_path_argument = path_expansion_service.WalkPathArgument
+    def CountingWalkPathArgument(argument, path_argument, *args):
+      self.walked_path_arguments.append(path_argument)
+      return walk_path_argument(argument, path_argument, *args)
+    self.mox.stubs.Set(path_expansion_service, 'WalkPathArgument',
+                       CountingWalkPathArgument)
+    PathExpansionService.Start([self.excluding_argument, self.system_argument,
+                                self.package_argument])
+
+  def testExpandArgument(self):
+    for argument in [self.excluding_argument, self.system_argument,
+                     self.package_argument]:
+      self.assertEqual(
+          sorted(PreprocessArgument(argument, self.extract_dir)),
+          sorted(PathExpansionService.ExpandArgument(argument,
+                                                     self.extract_dir, 2)))
+    self.assertEqual([self.system_dir, ''], self.walked_path_arguments)
+
+  def testExpandArgumentWithUnchangedTree(self):
+    self._ExpandArguments()
+    PathExpansionService.StartEpoch()
+    self._CreateFile('system/a/2')
+    self._ExpandArguments()
+    self.assertEqual([self.system_dir, '', ''], self.walked_path_arguments)
+
+  def testExpandArgumentWithChangedTree(self):
+    self._ExpandArguments()
+    PathExpansionService.StartEpoch()
+    self._CreateFile('system/a/5')
+    file_path_pairs = PathExpansionService.ExpandArgument(
+        self.system_argument, self.extract_dir)
+    new_file_path = os.path.join(self.system_dir, 'a/5')
+    self.assertIn((new_file_path, new_file_path), file_path_pairs)
+    self.assertEqual([self.system_dir, '', self.system_dir],
+                     self.walked_path_arguments)
+
+  def testExpandArgumentWithUnregisteredArgument(self):
+    argument = self._MakeArgument(os.path.join(self.system_dir, 'a'))
+    file_path = os.path.join(self.system_dir, 'a/2')
+    self.assertEqual(
+        [(file_path, file_path)],
+        list(PathExpansionService.ExpandArgument(argument, self.extract_dir)))
+    self.assertEqual([], self.walked_path_arguments)
+
+  def tearDown(self):
+    PathExpansionService.Close()
+    self.mox.UnsetStubs()
+    shutil.rmtree(self.tmp_dir)
+
+  def _ExpandArguments(self):
+    for argument in [self.excluding_argument, self.system_argument,
+                     self.package_argument]:
+      PathExpansionService.ExpandArgument(argument, self.extract_dir)
+
+  def _CreateFile(self, file_path):
+    with open(os.path.join(self.tmp_dir, file_path), 'w') as f:
+      f.write('test')
+
+  @staticmethod
+  def _MakeArgument(path_argument):
+    argument = wheelbarrow_pb2.AnalysisDescriptor.Argument()
+    argument.string_args.append(path_argument)
+    argument.recursive_file_walk = True
+    return argument
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,246 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Walk directory trees to find regular files.
+
+The walker lists directories with scandir when it is available (it is part of
+the os module in Python 3, and is provided by the scandir package in Python 2),
+which lets it tell files from directories using the d_type field of directory
+entries without calling stat on each entry. Otherwise, it falls back to lstat.
+
+Like os.walk, the walker does not descend into symbolic links to directories,
+and it skips directories which cannot be listed. Like os.path.isfile, it
+includes symbolic links to regular files.
+"""
+
+import os
+import Queue
+import stat
+import sys
+import threading
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+try:
+  from scandir import scandir  # pylint: disable=g-import-not-at-top
+except ImportError:
+  scandir = getattr(os, 'scandir', None)
+
+
+# The maximum number of directory listings buffered by a parallel walk before
+# the walking threads wait for the consumer.
+_MAX_PENDING_LISTINGS = 1024
+# How long the walking threads wait before checking whether the walk was
+# abandoned, in seconds.
+_WAIT_TIMEOUT = 0.1
+
+
+def WalkFiles(top, prune=None, workers=1):
+  """Walk a directory tree and generate the paths of the regular files in it.
+
+  With several workers, subtrees are listed in parallel threads and file paths
+  are generated as soon as their directory is listed, in no particular order.
+  Otherwise, files are generated in the same order as os.walk would list them.
+
+  Args:
+    top: The path to the root of the tree.
+    prune: A function which takes a directory path and returns True if the
+           directory should not be walked, or None.
+    workers: The number of threads listing directories.
+
+  Returns:
+    An iterator over the paths of the regular files in the tree.
+  """
+
+  if not os.path.isdir(top):
+    return iter(())
+  if workers > 1:
+    return _ParallelWalk(top, prune, workers)
+  return _SerialWalk(top, prune)
+
+
+def _SerialWalk(top, prune):
+  """Walk a directory tree in the current thread.
+
+  Args:
+    top: The path to the root of the tree.
+    prune: A function which takes a directory path and returns True if the
+           directory should not be walked, or None.
+
+  Yields:
+    The paths of the regular files in the tree.
+  """
+
+  directories = [top]
+  while directories:
+    (file_paths, dir_paths) = _ListDirectory(directories.pop(), prune)
+    for file_path in file_paths:
+      yield file_path
+    directories.extend(reversed(dir_paths))
+
+
+def _ParallelWalk(top, prune, workers):
+  """Walk a directory tree using several threads.
+
+  Args:
+    top: The path to the root of the tree.
+    prune: A function which takes a directory path and returns True if the
+           directory should not be walked, or None.
+    workers: The number of threads listing directories.
+
+  Yields:
+    The paths of the regular files in the tree.
+  """
+
+  directories = Queue.Queue()
+  listings = Queue.Queue(_MAX_PENDING_LISTINGS)
+  # The number of directories queued or being listed.
+  pending_directories = [1]
+  lock = threading.Lock()
+  stopping = threading.Event()
+
+  def ListDirectories():
+    while True:
+      dir_path = directories.get()
+      if dir_path is None:
+        return
+      (file_paths, dir_paths) = _ListDirectory(dir_path, prune)
+      with lock:
+        pending_directories[0] += len(dir_paths)
+      for subdir_path in dir_paths:
+        directories.put(subdir_path)
+      # The listing is queued before the directory stops being pending, so the
+      # last listing to be queued reports that the walk is over.
+      with lock:
+        pending_directories[0] -= 1
+        done = pending_directories[0] == 0
+      if not _PutUnlessStopping(listings, (file_paths, done), stopping):
+        return
+
+  directories.put(top)
+  threads = [threading.Thread(target=ListDirectories) for _ in xrange(workers)]
+  for thread in threads:
+    thread.daemon = True
+    thread.start()
+  try:
+    done = False
+    while not done:
+      (file_paths, done) = listings.get()
+      for file_path in file_paths:
+        yield file_path
+  finally:
+    # This also runs when the consumer abandons the walk.
+    stopping.set()
+    for _ in threads:
+      directories.put(None)
+
+
+def _PutUnlessStopping(queue, item, stopping):
+  """Put an item in a bounded queue, unless a walk is being stopped.
+
+  Args:
+    queue: A Queue.Queue.
+    item: The item to put in the queue.
+    stopping: A threading.Event set when the walk is stopped.
+
+  Returns:
+    True if the item was put in the queue, False if the walk was stopped.
+  """
+
+  while not stopping.is_set():
+    try:
+      queue.put(item, timeout=_WAIT_TIMEOUT)
+      return True
+    except Queue.Full:
+      pass
+  return False
+
+
+def _ListDirectory(dir_path, prune):
+  """List the regular files and the subdirectories of a directory.
+
+  Args:
+    dir_path: The path to a directory.
+    prune: A function which takes a directory path and returns True if the
+           directory should not be walked, or None.
+
+  Returns:
+    A pair (file paths, subdirectory paths). Both lists are empty if the
+    directory cannot be listed.
+  """
+
+  file_paths = []
+  dir_paths = []
+  try:
+    for (path, file_type) in _ScanDirectory(dir_path):
+      if file_type == stat.S_IFREG:
+        file_paths.append(path)
+      elif file_type == stat.S_IFDIR:
+        if prune is None or not prune(path):
+          dir_paths.append(path)
+      elif file_type == stat.S_IFLNK and os.path.isfile(path):
+        file_paths.append(path)
+  except OSError:
+    return ([], [])
+  return (file_paths, dir_paths)
+
+
+def _ScanDirectory(dir_path):
+  """List the entries of a directory along with their types.
+
+  Args:
+    dir_path: The path to a directory.
+
+  Returns:
+    A list of pairs (entry path, file type), where file types are stat.S_IFREG,
+    stat.S_IFDIR, stat.S_IFLNK or None for other types. Entries which vanish
+    while the directory is listed are left out.
+
+  Raises:
+    OSError: The directory could not be listed.
+  """
+
+  entries = []
+  if scandir is not None:
+    for entry in scandir(dir_path):
+      try:
+        if entry.is_symlink():
+          file_type = stat.S_IFLNK
+        elif entry.is_dir(follow_symlinks=False):
+          file_type = stat.S_IFDIR
+        elif entry.is_file(follow_symlinks=False):
+          file_type = stat.S_IFREG
+        else:
+          file_type = None
+      except OSError:
+        continue
+      entries.append((entry.path, file_type))
+    return entries
+
+  for name in os.listdir(dir_path):
+    path = os.path.join(dir_path, name)
+    try:
+      mode = os.lstat(path).st_mode
+    except OSError:
+      continue
+    file_type = stat.S_IFMT(mode)
+    if file_type not in (stat.S_IFREG, stat.S_IFDIR, stat.S_IFLNK):
+      file_type = None
+    entries.append((path, file_type))
+  return entries
@@ -0,0 +1,100 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Tree walker test."""
+
+import mox
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from guest import tree_walker
+
+
+class TreeWalkerTest(unittest.TestCase):
+  def setUp(self):
+    self.mox = mox.Mox()
+    self.tmp_dir = tempfile.mkdtemp()
+    self.excluded_dir = os.path.join(self.tmp_dir, 'excluded')
+    for dir_path in ['a/b/c', 'a/d', 'excluded/e', 'f']:
+      os.makedirs(os.path.join(self.tmp_dir, dir_path))
+    for file_path in ['1', 'a/2', 'a/b/3', 'a/b/c/4', 'a/d/5', 'excluded/6',
+                      'excluded/e/7']:
+      open(os.path.join(self.tmp_dir, file_path), 'w').close()
+    os.symlink(os.path.join(self.tmp_dir, '1'),
+               os.path.join(self.tmp_dir, 'f/file_link'))
+    os.symlink(os.path.join(self.tmp_dir, 'a'),
+               os.path.join(self.tmp_dir, 'f/dir_link'))
+    os.symlink(os.path.join(self.tmp_dir, 'none'),
+               os.path.join(self.tmp_dir, 'f/broken_link'))
+    os.mkfifo(os.path.join(self.tmp_dir, 'f/fifo'))
+
+  def testWalkFiles(self):
+    self.assertEqual(self._WalkWithOsWalk(),
+                     list(tree_walker.WalkFiles(self.tmp_dir)))
+
+  def testWalkFilesWithoutScandir(self):
+    self.mox.stubs.Set(tree_walker, 'scandir', None)
+    self.assertEqual(self._WalkWithOsWalk(),
+                     list(tree_walker.WalkFiles(self.tmp_dir)))
+
+  def testWalkFilesWithWorkers(self):
+    self.assertEqual(sorted(self._WalkWithOsWalk()),
+                     sorted(tree_walker.WalkFiles(self.tmp_dir, workers=4)))
+
+  def testWalkFilesWithPrune(self):
+    prune = lambda dir_path: dir_path == self.excluded_dir
+    expected_file_paths = [
+        file_path for file_path in self._WalkWithOsWalk()
+        if not file_path.startswith(os.path.join(self.excluded_dir, ''))]
+    self.assertEqual(expected_file_paths,
+                     list(tree_walker.WalkFiles(self.tmp_dir, prune)))
+    self.assertEqual(sorted(expected_file_paths),
+                     sorted(tree_walker.WalkFiles(self.tmp_dir, prune, 4)))
+
+  def testWalkFilesWithFile(self):
+    self.assertEqual(
+        [], list(tree_walker.WalkFiles(os.path.join(self.tmp_dir, '1'))))
+
+  def testWalkFilesWithAbandonedWalk(self):
+    self.mox.stubs.Set(tree_walker, '_MAX_PENDING_LISTINGS', 1)
+    walk = tree_walker.WalkFiles(self.tmp_dir, workers=2)
+    walk.next()
+    walk.close()
+
+  def tearDown(self):
+    self.mox.UnsetStubs()
+    shutil.rmtree(self.tmp_dir)
+
+  def _WalkWithOsWalk(self):
+    file_paths = []
+    for (dir_path, _, file_names) in os.walk(self.tmp_dir):
+      for file_name in file_names:
+        file_path = os.path.join(dir_path, file_name)
+        if os.path.isfile(file_path):
+          file_paths.append(file_path)
+    return file_paths
+
+
+if __name__ == '__main__':
+  unittest.main()
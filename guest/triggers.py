@@ -26,6 +26,8 @@ sys.path.append(WHEELBARROW_HOME)
 
 
 from common import wheelbarrow_pb2
+from common.instrumentation import GetMemoryUsed
+from common.instrumentation import ResourceMeter
 
 
 class Error(Exception):
@@ -56,6 +58,15 @@ class Trigger(object):
 
     raise NotImplementedError
 
+  def UsesAnalysisResults(self):
+    """Determine if this trigger uses the results of earlier analyses.
+
+    Analyses running in the background should be complete before such a
+    trigger is run.
+    """
+
+    return False
+
 
 # Base classes for all the triggers types defined in the application protobuf.
 # When a new trigger is added to the protobuf, a new base class should be
@@ -85,6 +96,10 @@ class RunBinaries(Trigger):
   def GetTriggerId(self):
     return wheelbarrow_pb2.RUN_BINARIES
 
+  def UsesAnalysisResults(self):
+    # The binaries to run are found by the package analyses.
+    return True
+
 
 class Remove(Trigger):
   def GetTriggerId(self):
@@ -109,6 +124,12 @@ class TriggerManager(object):
 
   _package_extract_dir = None
 
+  def __init__(self):
+    # A list of (trigger ID, ResourceUsage) tuples for completed triggers.
+    self._timings = []
+    # A (trigger ID, ResourceMeter) tuple for the trigger being run, or None.
+    self._current_trigger = None
+
   def SetUpTriggersAndMetadata(self, package_descriptor):
     """Perform setup for the trigger manager and extract package metadata.
 
@@ -127,9 +148,13 @@ class TriggerManager(object):
 
     raise NotImplementedError
 
-  def RunNextTrigger(self):
+  def RunNextTrigger(self, prepare_trigger=None):
     """Run the next trigger.
 
+    Args:
+      prepare_trigger: A function called with the next trigger before it is
+                       run, or None.
+
     Returns:
       The current trigger ID if performing the trigger went well, None if there
       is no trigger to perform.
@@ -137,11 +162,51 @@ class TriggerManager(object):
 
     try:
       trigger = self._GetNextTrigger()
-      trigger.RunTrigger()
-      return trigger.GetTriggerId()
+      if prepare_trigger is not None:
+        prepare_trigger(trigger)
     except NoNextTrigger:
       return None
 
+    trigger_id = trigger.GetTriggerId()
+    # Triggers mostly wait for package manager subprocesses, so their CPU time
+    # includes the one of the subprocesses they waited for.
+    meter = ResourceMeter(include_children=True)
+    meter.Start()
+    self._current_trigger = (trigger_id, meter)
+    try:
+      trigger.RunTrigger()
+    finally:
+      usage = meter.Read()
+      # The host sizes the memory of later VMs for the package from this.
+      memory_used = GetMemoryUsed()
+      if memory_used is not None:
+        usage.memory_used = memory_used
+      self._timings.append((trigger_id, usage))
+      self._current_trigger = None
+    return trigger_id
+
+  def AddTimings(self, timing):
+    """Add the resource usage of the triggers run so far to a Timing message.
+
+    A trigger which is still running (e.g., because the analysis timed out) is
+    added with its interrupted flag set.
+
+    Args:
+      timing: A wheelbarrow_pb2.Timing message.
+    """
+
+    current_trigger = self._current_trigger
+    usages = list(self._timings)
+    if current_trigger is not None:
+      (trigger_id, meter) = current_trigger
+      usage = meter.Read()
+      usage.interrupted = True
+      usages.append((trigger_id, usage))
+    for (trigger_id, usage) in usages:
+      trigger_timing = timing.triggers.add()
+      trigger_timing.trigger = trigger_id
+      trigger_timing.usage.CopyFrom(usage)
+
   @staticmethod
   def GetPackageExtractDir():
     """Get the directory where the package is extracted.
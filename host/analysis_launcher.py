@@ -30,18 +30,33 @@
        [-p|--processes <maximum number of concurrent VM processes>]
        [--snapshot]
        [--updatebroker]
+       [--baseline]
+       [--resume]
+       [--maxattempts <maximum number of attempts per package>]
+       [--retrydelay <delay before retrying a failed package>]
+       [--leaseduration <lease duration of a claimed package>]
+       [--packagespervm <maximum number of packages analyzed by a VM>]
+       [--warmstate <path to the saved state of a booted VM>]
+       [--overlaydir <directory for the disk overlays of the VMs>]
+       [--minmemory <minimum memory size of a VM>]
+       [--memoryreserve <memory left to the host>]
+       [--noblobstore]
 """
 
 from multiprocessing import Pool
 import gflags
 import logging
+import multiprocessing
 import os
 import os.path
 import sys
 WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
 sys.path.append(WHEELBARROW_HOME)
+from host.batch_dispatcher import BatchDispatcher
+from host.job_ledger import JobLedger
 from host.nfs_analysis_setup_agent import NfsAnalysisSetupAgent
 from host.scoring.result_directory_scorer import ScoreResultDirectory
+from host.vm_scheduler import VmScheduler
 import host.vm_launcher
 
 
@@ -61,16 +76,62 @@ gflags.DEFINE_string('nfshost', None, 'The path to an NFS share on the host.',
 gflags.DEFINE_string('nfsguest', None, 'The path to an NFS share on the guest.',
                      short_name='g')
 gflags.DEFINE_boolean('textout', False, 'Activate text output for analysis '
-                      'results. By default, the results are output to a binary '
-                      'protocol buffer.', short_name='a')
+                      'results. By default, the results are streamed to a '
+                      'binary result stream.', short_name='a')
 gflags.DEFINE_integer('processes', 1,
-                      'Number of concurrent analysis processes.',
+                      'Maximum number of concurrent analysis processes, or 0 '
+                      'for the number of CPUs. For batches, VMs are only '
+                      'started while the host has enough free memory and is '
+                      'not under CPU, memory or I/O pressure.',
                       short_name='p')
 gflags.DEFINE_boolean('snapshot', True, 'Activate snapshot mode, which avoids '
                       'writing modifications to the VM image.', short_name='s')
 gflags.DEFINE_boolean('updatebroker', False, 'Update the broker package on the '
                       'VM image before proceeding with the analysis.',
                       short_name='u')
+gflags.DEFINE_boolean('baseline', False, 'Compute a baseline manifest of the '
+                      'VM image, if there is no up-to-date one, and use it to '
+                      'skip unmodified system files during analyses.')
+gflags.DEFINE_boolean('resume', False, 'Resume the batch recorded in the job '
+                      'ledger of the NFS share, retrying the packages which '
+                      'failed. Analyses resume from the checkpoints left by '
+                      'previous runs, e.g., runs which timed out.')
+gflags.DEFINE_integer('maxattempts', 3, 'The maximum number of attempts to '
+                      'analyze a package.')
+gflags.DEFINE_integer('retrydelay', 60, 'The delay in seconds before a failed '
+                      'package is analyzed again. It is doubled after each '
+                      'attempt.')
+gflags.DEFINE_integer('leaseduration', 300, 'The time in seconds after which a '
+                      'package claimed by a VM is analyzed again if the VM '
+                      'stops renewing its lease, e.g., because it crashed.')
+gflags.DEFINE_integer('packagespervm', 1, 'The maximum number of packages '
+                      'analyzed by a VM. With more than 1, VMs are reverted to '
+                      'a clean saved state between packages instead of being '
+                      'booted for each package.')
+gflags.DEFINE_string('warmstate', None, 'The path to the saved state of a VM '
+                     'which booted and is ready to analyze a package. VMs are '
+                     'restored from it instead of being booted. It is saved '
+                     'if it is missing or older than the image, with the disk '
+                     'of the booted VM in a qcow2 overlay of the image next to '
+                     'it, so that the image is not modified. This requires '
+                     'snapshot mode.')
+gflags.DEFINE_string('overlaydir', None, 'A directory on a fast local file '
+                     'system (e.g., a tmpfs such as /dev/shm) in which each VM '
+                     'gets a throwaway disk overlay of the image, instead of '
+                     'using the temporary overlay of snapshot mode. This '
+                     'requires snapshot mode.')
+gflags.DEFINE_integer('minmemory', 1024, 'The minimum amount of memory of a VM '
+                      'in a batch. VMs which are not restored from a warm '
+                      'state and analyze one package get between this and '
+                      '--memory, estimated from the memory used by the '
+                      'package in earlier batches or from its installed size.')
+gflags.DEFINE_integer('memoryreserve', 1024, 'The amount of host memory which '
+                      'is not used for VMs.')
+gflags.DEFINE_boolean('blobstore', True, 'Store the file contents recorded by '
+                      'analyses once in a compressed, content-addressed blob '
+                      'store on the NFS share, and reference them by SHA-256 '
+                      'digest in results, instead of recording them in each '
+                      'result.')
 
 
 _SCORE_DIR = 'scores'
@@ -82,13 +143,36 @@ def main(argv):
   argv = FLAGS(argv)
   logging.root.setLevel(logging.INFO)
   logging.info(argv)
+  if FLAGS.warmstate and not FLAGS.snapshot:
+    logging.error('A warm state can only be used in snapshot mode.')
+    return 1
+  if FLAGS.overlaydir and not FLAGS.snapshot:
+    logging.error('Overlays can only be used in snapshot mode.')
+    return 1
   job_count = 1
+  dispatcher = None
   if FLAGS.batchfile:
     if FLAGS.nfshost and FLAGS.nfsguest:
       logging.info(FLAGS.image)
+      ledger = JobLedger(os.path.join(FLAGS.nfshost,
+                                      BatchDispatcher.LEDGER_FILE_NAME))
+      if not FLAGS.resume:
+        ledger.Clear()
+      dispatcher = BatchDispatcher(
+          ledger,
+          os.path.join(FLAGS.nfshost, NfsAnalysisSetupAgent.INPUT_DIR),
+          os.path.join(FLAGS.nfshost, NfsAnalysisSetupAgent.OUTPUT_DIR),
+          FLAGS.textout, FLAGS.timeout, FLAGS.maxattempts, FLAGS.retrydelay,
+          FLAGS.leaseduration, FLAGS.packagespervm, FLAGS.warmstate,
+          min(FLAGS.minmemory, FLAGS.memory))
       setup_agent = NfsAnalysisSetupAgent(FLAGS.nfshost, FLAGS.nfsguest,
                                           FLAGS.timeout, FLAGS.textout, False,
-                                          FLAGS.updatebroker, FLAGS.image)
+                                          FLAGS.updatebroker, FLAGS.image,
+                                          FLAGS.baseline, FLAGS.resume,
+                                          dispatcher,
+                                          FLAGS.packagespervm > 1
+                                          or FLAGS.warmstate is not None,
+                                          FLAGS.blobstore)
       job_count = setup_agent.SetUpAnalysis(FLAGS.batchfile)
       if job_count == NfsAnalysisSetupAgent.ERROR:
         logging.error('NFS analysis setup has failed.')
@@ -104,18 +188,39 @@ def main(argv):
       return 1
 
   logging.info('Starting analysis of %d applications...', job_count)
-  processes = FLAGS.processes if job_count >= FLAGS.processes else job_count
-  pool = Pool(processes=processes)
+  processes = min(FLAGS.processes or multiprocessing.cpu_count(), job_count)
   logging.info('Flags are::::::::::::::')
   logging.info(FLAGS.image)
-  cmd = host.vm_launcher.MakeVmCommand(
-      FLAGS.image, FLAGS.memory, FLAGS.snapshot)
+  image = FLAGS.image
+  if dispatcher is not None and FLAGS.warmstate:
+    if not host.vm_launcher.IsWarmStateCurrent(FLAGS.image, FLAGS.warmstate):
+      logging.info('Saving warm state to %s...', FLAGS.warmstate)
+      if not host.vm_launcher.SaveWarmState(FLAGS.image, FLAGS.memory,
+                                            FLAGS.warmstate, FLAGS.timeout):
+        logging.error('Could not save the warm state.')
+        return 1
+    # VMs restored from the warm state run on the disk it was saved with.
+    image = host.vm_launcher.GetWarmDiskPath(FLAGS.warmstate)
+  vm_commands = host.vm_launcher.VmCommandFactory(
+      image, FLAGS.memory, FLAGS.snapshot, FLAGS.overlaydir)
+  if not vm_commands.Prepare():
+    logging.error('Could not prepare the VM overlays.')
+    return 1
 
-  logging.info(cmd)
-  for unused_i in range(job_count):
-    pool.apply_async(host.vm_launcher.StartVm, args=(cmd, FLAGS.timeout))
-  pool.close()
-  pool.join()
+  try:
+    if dispatcher is not None:
+      dispatcher.Run(vm_commands, VmScheduler(processes, FLAGS.memoryreserve))
+    else:
+      pool = Pool(processes=processes)
+      for unused_i in range(job_count):
+        (cmd, unused_overlay) = vm_commands.MakeCommand()
+        logging.info(cmd)
+        if cmd is not None:
+          pool.apply_async(host.vm_launcher.StartVm, args=(cmd, FLAGS.timeout))
+      pool.close()
+      pool.join()
+  finally:
+    vm_commands.Close()
 
   logging.info('Complete run proceeding to scoring')
   if FLAGS.nfshost:
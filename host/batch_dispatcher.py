@@ -0,0 +1,435 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Dispatch of the analysis jobs of a batch to VMs.
+
+The dispatcher keeps the jobs of a batch in a JobLedger. It writes package
+descriptors to the NFS input directory as VMs are started, rather than all at
+once, and follows each job through the files written by the guests: a pending
+descriptor when a VM claims the package and an application result when the
+analysis is over. Failed jobs are retried with an exponential backoff, and jobs
+whose VM was killed or crashed return to the queue when their lease expires.
+
+The NFS input directory is the queue. A guest claims a package by renaming its
+descriptor to a pending descriptor in the output directory, which is a lease on
+the package. The guest renews the lease by touching the pending descriptor
+(see guest/lease_renewer.py). Since descriptors are only written as VMs are
+started, the input directory stays small and guests claim packages in constant
+time, regardless of the size of the batch.
+
+The VMs still claim packages themselves, so the exit code of a VM cannot be
+attributed to a job. VM exit codes are recorded separately in the ledger.
+
+VMs are started as a VmScheduler admits them, depending on the resources of the
+host. The peak memory reported by the guest for each package is recorded in the
+ledger, to size the memory of the VMs analyzing the package in later batches.
+"""
+
+from multiprocessing import Pool
+import logging
+import os
+import os.path
+import sys
+import time
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+from common import result_stream
+from common import utils
+from common import wheelbarrow_pb2
+from host import vm_launcher
+from host import vm_scheduler
+from host import worker_vm
+from host.job_ledger import JobLedger
+
+
+class BatchDispatcher(object):
+  """Dispatches the analysis jobs of a batch to VMs."""
+
+  LEDGER_FILE_NAME = 'jobs.sqlite'
+  # The error reported by the broker when an analysis times out.
+  _TIMEOUT_ERROR = 'Analysis timed out.'
+  _POLL_INTERVAL = 5
+
+  def __init__(self, ledger, input_dir, output_dir, text_output, vm_timeout,
+               max_attempts=3, retry_delay=60, lease_duration=300,
+               packages_per_vm=1, warm_state=None, min_memory=None):
+    """Constructor.
+
+    Args:
+      ledger: A JobLedger.
+      input_dir: The NFS input directory for package descriptors, on the host.
+      output_dir: The NFS output directory for results, on the host.
+      text_output: True if descriptors and results are in ASCII format.
+      vm_timeout: The timeout after which VMs are killed, in seconds. For
+                  worker VMs, this is the time allowed to boot and for each
+                  package.
+      max_attempts: The maximum number of attempts per job.
+      retry_delay: The delay before the second attempt of a failed job, in
+                   seconds. It is doubled for each further attempt.
+      lease_duration: The time after which a job claimed by a VM returns to
+                      the queue if the VM does not renew its lease, in seconds.
+      packages_per_vm: The maximum number of packages analyzed by a VM. If it
+                       is more than 1, worker VMs are used (see WorkerVm).
+      warm_state: The path to a warm state to restore worker VMs from, or None
+                  to boot them. If it is set, worker VMs are used.
+      min_memory: The minimum memory of a VM, in megabytes, or None. If it is
+                  set, VMs which analyze a single package without a warm state
+                  get the memory estimated for the packages they may claim,
+                  between this and the default memory. Worker VMs always get
+                  the default memory, which must match their saved states.
+    """
+
+    self._ledger = ledger
+    self._input_dir = input_dir
+    self._output_dir = output_dir
+    self._extension = '.txt' if text_output else '.dat'
+    # Binary results are written by guests as result streams.
+    self._result_extension = '.txt' if text_output else result_stream.EXTENSION
+    self._text_output = text_output
+    self._vm_timeout = vm_timeout
+    self._max_attempts = max_attempts
+    self._retry_delay = retry_delay
+    self._lease_duration = lease_duration
+    self._packages_per_vm = packages_per_vm
+    self._warm_state = warm_state
+    self._min_memory = min_memory
+
+  @staticmethod
+  def GetJobName(package):
+    """Get the name of the job for a wheelbarrow_pb2.Package."""
+
+    return '%s-%s-%s' % (package.name, package.version, package.architecture)
+
+  def GetLeaseDuration(self):
+    return self._lease_duration
+
+  def AddJob(self, package):
+    """Add a job for a package, unless it was already analyzed.
+
+    Args:
+      package: A wheelbarrow_pb2.Package.
+
+    Returns:
+      True if the package should be analyzed.
+    """
+
+    job_name = BatchDispatcher.GetJobName(package)
+    job = self._ledger.GetJob(job_name)
+    if job is not None:
+      return job.state != JobLedger.DONE
+    result_package = self._ReadResultPackage(job_name)
+    if (result_package is not None
+        and result_package.status == wheelbarrow_pb2.Package.DONE):
+      logging.info('Skipping %s, which was already analyzed.', job_name)
+      return False
+    self._ledger.AddJob(job_name, package.SerializePartialToString())
+    return True
+
+  def Run(self, vm_commands, scheduler):
+    """Run VMs until all the jobs are done or out of attempts.
+
+    Args:
+      vm_commands: A vm_launcher.VmCommandFactory.
+      scheduler: A vm_scheduler.VmScheduler, which admits new VMs.
+    """
+
+    max_vms = scheduler.GetMaxVms()
+    pool = Pool(processes=max_vms)
+    vm_runs = []
+    while True:
+      now = time.time()
+      vm_runs = self._CollectVmRuns(vm_runs, vm_commands, now)
+      self._Reconcile(now)
+      free_slots = max_vms - len(vm_runs)
+      # Descriptors which were dispatched but not claimed yet are taken by the
+      # next VMs. Running worker VMs claim further packages as well.
+      claimers = max_vms if self._packages_per_vm > 1 else free_slots
+      unclaimed = len(self._ledger.GetJobs([JobLedger.DISPATCHED]))
+      dispatched = self._DispatchJobs(claimers - unclaimed, now)
+      for unused_i in range(min(free_slots, unclaimed + dispatched)):
+        memory = self._GetVmMemory(vm_commands)
+        if not scheduler.CanStartVm(
+            memory, [(start_time, vm_memory)
+                     for (start_time, vm_memory, _, _) in vm_runs], now):
+          break
+        (cmd, overlay) = vm_commands.MakeCommand(memory)
+        if cmd is None:
+          break
+        vm_runs.append((now, memory, overlay, self._StartVm(pool, cmd)))
+      if not vm_runs and not self._ledger.HasUnfinishedJobs(
+          self._max_attempts):
+        break
+      time.sleep(BatchDispatcher._POLL_INTERVAL)
+    pool.close()
+    pool.join()
+    logging.info('Job states: %s', self._ledger.GetStateCounts())
+
+  def _StartVm(self, pool, cmd):
+    """Start a VM in a pool process.
+
+    Args:
+      pool: A multiprocessing.Pool.
+      cmd: The command to start a VM, as a list of strings.
+
+    Returns:
+      A multiprocessing.AsyncResult for the (exit code, VmResourceUsage) tuple
+      of the VM.
+    """
+
+    if self._packages_per_vm > 1 or self._warm_state is not None:
+      return pool.apply_async(worker_vm.RunWorkerVm, args=(
+          cmd, self._vm_timeout, self._packages_per_vm, self._input_dir,
+          self._warm_state))
+    return pool.apply_async(_RunVm, args=(cmd, self._vm_timeout))
+
+  def _GetVmMemory(self, vm_commands):
+    """Get the memory of the next VM.
+
+    Args:
+      vm_commands: The vm_launcher.VmCommandFactory of the VMs.
+
+    Returns:
+      The memory of the VM, in megabytes.
+    """
+
+    max_memory = vm_commands.GetMemory()
+    if (self._min_memory is None or self._packages_per_vm > 1
+        or self._warm_state is not None):
+      return max_memory
+    # The VM may claim any of the unclaimed packages.
+    memory = self._min_memory
+    for job in self._ledger.GetJobs([JobLedger.DISPATCHED]):
+      package = wheelbarrow_pb2.Package()
+      package.MergeFromString(str(job.descriptor))
+      memory = max(memory, vm_scheduler.EstimateVmMemory(
+          self._ledger.GetPeakMemory(package.name),
+          package.installed_size, self._min_memory, max_memory))
+    return memory
+
+  def _CollectVmRuns(self, vm_runs, vm_commands, now):
+    """Record the VM runs which are over, and release their overlays.
+
+    Args:
+      vm_runs: A list of (start time, memory, overlay path,
+               multiprocessing.AsyncResult) tuples.
+      vm_commands: The vm_launcher.VmCommandFactory of the VMs.
+      now: The current time.
+
+    Returns:
+      The VM runs which are not over.
+    """
+
+    running_vm_runs = []
+    for vm_run in vm_runs:
+      (start_time, unused_memory, overlay, vm_result) = vm_run
+      if vm_result.ready():
+        (exit_code, usage) = vm_result.get()
+        self._ledger.RecordVmRun(start_time, now, exit_code, usage)
+        vm_commands.ReleaseOverlay(overlay)
+      else:
+        running_vm_runs.append(vm_run)
+    return running_vm_runs
+
+  def _Reconcile(self, now):
+    """Update the state of dispatched and running jobs from the NFS share.
+
+    Args:
+      now: The current time.
+    """
+
+    for job in self._ledger.GetJobs([JobLedger.DISPATCHED,
+                                     JobLedger.RUNNING]):
+      # The files of a job are checked in the order in which they are created:
+      # the guest claims the descriptor by renaming it to the pending
+      # descriptor, and removes the pending descriptor after writing the
+      # result. A file which is gone thus means that the job moved forward,
+      # even if the guest acts between the checks.
+      if os.path.exists(self._GetDescriptorPath(job.name)):
+        continue
+      pending_path = self._GetPendingPath(job.name)
+      try:
+        pending_mtime = os.stat(pending_path).st_mtime
+      except OSError:
+        pending_mtime = None
+      if pending_mtime is not None:
+        if pending_mtime + self._lease_duration < now:
+          logging.warning('The lease of the VM analyzing %s expired.',
+                          job.name)
+          self._ledger.MarkFailed(job.name, JobLedger.LOST, now, None, None,
+                                  self._retry_delay)
+          BatchDispatcher._RemoveFile(pending_path)
+        elif job.state != JobLedger.RUNNING:
+          self._ledger.MarkRunning(job.name)
+      elif os.path.exists(self._GetResultPath(job.name)):
+        self._RecordResult(job, now)
+      else:
+        # The descriptor was claimed, but the pending descriptor is gone
+        # without a result.
+        self._ledger.MarkFailed(job.name, JobLedger.LOST, now, None, None,
+                                self._retry_delay)
+
+  def _RecordResult(self, job, now):
+    """Record the outcome of a job from its application result.
+
+    Args:
+      job: A Job.
+      now: The current time.
+    """
+
+    application_result = self._ReadApplicationResult(job.name)
+    if application_result is None:
+      self._ledger.MarkFailed(job.name, JobLedger.FAILED, now,
+                              'Could not read the application result.', None,
+                              self._retry_delay)
+      return
+    package = application_result.package
+    if package.analysis_attempts != job.attempts:
+      # A VM whose lease expired finished after the job was dispatched again.
+      logging.warning('Ignoring the result of attempt %d of %s.',
+                      package.analysis_attempts, job.name)
+      BatchDispatcher._RemoveFile(self._GetResultPath(job.name))
+      return
+    memory_used = [trigger_timing.usage.memory_used for trigger_timing
+                   in application_result.timing.triggers
+                   if trigger_timing.usage.HasField('memory_used')]
+    if memory_used:
+      self._ledger.RecordPeakMemory(package.name, max(memory_used))
+    analysis_duration = (package.analysis_end - package.analysis_start
+                         if package.HasField('analysis_start')
+                         and package.HasField('analysis_end') else None)
+    if package.status == wheelbarrow_pb2.Package.DONE:
+      self._ledger.MarkDone(job.name, now, analysis_duration)
+      return
+    state = (JobLedger.TIMED_OUT
+             if package.error == BatchDispatcher._TIMEOUT_ERROR
+             else JobLedger.FAILED)
+    logging.warning('Analysis of %s failed: %s', job.name, package.error)
+    self._ledger.MarkFailed(job.name, state, now, package.error,
+                            analysis_duration, self._retry_delay)
+
+  def _DispatchJobs(self, count, now):
+    """Write the package descriptors of the next jobs to the input directory.
+
+    Args:
+      count: The maximum number of jobs to dispatch.
+      now: The current time.
+
+    Returns:
+      The number of jobs which were dispatched.
+    """
+
+    if count <= 0:
+      return 0
+    dispatched = 0
+    for job in self._ledger.GetDispatchableJobs(now, self._max_attempts, count):
+      # Remove the files left by a previous attempt. Checkpoints are kept, so
+      # that the analysis can be resumed.
+      BatchDispatcher._RemoveFile(self._GetResultPath(job.name))
+      for temporary_path in result_stream.GetTemporaryFilePaths(
+          self._GetResultPath(job.name)):
+        BatchDispatcher._RemoveFile(temporary_path)
+      BatchDispatcher._RemoveFile(self._GetPendingPath(job.name))
+      package = wheelbarrow_pb2.Package()
+      package.MergeFromString(str(job.descriptor))
+      package.analysis_attempts = job.attempts
+      # The descriptor is written under a hidden name and renamed into place,
+      # so that VMs do not claim a partially written descriptor.
+      descriptor_path = self._GetDescriptorPath(job.name)
+      temporary_path = os.path.join(
+          self._input_dir, '.%s' % os.path.basename(descriptor_path))
+      if not utils.WriteProtobufToFile(package, temporary_path,
+                                       self._text_output):
+        logging.error('Could not write package descriptor for %s.', job.name)
+        BatchDispatcher._RemoveFile(temporary_path)
+        continue
+      try:
+        os.rename(temporary_path, descriptor_path)
+      except OSError as err:
+        logging.error('Could not move package descriptor for %s: %s', job.name,
+                      err)
+        BatchDispatcher._RemoveFile(temporary_path)
+        continue
+      self._ledger.MarkDispatched(job.name, now)
+      dispatched += 1
+    return dispatched
+
+  def _ReadResultPackage(self, job_name):
+    """Read the package descriptor from the application result of a job.
+
+    Args:
+      job_name: The name of a job.
+
+    Returns:
+      The wheelbarrow_pb2.Package of the result, or None if there is no
+      readable result.
+    """
+
+    application_result = self._ReadApplicationResult(job_name)
+    return (application_result.package if application_result is not None
+            else None)
+
+  def _ReadApplicationResult(self, job_name):
+    """Read the application result of a job.
+
+    Args:
+      job_name: The name of a job.
+
+    Returns:
+      A wheelbarrow_pb2.ApplicationResult, or None if there is no readable
+      result. The analysis results of result streams are not read.
+    """
+
+    result_path = self._GetResultPath(job_name)
+    if not os.path.exists(result_path):
+      return None
+    application_result = wheelbarrow_pb2.ApplicationResult()
+    if not result_stream.IsResultStream(result_path):
+      if not utils.ParseFileToProtobuf(result_path, application_result):
+        return None
+      return application_result
+    try:
+      result_stream.ParseResultStreamWithoutResults(result_path,
+                                                    application_result)
+    except result_stream.Error as err:
+      logging.error('Could not read result stream %s: %s', result_path, err)
+      return None
+    return application_result
+
+  def _GetDescriptorPath(self, job_name):
+    return os.path.join(self._input_dir, job_name + self._extension)
+
+  def _GetPendingPath(self, job_name):
+    return os.path.join(self._output_dir,
+                        '%s%s.pending' % (job_name, self._extension))
+
+  def _GetResultPath(self, job_name):
+    return os.path.join(self._output_dir, job_name + self._result_extension)
+
+  @staticmethod
+  def _RemoveFile(path):
+    try:
+      os.remove(path)
+    except OSError:
+      pass
+
+
+def _RunVm(cmd, timeout):
+  """Run a VM which is not controlled, whose resource usage is unknown."""
+
+  return (vm_launcher.RunVm(cmd, timeout), None)
@@ -0,0 +1,217 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Tests for the batch dispatcher."""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from common import result_stream
+from common import utils
+from common import wheelbarrow_pb2
+from host.batch_dispatcher import BatchDispatcher
+from host.job_ledger import JobLedger
+
+
+JOB_NAME = 'a-1.0-amd64'
+
+
+class BatchDispatcherTest(unittest.TestCase):
+  def setUp(self):
+    self.tmp_dir = tempfile.mkdtemp()
+    self.input_dir = os.path.join(self.tmp_dir, 'in')
+    self.output_dir = os.path.join(self.tmp_dir, 'out')
+    os.mkdir(self.input_dir)
+    os.mkdir(self.output_dir)
+    self.ledger = JobLedger(os.path.join(self.tmp_dir, 'jobs.sqlite'))
+    self.dispatcher = BatchDispatcher(
+        self.ledger, self.input_dir, self.output_dir, False, 60,
+        max_attempts=2, retry_delay=10, lease_duration=100)
+    self.package = self._MakePackage('a')
+    self.descriptor_path = os.path.join(self.input_dir, JOB_NAME + '.dat')
+    self.pending_path = os.path.join(self.output_dir,
+                                     JOB_NAME + '.dat.pending')
+    self.result_path = os.path.join(self.output_dir,
+                                    JOB_NAME + result_stream.EXTENSION)
+
+  def tearDown(self):
+    self.ledger.Close()
+    shutil.rmtree(self.tmp_dir)
+
+  def testAddJob(self):
+    self.assertTrue(self.dispatcher.AddJob(self.package))
+    self.assertTrue(self.dispatcher.AddJob(self.package))
+    self.assertEqual(JobLedger.QUEUED, self.ledger.GetJob(JOB_NAME).state)
+
+  def testAddJobWithDoneResult(self):
+    self._WriteResult(1, wheelbarrow_pb2.Package.DONE)
+    self.assertFalse(self.dispatcher.AddJob(self.package))
+    self.assertIsNone(self.ledger.GetJob(JOB_NAME))
+
+  def testAddJobWithFailedResult(self):
+    self._WriteResult(1, wheelbarrow_pb2.Package.FAILED)
+    self.assertTrue(self.dispatcher.AddJob(self.package))
+
+  def testDispatchJobs(self):
+    self.dispatcher.AddJob(self.package)
+    self.dispatcher.AddJob(self._MakePackage('b'))
+    open(self.result_path, 'w').close()
+    open(self.result_path + '.x' + result_stream.TEMP_EXTENSION, 'w').close()
+
+    self.assertEqual(1, self.dispatcher._DispatchJobs(1, 0))
+    self.assertEqual([JOB_NAME + '.dat'], os.listdir(self.input_dir))
+    self.assertEqual([], os.listdir(self.output_dir))
+    descriptor = wheelbarrow_pb2.Package()
+    self.assertTrue(utils.ParseFileToProtobuf(self.descriptor_path, descriptor,
+                                              -1, False))
+    self.assertEqual('a', descriptor.name)
+    self.assertEqual(0, descriptor.analysis_attempts)
+    job = self.ledger.GetJob(JOB_NAME)
+    self.assertEqual(JobLedger.DISPATCHED, job.state)
+    self.assertEqual(1, job.attempts)
+    self.assertEqual(0, self.dispatcher._DispatchJobs(0, 0))
+
+  def testReconcileUnclaimedJob(self):
+    self._Dispatch()
+    self.dispatcher._Reconcile(1000)
+    self.assertEqual(JobLedger.DISPATCHED, self.ledger.GetJob(JOB_NAME).state)
+
+  def testReconcileClaimedJob(self):
+    self._Dispatch()
+    self._Claim()
+    self.dispatcher._Reconcile(os.stat(self.pending_path).st_mtime)
+    self.assertEqual(JobLedger.RUNNING, self.ledger.GetJob(JOB_NAME).state)
+
+  def testReconcileExpiredLease(self):
+    self._Dispatch()
+    self._Claim()
+    self.dispatcher._Reconcile(os.stat(self.pending_path).st_mtime + 101)
+    self.assertEqual(JobLedger.LOST, self.ledger.GetJob(JOB_NAME).state)
+    self.assertFalse(os.path.exists(self.pending_path))
+
+  def testReconcileJobWithoutResult(self):
+    self._Dispatch()
+    os.remove(self.descriptor_path)
+    self.dispatcher._Reconcile(0)
+    self.assertEqual(JobLedger.LOST, self.ledger.GetJob(JOB_NAME).state)
+
+  def testReconcileDoneJob(self):
+    self._Dispatch()
+    self._Claim()
+    os.remove(self.pending_path)
+    self._WriteResult(1, wheelbarrow_pb2.Package.DONE, memory_used=2048)
+    self.dispatcher._Reconcile(0)
+    job = self.ledger.GetJob(JOB_NAME)
+    self.assertEqual(JobLedger.DONE, job.state)
+    self.assertEqual(30, job.analysis_duration)
+    self.assertEqual(2048, self.ledger.GetPeakMemory('a'))
+    self.assertFalse(self.ledger.HasUnfinishedJobs(2))
+
+  def testReconcileTimedOutJob(self):
+    self._Dispatch()
+    os.remove(self.descriptor_path)
+    self._WriteResult(1, wheelbarrow_pb2.Package.FAILED,
+                      BatchDispatcher._TIMEOUT_ERROR)
+    self.dispatcher._Reconcile(0)
+    job = self.ledger.GetJob(JOB_NAME)
+    self.assertEqual(JobLedger.TIMED_OUT, job.state)
+    self.assertEqual(BatchDispatcher._TIMEOUT_ERROR, job.error)
+    self.assertEqual(10, job.next_attempt_time)
+
+  def testRetryAfterFailure(self):
+    self._Dispatch()
+    os.remove(self.descriptor_path)
+    self._WriteResult(1, wheelbarrow_pb2.Package.FAILED, 'error')
+    self.dispatcher._Reconcile(0)
+    self.assertEqual(JobLedger.FAILED, self.ledger.GetJob(JOB_NAME).state)
+
+    self.assertEqual(0, self.dispatcher._DispatchJobs(1, 9))
+    self.assertEqual(1, self.dispatcher._DispatchJobs(1, 10))
+    self.assertFalse(os.path.exists(self.result_path))
+    descriptor = wheelbarrow_pb2.Package()
+    self.assertTrue(utils.ParseFileToProtobuf(self.descriptor_path, descriptor,
+                                              -1, False))
+    self.assertEqual(1, descriptor.analysis_attempts)
+
+    os.remove(self.descriptor_path)
+    self.dispatcher._Reconcile(20)
+    self.assertEqual(JobLedger.LOST, self.ledger.GetJob(JOB_NAME).state)
+    self.assertEqual(0, self.dispatcher._DispatchJobs(1, 1000))
+    self.assertFalse(self.ledger.HasUnfinishedJobs(2))
+
+  def testReconcileIgnoresResultOfEarlierAttempt(self):
+    self._Dispatch()
+    self.ledger.MarkFailed(JOB_NAME, JobLedger.LOST, 0, None)
+    os.remove(self.descriptor_path)
+    self.dispatcher._DispatchJobs(1, 0)
+    os.remove(self.descriptor_path)
+    self._WriteResult(1, wheelbarrow_pb2.Package.DONE)
+    self.dispatcher._Reconcile(0)
+    self.assertEqual(JobLedger.DISPATCHED, self.ledger.GetJob(JOB_NAME).state)
+    self.assertFalse(os.path.exists(self.result_path))
+
+  @staticmethod
+  def _MakePackage(name):
+    package = wheelbarrow_pb2.Package()
+    package.name = name
+    package.version = '1.0'
+    package.architecture = 'amd64'
+    package.section = 'misc'
+    package.status = wheelbarrow_pb2.Package.AVAILABLE
+    package.analysis_attempts = 0
+    return package
+
+  def _Dispatch(self):
+    self.dispatcher.AddJob(self.package)
+    self.assertEqual(1, self.dispatcher._DispatchJobs(1, 0))
+
+  def _Claim(self):
+    """Claim the descriptor, as the guest does."""
+
+    os.rename(self.descriptor_path, self.pending_path)
+
+  def _WriteResult(self, analysis_attempts, status, error=None,
+                   memory_used=None):
+    """Write the result stream of a job, as the guest does."""
+
+    package = wheelbarrow_pb2.Package()
+    package.CopyFrom(self.package)
+    package.analysis_attempts = analysis_attempts
+    package.status = status
+    package.analysis_start = 100
+    package.analysis_end = 130
+    if error is not None:
+      package.error = error
+    timing = wheelbarrow_pb2.Timing()
+    if memory_used is not None:
+      trigger_timing = timing.triggers.add()
+      trigger_timing.trigger = wheelbarrow_pb2.INSTALL
+      trigger_timing.usage.memory_used = memory_used
+    writer = result_stream.ResultStreamWriter(self.result_path)
+    writer.WritePackage(package, timing)
+    writer.Close()
+
+
+if __name__ == '__main__':
+  unittest.main()
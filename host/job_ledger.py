@@ -0,0 +1,303 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""A persistent ledger of the analysis jobs of a batch.
+
+The ledger is a SQLite file which records the state of each package analysis
+job, its attempts, durations and errors, as well as the exit codes and resource
+usage of the VMs which were run. It survives crashes of the launcher, so that a
+batch can be resumed. It also keeps the peak memory used by the guest for each
+package across batches, which is used to size the memory of VMs.
+"""
+
+from collections import namedtuple
+import os.path
+import sqlite3
+import sys
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+
+Job = namedtuple('Job', 'name, descriptor, state, attempts, next_attempt_time, '
+                 'dispatch_time, end_time, analysis_duration, error')
+
+
+class JobLedger(object):
+  """A persistent ledger of analysis jobs."""
+
+  # The job is waiting to be dispatched.
+  QUEUED = 'queued'
+  # The package descriptor was written to the input directory.
+  DISPATCHED = 'dispatched'
+  # A VM claimed the package descriptor.
+  RUNNING = 'running'
+  DONE = 'done'
+  FAILED = 'failed'
+  TIMED_OUT = 'timed_out'
+  # The VM which claimed the job did not write a result.
+  LOST = 'lost'
+
+  # The states of jobs which can be retried.
+  RETRYABLE_STATES = (FAILED, TIMED_OUT, LOST)
+
+  _SCHEMA = """
+      CREATE TABLE IF NOT EXISTS jobs (
+        name TEXT PRIMARY KEY,
+        descriptor BLOB NOT NULL,
+        state TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_time REAL NOT NULL DEFAULT 0,
+        dispatch_time REAL,
+        end_time REAL,
+        analysis_duration INTEGER,
+        error TEXT);
+      CREATE TABLE IF NOT EXISTS vm_runs (
+        id INTEGER PRIMARY KEY,
+        start_time REAL NOT NULL,
+        end_time REAL NOT NULL,
+        exit_code INTEGER,
+        cpu_time REAL,
+        max_rss INTEGER,
+        disk_read_bytes INTEGER,
+        disk_write_bytes INTEGER);
+      CREATE TABLE IF NOT EXISTS package_memory (
+        package TEXT PRIMARY KEY,
+        peak_memory INTEGER NOT NULL);
+  """
+
+  def __init__(self, path):
+    """Constructor.
+
+    Args:
+      path: The path to the SQLite file. It is created if it does not exist.
+    """
+
+    self._connection = sqlite3.connect(path)
+    self._connection.executescript(JobLedger._SCHEMA)
+    self._connection.commit()
+
+  def Close(self):
+    self._connection.close()
+
+  def Clear(self):
+    """Remove all jobs and VM runs, e.g., to start a new batch.
+
+    The memory history of packages is kept.
+    """
+
+    with self._connection:
+      self._connection.execute('DELETE FROM jobs')
+      self._connection.execute('DELETE FROM vm_runs')
+
+  def AddJob(self, name, descriptor):
+    """Add a job, if it is not already in the ledger.
+
+    Args:
+      name: The name of the job, e.g., '<package>-<version>-<architecture>'.
+      descriptor: The serialized wheelbarrow_pb2.Package of the job.
+    """
+
+    with self._connection:
+      self._connection.execute(
+          'INSERT OR IGNORE INTO jobs (name, descriptor, state) '
+          'VALUES (?, ?, ?)', (name, sqlite3.Binary(descriptor),
+                               JobLedger.QUEUED))
+
+  def GetJob(self, name):
+    """Get a job.
+
+    Args:
+      name: The name of a job.
+
+    Returns:
+      A Job, or None if there is no such job.
+    """
+
+    jobs = self._SelectJobs('WHERE name = ?', (name,))
+    return jobs[0] if jobs else None
+
+  def GetJobs(self, states):
+    """Get the jobs in some states, by name.
+
+    Args:
+      states: A list of job states.
+
+    Returns:
+      A list of Job tuples.
+    """
+
+    return self._SelectJobs(
+        'WHERE state IN (%s) ORDER BY name' % ', '.join('?' * len(states)),
+        tuple(states))
+
+  def GetDispatchableJobs(self, now, max_attempts, limit):
+    """Get the jobs which should be dispatched next.
+
+    These are queued jobs, and jobs which can be retried and whose retry delay
+    has expired.
+
+    Args:
+      now: The current time.
+      max_attempts: The maximum number of attempts per job.
+      limit: The maximum number of jobs to return.
+
+    Returns:
+      A list of Job tuples.
+    """
+
+    return self._SelectJobs(
+        'WHERE state = ? OR (state IN (?, ?, ?) AND attempts < ? '
+        'AND next_attempt_time <= ?) ORDER BY next_attempt_time, name '
+        'LIMIT ?', (JobLedger.QUEUED,) + JobLedger.RETRYABLE_STATES
+        + (max_attempts, now, limit))
+
+  def HasUnfinishedJobs(self, max_attempts):
+    """Determine if some jobs are not done and can still be attempted.
+
+    Args:
+      max_attempts: The maximum number of attempts per job.
+
+    Returns:
+      True if some jobs are queued, dispatched, running or can be retried.
+    """
+
+    (count,) = self._connection.execute(
+        'SELECT COUNT(*) FROM jobs WHERE state IN (?, ?, ?) '
+        'OR (state IN (?, ?, ?) AND attempts < ?)',
+        (JobLedger.QUEUED, JobLedger.DISPATCHED, JobLedger.RUNNING)
+        + JobLedger.RETRYABLE_STATES + (max_attempts,)).fetchone()
+    return count > 0
+
+  def MarkDispatched(self, name, now):
+    """Record that a new attempt of a job was dispatched."""
+
+    with self._connection:
+      self._connection.execute(
+          'UPDATE jobs SET state = ?, attempts = attempts + 1, '
+          'dispatch_time = ?, end_time = NULL, error = NULL WHERE name = ?',
+          (JobLedger.DISPATCHED, now, name))
+
+  def MarkRunning(self, name):
+    """Record that a job was claimed by a VM."""
+
+    with self._connection:
+      self._connection.execute('UPDATE jobs SET state = ? WHERE name = ?',
+                               (JobLedger.RUNNING, name))
+
+  def MarkDone(self, name, now, analysis_duration):
+    """Record that a job completed successfully.
+
+    Args:
+      name: The name of a job.
+      now: The current time.
+      analysis_duration: The duration of the analysis reported by the guest,
+                         in seconds, or None.
+    """
+
+    with self._connection:
+      self._connection.execute(
+          'UPDATE jobs SET state = ?, end_time = ?, analysis_duration = ? '
+          'WHERE name = ?', (JobLedger.DONE, now, analysis_duration, name))
+
+  def MarkFailed(self, name, state, now, error, analysis_duration=None,
+                 retry_delay=0):
+    """Record that an attempt of a job failed.
+
+    The next attempt is delayed exponentially with the number of attempts.
+
+    Args:
+      name: The name of a job.
+      state: One of RETRYABLE_STATES.
+      now: The current time.
+      error: An error description, or None.
+      analysis_duration: The duration of the analysis reported by the guest,
+                         in seconds, or None.
+      retry_delay: The delay before the second attempt of a job, in seconds.
+    """
+
+    with self._connection:
+      self._connection.execute(
+          'UPDATE jobs SET state = ?, end_time = ?, error = ?, '
+          'analysis_duration = ?, '
+          'next_attempt_time = ? + ? * (1 << MAX(attempts - 1, 0)) '
+          'WHERE name = ?',
+          (state, now, error, analysis_duration, now, retry_delay, name))
+
+  def RecordVmRun(self, start_time, end_time, exit_code, usage=None):
+    """Record a VM run.
+
+    Args:
+      start_time: The time at which the VM was started.
+      end_time: The time at which the VM exited.
+      exit_code: The exit code of the VM process (negative if it was killed by
+                 a signal), or None if it could not be started.
+      usage: A vm_controller.VmResourceUsage, or None if the usage of the VM is
+             unknown.
+    """
+
+    if usage is None:
+      usage = (None, None, None, None)
+    with self._connection:
+      self._connection.execute(
+          'INSERT INTO vm_runs (start_time, end_time, exit_code, cpu_time, '
+          'max_rss, disk_read_bytes, disk_write_bytes) '
+          'VALUES (?, ?, ?, ?, ?, ?, ?)',
+          (start_time, end_time, exit_code) + tuple(usage))
+
+  def RecordPeakMemory(self, package_name, peak_memory):
+    """Record the memory used by the guest while analyzing a package.
+
+    Only the highest value across versions and attempts is kept.
+
+    Args:
+      package_name: The name of a package, without its version.
+      peak_memory: The peak memory in use in the guest, in kilobytes.
+    """
+
+    with self._connection:
+      self._connection.execute(
+          'INSERT OR IGNORE INTO package_memory (package, peak_memory) '
+          'VALUES (?, 0)', (package_name,))
+      self._connection.execute(
+          'UPDATE package_memory SET peak_memory = MAX(peak_memory, ?) '
+          'WHERE package = ?', (peak_memory, package_name))
+
+  def GetPeakMemory(self, package_name):
+    """Get the highest memory recorded for a package, in kilobytes, or None."""
+
+    row = self._connection.execute(
+        'SELECT peak_memory FROM package_memory WHERE package = ?',
+        (package_name,)).fetchone()
+    return row[0] if row else None
+
+  def GetStateCounts(self):
+    """Get the number of jobs in each state.
+
+    Returns:
+      A map from job states to job counts.
+    """
+
+    return dict(self._connection.execute(
+        'SELECT state, COUNT(*) FROM jobs GROUP BY state'))
+
+  def _SelectJobs(self, condition, parameters):
+    rows = self._connection.execute(
+        'SELECT %s FROM jobs %s' % (', '.join(Job._fields), condition),
+        parameters)
+    return [Job(*row) for row in rows]
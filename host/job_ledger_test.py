@@ -0,0 +1,154 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Tests for the job ledger."""
+
+import os.path
+import shutil
+import sys
+import tempfile
+import unittest
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from host.job_ledger import JobLedger
+from host.vm_controller import VmResourceUsage
+
+
+class JobLedgerTest(unittest.TestCase):
+  def setUp(self):
+    self.tmp_dir = tempfile.mkdtemp()
+    self.path = os.path.join(self.tmp_dir, 'ledger.sqlite')
+    self.ledger = JobLedger(self.path)
+
+  def tearDown(self):
+    self.ledger.Close()
+    shutil.rmtree(self.tmp_dir)
+
+  def testAddJob(self):
+    self.ledger.AddJob('a', 'descriptor')
+    self.ledger.AddJob('a', 'other descriptor')
+
+    job = self.ledger.GetJob('a')
+    self.assertEqual('a', job.name)
+    self.assertEqual('descriptor', str(job.descriptor))
+    self.assertEqual(JobLedger.QUEUED, job.state)
+    self.assertEqual(0, job.attempts)
+    self.assertIsNone(self.ledger.GetJob('b'))
+
+  def testSuccessfulJob(self):
+    self.ledger.AddJob('a', 'descriptor')
+
+    self.ledger.MarkDispatched('a', 10)
+    job = self.ledger.GetJob('a')
+    self.assertEqual(JobLedger.DISPATCHED, job.state)
+    self.assertEqual(1, job.attempts)
+    self.assertEqual(10, job.dispatch_time)
+    self.ledger.MarkRunning('a')
+    self.assertEqual(JobLedger.RUNNING, self.ledger.GetJob('a').state)
+    self.ledger.MarkDone('a', 20, 8)
+    job = self.ledger.GetJob('a')
+    self.assertEqual(JobLedger.DONE, job.state)
+    self.assertEqual(20, job.end_time)
+    self.assertEqual(8, job.analysis_duration)
+    self.assertFalse(self.ledger.HasUnfinishedJobs(3))
+    self.assertEqual([], self.ledger.GetDispatchableJobs(100, 3, 10))
+
+  def testRetryDelayIsDoubled(self):
+    self.ledger.AddJob('a', 'descriptor')
+
+    self.ledger.MarkDispatched('a', 0)
+    self.ledger.MarkFailed('a', JobLedger.FAILED, 10, 'error', 5, 60)
+    job = self.ledger.GetJob('a')
+    self.assertEqual(JobLedger.FAILED, job.state)
+    self.assertEqual('error', job.error)
+    self.assertEqual(5, job.analysis_duration)
+    self.assertEqual(70, job.next_attempt_time)
+    self.assertEqual([], self.ledger.GetDispatchableJobs(69, 3, 10))
+    self.assertEqual(['a'], [job.name for job
+                             in self.ledger.GetDispatchableJobs(70, 3, 10)])
+
+    self.ledger.MarkDispatched('a', 70)
+    job = self.ledger.GetJob('a')
+    self.assertEqual(2, job.attempts)
+    self.assertIsNone(job.error)
+    self.assertIsNone(job.end_time)
+    self.ledger.MarkFailed('a', JobLedger.LOST, 100, None, None, 60)
+    self.assertEqual(220, self.ledger.GetJob('a').next_attempt_time)
+
+  def testMaxAttempts(self):
+    self.ledger.AddJob('a', 'descriptor')
+
+    for attempt in xrange(2):
+      self.assertTrue(self.ledger.HasUnfinishedJobs(2))
+      self.ledger.MarkDispatched('a', attempt)
+      self.ledger.MarkFailed('a', JobLedger.TIMED_OUT, attempt, None)
+    self.assertEqual([], self.ledger.GetDispatchableJobs(100, 2, 10))
+    self.assertFalse(self.ledger.HasUnfinishedJobs(2))
+    self.assertTrue(self.ledger.HasUnfinishedJobs(3))
+
+  def testGetDispatchableJobs(self):
+    for name in ('c', 'b', 'a', 'd'):
+      self.ledger.AddJob(name, 'descriptor')
+    self.ledger.MarkDispatched('d', 0)
+    self.ledger.MarkFailed('d', JobLedger.FAILED, 0, None, None, 10)
+
+    self.assertEqual(['a', 'b'], [job.name for job
+                                  in self.ledger.GetDispatchableJobs(5, 3, 2)])
+    self.assertEqual(['a', 'b', 'c'],
+                     [job.name for job
+                      in self.ledger.GetDispatchableJobs(5, 3, 10)])
+    self.assertEqual(['a', 'b', 'c', 'd'],
+                     [job.name for job
+                      in self.ledger.GetDispatchableJobs(10, 3, 10)])
+
+  def testGetJobsAndStateCounts(self):
+    for name in ('a', 'b', 'c'):
+      self.ledger.AddJob(name, 'descriptor')
+    self.ledger.MarkDispatched('b', 0)
+    self.ledger.MarkDispatched('c', 0)
+    self.ledger.MarkRunning('c')
+
+    self.assertEqual(['b', 'c'], [job.name for job in self.ledger.GetJobs(
+        [JobLedger.DISPATCHED, JobLedger.RUNNING])])
+    self.assertEqual({JobLedger.QUEUED: 1, JobLedger.DISPATCHED: 1,
+                      JobLedger.RUNNING: 1}, self.ledger.GetStateCounts())
+
+  def testPeakMemory(self):
+    self.assertIsNone(self.ledger.GetPeakMemory('a'))
+    self.ledger.RecordPeakMemory('a', 100)
+    self.ledger.RecordPeakMemory('a', 50)
+    self.assertEqual(100, self.ledger.GetPeakMemory('a'))
+
+  def testClearAndReopen(self):
+    self.ledger.AddJob('a', 'descriptor')
+    self.ledger.RecordPeakMemory('a', 100)
+    self.ledger.RecordVmRun(0, 10, 0, VmResourceUsage(1.5, 1024, 10, 20))
+    self.ledger.RecordVmRun(0, 10, None)
+    self.ledger.Close()
+
+    self.ledger = JobLedger(self.path)
+    self.assertEqual(JobLedger.QUEUED, self.ledger.GetJob('a').state)
+    self.ledger.Clear()
+    self.assertIsNone(self.ledger.GetJob('a'))
+    self.assertEqual(100, self.ledger.GetPeakMemory('a'))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,29 @@
+#!/bin/bash
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+
+# Compute the baseline manifest of the VM image.
+
+NFS_PATH=/mnt/broker
+export WHEELBARROW_HOME=${NFS_PATH}/wheelbarrow
+BASELINE_MANIFEST=${WHEELBARROW_HOME}/guest/baseline_manifest.py
+
+sudo -E "${BASELINE_MANIFEST}" --output "${NFS_PATH}/baseline_manifest.dat"
+
+poweroff
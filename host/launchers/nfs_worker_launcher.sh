@@ -0,0 +1,51 @@
+#!/bin/bash
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+
+# Launch analysis broker on a worker VM, which analyzes several packages.
+#
+# The host drives the VM through the first serial port. When the VM is ready,
+# it writes READY and waits for a command. The host saves the state of the VM
+# the first time, and answers GO. After each package, the VM writes DONE and
+# the host either reverts the VM to the saved state, where it waits for the next
+# GO, or answers QUIT. The state of the VM while it waits for the first command
+# may also be saved as a warm state, which later VMs are restored from.
+
+NFS_PATH=/mnt/broker
+export WHEELBARROW_HOME=${NFS_PATH}/wheelbarrow
+BROKER=${WHEELBARROW_HOME}/guest/broker.py
+CONTROL=/dev/ttyS0
+
+# Avoid prompts during install.
+export DEBIAN_FRONTENT=noninteractive
+
+stty -F "${CONTROL}" raw -echo
+exec 3<>"${CONTROL}"
+echo READY >&3
+read COMMAND <&3
+
+if [ "${COMMAND}" = "GO" ]; then
+  # The clock of the VM stopped while its state was saved.
+  sudo hwclock --hctosys
+  sudo -E "${BROKER}" --nfs "${NFS_PATH}/analysis.config"
+  echo "DONE $?" >&3
+  read COMMAND <&3
+fi
+
+poweroff
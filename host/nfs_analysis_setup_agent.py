@@ -42,6 +42,8 @@ class NfsAnalysisSetupAgent(object):
   using an NFS share to communicate with the guest.
   """
 
+  BASELINE_MANIFEST_FILE_NAME = 'baseline_manifest.dat'
+  BLOB_DIR = 'blobs'
   CONFIG_FILE_NAME = 'analysis.config'
   INPUT_DIR = 'in'
   ERROR = -1
@@ -52,7 +54,9 @@ class NfsAnalysisSetupAgent(object):
   _DEST_LAUNCHER_FILE_NAME = 'nfs_launcher.sh'
 
   def __init__(self, host_nfs_share, guest_nfs_share, timeout,
-               text_output=False, update=False, broker=False, image=None):
+               text_output=False, update=False, broker=False, image=None,
+               baseline=False, resume=False, dispatcher=None, worker=False,
+               blob_store=False):
     self._host_nfs_share = host_nfs_share
     self._dest_launcher_path = os.path.join(
         self._host_nfs_share,
@@ -63,6 +67,11 @@ class NfsAnalysisSetupAgent(object):
     self._update = update
     self._broker = broker
     self._image = image
+    self._baseline = baseline
+    self._resume = resume
+    self._dispatcher = dispatcher
+    self._worker = worker
+    self._blob_store = blob_store
 
   def SetUpAnalysis(self, batch_descriptor_path):
     """Set up the analysis.
@@ -78,6 +87,8 @@ class NfsAnalysisSetupAgent(object):
 
     if self._broker and not self._UpdateBroker():
       return NfsAnalysisSetupAgent.ERROR
+    if self._baseline and not self._SetUpBaselineManifest():
+      return NfsAnalysisSetupAgent.ERROR
     if not self._SetUpBrokerRunLauncher():
       return NfsAnalysisSetupAgent.ERROR
     batch_descriptor = NfsAnalysisSetupAgent._LoadBatchDescriptorFromFile(
@@ -99,12 +110,55 @@ class NfsAnalysisSetupAgent(object):
     return (self._CopyBrokerLauncher(set_up_launcher_path)
             and vm_launcher.StartVm(cmd, 1200))
 
+  def _SetUpBaselineManifest(self):
+    """Make sure that an up-to-date baseline manifest of the image exists.
+
+    The manifest is computed by a VM started from the image, and reused as long
+    as the image is not modified.
+
+    Returns:
+      True if all goes well.
+    """
+
+    manifest_path = os.path.join(
+        self._host_nfs_share, NfsAnalysisSetupAgent.BASELINE_MANIFEST_FILE_NAME)
+    image_mtime = int(os.stat(self._image).st_mtime)
+    manifest = wheelbarrow_pb2.BaselineManifest()
+    if (os.path.exists(manifest_path)
+        and utils.ParseFileToProtobuf(manifest_path, manifest, -1, False)
+        and manifest.image == self._image
+        and manifest.image_mtime == image_mtime):
+      logging.info('Reusing baseline manifest %s.', manifest_path)
+      return True
+
+    logging.info('Computing baseline manifest of %s...', self._image)
+    try:
+      os.remove(manifest_path)
+    except OSError:
+      pass
+    manifest_launcher_path = os.path.join(
+        NfsAnalysisSetupAgent._INSTALL_BASE_DIR,
+        NfsAnalysisSetupAgent._LAUNCHERS_BASE_DIR,
+        'nfs_manifest_launcher.sh')
+    cmd = vm_launcher.MakeVmCommand(self._image, 2048, True)
+    if not (self._CopyBrokerLauncher(manifest_launcher_path)
+            and vm_launcher.StartVm(cmd, 1200)):
+      logging.error('Could not compute baseline manifest.')
+      return False
+    manifest.Clear()
+    if not utils.ParseFileToProtobuf(manifest_path, manifest, -1, False):
+      logging.error('Could not read baseline manifest %s.', manifest_path)
+      return False
+    manifest.image = self._image
+    manifest.image_mtime = image_mtime
+    return utils.WriteProtobufToFile(manifest, manifest_path, False)
+
   def _SetUpBrokerRunLauncher(self):
     """Setup Broker paths."""
     run_launcher_path = os.path.join(
         NfsAnalysisSetupAgent._INSTALL_BASE_DIR,
         NfsAnalysisSetupAgent._LAUNCHERS_BASE_DIR,
-        'nfs_run_launcher.sh')
+        'nfs_worker_launcher.sh' if self._worker else 'nfs_run_launcher.sh')
     return self._CopyBrokerLauncher(run_launcher_path)
 
   def _CopyBrokerLauncher(self, src):
@@ -166,7 +220,10 @@ class NfsAnalysisSetupAgent(object):
       return None
 
   def _SetUpDirs(self):
-    """Check/create INPUT_DIR, OUTPUT_DIR, _LOG_DIR if they don't exist."""
+    """Check/create INPUT_DIR, OUTPUT_DIR, _LOG_DIR if they don't exist.
+
+    BLOB_DIR is also created if a blob store is used.
+    """
     logging.info('Setting up directories...')
     host_input_dir = os.path.join(self._host_nfs_share,
                                   NfsAnalysisSetupAgent.INPUT_DIR)
@@ -178,6 +235,9 @@ class NfsAnalysisSetupAgent(object):
       NfsAnalysisSetupAgent._CreateDirIfNotExists(host_input_dir)
       NfsAnalysisSetupAgent._CreateDirIfNotExists(host_output_dir)
       NfsAnalysisSetupAgent._CreateDirIfNotExists(host_log_dir)
+      if self._blob_store:
+        NfsAnalysisSetupAgent._CreateDirIfNotExists(
+            os.path.join(self._host_nfs_share, NfsAnalysisSetupAgent.BLOB_DIR))
       return True
     except OSError as err:
       logging.error('Could not set up directories: %s', err)
@@ -212,7 +272,13 @@ class NfsAnalysisSetupAgent(object):
       for version in package.versions:
         if not self._SelectVersion(version, architecture):
           continue
-        if not self._WritePackageDescriptorToFile(package.name, version):
+        package_pb = NfsAnalysisSetupAgent._MakePackageDescriptor(package.name,
+                                                                  version)
+        if self._dispatcher is not None:
+          # The dispatcher writes the descriptor when the job is dispatched.
+          if not self._dispatcher.AddJob(package_pb):
+            continue
+        elif not self._WritePackageDescriptorToFile(package_pb):
           return NfsAnalysisSetupAgent.ERROR
         count += 1
         if max_count and count >= max_count:
@@ -248,15 +314,22 @@ class NfsAnalysisSetupAgent(object):
 
     return version.architecture == architecture
 
-  def _WritePackageDescriptorToFile(self, package_name, version):
-    """Write out the packages to be analysed."""
+  @staticmethod
+  def _MakePackageDescriptor(package_name, version):
+    """Make the descriptor of a package to be analysed."""
     package_pb = wheelbarrow_pb2.Package()
     package_pb.name = package_name
     package_pb.architecture = version.architecture
     package_pb.version = version.version
     package_pb.status = wheelbarrow_pb2.Package.AVAILABLE
-    file_name = '%s-%s-%s' % (package_name, version.version,
-                              version.architecture)
+    if version.installed_size:
+      package_pb.installed_size = version.installed_size
+    return package_pb
+
+  def _WritePackageDescriptorToFile(self, package_pb):
+    """Write out the packages to be analysed."""
+    file_name = '%s-%s-%s' % (package_pb.name, package_pb.version,
+                              package_pb.architecture)
     path = os.path.join(self._host_nfs_share, NfsAnalysisSetupAgent.INPUT_DIR,
                         file_name)
     if utils.WriteProtobufToFile(package_pb, path, self._text_output, True):
@@ -281,6 +354,16 @@ class NfsAnalysisSetupAgent(object):
     config.log_dir = os.path.join(self._guest_nfs_share,
                                   NfsAnalysisSetupAgent._LOG_DIR)
     config.text_output = self._text_output
+    if self._baseline:
+      config.baseline_manifest = os.path.join(
+          self._guest_nfs_share,
+          NfsAnalysisSetupAgent.BASELINE_MANIFEST_FILE_NAME)
+    config.resume = self._resume
+    if self._blob_store:
+      config.blob_dir = os.path.join(self._guest_nfs_share,
+                                     NfsAnalysisSetupAgent.BLOB_DIR)
+    if self._dispatcher is not None:
+      config.lease_duration = self._dispatcher.GetLeaseDuration()
     # We estimate that the VM startup and initial setup should take less than a
     # minute.
     config.timeout = self._timeout - 60
@@ -0,0 +1,135 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Ingest analysis results into a result store and query it.
+
+     Usage: %s
+       --store <path to the result store>
+       [--resultdir <directory containing result protobufs to ingest>]
+       [--follow <seconds between ingestions of the result directory>]
+       [--path <path glob pattern>] [--analysis <analysis name>]
+       [--type <result type, e.g., ADD>] [--package <package name pattern>]
+       [--sql <SQL query>]
+
+     With --follow, the result directory is ingested periodically as results
+     arrive, until the launcher is interrupted. Otherwise, the file results
+     matching the --path, --analysis, --type and --package filters are printed,
+     or the result of the --sql query if it is given. Filters are combined, and
+     patterns use the syntax of the SQLite GLOB operator (e.g., '/etc/pam.d/*').
+
+     Examples:
+       %s --store results.sqlite --resultdir out --path '/etc/pam.d/*'
+       %s --store results.sqlite --sql 'SELECT local_port, COUNT(*)
+           FROM network_states GROUP BY local_port'
+"""
+
+import gflags
+import logging
+import os.path
+import sys
+import time
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+from host.result_store import ResultStore
+
+FLAGS = gflags.FLAGS
+
+gflags.DEFINE_string('store', None, 'The path to the result store.')
+gflags.DEFINE_string('resultdir', None, 'A directory containing results to '
+                     'ingest before querying.')
+gflags.DEFINE_integer('follow', 0, 'If positive, ingest the result directory '
+                      'every given number of seconds instead of querying.')
+gflags.DEFINE_string('path', None, 'A glob pattern for the paths of file '
+                     'results.')
+gflags.DEFINE_string('analysis', None, 'The name of an analysis.')
+gflags.DEFINE_string('type', None, 'A result type (ADD, DELETE, CHANGE or '
+                     'DESCRIPTIVE).')
+gflags.DEFINE_string('package', None, 'A glob pattern for package names.')
+gflags.DEFINE_string('sql', None, 'A SQL query to run instead of the file '
+                     'result query.')
+gflags.MarkFlagAsRequired('store')
+
+_FILE_RESULT_QUERY = """
+    SELECT packages.name, packages.version, packages.architecture,
+           file_results.analysis_name, file_results.scope, file_results.type,
+           file_results.path
+    FROM file_results JOIN packages ON file_results.package_id = packages.id
+"""
+
+
+def _MakeFileResultQuery():
+  """Make the file result query from the filter flags.
+
+  Returns:
+    A (SQL query, parameters) tuple.
+  """
+
+  conditions = []
+  parameters = []
+  for (column, operator, value) in (
+      ('file_results.path', 'GLOB', FLAGS.path),
+      ('file_results.analysis_name', '=', FLAGS.analysis),
+      ('file_results.type', '=', FLAGS.type and FLAGS.type.upper()),
+      ('packages.name', 'GLOB', FLAGS.package)):
+    if value is not None:
+      conditions.append('%s %s ?' % (column, operator))
+      parameters.append(value)
+  query = _FILE_RESULT_QUERY
+  if conditions:
+    query += '    WHERE %s\n' % ' AND '.join(conditions)
+  query += '    ORDER BY packages.name, file_results.path'
+  return (query, parameters)
+
+
+def _PrintRows(column_names, rows):
+  print '\t'.join(column_names)
+  for row in rows:
+    print '\t'.join('' if value is None else str(value) for value in row)
+
+
+def main(argv):
+  """Ingest results and query them."""
+  logging.root.setLevel(logging.INFO)
+  argv = FLAGS(argv)
+  if FLAGS.follow > 0 and not FLAGS.resultdir:
+    logging.error('--follow requires --resultdir.')
+    sys.exit(1)
+
+  store = ResultStore(FLAGS.store)
+  try:
+    if FLAGS.resultdir:
+      while True:
+        count = store.IngestResultDirectory(FLAGS.resultdir)
+        logging.info('Ingested %d result files from %s.', count,
+                     FLAGS.resultdir)
+        if FLAGS.follow <= 0:
+          break
+        time.sleep(FLAGS.follow)
+
+    if FLAGS.sql:
+      (column_names, rows) = store.Query(FLAGS.sql)
+    else:
+      (column_names, rows) = store.Query(*_MakeFileResultQuery())
+    _PrintRows(column_names, rows)
+  finally:
+    store.Close()
+
+
+if __name__ == '__main__':
+  main(sys.argv)
@@ -0,0 +1,372 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""A queryable store of the analysis results of a batch.
+
+Application results are written as one protobuf file per package. The store
+flattens them into SQLite tables, with one row per package, per file result,
+per file state and per network state, and indexes on the columns which are
+commonly queried (package name, analysis name, result type and path). This
+answers questions such as "which packages change /etc/pam.d/*" without parsing
+every result file.
+
+Result files are ingested incrementally: a file is only parsed again if its
+size or modification time changed since it was ingested. Result streams are
+ingested one result at a time.
+"""
+
+import logging
+import os.path
+import sqlite3
+import sys
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from common import result_stream
+from common import wheelbarrow_pb2
+from common.utils import ParseFileToProtobuf
+
+
+class ResultStore(object):
+  """A SQLite store of flattened application results."""
+
+  # The descriptors of the enums whose value names are stored.
+  _RESULT_TYPE = wheelbarrow_pb2.DESCRIPTOR.enum_types_by_name['ResultType']
+  _TRIGGER = wheelbarrow_pb2.DESCRIPTOR.enum_types_by_name['Trigger']
+  _FILE_TYPE = wheelbarrow_pb2.FileResult.DESCRIPTOR.enum_types_by_name[
+      'FileType']
+  _PACKAGE_STATUS = wheelbarrow_pb2.Package.DESCRIPTOR.enum_types_by_name[
+      'PackageStatus']
+  # The number of ingested files between commits.
+  _COMMIT_INTERVAL = 100
+
+  _SCHEMA = """
+      CREATE TABLE IF NOT EXISTS packages (
+        id INTEGER PRIMARY KEY,
+        file_name TEXT UNIQUE NOT NULL,
+        file_size INTEGER NOT NULL,
+        file_mtime REAL NOT NULL,
+        name TEXT,
+        version TEXT,
+        architecture TEXT,
+        section TEXT,
+        repository TEXT,
+        status TEXT,
+        analysis_attempts INTEGER,
+        analysis_start INTEGER,
+        analysis_end INTEGER,
+        installed_size INTEGER,
+        error TEXT);
+      CREATE TABLE IF NOT EXISTS file_results (
+        id INTEGER PRIMARY KEY,
+        package_id INTEGER NOT NULL,
+        analysis_name TEXT NOT NULL,
+        scope TEXT NOT NULL,
+        type TEXT NOT NULL,
+        path TEXT NOT NULL,
+        file_type TEXT NOT NULL);
+      CREATE TABLE IF NOT EXISTS file_states (
+        file_result_id INTEGER NOT NULL,
+        package_id INTEGER NOT NULL,
+        trigger TEXT NOT NULL,
+        permissions TEXT,
+        dependencies TEXT,
+        relro TEXT,
+        md5 TEXT,
+        sha1 TEXT,
+        sha256 TEXT,
+        contents_size INTEGER,
+        contents_sha256 TEXT);
+      CREATE TABLE IF NOT EXISTS network_states (
+        package_id INTEGER NOT NULL,
+        analysis_name TEXT NOT NULL,
+        type TEXT NOT NULL,
+        trigger TEXT NOT NULL,
+        local_ip4address TEXT,
+        local_ip6address TEXT,
+        local_port TEXT,
+        foreign_ip4address TEXT,
+        foreign_ip6address TEXT,
+        foreign_port TEXT,
+        is_udp INTEGER,
+        process_path TEXT);
+      CREATE INDEX IF NOT EXISTS packages_name ON packages (name);
+      CREATE INDEX IF NOT EXISTS file_results_package
+          ON file_results (package_id);
+      CREATE INDEX IF NOT EXISTS file_results_path ON file_results (path);
+      CREATE INDEX IF NOT EXISTS file_results_analysis
+          ON file_results (analysis_name, type);
+      CREATE INDEX IF NOT EXISTS file_states_result
+          ON file_states (file_result_id);
+      CREATE INDEX IF NOT EXISTS file_states_package
+          ON file_states (package_id);
+      CREATE INDEX IF NOT EXISTS network_states_package
+          ON network_states (package_id);
+      CREATE INDEX IF NOT EXISTS network_states_port
+          ON network_states (local_port);
+  """
+
+  # The tables with rows which belong to a package, other than packages.
+  _PACKAGE_TABLES = ('file_results', 'file_states', 'network_states')
+
+  def __init__(self, path):
+    """Constructor.
+
+    Args:
+      path: The path to the SQLite file. It is created if it does not exist.
+    """
+
+    self._connection = sqlite3.connect(path)
+    self._connection.text_factory = str
+    self._connection.executescript(ResultStore._SCHEMA)
+    self._connection.commit()
+
+  def Close(self):
+    self._connection.commit()
+    self._connection.close()
+
+  def IngestResultDirectory(self, result_dir):
+    """Ingest the new and changed results in a directory.
+
+    The results of files which were removed from the directory are removed from
+    the store.
+
+    Args:
+      result_dir: A directory containing ApplicationResult files.
+
+    Returns:
+      The number of result files which were ingested.
+    """
+
+    stat_results = {}
+    for file_path in result_stream.GetResultFilePaths(result_dir):
+      try:
+        stat_results[os.path.basename(file_path)] = os.stat(file_path)
+      except OSError as err:
+        logging.error('Could not stat result file %s: %s', file_path, err)
+
+    ingested = {}
+    for (package_id, file_name, file_size, file_mtime) in (
+        self._connection.execute(
+            'SELECT id, file_name, file_size, file_mtime FROM packages')):
+      ingested[file_name] = (package_id, file_size, file_mtime)
+
+    for (file_name, (package_id, _, _)) in ingested.iteritems():
+      if file_name not in stat_results:
+        self._RemovePackage(package_id)
+
+    count = 0
+    for (file_name, stat_result) in sorted(stat_results.iteritems()):
+      entry = ingested.get(file_name)
+      if entry is not None and entry[1:] == (stat_result.st_size,
+                                             stat_result.st_mtime):
+        continue
+      if entry is not None:
+        self._RemovePackage(entry[0])
+      file_path = os.path.join(result_dir, file_name)
+      if result_stream.IsResultStream(file_path):
+        try:
+          self.AddResultStream(file_name, stat_result, file_path)
+        except result_stream.Error as err:
+          logging.error('Could not read result stream %s: %s', file_name, err)
+          continue
+      else:
+        application_result = wheelbarrow_pb2.ApplicationResult()
+        if not ParseFileToProtobuf(file_path, application_result):
+          logging.error('Could not parse application result %s.', file_name)
+          continue
+        self.AddApplicationResult(file_name, stat_result, application_result)
+      count += 1
+      if count % ResultStore._COMMIT_INTERVAL == 0:
+        self._connection.commit()
+    self._connection.commit()
+    return count
+
+  def AddApplicationResult(self, file_name, stat_result, application_result):
+    """Add an application result to the store.
+
+    Args:
+      file_name: The name of the result file.
+      stat_result: The result of os.stat() on the result file.
+      application_result: A wheelbarrow_pb2.ApplicationResult.
+    """
+
+    package_id = self._AddPackage(file_name, stat_result,
+                                  application_result.package)
+    for analysis_result in application_result.analysis_results:
+      for result in analysis_result.results:
+        self._AddResult(package_id, analysis_result.analysis_name, result)
+
+  def AddResultStream(self, file_name, stat_result, file_path):
+    """Add the application result of a result stream to the store.
+
+    The results are added one at a time, so that the whole application result
+    is never held in memory. The final package is at the end of the stream, so
+    the package row is completed once the stream has been read.
+
+    Args:
+      file_name: The name of the result file.
+      stat_result: The result of os.stat() on the result file.
+      file_path: The path to the result stream.
+
+    Raises:
+      result_stream.Error: If the stream cannot be read or is invalid.
+                           Nothing is added to the store in that case.
+    """
+
+    application_result = wheelbarrow_pb2.ApplicationResult()
+    package_id = self._AddPackage(file_name, stat_result,
+                                  application_result.package)
+    try:
+      for (analysis_name, result) in result_stream.ReadResults(
+          file_path, application_result):
+        self._AddResult(package_id, analysis_name, result)
+    except result_stream.Error:
+      self._RemovePackage(package_id)
+      raise
+    self._connection.execute(
+        'UPDATE packages SET name = ?, version = ?, architecture = ?, '
+        'section = ?, repository = ?, status = ?, analysis_attempts = ?, '
+        'analysis_start = ?, analysis_end = ?, installed_size = ?, error = ? '
+        'WHERE id = ?',
+        ResultStore._GetPackageColumns(application_result.package)
+        + (package_id,))
+
+  def Query(self, sql, parameters=()):
+    """Run a SQL query on the store.
+
+    Args:
+      sql: A SQL statement.
+      parameters: The values of the parameters of the statement.
+
+    Returns:
+      A (column names, list of rows) tuple.
+    """
+
+    cursor = self._connection.execute(sql, parameters)
+    column_names = [column[0] for column in cursor.description or ()]
+    return (column_names, cursor.fetchall())
+
+  def _AddPackage(self, file_name, stat_result, package):
+    """Add a package row and return its identifier."""
+
+    return self._connection.execute(
+        'INSERT INTO packages (file_name, file_size, file_mtime, name, '
+        'version, architecture, section, repository, status, '
+        'analysis_attempts, analysis_start, analysis_end, installed_size, '
+        'error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        (file_name, stat_result.st_size, stat_result.st_mtime)
+        + ResultStore._GetPackageColumns(package)).lastrowid
+
+  def _AddResult(self, package_id, analysis_name, result):
+    for file_result in result.package_results:
+      self._AddFileResult(package_id, analysis_name, 'package', file_result)
+    for file_result in result.file_system_results:
+      self._AddFileResult(package_id, analysis_name, 'file_system',
+                          file_result)
+    for network_result in result.network_results:
+      self._AddNetworkResult(package_id, analysis_name, network_result)
+
+  def _AddFileResult(self, package_id, analysis_name, scope, file_result):
+    """Add a file result and its states.
+
+    Args:
+      package_id: The id of the package of the result.
+      analysis_name: The name of the analysis which produced the result.
+      scope: 'package' for results about the files of the package,
+             'file_system' for results about the rest of the file system.
+      file_result: A wheelbarrow_pb2.FileResult.
+    """
+
+    file_result_id = self._connection.execute(
+        'INSERT INTO file_results (package_id, analysis_name, scope, type, '
+        'path, file_type) VALUES (?, ?, ?, ?, ?, ?)',
+        (package_id, analysis_name, scope,
+         ResultStore._GetEnumName(ResultStore._RESULT_TYPE, file_result.type),
+         file_result.path,
+         ResultStore._GetEnumName(ResultStore._FILE_TYPE,
+                                  file_result.file_type))).lastrowid
+    self._connection.executemany(
+        'INSERT INTO file_states VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        [(file_result_id, package_id,
+          ResultStore._GetEnumName(ResultStore._TRIGGER, state.trigger),
+          ResultStore._GetOptionalField(state, 'permissions'),
+          ResultStore._GetOptionalField(state, 'dependencies'),
+          ResultStore._GetOptionalField(state.hardening_features, 'relro'),
+          ResultStore._GetOptionalField(state, 'md5'),
+          ResultStore._GetOptionalField(state, 'sha1'),
+          ResultStore._GetOptionalField(state, 'sha256'),
+          len(state.contents) if state.HasField('contents') else None,
+          ResultStore._GetOptionalField(state, 'contents_sha256'))
+         for state in file_result.states])
+
+  def _AddNetworkResult(self, package_id, analysis_name, network_result):
+    """Add the states of a network result.
+
+    Args:
+      package_id: The id of the package of the result.
+      analysis_name: The name of the analysis which produced the result.
+      network_result: A wheelbarrow_pb2.NetworkResult.
+    """
+
+    result_type = ResultStore._GetEnumName(ResultStore._RESULT_TYPE,
+                                           network_result.type)
+    self._connection.executemany(
+        'INSERT INTO network_states VALUES '
+        '(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        [(package_id, analysis_name, result_type,
+          ResultStore._GetEnumName(ResultStore._TRIGGER, state.trigger))
+         + tuple(ResultStore._GetOptionalField(state, field_name)
+                 for field_name in ('local_ip4address', 'local_ip6address',
+                                    'local_port', 'foreign_ip4address',
+                                    'foreign_ip6address', 'foreign_port',
+                                    'is_udp', 'process_path'))
+         for state in network_result.states])
+
+  def _RemovePackage(self, package_id):
+    for table in ResultStore._PACKAGE_TABLES:
+      self._connection.execute('DELETE FROM %s WHERE package_id = ?' % table,
+                               (package_id,))
+    self._connection.execute('DELETE FROM packages WHERE id = ?',
+                             (package_id,))
+
+  @staticmethod
+  def _GetPackageColumns(package):
+    """Get the values of the package columns, from name to error."""
+
+    return (package.name, package.version, package.architecture,
+            package.section,
+            ResultStore._GetOptionalField(package, 'repository'),
+            ResultStore._GetEnumName(ResultStore._PACKAGE_STATUS,
+                                     package.status),
+            package.analysis_attempts,
+            ResultStore._GetOptionalField(package, 'analysis_start'),
+            ResultStore._GetOptionalField(package, 'analysis_end'),
+            ResultStore._GetOptionalField(package, 'installed_size'),
+            ResultStore._GetOptionalField(package, 'error'))
+
+  @staticmethod
+  def _GetOptionalField(protobuf, field_name):
+    return (getattr(protobuf, field_name) if protobuf.HasField(field_name)
+            else None)
+
+  @staticmethod
+  def _GetEnumName(enum_descriptor, number):
+    enum_value = enum_descriptor.values_by_number.get(number)
+    return enum_value.name if enum_value else str(number)
@@ -0,0 +1,164 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Tests for the result store."""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from common import result_stream
+from common import utils
+from common import wheelbarrow_pb2
+from host.result_store import ResultStore
+
+
+class ResultStoreTest(unittest.TestCase):
+  def setUp(self):
+    self.tmp_dir = tempfile.mkdtemp()
+    self.result_dir = os.path.join(self.tmp_dir, 'out')
+    os.mkdir(self.result_dir)
+    self.store = ResultStore(os.path.join(self.tmp_dir, 'results.sqlite'))
+    self.text_path = os.path.join(self.result_dir, 'a-1.0-amd64.txt')
+    self.stream_path = os.path.join(self.result_dir,
+                                    'b-1.0-amd64' + result_stream.EXTENSION)
+
+  def tearDown(self):
+    self.store.Close()
+    shutil.rmtree(self.tmp_dir)
+
+  def testIngestResultDirectory(self):
+    self._WriteText(self._MakeApplicationResult('a', '/etc/passwd'))
+    self._WriteStream(self._MakeApplicationResult('b', '/etc/shadow'))
+    open(os.path.join(self.result_dir, 'c-1.0-amd64.dat.pending'), 'w').close()
+
+    self.assertEqual(2, self.store.IngestResultDirectory(self.result_dir))
+    self.assertEqual(
+        [('a-1.0-amd64.txt', 'a', 'DONE', 1, 130),
+         ('b-1.0-amd64.rec', 'b', 'DONE', 1, 130)],
+        self._Select('SELECT file_name, name, status, analysis_attempts, '
+                     'analysis_end FROM packages ORDER BY name'))
+    self.assertEqual(
+        [('a', 'checksum', 'file_system', 'CHANGE', '/etc/passwd', 'TEXT'),
+         ('b', 'checksum', 'file_system', 'CHANGE', '/etc/shadow', 'TEXT')],
+        self._Select('SELECT name, analysis_name, scope, type, path, '
+                     'file_type FROM file_results JOIN packages '
+                     'ON packages.id = package_id ORDER BY name'))
+    self.assertEqual(
+        [('a', 'INSTALL', '0644', 'ab' * 32), ('b', 'INSTALL', '0644',
+                                               'ab' * 32)],
+        self._Select('SELECT name, trigger, permissions, sha256 '
+                     'FROM file_states JOIN packages ON packages.id = '
+                     'package_id ORDER BY name'))
+    self.assertEqual(
+        [('a', 'ADD', 'START_SERVICE', '22', 0),
+         ('b', 'ADD', 'START_SERVICE', '22', 0)],
+        self._Select('SELECT name, type, trigger, local_port, is_udp '
+                     'FROM network_states JOIN packages ON packages.id = '
+                     'package_id ORDER BY name'))
+
+  def testIngestChangedAndRemovedResults(self):
+    self._WriteText(self._MakeApplicationResult('a', '/etc/passwd'))
+    self._WriteStream(self._MakeApplicationResult('b', '/etc/shadow'))
+    self.assertEqual(2, self.store.IngestResultDirectory(self.result_dir))
+    self.assertEqual(0, self.store.IngestResultDirectory(self.result_dir))
+
+    self._WriteText(self._MakeApplicationResult('a', '/etc/group'))
+    os.utime(self.text_path, (1, 1))
+    os.remove(self.stream_path)
+    self.assertEqual(1, self.store.IngestResultDirectory(self.result_dir))
+    self.assertEqual([('a', '/etc/group')],
+                     self._Select('SELECT name, path FROM file_results JOIN '
+                                  'packages ON packages.id = package_id'))
+    self.assertEqual([(1,)], self._Select('SELECT COUNT(*) FROM file_states'))
+    self.assertEqual([(1,)],
+                     self._Select('SELECT COUNT(*) FROM network_states'))
+
+  def testIngestTruncatedResultStream(self):
+    self._WriteStream(self._MakeApplicationResult('b', '/etc/shadow'))
+    with open(self.stream_path, 'rb') as stream_file:
+      data = stream_file.read()
+    with open(self.stream_path, 'wb') as stream_file:
+      stream_file.write(data[:-1])
+
+    self.assertRaises(result_stream.ResultStreamError,
+                      self.store.AddResultStream, 'b-1.0-amd64.rec',
+                      os.stat(self.stream_path), self.stream_path)
+    self.assertEqual(0, self.store.IngestResultDirectory(self.result_dir))
+    for table in ('packages', 'file_results', 'file_states',
+                  'network_states'):
+      self.assertEqual([(0,)],
+                       self._Select('SELECT COUNT(*) FROM %s' % table))
+
+  def _Select(self, sql):
+    return self.store.Query(sql)[1]
+
+  @staticmethod
+  def _MakeApplicationResult(name, path):
+    application_result = wheelbarrow_pb2.ApplicationResult()
+    package = application_result.package
+    package.name = name
+    package.version = '1.0'
+    package.architecture = 'amd64'
+    package.section = 'misc'
+    package.status = wheelbarrow_pb2.Package.DONE
+    package.analysis_attempts = 1
+    package.analysis_end = 130
+    analysis_result = application_result.analysis_results.add()
+    analysis_result.analysis_name = 'checksum'
+    result = analysis_result.results.add()
+    file_result = result.file_system_results.add()
+    file_result.path = path
+    file_result.type = wheelbarrow_pb2.CHANGE
+    file_result.file_type = wheelbarrow_pb2.FileResult.TEXT
+    state = file_result.states.add()
+    state.trigger = wheelbarrow_pb2.INSTALL
+    state.permissions = '0644'
+    state.sha256 = 'ab' * 32
+    network_result = result.network_results.add()
+    network_result.type = wheelbarrow_pb2.ADD
+    network_state = network_result.states.add()
+    network_state.trigger = wheelbarrow_pb2.START_SERVICE
+    network_state.local_port = '22'
+    network_state.is_udp = False
+    return application_result
+
+  def _WriteText(self, application_result):
+    self.assertTrue(utils.WriteProtobufToFile(application_result,
+                                              self.text_path, True))
+
+  def _WriteStream(self, application_result):
+    writer = result_stream.ResultStreamWriter(self.stream_path)
+    package = wheelbarrow_pb2.Package()
+    package.CopyFrom(application_result.package)
+    package.status = wheelbarrow_pb2.Package.PROCESSING
+    package.ClearField('analysis_end')
+    writer.WritePackage(package)
+    for analysis_result in application_result.analysis_results:
+      writer.WriteAnalysisResult(analysis_result)
+    writer.WritePackage(application_result.package)
+    writer.Close()
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -21,12 +21,14 @@
 
 from collections import Counter
 import glob
+import hashlib
 import logging
 import os.path
 import sys
 WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
 sys.path.append(WHEELBARROW_HOME)
 
+from common import result_stream
 from common import wheelbarrow_pb2
 from common.utils import ParseFileToProtobuf
 from host.scoring.file_result_scorer import FileResultScorer
@@ -51,22 +53,59 @@ class ApplicationScorer(object):
   _PACKAGE_DICTIONARY = 'package_score_dictionary'
 
   def __init__(self):
-    root_dir = WHEELBARROW_HOME
-    dictionary_base_dir = os.path.join(
-        root_dir, 'host/scoring')
+    (fs_paths, package_paths) = ApplicationScorer._GetDictionaryPaths()
+    self._file_system_result_scorer = FileResultScorer(fs_paths)
+    self._package_result_scorer = FileResultScorer(package_paths)
+
+  @staticmethod
+  def GetDictionaryHash():
+    """Get a hash of the score dictionaries.
+
+    Scores computed with dictionaries which have the same hash are the same.
+
+    Returns:
+      A hexadecimal SHA-256 digest of the names and contents of the dictionary
+      entry files.
+    """
+
+    dictionary_hash = hashlib.sha256()
+    for paths in ApplicationScorer._GetDictionaryPaths():
+      dictionary_hash.update('%d\0' % len(paths))
+      for path in paths:
+        with open(path, 'rb') as entry_file:
+          contents = entry_file.read()
+        dictionary_hash.update('%s\0%d\0' % (os.path.basename(path),
+                                               len(contents)))
+        dictionary_hash.update(contents)
+    return dictionary_hash.hexdigest()
+
+  @staticmethod
+  def _GetDictionaryPaths():
+    """Get the paths to the dictionary entry files.
+
+    Entries are sorted by file name, since the first matching entry gives the
+    score of a result.
+
+    Returns:
+      A (file system dictionary paths, package dictionary paths) tuple.
+    """
+
+    dictionary_base_dir = os.path.join(WHEELBARROW_HOME, 'host/scoring')
     fs_path = os.path.join(
         dictionary_base_dir, ApplicationScorer._FILE_SYSTEM_DICTIONARY, '*')
-    self._file_system_result_scorer = FileResultScorer(glob.glob(fs_path))
     package_path = os.path.join(
         dictionary_base_dir, ApplicationScorer._PACKAGE_DICTIONARY, '*')
-    self._package_result_scorer = FileResultScorer(glob.glob(package_path))
+    return (sorted(glob.glob(fs_path)), sorted(glob.glob(package_path)))
 
   def Score(self, file_path):
     """Score an application.
 
+    Result streams are read one result at a time, so that the whole
+    application result is never held in memory.
+
     Args:
       file_path: The path to a file containing a
-      wheelbarrow_pb2.ApplicationResult.
+      wheelbarrow_pb2.ApplicationResult, or to a result stream.
 
     Returns:
       A wheelbarrow_pb2.DetailedPackageScore.
@@ -77,15 +116,16 @@ class ApplicationScorer(object):
     """
 
     application_result = wheelbarrow_pb2.ApplicationResult()
-    if not ParseFileToProtobuf(file_path, application_result):
-      error = 'Could not parse application result from file %s.' % file_path
-      logging.error(error)
-      raise FatalScorerError(error)
-
-    status = application_result.package.status
-    if status != wheelbarrow_pb2.Package.DONE:
-      raise NoResultError('No result found in file %s: package status %d.' %
-                          (file_path, status))
+    if result_stream.IsResultStream(file_path):
+      results = result_stream.ReadResults(file_path, application_result)
+    else:
+      if not ParseFileToProtobuf(file_path, application_result):
+        error = 'Could not parse application result from file %s.' % file_path
+        logging.error(error)
+        raise FatalScorerError(error)
+      results = ((analysis_result.analysis_name, result)
+                 for analysis_result in application_result.analysis_results
+                 for result in analysis_result.results)
 
     # Map file to score.
     package_level_file_score_map = dict()
@@ -93,9 +133,8 @@ class ApplicationScorer(object):
     # Map analysis name to score.
     self._analysis_scores = Counter()
 
-    for analysis_result in application_result.analysis_results:
-      analysis_name = analysis_result.analysis_name
-      for result in analysis_result.results:
+    try:
+      for (analysis_name, result) in results:
         for package_result in result.package_results:
           score = self._package_result_scorer.Score(analysis_name,
                                                     package_result)
@@ -108,6 +147,16 @@ class ApplicationScorer(object):
           if score:
             self._AddSingleScore(package_level_file_score_map, analysis_name,
                                  file_system_result.path, score)
+    except result_stream.Error as err:
+      error = 'Could not read result stream %s: %s' % (file_path, err)
+      logging.error(error)
+      raise FatalScorerError(error)
+
+    # The final status of the package is at the end of result streams.
+    status = application_result.package.status
+    if status != wheelbarrow_pb2.Package.DONE:
+      raise NoResultError('No result found in file %s: package status %d.' %
+                          (file_path, status))
 
     # Populate the final score protobuf.
     detailed_package_score = wheelbarrow_pb2.DetailedPackageScore()
@@ -0,0 +1,315 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""A compiled index of file result score dictionary entries."""
+
+import logging
+import os.path
+import re
+import sre_constants
+import sre_parse
+import sys
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from common import wheelbarrow_pb2
+from common.wheelbarrow_pb2 import ResultScore
+
+
+class FileResultScoreIndex(object):
+  """An index of score dictionary entries, for scoring file results quickly.
+
+  Scoring a file result with a list of entries runs the path regular expression
+  of each entry in turn, until one matches. The index gives the same score as
+  the first matching entry, with few regular expression matches:
+    - Entries are bucketed by analysis name and by result type. Entries without
+      a result type are in all the buckets of their analysis.
+    - Within a bucket, entries are stored in a trie, by the literal prefix of
+      their path regular expression. Only the entries along the path of a file
+      result can match it.
+    - The entries of a trie node are combined into anchored alternations, with
+      one named group per entry. Since alternatives are tried in order, the
+      group which matched is the first entry of the node which matches.
+  Entries whose regular expression uses flags, named groups or backreferences
+  are not combined, since that would change their meaning.
+  """
+
+  # Python 2 regular expressions cannot have more than 100 groups.
+  _MAX_GROUPS = 99
+
+  def __init__(self):
+    # A map from analysis names to maps from result types to the root
+    # _TrieNode of their bucket. The None result type maps to the bucket of
+    # entries without a result type.
+    self._buckets = {}
+    # The entries added so far, as (order, entry, regex info) tuples, by
+    # analysis name.
+    self._entries = {}
+    self._compiled = True
+
+  def AddEntry(self, entry):
+    """Add an entry. Entries added first have precedence.
+
+    Args:
+      entry: A wheelbarrow_pb2.FileResultScoreDictionaryEntry.
+
+    Raises:
+      re.error: If the path regular expression of the entry is invalid.
+    """
+
+    entries = self._entries.setdefault(entry.analysis_name, [])
+    entries.append((len(entries), entry, _PathPattern(entry.path)))
+    self._compiled = False
+
+  def Score(self, analysis_name, file_result):
+    """Score a file result.
+
+    Args:
+      analysis_name: The name of the analysis that generated the file result.
+      file_result: A wheelbarrow_pb2.FileResult.
+
+    Returns:
+      A wheelbarrow_pb2.ResultScore for the first entry matching the file
+      result, or None if no entry matches.
+    """
+
+    if not self._compiled:
+      self._Compile()
+    buckets = self._buckets.get(analysis_name)
+    if buckets is None:
+      return None
+    root = buckets.get(file_result.type, buckets[None])
+    best = None
+    for chunk in sorted(root.GetChunks(file_result.path),
+                        key=lambda chunk: chunk.first_order):
+      if best is not None and chunk.first_order > best[0]:
+        break
+      match = chunk.Match(file_result.path)
+      if match is not None and (best is None or match[0] < best[0]):
+        best = match
+    if best is None:
+      return None
+    entry = best[1]
+    result_score = ResultScore()
+    result_score.result_name = (entry.result_name if entry.result_name
+                                else entry.analysis_name)
+    result_score.score = entry.score
+    return result_score
+
+  def _Compile(self):
+    """Build the buckets of all the entries added so far."""
+
+    result_types = [value.number for value
+                    in wheelbarrow_pb2.DESCRIPTOR.enum_types_by_name[
+                        'ResultType'].values
+                    if value.number != wheelbarrow_pb2.NO_TYPE]
+    self._buckets = {}
+    for (analysis_name, entries) in self._entries.iteritems():
+      buckets = {}
+      for result_type in result_types + [None]:
+        buckets[result_type] = FileResultScoreIndex._MakeBucket(
+            [(order, entry, pattern) for (order, entry, pattern) in entries
+             if not entry.result_type or entry.result_type == result_type])
+      self._buckets[analysis_name] = buckets
+    self._compiled = True
+
+  @staticmethod
+  def _MakeBucket(entries):
+    """Make the trie of a bucket.
+
+    Args:
+      entries: A list of (order, entry, _PathPattern) tuples, in order.
+
+    Returns:
+      The root _TrieNode of the bucket.
+    """
+
+    root = _TrieNode()
+    for (order, entry, pattern) in entries:
+      root.GetNode(pattern.prefix).entries.append((order, entry, pattern))
+    root.Compile(FileResultScoreIndex._MAX_GROUPS)
+    return root
+
+
+class _PathPattern(object):
+  """The path regular expression of a dictionary entry.
+
+  Attributes:
+    regex: The regular expression, or None if the entry matches all paths.
+    compiled: The compiled regular expression, or None.
+    prefix: The literal prefix of all the paths which the expression matches.
+    group_count: The number of groups of the expression.
+    combinable: Whether the expression can be combined with other ones.
+  """
+
+  def __init__(self, regex):
+    self.regex = regex or None
+    self.compiled = re.compile(regex) if regex else None
+    self.prefix = ''
+    self.group_count = 0
+    self.combinable = True
+    if self.compiled is None:
+      return
+    parsed = sre_parse.parse(regex)
+    self.group_count = self.compiled.groups
+    if (parsed.pattern.flags or self.compiled.groupindex
+        or _HasGroupReference(parsed)):
+      self.combinable = False
+    if parsed.pattern.flags & (re.IGNORECASE | re.LOCALE | re.UNICODE):
+      # Literals may match other characters.
+      return
+    prefix = []
+    for (op, av) in parsed:
+      if op != sre_constants.LITERAL:
+        break
+      prefix.append(unichr(av))
+    self.prefix = u''.join(prefix)
+
+
+def _HasGroupReference(parsed):
+  """Determine if a parsed regular expression refers to its groups."""
+
+  for (op, av) in parsed:
+    if op in (sre_constants.GROUPREF, sre_constants.GROUPREF_EXISTS):
+      return True
+    for value in (av if isinstance(av, (list, tuple)) else [av]):
+      if isinstance(value, sre_parse.SubPattern) and _HasGroupReference(value):
+        return True
+      if isinstance(value, (list, tuple)):
+        for item in value:
+          if (isinstance(item, sre_parse.SubPattern)
+              and _HasGroupReference(item)):
+            return True
+  return False
+
+
+class _TrieNode(object):
+  """A node of the literal prefix trie of a bucket."""
+
+  def __init__(self):
+    self.children = {}
+    # The (order, entry, _PathPattern) tuples of the entries whose prefix ends
+    # at this node, in order.
+    self.entries = []
+    self.chunks = []
+
+  def GetNode(self, prefix):
+    """Get the node of a prefix, creating it if needed."""
+
+    node = self
+    for character in prefix:
+      node = node.children.setdefault(character, _TrieNode())
+    return node
+
+  def GetChunks(self, path):
+    """Get the chunks of the nodes whose prefix is a prefix of a path."""
+
+    chunks = list(self.chunks)
+    node = self
+    for character in path:
+      node = node.children.get(character)
+      if node is None:
+        break
+      chunks.extend(node.chunks)
+    return chunks
+
+  def Compile(self, max_groups):
+    """Combine the entries of this node and its descendants into chunks.
+
+    Args:
+      max_groups: The maximum number of groups of a chunk.
+    """
+
+    pending = []
+    group_count = 0
+    for (order, entry, pattern) in self.entries:
+      if not pattern.combinable:
+        self.chunks.append(_Chunk([(order, entry, pattern)], False))
+        continue
+      if pending and group_count + pattern.group_count + 1 > max_groups:
+        self.chunks.append(_Chunk(pending, True))
+        pending = []
+        group_count = 0
+      pending.append((order, entry, pattern))
+      group_count += pattern.group_count + 1
+    if pending:
+      self.chunks.append(_Chunk(pending, True))
+    for child in self.children.itervalues():
+      child.Compile(max_groups)
+
+
+class _Chunk(object):
+  """Entries of a trie node, matched with a single regular expression."""
+
+  def __init__(self, entries, combined):
+    """Constructor.
+
+    Args:
+      entries: A list of (order, entry, _PathPattern) tuples, in order.
+      combined: Whether the regular expressions of the entries are combined. If
+                not, there must be a single entry.
+    """
+
+    self.first_order = entries[0][0]
+    self._entries = entries
+    if not combined:
+      self._regex = entries[0][2].compiled
+      self._entries_by_group = None
+      return
+    alternatives = []
+    self._entries_by_group = {}
+    group = 1
+    for (order, entry, pattern) in entries:
+      alternatives.append('(?P<entry%d>%s)' % (order, pattern.regex or ''))
+      self._entries_by_group[group] = (order, entry)
+      group += pattern.group_count + 1
+    try:
+      self._regex = re.compile('|'.join(alternatives))
+    except (re.error, AssertionError, OverflowError) as err:
+      # Fall back to matching the entries one by one.
+      logging.warning('Could not combine score dictionary entries: %s', err)
+      self._regex = None
+
+  def Match(self, path):
+    """Match a path.
+
+    Args:
+      path: A file path.
+
+    Returns:
+      The (order, entry) tuple of the first entry of the chunk which matches,
+      or None.
+    """
+
+    if self._entries_by_group is None:
+      (order, entry, pattern) = self._entries[0]
+      if pattern.compiled is None or pattern.compiled.match(path):
+        return (order, entry)
+      return None
+    if self._regex is None:
+      for (order, entry, pattern) in self._entries:
+        if pattern.compiled is None or pattern.compiled.match(path):
+          return (order, entry)
+      return None
+    match = self._regex.match(path)
+    if match is None:
+      return None
+    # The group of an entry encloses its whole expression, so it is the last
+    # one to close.
+    return self._entries_by_group[match.lastindex]
@@ -0,0 +1,213 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Tests for the file result score index."""
+
+import os.path
+import random
+import re
+import sys
+import unittest
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from common import wheelbarrow_pb2
+from common.wheelbarrow_pb2 import ResultScore
+from host.scoring.file_result_score_index import FileResultScoreIndex
+
+
+ANALYSIS_NAME = 'analysis'
+RESULT_TYPES = (wheelbarrow_pb2.ADD, wheelbarrow_pb2.DELETE,
+                wheelbarrow_pb2.CHANGE, wheelbarrow_pb2.DESCRIPTIVE)
+
+
+class FileResultScoreIndexTest(unittest.TestCase):
+  def setUp(self):
+    self.index = FileResultScoreIndex()
+    self.entries = []
+
+  def testTypedAndUntypedEntries(self):
+    self._AddEntry('/etc/passwd', 1, wheelbarrow_pb2.DELETE)
+    self._AddEntry('/etc/.*', 2)
+    self._AddEntry('/etc/passwd', 3, wheelbarrow_pb2.CHANGE)
+    self._AddEntry('', 4, wheelbarrow_pb2.ADD, 'any_add')
+    self._AddEntry('/usr/.*', 5, wheelbarrow_pb2.CHANGE)
+
+    self.assertEqual(1, self._Score('/etc/passwd', wheelbarrow_pb2.DELETE))
+    self.assertEqual(2, self._Score('/etc/passwd', wheelbarrow_pb2.CHANGE))
+    self.assertEqual(4, self._Score('/usr/bin/a', wheelbarrow_pb2.ADD))
+    self.assertIsNone(self._Score('/usr/bin/a', wheelbarrow_pb2.DELETE))
+    self._CheckScores(['/etc/passwd', '/etc', '/usr/bin/a', '/var/log/a'])
+
+  def testSharedLiteralPrefixes(self):
+    self._AddEntry('/etc/ssh/sshd_config$', 1)
+    self._AddEntry('/etc/ssh/.*', 2)
+    self._AddEntry('/etc/s', 3)
+    self._AddEntry('/etc/group.*|/etc/gshadow.*', 4)
+    self._AddEntry('/et[c]/p', 5)
+    self._AddEntry('/e?tc', 6)
+    self._AddEntry('/etc/ssh/ssh_config', 7)
+
+    self.assertEqual(2, self._Score('/etc/ssh/sshd_config.d/a'))
+    self.assertEqual(3, self._Score('/etc/shadow'))
+    self.assertEqual(2, self._Score('/etc/ssh/ssh_config'))
+    self._CheckScores(['/etc/ssh/sshd_config', '/etc/ssh/sshd_config.d/a',
+                       '/etc/ssh/ssh_config', '/etc/shadow', '/etc/gshadow-',
+                       '/etc/passwd', '/tc', '/etc', '/et'])
+
+  def testInlineFlags(self):
+    self._AddEntry('(?i)/etc/x\\.conf', 1)
+    self._AddEntry('/etc/X.CONF', 2)
+    self._AddEntry('(?x) /usr/lib/ a b  # Verbose.', 3)
+    self._AddEntry('/usr/lib/a', 4)
+
+    self.assertEqual(1, self._Score('/ETC/X.conf'))
+    self.assertEqual(3, self._Score('/usr/lib/ab'))
+    self.assertEqual(4, self._Score('/usr/lib/a b'))
+    self._CheckScores(['/etc/x.conf', '/ETC/X.conf', '/etc/X.CONF',
+                       '/usr/lib/ab', '/usr/lib/a b', '/usr/lib/a'])
+
+  def testNamedGroupsAndBackreferences(self):
+    self._AddEntry('/etc/(a)(b)\\2$', 1)
+    self._AddEntry('/etc/(?P<name>a)(?P=name)$', 2)
+    self._AddEntry('/etc/(a)?(?(1)b|c)$', 3)
+    self._AddEntry('/etc/(((a)))', 4)
+    self._AddEntry('/tmp/(?:(a)|(ab))c?', 5)
+
+    self.assertEqual(1, self._Score('/etc/abb'))
+    self.assertEqual(2, self._Score('/etc/aa'))
+    self.assertEqual(3, self._Score('/etc/c'))
+    self.assertEqual(3, self._Score('/etc/ab'))
+    self.assertEqual(4, self._Score('/etc/a'))
+    self._CheckScores(['/etc/abb', '/etc/aa', '/etc/ab', '/etc/c', '/etc/a',
+                       '/tmp/abc', '/tmp/b'])
+
+  def testBucketPastMaxGroups(self):
+    # The entries of a trie node are split into several alternations when they
+    # have more groups than a regular expression can hold.
+    for i in xrange(150):
+      self._AddEntry('/usr/lib/(a)(b)?%d$' % i, i)
+    self._AddEntry('/usr/lib/(a)', 150)
+
+    self.assertEqual(0, self._Score('/usr/lib/a0'))
+    self.assertEqual(149, self._Score('/usr/lib/ab149'))
+    self.assertEqual(150, self._Score('/usr/lib/a150'))
+    self._CheckScores(['/usr/lib/a%d' % i for i in xrange(0, 160, 7)]
+                      + ['/usr/lib/ab%d' % i for i in xrange(0, 160, 7)])
+
+  def testUnknownAnalysis(self):
+    self._AddEntry('', 1)
+
+    file_result = self._MakeFileResult('/etc/passwd', wheelbarrow_pb2.ADD)
+    self.assertIsNone(self.index.Score('unknown', file_result))
+
+  def testRandomEntries(self):
+    generator = random.Random(0)
+    regexes = ['', '/etc/.*', '/etc/passwd', '/etc/group.*|/etc/gshadow.*',
+               '/usr/(bin|lib)/a+', '(?i)/etc/x\\.conf', '/etc/(a)(b)\\2?',
+               '/etc/(?P<n>a)(?P=n)?', '/tmp', '/tmp/(?:(a)|(ab))c?',
+               '/var/log/.*\\.log$', '/home/u/a|/etc/ssh/.*', '.*conf',
+               '/etc/ssh/sshd_config$', '/usr/bin/a(?=b)', '/etc/(((a)))',
+               '/et[c]/p', '(/etc)(/group)?', '/e?tc', '/usr/lib/ab?c?$',
+               '/etc/a{2}', '[/]etc/passwd']
+    for unused_i in xrange(60):
+      regexes.append('/usr/lib/' + ''.join(
+          '(%s)' % generator.choice('abc')
+          for unused_j in xrange(generator.randint(0, 3)))
+                     + generator.choice(['', '.*', '$']))
+    for score in xrange(300):
+      self._AddEntry(generator.choice(regexes), score,
+                     generator.choice((wheelbarrow_pb2.NO_TYPE,)
+                                      + RESULT_TYPES),
+                     generator.choice([None, 'result%d' % score]),
+                     generator.choice(['analysis1', 'analysis2']))
+
+    directories = ['/etc', '/etc/ssh', '/usr/bin', '/usr/lib', '/var/log',
+                   '/tmp', '/home/u']
+    names = ['passwd', 'group', 'gshadow', 'sshd_config', 'a', 'ab', 'abc',
+             'x.conf', 'X.CONF']
+    for unused_i in xrange(2000):
+      analysis_name = generator.choice(['analysis1', 'analysis2'])
+      file_result = self._MakeFileResult(
+          '%s/%s%s' % (generator.choice(directories), generator.choice(names),
+                       generator.choice(['', 'c', '.log', 'bc'])),
+          generator.choice(RESULT_TYPES))
+      self.assertEqual(
+          self._FirstMatchScore(analysis_name, file_result),
+          self.index.Score(analysis_name, file_result))
+
+  def _AddEntry(self, path, score, result_type=wheelbarrow_pb2.NO_TYPE,
+                result_name=None, analysis_name=ANALYSIS_NAME):
+    entry = wheelbarrow_pb2.FileResultScoreDictionaryEntry()
+    entry.analysis_name = analysis_name
+    if result_name is not None:
+      entry.result_name = result_name
+    if path:
+      entry.path = path
+    if result_type != wheelbarrow_pb2.NO_TYPE:
+      entry.result_type = result_type
+    entry.score = score
+    self.index.AddEntry(entry)
+    self.entries.append(entry)
+
+  def _Score(self, path, result_type=wheelbarrow_pb2.ADD):
+    """Score a file result with the index, checking it against the entries."""
+
+    file_result = self._MakeFileResult(path, result_type)
+    result_score = self.index.Score(ANALYSIS_NAME, file_result)
+    self.assertEqual(self._FirstMatchScore(ANALYSIS_NAME, file_result),
+                     result_score)
+    return result_score.score if result_score is not None else None
+
+  def _CheckScores(self, paths):
+    for path in paths:
+      for result_type in RESULT_TYPES:
+        self._Score(path, result_type)
+
+  def _FirstMatchScore(self, analysis_name, file_result):
+    """Score a file result with the first matching entry, in order.
+
+    This is the reference behavior of the index.
+    """
+
+    for entry in self.entries:
+      if entry.analysis_name != analysis_name:
+        continue
+      if entry.path and not re.match(entry.path, file_result.path):
+        continue
+      if entry.result_type and entry.result_type != file_result.type:
+        continue
+      result_score = ResultScore()
+      result_score.result_name = (entry.result_name if entry.result_name
+                                  else entry.analysis_name)
+      result_score.score = entry.score
+      return result_score
+    return None
+
+  @staticmethod
+  def _MakeFileResult(path, result_type):
+    file_result = wheelbarrow_pb2.FileResult()
+    file_result.path = path
+    file_result.type = result_type
+    file_result.file_type = wheelbarrow_pb2.FileResult.OTHER
+    return file_result
+
+
+if __name__ == '__main__':
+  unittest.main()
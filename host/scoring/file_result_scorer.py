@@ -18,6 +18,7 @@
 #     See the License for the specific language governing permissions and
 #     limitations under the License.
 """Score the results of analysis."""
+import logging
 import os.path
 import sys
 WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
@@ -25,7 +26,7 @@ sys.path.append(WHEELBARROW_HOME)
 
 from common import wheelbarrow_pb2
 from common.utils import ParseFileToProtobuf
-from host.scoring.file_result_dictionary_matcher import FileResultDictionaryMatcher
+from host.scoring.file_result_score_index import FileResultScoreIndex
 
 
 class FileResultScorer(object):
@@ -53,32 +54,21 @@ class FileResultScorer(object):
       otherwise.
     """
 
-    if analysis_name not in self._dictionary:
-      return None
-
-    for entry in self._dictionary[analysis_name]:
-      # We only use matchers with the right analysis name, which excludes a lot
-      # of irrelevant matchers.
-      score = entry.Match(file_result)
-      if score:
-        return score
-
-    return None
+    return self._index.Score(analysis_name, file_result)
 
   def _InitializeScoreDictionary(self, srcs):
     """Initialize a score dictionary.
 
-    This loads score dictionary entries for scoring file results. It
-    populates the internal self._dictionary, which maps analysis names to
-    dictionary matchers. This allows us to do a first matching on the analysis
-    name when we try to match a file result to a score.
+    This loads score dictionary entries for scoring file results into the
+    internal self._index. The first entry matching a file result gives its
+    score, so entries are added in the order of the source files.
 
     Args:
       srcs: A list of paths to files containing
       wheelbarrow_pb2.FileResultScoreDictionaryEntry protobufs.
     """
 
-    self._dictionary = {}
+    self._index = FileResultScoreIndex()
 
     for src in srcs:
       entry = wheelbarrow_pb2.FileResultScoreDictionaryEntry()
@@ -87,8 +77,4 @@ class FileResultScorer(object):
         continue
       if not entry.analysis_name:
         continue
-      matcher = FileResultDictionaryMatcher(entry)
-      if entry.analysis_name in self._dictionary:
-        self._dictionary[entry.analysis_name].append(matcher)
-      else:
-        self._dictionary[entry.analysis_name] = [matcher]
+      self._index.AddEntry(entry)
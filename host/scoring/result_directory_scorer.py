@@ -17,32 +17,149 @@
 #     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #     See the License for the specific language governing permissions and
 #     limitations under the License.
-"""Result directory scorer."""
+"""Result directory scorer.
+
+Result files are scored in parallel by a pool of worker processes, each of
+which loads the score dictionaries once. Score files are written as soon as
+each result file is scored.
+
+A manifest in the score directory records the size and modification time of
+each result file which was scored, together with a hash of the score
+dictionaries. Result files which did not change since they were scored with the
+current dictionaries are skipped, so scoring a directory again only scores new
+and changed results.
+"""
 
-import glob
 import logging
+from multiprocessing import Pool
 import os.path
 import sys
 
 WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
 sys.path.append(WHEELBARROW_HOME)
+from common import result_stream
 from common.utils import WriteProtobufToFile
 from host.scoring import application_scorer
+from host.scoring.score_manifest import ScoreManifest
+
+
+# The number of manifest records between commits.
+_COMMIT_INTERVAL = 100
+# The scorer of a worker process.
+_scorer = None
+
+
+def ScoreResultDirectory(input_dir, output_dir, text_out=True, processes=None):
+  """Score the new and changed results in a directory.
 
+  Args:
+    input_dir: The directory containing the result files.
+    output_dir: The directory where score files are written.
+    text_out: True if score files should be written in ASCII format.
+    processes: The number of worker processes. If None, the CPU count is used.
+  """
 
-def ScoreResultDirectory(input_dir, output_dir, text_out=True):
-  """Result directory scorer."""
-  file_paths = glob.glob(os.path.join(input_dir, '*'))
   if not os.path.exists(output_dir):
     os.makedirs(output_dir)
 
-  scorer = application_scorer.ApplicationScorer()
-  for file_path in file_paths:
+  dictionary_hash = application_scorer.ApplicationScorer.GetDictionaryHash()
+  manifest = ScoreManifest(os.path.join(output_dir, ScoreManifest.FILE_NAME))
+  try:
+    stat_results = _GetResultFiles(input_dir)
+    for file_name in set(manifest.GetFileNames()) - set(stat_results):
+      manifest.Remove(file_name)
+
+    work = []
+    for (file_name, stat_result) in sorted(stat_results.iteritems()):
+      score_path = os.path.join(output_dir, file_name)
+      status = manifest.GetStatus(file_name, stat_result, dictionary_hash)
+      if (status == ScoreManifest.NO_RESULT
+          or (status == ScoreManifest.SCORED and os.path.exists(score_path))):
+        continue
+      work.append((os.path.join(input_dir, file_name), score_path, text_out,
+                   stat_result))
+    logging.info('Scoring %d of %d result files.', len(work),
+                 len(stat_results))
+    if not work:
+      return
+
+    pool = Pool(processes, initializer=_InitializeWorker)
     try:
-      score = scorer.Score(file_path)
-      file_name = os.path.basename(file_path)
-      score_file_path = os.path.join(output_dir, file_name)
-      if not WriteProtobufToFile(score, score_file_path, text_out, False):
-        logging.error('Could not write score to file %s.', score_file_path)
-    except application_scorer.Error as err:
-      logging.error('Could not score package file %s: %s', file_path, err)
+      for (count, (file_path, stat_result, status)) in enumerate(
+          pool.imap_unordered(_ScoreResultFile, work), 1):
+        if status is not None:
+          manifest.Record(os.path.basename(file_path), stat_result,
+                          dictionary_hash, status)
+        if count % _COMMIT_INTERVAL == 0:
+          manifest.Commit()
+          logging.info('Scored %d of %d result files.', count, len(work))
+      pool.close()
+    except:
+      pool.terminate()
+      raise
+    finally:
+      pool.join()
+  finally:
+    manifest.Close()
+
+
+def _GetResultFiles(input_dir):
+  """Get the result files in a directory.
+
+  Args:
+    input_dir: A result directory.
+
+  Returns:
+    A map from result file names to the results of os.stat() on the files.
+  """
+
+  stat_results = {}
+  for file_path in result_stream.GetResultFilePaths(input_dir):
+    try:
+      stat_result = os.stat(file_path)
+    except OSError as err:
+      logging.error('Could not stat result file %s: %s', file_path, err)
+      continue
+    stat_results[os.path.basename(file_path)] = stat_result
+  return stat_results
+
+
+def _InitializeWorker():
+  """Load the score dictionaries in a worker process."""
+
+  global _scorer
+  _scorer = application_scorer.ApplicationScorer()
+
+
+def _ScoreResultFile(work_item):
+  """Score a result file and write the score file.
+
+  Args:
+    work_item: A (result file path, score file path, text_out, stat result)
+               tuple.
+
+  Returns:
+    A (result file path, stat result, status) tuple, where status is a
+    ScoreManifest status, or None if the file should be scored again.
+  """
+
+  (file_path, score_path, text_out, stat_result) = work_item
+  try:
+    score = _scorer.Score(file_path)
+  except application_scorer.NoResultError as err:
+    logging.info('%s', err)
+    # Do not leave the score of a previous version of the result.
+    if os.path.exists(score_path):
+      os.remove(score_path)
+    return (file_path, stat_result, ScoreManifest.NO_RESULT)
+  except application_scorer.Error as err:
+    logging.error('Could not score package file %s: %s', file_path, err)
+    return (file_path, stat_result, None)
+
+  # Write the score atomically, so that a partial score file is never seen.
+  temp_path = '%s.tmp' % score_path
+  if not WriteProtobufToFile(score, temp_path, text_out, False):
+    logging.error('Could not write score to file %s.', score_path)
+    return (file_path, stat_result, None)
+  os.rename(temp_path, score_path)
+  return (file_path, stat_result, ScoreManifest.SCORED)
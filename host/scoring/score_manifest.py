@@ -0,0 +1,123 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""A manifest of the result files which were scored.
+
+The manifest is a SQLite file in the score directory. For each result file, it
+records the size and modification time the file had when it was scored, the
+hash of the score dictionaries which were used and the outcome. A result file
+only needs to be scored again if it changed or if the dictionaries changed.
+"""
+
+import os.path
+import sqlite3
+import sys
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+
+class ScoreManifest(object):
+  """A manifest of scored result files."""
+
+  FILE_NAME = 'score_manifest.sqlite'
+
+  # A score file was written.
+  SCORED = 'scored'
+  # The package was not analyzed successfully, so there is no score.
+  NO_RESULT = 'no_result'
+
+  _SCHEMA = """
+      CREATE TABLE IF NOT EXISTS results (
+        file_name TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        mtime REAL NOT NULL,
+        dictionary_hash TEXT NOT NULL,
+        status TEXT NOT NULL);
+  """
+
+  def __init__(self, path):
+    """Constructor.
+
+    Args:
+      path: The path to the SQLite file. It is created if it does not exist.
+    """
+
+    self._connection = sqlite3.connect(path)
+    self._connection.executescript(ScoreManifest._SCHEMA)
+    self._connection.commit()
+    self._entries = dict(
+        (file_name, (size, mtime, dictionary_hash, status))
+        for (file_name, size, mtime, dictionary_hash, status)
+        in self._connection.execute('SELECT * FROM results'))
+
+  def Close(self):
+    self._connection.commit()
+    self._connection.close()
+
+  def GetStatus(self, file_name, stat_result, dictionary_hash):
+    """Get the outcome of the scoring of a result file, if it is up to date.
+
+    Args:
+      file_name: The name of a result file.
+      stat_result: The result of os.stat() on the result file.
+      dictionary_hash: The hash of the current score dictionaries.
+
+    Returns:
+      SCORED or NO_RESULT if the file was scored in its current state with the
+      current dictionaries, None otherwise.
+    """
+
+    entry = self._entries.get(file_name)
+    if (entry is None or entry[:3] != (stat_result.st_size,
+                                       stat_result.st_mtime, dictionary_hash)):
+      return None
+    return entry[3]
+
+  def Record(self, file_name, stat_result, dictionary_hash, status):
+    """Record that a result file was scored.
+
+    Records are committed by Commit() or Close().
+
+    Args:
+      file_name: The name of a result file.
+      stat_result: The result of os.stat() on the result file, before it was
+                   scored.
+      dictionary_hash: The hash of the score dictionaries which were used.
+      status: SCORED or NO_RESULT.
+    """
+
+    entry = (stat_result.st_size, stat_result.st_mtime, dictionary_hash,
+             status)
+    self._entries[file_name] = entry
+    self._connection.execute(
+        'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)',
+        (file_name,) + entry)
+
+  def Remove(self, file_name):
+    """Remove the record of a result file, e.g., because it was deleted."""
+
+    self._entries.pop(file_name, None)
+    self._connection.execute('DELETE FROM results WHERE file_name = ?',
+                             (file_name,))
+
+  def GetFileNames(self):
+    return self._entries.keys()
+
+  def Commit(self):
+    self._connection.commit()
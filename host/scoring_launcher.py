@@ -22,6 +22,7 @@
      Usage: %s
        --resultdir <directory containing result protobufs>
        --scoredir <output directory>
+       [--processes <number of scoring processes, 0 for the CPU count>]
 """
 
 import gflags
@@ -37,6 +38,8 @@ FLAGS = gflags.FLAGS
 gflags.DEFINE_string('resultdir', None, 'The input directory containing the '
                      'results.')
 gflags.DEFINE_string('scoredir', None, 'The output directory.')
+gflags.DEFINE_integer('processes', 0, 'The number of scoring processes. If 0, '
+                      'the number of CPUs is used.')
 gflags.MarkFlagAsRequired('resultdir')
 gflags.MarkFlagAsRequired('scoredir')
 
@@ -46,7 +49,8 @@ def main(argv):
   logging.root.setLevel(logging.INFO)
   argv = FLAGS(argv)
   logging.info('Scoring result in %s...', FLAGS.resultdir)
-  ScoreResultDirectory(FLAGS.resultdir, FLAGS.scoredir)
+  ScoreResultDirectory(FLAGS.resultdir, FLAGS.scoredir,
+                       processes=FLAGS.processes or None)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,186 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Aggregation of trigger and analysis resource usage across a batch."""
+
+import logging
+import os.path
+import sys
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from common import result_stream
+from common import wheelbarrow_pb2
+from common.utils import ParseFileToProtobuf
+
+
+class UsageSummary(object):
+  """A summary of the resource usage of several runs of a trigger or analysis.
+
+  Attributes:
+    runs: The number of runs.
+    interrupted_runs: The number of runs which were interrupted by a timeout.
+    wall_time: The total wall time, in seconds.
+    max_wall_time: The largest wall time of a single run, in seconds.
+    cpu_time: The total CPU time, in seconds.
+    files_processed: The total number of files processed.
+    bytes_read: The total number of bytes read.
+    subprocesses: The total number of subprocesses started.
+  """
+
+  def __init__(self):
+    self.runs = 0
+    self.interrupted_runs = 0
+    self.wall_time = 0.0
+    self.max_wall_time = 0.0
+    self.cpu_time = 0.0
+    self.files_processed = 0
+    self.bytes_read = 0
+    self.subprocesses = 0
+
+  def Add(self, usage):
+    """Add a run to the summary.
+
+    Args:
+      usage: A wheelbarrow_pb2.ResourceUsage.
+    """
+
+    self.runs += 1
+    if usage.interrupted:
+      self.interrupted_runs += 1
+    self.wall_time += usage.wall_time
+    self.max_wall_time = max(self.max_wall_time, usage.wall_time)
+    self.cpu_time += usage.cpu_time
+    self.files_processed += usage.files_processed
+    self.bytes_read += usage.bytes_read
+    self.subprocesses += usage.subprocesses
+
+  def GetMeanWallTime(self):
+    return self.wall_time / self.runs if self.runs else 0.0
+
+
+class TimingAggregator(object):
+  """Aggregates the timings of application results per trigger and analysis."""
+
+  _HEADER = ('%-40s %6s %5s %10s %9s %9s %10s %9s %12s %6s' %
+             ('name', 'runs', 'intr', 'wall(s)', 'mean(s)', 'max(s)', 'cpu(s)',
+              'files', 'bytes', 'procs'))
+
+  def __init__(self):
+    # Map from trigger names to UsageSummary objects.
+    self._triggers = {}
+    # Map from (analysis name, trigger name) tuples to UsageSummary objects.
+    self._analyses = {}
+    self._results = 0
+
+  def AddApplicationResult(self, application_result):
+    """Add the timings of an application result.
+
+    Args:
+      application_result: A wheelbarrow_pb2.ApplicationResult.
+    """
+
+    if not application_result.HasField('timing'):
+      return
+    self._results += 1
+    timing = application_result.timing
+    for trigger_timing in timing.triggers:
+      trigger_name = TimingAggregator._GetTriggerName(trigger_timing.trigger)
+      self._triggers.setdefault(trigger_name, UsageSummary()).Add(
+          trigger_timing.usage)
+    for analysis_timing in timing.analyses:
+      key = (analysis_timing.analysis_name,
+             TimingAggregator._GetTriggerName(analysis_timing.trigger))
+      self._analyses.setdefault(key, UsageSummary()).Add(analysis_timing.usage)
+
+  def AddResultDirectory(self, result_dir):
+    """Add the timings of all the application results in a directory.
+
+    Args:
+      result_dir: A directory containing ApplicationResult files.
+    """
+
+    for file_path in result_stream.GetResultFilePaths(result_dir):
+      application_result = wheelbarrow_pb2.ApplicationResult()
+      if result_stream.IsResultStream(file_path):
+        # Only the timings are needed, so the results are not kept.
+        try:
+          result_stream.ParseResultStreamWithoutResults(file_path,
+                                                        application_result)
+        except result_stream.Error as err:
+          logging.error('Could not read result stream %s: %s', file_path, err)
+          continue
+      elif not ParseFileToProtobuf(file_path, application_result):
+        logging.error('Could not parse application result %s.', file_path)
+        continue
+      self.AddApplicationResult(application_result)
+
+  def GetTriggerSummaries(self):
+    """Get the trigger summaries, sorted by decreasing total wall time.
+
+    Returns:
+      A list of (trigger name, UsageSummary) tuples.
+    """
+
+    return TimingAggregator._SortByWallTime(self._triggers)
+
+  def GetAnalysisSummaries(self):
+    """Get the analysis summaries, sorted by decreasing total wall time.
+
+    Returns:
+      A list of ((analysis name, trigger name), UsageSummary) tuples.
+    """
+
+    return TimingAggregator._SortByWallTime(self._analyses)
+
+  def FormatReport(self):
+    """Format a report of the aggregated timings.
+
+    Returns:
+      A string with one table for triggers and one for analyses.
+    """
+
+    lines = ['Timings of %d application results.' % self._results, '',
+             'Triggers:', TimingAggregator._HEADER]
+    for (trigger_name, summary) in self.GetTriggerSummaries():
+      lines.append(TimingAggregator._FormatSummary(trigger_name, summary))
+    lines.extend(['', 'Analyses:', TimingAggregator._HEADER])
+    for ((analysis_name, trigger_name), summary) in self.GetAnalysisSummaries():
+      lines.append(TimingAggregator._FormatSummary(
+          '%s/%s' % (analysis_name, trigger_name), summary))
+    return '\n'.join(lines)
+
+  @staticmethod
+  def _GetTriggerName(trigger):
+    trigger_value = wheelbarrow_pb2.DESCRIPTOR.enum_types_by_name[
+        'Trigger'].values_by_number.get(trigger)
+    return trigger_value.name if trigger_value else str(trigger)
+
+  @staticmethod
+  def _SortByWallTime(summaries):
+    return sorted(summaries.iteritems(),
+                  key=lambda (key, summary): (-summary.wall_time, key))
+
+  @staticmethod
+  def _FormatSummary(name, summary):
+    return ('%-40s %6d %5d %10.2f %9.2f %9.2f %10.2f %9d %12d %6d' %
+            (name, summary.runs, summary.interrupted_runs, summary.wall_time,
+             summary.GetMeanWallTime(), summary.max_wall_time,
+             summary.cpu_time, summary.files_processed, summary.bytes_read,
+             summary.subprocesses))
@@ -0,0 +1,437 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Control of QEMU VMs through QMP and a serial control channel.
+
+A VmController starts QEMU with a QMP socket and with its first serial port on
+a UNIX socket. QMP is used to save and restore the state of the VM, to detect
+when it shuts down and to read its block device counters. The serial port
+carries the control protocol of host/launchers/nfs_worker_launcher.sh.
+
+A VM can be restored from a warm state, i.e., the saved memory and device state
+of a VM which booted and is waiting for its first command. Restoring a warm
+state only takes the time to read it, instead of the time to boot the guest.
+"""
+
+from collections import namedtuple
+import json
+import logging
+import os
+import pipes
+import select
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+
+# The resources used by a VM process. cpu_time is in seconds and max_rss in
+# kilobytes. The disk counters are summed over the block devices of the VM.
+VmResourceUsage = namedtuple('VmResourceUsage', 'cpu_time, max_rss, '
+                             'disk_read_bytes, disk_write_bytes')
+
+
+class Error(Exception):
+  pass
+
+
+class VmControllerError(Error):
+  pass
+
+
+class VmController(object):
+  """Controls a QEMU VM."""
+
+  # The time to wait for QEMU to create its sockets, in seconds.
+  _CONNECT_TIMEOUT = 30
+  # The time to wait for QMP commands such as savevm, in seconds.
+  _COMMAND_TIMEOUT = 600
+  _POLL_INTERVAL = 0.5
+
+  def __init__(self, cmd, warm_state=None):
+    """Constructor.
+
+    Args:
+      cmd: A command to start a QEMU VM, as a list of strings.
+      warm_state: The path to a warm state to restore the VM from, or None to
+                  boot it.
+    """
+
+    self._cmd = cmd
+    self._warm_state = warm_state
+    self._socket_dir = None
+    self._process = None
+    self._qmp = None
+    self._qmp_buffer = ''
+    self._control = None
+    self._control_buffer = ''
+    self._shut_down = False
+
+  def Start(self):
+    """Start the VM and connect to it.
+
+    If the VM is restored from a warm state, this returns once it is running.
+
+    Returns:
+      True if the VM was started.
+
+    Raises:
+      VmControllerError: If the VM could not be connected to or restored.
+      socket.error: If there was a communication error.
+    """
+
+    self._socket_dir = tempfile.mkdtemp(prefix='wheelbarrow-vm-')
+    qmp_path = os.path.join(self._socket_dir, 'qmp')
+    control_path = os.path.join(self._socket_dir, 'control')
+    cmd = self._cmd + ['-qmp', 'unix:%s,server,nowait' % qmp_path,
+                       '-serial', 'unix:%s,server,nowait' % control_path]
+    if self._warm_state is not None:
+      cmd += ['-incoming', 'exec:cat %s' % pipes.quote(self._warm_state)]
+    try:
+      logging.info(cmd)
+      self._process = subprocess.Popen(cmd)
+    except OSError as err:
+      logging.error('Unable to run command %s: %s', cmd, err)
+      return False
+    self._qmp = self._Connect(qmp_path)
+    self._control = self._Connect(control_path)
+    # Wait for the QMP greeting and leave capabilities negotiation mode.
+    self._ReadQmpMessage(VmController._CONNECT_TIMEOUT)
+    self.Execute('qmp_capabilities')
+    if self._warm_state is not None:
+      self._WaitForIncomingState()
+    return True
+
+  def GetPid(self):
+    return self._process.pid if self._process is not None else None
+
+  def Execute(self, command, arguments=None):
+    """Execute a QMP command.
+
+    Args:
+      command: The name of a QMP command.
+      arguments: A map from argument names to values, or None.
+
+    Returns:
+      The return value of the command.
+
+    Raises:
+      VmControllerError: If the command failed.
+    """
+
+    request = {'execute': command}
+    if arguments:
+      request['arguments'] = arguments
+    self._qmp.sendall(json.dumps(request) + '\r\n')
+    while True:
+      message = self._ReadQmpMessage(VmController._COMMAND_TIMEOUT)
+      if 'return' in message:
+        return message['return']
+      if 'error' in message:
+        raise VmControllerError('QMP command %s failed: %s' % (
+            command, message['error'].get('desc')))
+
+  def HumanMonitorCommand(self, command_line):
+    """Execute a human monitor command, for commands without a QMP equivalent.
+
+    Args:
+      command_line: A human monitor command line (e.g., 'savevm clean').
+
+    Returns:
+      The output of the command.
+
+    Raises:
+      VmControllerError: If the command failed.
+    """
+
+    output = self.Execute('human-monitor-command',
+                          {'command-line': command_line})
+    if 'Error' in output or 'error' in output:
+      raise VmControllerError('Monitor command %s failed: %s' % (command_line,
+                                                                 output))
+    return output
+
+  def SaveSnapshot(self, name):
+    """Save the state of the VM, including its disks, in an internal snapshot.
+
+    Args:
+      name: The name of the snapshot.
+    """
+
+    self.HumanMonitorCommand('savevm %s' % name)
+
+  def LoadSnapshot(self, name):
+    """Revert the VM to an internal snapshot.
+
+    Args:
+      name: The name of the snapshot.
+    """
+
+    self.HumanMonitorCommand('loadvm %s' % name)
+
+  def SaveWarmState(self, path):
+    """Stop the VM and save its memory and device state to a file.
+
+    Disks are not saved, so the state can only be restored on top of the disk
+    image the VM is running on, in the state it is left in.
+
+    Args:
+      path: The path to the warm state file.
+
+    Raises:
+      VmControllerError: If the state could not be saved.
+    """
+
+    self.Execute('stop')
+    self.Execute('migrate', {'uri': 'exec:cat > %s' % pipes.quote(path)})
+    deadline = time.time() + VmController._COMMAND_TIMEOUT
+    while True:
+      status = self.Execute('query-migrate').get('status')
+      if status == 'completed':
+        return
+      if status in ('failed', 'cancelled') or time.time() > deadline:
+        raise VmControllerError('Could not save warm state: migration %s.' %
+                                (status or 'timed out'))
+      time.sleep(VmController._POLL_INTERVAL)
+
+  def SendCommand(self, command):
+    """Send a command to the VM on the control serial port."""
+
+    self._control.sendall('%s\n' % command)
+
+  def WaitForMessage(self, expected, timeout):
+    """Wait for a message from the VM on the control serial port.
+
+    Lines which do not start with the expected message (e.g., console output)
+    are ignored.
+
+    Args:
+      expected: The expected message (e.g., 'READY').
+      timeout: The time to wait, in seconds.
+
+    Returns:
+      The message line, or None if it was not received within the timeout.
+
+    Raises:
+      VmControllerError: If the VM shut down.
+    """
+
+    deadline = time.time() + timeout
+    while True:
+      while '\n' in self._control_buffer:
+        (line, self._control_buffer) = self._control_buffer.split('\n', 1)
+        line = line.strip()
+        if line.split(' ', 1)[0] == expected:
+          return line
+      if self._shut_down:
+        raise VmControllerError('The VM shut down.')
+      remaining = deadline - time.time()
+      if remaining <= 0:
+        return None
+      (readable, unused_writable, unused_errors) = select.select(
+          [self._control, self._qmp], [], [], remaining)
+      if self._qmp in readable:
+        # Only events are sent while no command is running.
+        self._ReceiveQmpData()
+        self._ParseQmpMessages()
+      if self._control in readable:
+        data = self._control.recv(4096)
+        if not data:
+          raise VmControllerError('The VM exited.')
+        self._control_buffer += data
+
+  def GetResourceUsage(self):
+    """Get the resources used by the VM so far.
+
+    Returns:
+      A VmResourceUsage, or None if the usage could not be read.
+    """
+
+    try:
+      with open('/proc/%d/stat' % self._process.pid) as stat_file:
+        # The command name may contain spaces, so fields are counted from the
+        # end of it.
+        fields = stat_file.read().rsplit(')', 1)[1].split()
+      cpu_time = ((int(fields[11]) + int(fields[12]))
+                  / float(os.sysconf('SC_CLK_TCK')))
+      max_rss = None
+      with open('/proc/%d/status' % self._process.pid) as status_file:
+        for line in status_file:
+          if line.startswith('VmHWM:'):
+            max_rss = int(line.split()[1])
+      disk_read_bytes = 0
+      disk_write_bytes = 0
+      for device in self.Execute('query-blockstats'):
+        disk_read_bytes += device['stats'].get('rd_bytes', 0)
+        disk_write_bytes += device['stats'].get('wr_bytes', 0)
+    except (IOError, OSError, IndexError, ValueError, KeyError, Error,
+            socket.error) as err:
+      logging.error('Could not read the resource usage of the VM: %s', err)
+      return None
+    return VmResourceUsage(cpu_time, max_rss, disk_read_bytes,
+                           disk_write_bytes)
+
+  def Stop(self, timeout):
+    """Wait for the VM to exit, and kill it if it does not.
+
+    Args:
+      timeout: The time to wait, in seconds.
+
+    Returns:
+      The exit code of the VM process, which is negative if it was killed, or
+      None if it was not started.
+    """
+
+    try:
+      if self._process is None:
+        return None
+      deadline = time.time() + timeout
+      while self._process.poll() is None and time.time() < deadline:
+        time.sleep(VmController._POLL_INTERVAL)
+      if self._process.poll() is None:
+        logging.warning('VM did not exit. Stopping it.')
+        try:
+          self._process.kill()
+        except OSError as err:
+          logging.error('Error while trying to kill process: %s', err)
+        self._process.wait()
+      return self._process.returncode
+    finally:
+      for connection in (self._qmp, self._control):
+        if connection is not None:
+          connection.close()
+      if self._socket_dir is not None:
+        shutil.rmtree(self._socket_dir, ignore_errors=True)
+
+  def Quit(self):
+    """Make QEMU exit immediately, without shutting the guest down."""
+
+    try:
+      self.Execute('quit')
+    except (VmControllerError, socket.error):
+      # QEMU may exit before answering.
+      pass
+
+  def _WaitForIncomingState(self):
+    """Wait for the VM to be restored from its warm state, and resume it.
+
+    Raises:
+      VmControllerError: If the state could not be restored.
+    """
+
+    deadline = time.time() + VmController._COMMAND_TIMEOUT
+    while True:
+      status = self.Execute('query-status').get('status')
+      if status == 'running':
+        return
+      if status == 'paused' or status == 'postmigrate':
+        # The VM was stopped when its state was saved.
+        self.Execute('cont')
+        return
+      if status != 'inmigrate' or time.time() > deadline:
+        raise VmControllerError('Could not restore warm state: VM is %s.' %
+                                status)
+      time.sleep(VmController._POLL_INTERVAL)
+
+  def _Connect(self, path):
+    """Connect to a UNIX socket created by QEMU.
+
+    Args:
+      path: The path to the socket.
+
+    Returns:
+      A connected socket.
+
+    Raises:
+      VmControllerError: If the socket could not be connected in time.
+    """
+
+    deadline = time.time() + VmController._CONNECT_TIMEOUT
+    while True:
+      connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+      try:
+        connection.connect(path)
+        return connection
+      except socket.error as err:
+        connection.close()
+        if self._process.poll() is not None or time.time() > deadline:
+          raise VmControllerError('Could not connect to %s: %s' % (path, err))
+      time.sleep(0.1)
+
+  def _ReadQmpMessage(self, timeout):
+    """Read the next QMP message which is not an event.
+
+    Args:
+      timeout: The time to wait, in seconds.
+
+    Returns:
+      The message, as a map.
+
+    Raises:
+      VmControllerError: If no message was received in time.
+    """
+
+    deadline = time.time() + timeout
+    while True:
+      message = self._ParseQmpMessages()
+      if message is not None:
+        return message
+      remaining = deadline - time.time()
+      if remaining <= 0:
+        raise VmControllerError('Timed out waiting for QMP.')
+      self._qmp.settimeout(remaining)
+      try:
+        self._ReceiveQmpData()
+      except socket.timeout:
+        raise VmControllerError('Timed out waiting for QMP.')
+      finally:
+        self._qmp.settimeout(None)
+
+  def _ReceiveQmpData(self):
+    data = self._qmp.recv(4096)
+    if not data:
+      raise VmControllerError('The VM exited.')
+    self._qmp_buffer += data
+
+  def _ParseQmpMessages(self):
+    """Parse buffered QMP messages, up to the first one which is not an event.
+
+    Returns:
+      The first message which is not an event, or None.
+    """
+
+    while '\n' in self._qmp_buffer:
+      (line, self._qmp_buffer) = self._qmp_buffer.split('\n', 1)
+      if not line.strip():
+        continue
+      try:
+        message = json.loads(line)
+      except ValueError:
+        logging.warning('Invalid QMP message: %s', line)
+        continue
+      if 'event' not in message:
+        return message
+      logging.info('VM event: %s', message['event'])
+      if message['event'] == 'SHUTDOWN':
+        self._shut_down = True
+    return None
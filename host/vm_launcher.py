@@ -20,13 +20,22 @@
 """VM management."""
 
 
+import errno
+import json
 import logging
+import os
 import os.path
+import shutil
+import socket
+import subprocess
 import sys
+import tempfile
 
 WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
 sys.path.append(WHEELBARROW_HOME)
 from common.timed_subprocess import TimedSubprocess
+from host.vm_controller import VmController
+from host.vm_controller import VmControllerError
 
 
 def StartVm(cmd, timeout):
@@ -40,37 +49,379 @@ def StartVm(cmd, timeout):
     True if the VM executed without any errors.
   """
 
-  vm = TimedSubprocess(timeout)
-  if vm.Popen(cmd):
-    logging.info('VM process was successfully started.')
-    if vm.Wait():
-      logging.error('VM process has terminated with errors.')
-      return False
-    else:
-      logging.info('VM process has terminated without errors.')
-      return True
+  exit_code = RunVm(cmd, timeout)
+  if exit_code is None:
+    return False
+  elif exit_code:
+    logging.error('VM process has terminated with errors.')
+    return False
   else:
+    logging.info('VM process has terminated without errors.')
+    return True
+
+
+def RunVm(cmd, timeout):
+  """Run a VM with timeout.
+
+  Args:
+    cmd: A command to execute.
+    timeout: The timeout after which the VM should be terminated.
+
+  Returns:
+    The exit code of the VM process, which is negative if it was killed by a
+    signal (e.g., after the timeout), or None if the VM could not be started.
+  """
+
+  vm = TimedSubprocess(timeout)
+  if not vm.Popen(cmd):
     logging.error('VM process was not started.')
+    return None
+  logging.info('VM process was successfully started.')
+  return vm.Wait()
+
+
+def GetWarmDiskPath(warm_state):
+  """Get the path to the disk of a warm state.
+
+  The disk changes made while booting the VM of a warm state are kept in a qcow2
+  overlay next to the warm state, backed by the image, so that the image is not
+  modified. VMs restored from the warm state use the overlay as their image.
+
+  Args:
+    warm_state: The path to a warm state.
+
+  Returns:
+    The path to the qcow2 overlay of the warm state.
+  """
+
+  return warm_state + '.qcow2'
+
+
+def IsWarmStateCurrent(image, warm_state):
+  """Determine if a warm state was saved after the last change to an image.
+
+  Args:
+    image: The path to a QEMU VM image.
+    warm_state: The path to a warm state.
+
+  Returns:
+    True if the warm state and its disk exist and the warm state is newer than
+    the image.
+  """
+
+  try:
+    return (os.path.exists(GetWarmDiskPath(warm_state))
+            and os.stat(warm_state).st_mtime >= os.stat(image).st_mtime)
+  except OSError:
     return False
 
 
-def MakeVmCommand(image, memory, snapshot):
+def SaveWarmState(image, memory, warm_state, timeout):
+  """Boot a VM until it is ready to analyze a package, and save its state.
+
+  The VM must run host/launchers/nfs_worker_launcher.sh. It boots on a new disk
+  overlay of the image (see GetWarmDiskPath()), which keeps the disk changes
+  made during the boot without modifying the image. VMs restored from the warm
+  state must use that overlay as their image, in snapshot mode or through
+  overlays of their own.
+
+  Args:
+    image: The path to a QEMU VM image.
+    memory: The amount of memory of the VM.
+    warm_state: The path to which the warm state is saved.
+    timeout: The time allowed for the VM to boot, in seconds.
+
+  Returns:
+    True if the warm state was saved.
+  """
+
+  image_format = _GetImageFormat(image)
+  if image_format is None:
+    return False
+  disk = GetWarmDiskPath(warm_state)
+  temp_disk = disk + '.tmp'
+  temp_path = warm_state + '.tmp'
+  if not _CreateOverlay(image, image_format, temp_disk):
+    return False
+  controller = VmController(MakeVmCommand(temp_disk, memory, False))
+  saved = False
+  try:
+    if controller.Start():
+      if controller.WaitForMessage('READY', timeout) is None:
+        raise VmControllerError('The VM did not boot in time.')
+      controller.SaveWarmState(temp_path)
+      saved = True
+      controller.Quit()
+  except (VmControllerError, socket.error, OSError) as err:
+    logging.error('Could not save warm state: %s', err)
+  controller.Stop(60)
+  if saved:
+    # The disk is moved first, since the warm state is current once it is in
+    # place.
+    try:
+      os.rename(temp_disk, disk)
+      os.rename(temp_path, warm_state)
+    except OSError as err:
+      logging.error('Could not move warm state: %s', err)
+      saved = False
+  for path in (temp_disk, temp_path):
+    if os.path.exists(path):
+      os.remove(path)
+  return saved
+
+
+def MakeVmCommand(image, memory, snapshot, overlay=False, aio=None):
   """Make a command to start a QEMU VM.
 
   Args:
     image: The path to a QEMU VM image.
     memory: The amount of memory to be reserved for the VM.
     snapshot: True if the VM should be started in snapshot mode.
+    overlay: True if the image is a throwaway qcow2 overlay (see
+             VmCommandFactory). Writes to it are never flushed, and snapshot
+             mode is not used.
+    aio: The AIO mode of the overlay (e.g., 'io_uring'), or None for the
+         default of QEMU.
 
   Returns:
     A command to start a VM, as a list of strings.
   """
 
-  cmd = ['qemu-system-x86_64',
-         '-hda', image,
-         '--enable-kvm',
-         '-m', str(memory)]
+  if overlay:
+    # The drive is the same device as with -hda, so that warm states saved with
+    # -hda can be restored.
+    drive_options = ['file=%s' % image.replace(',', ',,'), 'format=qcow2',
+                     'if=ide', 'index=0', 'media=disk', 'cache=unsafe']
+    if aio is not None:
+      drive_options.append('aio=%s' % aio)
+    disk = ['-drive', ','.join(drive_options)]
+  else:
+    disk = ['-hda', image]
+  cmd = (['qemu-system-x86_64']
+         + disk
+         + ['--enable-kvm',
+            '-m', str(memory)])
   # Concatenate any additional options.
-  if snapshot:
+  if snapshot and not overlay:
     cmd += ['-snapshot']
   return cmd
+
+
+class VmCommandFactory(object):
+  """Makes the commands which start the VMs of a batch.
+
+  If an overlay directory is given, each VM gets its own qcow2 overlay, backed
+  by the image, instead of running in snapshot mode. Overlays are throwaway, so
+  writes to them are never flushed and io_uring is used when QEMU supports it.
+  Placing the overlays on a fast local file system, such as a tmpfs (e.g.,
+  /dev/shm), keeps the writes of concurrent VMs away from the disk of the image.
+
+  The overlays of a launcher are kept in a directory named after its process
+  ID, which is removed by Close(), or by the next launcher if the process died.
+  """
+
+  _OVERLAY_DIR_PREFIX = 'wheelbarrow-overlays-'
+
+  def __init__(self, image, memory, snapshot, overlay_dir=None):
+    """Constructor.
+
+    Args:
+      image: The path to a QEMU VM image.
+      memory: The default amount of memory to be reserved for each VM.
+      snapshot: True if the VMs should not modify the image. This must be True
+                if overlay_dir is set.
+      overlay_dir: The directory in which overlays are created, or None to use
+                   the image directly.
+    """
+
+    self._image = image
+    self._memory = memory
+    self._snapshot = snapshot
+    self._overlay_root = overlay_dir
+    self._overlay_dir = None
+    self._image_format = None
+    self._aio = None
+
+  def Prepare(self):
+    """Create the overlay directory, and remove the ones of dead launchers.
+
+    Returns:
+      True if VM commands can be made.
+    """
+
+    if self._overlay_root is None:
+      return True
+    self._image_format = _GetImageFormat(self._image)
+    if self._image_format is None:
+      return False
+    try:
+      if not os.path.isdir(self._overlay_root):
+        os.makedirs(self._overlay_root)
+      VmCommandFactory._RemoveStaleOverlayDirs(self._overlay_root)
+      self._overlay_dir = os.path.join(
+          self._overlay_root,
+          '%s%d' % (VmCommandFactory._OVERLAY_DIR_PREFIX, os.getpid()))
+      os.mkdir(self._overlay_dir)
+    except OSError as err:
+      logging.error('Could not create overlay directory: %s', err)
+      return False
+    if _IsIoUringSupported(self._overlay_dir):
+      self._aio = 'io_uring'
+    logging.info('Creating overlays in %s, with %s AIO.', self._overlay_dir,
+                 self._aio or 'default')
+    return True
+
+  def GetMemory(self):
+    return self._memory
+
+  def MakeCommand(self, memory=None):
+    """Make the command of a VM, and its overlay if overlays are used.
+
+    Args:
+      memory: The memory of the VM, or None for the default memory.
+
+    Returns:
+      A (command, overlay path) tuple. The overlay path is None if overlays are
+      not used. Both are None if the overlay could not be created.
+    """
+
+    memory = memory or self._memory
+    if self._overlay_dir is None:
+      return (MakeVmCommand(self._image, memory, self._snapshot), None)
+    (file_descriptor, overlay) = tempfile.mkstemp(suffix='.qcow2',
+                                                  dir=self._overlay_dir)
+    os.close(file_descriptor)
+    if not _CreateOverlay(self._image, self._image_format, overlay):
+      self.ReleaseOverlay(overlay)
+      return (None, None)
+    return (MakeVmCommand(overlay, memory, True, True, self._aio), overlay)
+
+  def ReleaseOverlay(self, overlay):
+    """Remove the overlay of a VM which exited.
+
+    Args:
+      overlay: An overlay path returned by MakeCommand(), or None.
+    """
+
+    if overlay is None:
+      return
+    try:
+      os.remove(overlay)
+    except OSError as err:
+      logging.error('Could not remove overlay %s: %s', overlay, err)
+
+  def Close(self):
+    """Remove the overlay directory, with any overlay left in it."""
+
+    if self._overlay_dir is not None:
+      shutil.rmtree(self._overlay_dir, ignore_errors=True)
+      self._overlay_dir = None
+
+  @staticmethod
+  def _RemoveStaleOverlayDirs(overlay_root):
+    """Remove the overlay directories of launchers which are not running.
+
+    Args:
+      overlay_root: The directory containing overlay directories.
+    """
+
+    for name in os.listdir(overlay_root):
+      if not name.startswith(VmCommandFactory._OVERLAY_DIR_PREFIX):
+        continue
+      try:
+        pid = int(name[len(VmCommandFactory._OVERLAY_DIR_PREFIX):])
+      except ValueError:
+        continue
+      if pid == os.getpid() or not _IsProcessRunning(pid):
+        logging.info('Removing stale overlay directory %s.', name)
+        shutil.rmtree(os.path.join(overlay_root, name), ignore_errors=True)
+
+
+def _IsProcessRunning(pid):
+  try:
+    os.kill(pid, 0)
+  except OSError as err:
+    return err.errno != errno.ESRCH
+  return True
+
+
+def _CreateOverlay(image, image_format, overlay):
+  """Create a qcow2 overlay backed by an image.
+
+  Args:
+    image: The path to a QEMU VM image.
+    image_format: The format of the image (e.g., 'qcow2').
+    overlay: The path to the overlay, which is replaced if it exists.
+
+  Returns:
+    True if the overlay was created.
+  """
+
+  cmd = ['qemu-img', 'create', '-q', '-f', 'qcow2',
+         '-b', os.path.abspath(image), '-F', image_format, overlay]
+  return _RunQemuTool(cmd) is not None
+
+
+def _GetImageFormat(image):
+  """Get the format of an image (e.g., 'qcow2'), or None on error."""
+
+  output = _RunQemuTool(['qemu-img', 'info', '--output=json', image])
+  if output is None:
+    return None
+  try:
+    return json.loads(output)['format']
+  except (ValueError, KeyError) as err:
+    logging.error('Could not read the format of %s: %s', image, err)
+    return None
+
+
+def _IsIoUringSupported(directory):
+  """Determine if QEMU can open files with io_uring.
+
+  This depends on the version of QEMU, on how it was built and on the kernel.
+
+  Args:
+    directory: A directory in which a probe file can be created.
+
+  Returns:
+    True if io_uring can be used.
+  """
+
+  (file_descriptor, probe_path) = tempfile.mkstemp(dir=directory)
+  os.close(file_descriptor)
+  cmd = ['qemu-system-x86_64', '-machine', 'none', '-nodefaults',
+         '-display', 'none', '-monitor', 'stdio',
+         '-blockdev', 'driver=file,node-name=probe,aio=io_uring,filename=%s' %
+         probe_path.replace(',', ',,')]
+  try:
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    process.communicate('quit\n')
+    return process.returncode == 0
+  except OSError:
+    return False
+  finally:
+    os.remove(probe_path)
+
+
+def _RunQemuTool(cmd):
+  """Run a QEMU tool.
+
+  Args:
+    cmd: A command, as a list of strings.
+
+  Returns:
+    The standard output of the command, or None if it failed.
+  """
+
+  try:
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+    (output, error) = process.communicate()
+  except OSError as err:
+    logging.error('Unable to run command %s: %s', cmd, err)
+    return None
+  if process.returncode:
+    logging.error('Command %s failed: %s', cmd, error.strip())
+    return None
+  return output
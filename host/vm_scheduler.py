@@ -0,0 +1,203 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Admission of VMs based on the resources of the host.
+
+A VmScheduler decides when another VM can be started, from the memory available
+on the host, the pressure stall information (PSI) of the kernel and the number
+of CPUs. When the host is saturated, no VM is started for a delay which doubles
+as long as the host stays saturated.
+
+The memory of a VM is estimated from the peak memory the guest used for the
+same package in previous analyses or, failing that, from the installed size of
+the package.
+"""
+
+import logging
+import multiprocessing
+import os
+import sys
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+from common.instrumentation import GetMemInfo
+
+
+# The memory estimated from the peak memory of a previous analysis is this many
+# times larger.
+_HISTORY_HEADROOM = 1.5
+# The memory needed by a package is estimated as this many times its installed
+# size, since it is downloaded, installed and extracted for analysis.
+_INSTALLED_SIZE_FACTOR = 3
+
+
+def EstimateVmMemory(peak_memory, installed_size, min_memory, max_memory):
+  """Estimate the memory of a VM which analyzes a package.
+
+  Args:
+    peak_memory: The peak memory used by the guest for the package in a
+                 previous analysis, in kilobytes, or None.
+    installed_size: The installed size of the package, in bytes, or None.
+    min_memory: The minimum memory of a VM, in megabytes.
+    max_memory: The maximum memory of a VM, in megabytes.
+
+  Returns:
+    The memory of the VM, in megabytes.
+  """
+
+  if peak_memory:
+    memory = peak_memory * _HISTORY_HEADROOM / 1024
+  elif installed_size:
+    memory = min_memory + installed_size * _INSTALLED_SIZE_FACTOR / 2 ** 20
+  else:
+    return max_memory
+  return int(min(max(memory, min_memory), max_memory))
+
+
+class VmScheduler(object):
+  """Decides when VMs can be started, based on the resources of the host."""
+
+  # VMs started less than this many seconds ago may not have touched their
+  # memory yet, so it is not accounted for by the host.
+  _RAMP_UP_TIME = 120
+  _MIN_BACKOFF = 5
+  _MAX_BACKOFF = 120
+
+  def __init__(self, max_vms=0, memory_reserve=1024,
+               memory_pressure_limit=10.0, io_pressure_limit=30.0,
+               cpu_pressure_limit=50.0, proc_dir='/proc'):
+    """Constructor.
+
+    Args:
+      max_vms: The maximum number of concurrent VMs, or 0 for the number of
+               CPUs of the host.
+      memory_reserve: The memory which is left to the host, in megabytes.
+      memory_pressure_limit: The share of time in which all tasks are stalled
+                             on memory, in percent over the last 10 seconds,
+                             above which no VM is started.
+      io_pressure_limit: The same limit for I/O.
+      cpu_pressure_limit: The share of time in which some task waits for a CPU,
+                          in percent over the last 10 seconds, above which no
+                          VM is started.
+      proc_dir: The mount point of procfs.
+    """
+
+    self._cpu_count = multiprocessing.cpu_count()
+    self._max_vms = max_vms or self._cpu_count
+    self._memory_reserve = memory_reserve
+    self._pressure_limits = (('memory', 'full', memory_pressure_limit),
+                             ('io', 'full', io_pressure_limit),
+                             ('cpu', 'some', cpu_pressure_limit))
+    self._proc_dir = proc_dir
+    self._backoff = 0
+    self._next_admission_time = 0
+
+  def GetMaxVms(self):
+    return self._max_vms
+
+  def CanStartVm(self, memory, running_vms, now):
+    """Determine if a VM can be started now.
+
+    A VM is always admitted if none is running, so that the batch progresses.
+
+    Args:
+      memory: The memory of the VM, in megabytes.
+      running_vms: A list of (start time, memory) tuples for the running VMs.
+      now: The current time.
+
+    Returns:
+      True if the VM can be started.
+    """
+
+    if len(running_vms) >= self._max_vms:
+      return False
+    if not running_vms:
+      return True
+    if now < self._next_admission_time:
+      return False
+    saturation = self._GetSaturation(memory, running_vms, now)
+    if saturation is None:
+      self._backoff = 0
+      return True
+    self._backoff = min(max(2 * self._backoff, VmScheduler._MIN_BACKOFF),
+                        VmScheduler._MAX_BACKOFF)
+    self._next_admission_time = now + self._backoff
+    logging.info('Host is saturated (%s) with %d VMs. No VM is started for %d '
+                 'seconds.', saturation, len(running_vms), self._backoff)
+    return False
+
+  def _GetSaturation(self, memory, running_vms, now):
+    """Determine which resource of the host, if any, is saturated.
+
+    Args:
+      memory: The memory of the VM to start, in megabytes.
+      running_vms: A list of (start time, memory) tuples for the running VMs.
+      now: The current time.
+
+    Returns:
+      A description of the saturated resource, or None.
+    """
+
+    mem_info = GetMemInfo(os.path.join(self._proc_dir, 'meminfo'))
+    if 'MemAvailable' in mem_info:
+      ramping_up_memory = sum(
+          vm_memory for (start_time, vm_memory) in running_vms
+          if now - start_time < VmScheduler._RAMP_UP_TIME)
+      available_memory = (mem_info['MemAvailable'] / 1024 - ramping_up_memory
+                          - self._memory_reserve)
+      if available_memory < memory:
+        return 'memory: %d MB available' % available_memory
+    cpu_pressure = None
+    for (resource, kind, limit) in self._pressure_limits:
+      pressure = self._GetPressure(resource, kind)
+      if resource == 'cpu':
+        cpu_pressure = pressure
+      if pressure is not None and pressure > limit:
+        return '%s pressure: %.1f%%' % (resource, pressure)
+    if cpu_pressure is None:
+      # Without PSI, the load average is compared to the number of CPUs.
+      load = os.getloadavg()[0]
+      if load >= self._cpu_count:
+        return 'load average: %.1f' % load
+    return None
+
+  def _GetPressure(self, resource, kind):
+    """Read a pressure stall metric of the kernel.
+
+    Args:
+      resource: 'cpu', 'memory' or 'io'.
+      kind: 'some' or 'full'.
+
+    Returns:
+      The average share of stalled time over the last 10 seconds, in percent,
+      or None if it is not available (e.g., before Linux 4.20).
+    """
+
+    try:
+      path = os.path.join(self._proc_dir, 'pressure', resource)
+      with open(path) as pressure_file:
+        for line in pressure_file:
+          fields = line.split()
+          if fields and fields[0] == kind:
+            for field in fields[1:]:
+              (name, value) = field.split('=', 1)
+              if name == 'avg10':
+                return float(value)
+    except (IOError, ValueError):
+      pass
+    return None
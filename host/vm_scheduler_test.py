@@ -0,0 +1,164 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Tests for the VM scheduler."""
+
+import mox
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+
+from host import vm_scheduler
+from host.vm_scheduler import VmScheduler
+
+
+class EstimateVmMemoryTest(unittest.TestCase):
+  def testEstimateFromHistory(self):
+    # 1.5 times the peak memory, which is in kilobytes.
+    self.assertEqual(
+        1536, vm_scheduler.EstimateVmMemory(1024 * 1024, 2 ** 30, 512, 4096))
+
+  def testEstimateFromInstalledSize(self):
+    # The minimum memory plus 3 times the installed size.
+    self.assertEqual(
+        812, vm_scheduler.EstimateVmMemory(None, 100 * 2 ** 20, 512, 4096))
+
+  def testEstimateWithoutInformation(self):
+    self.assertEqual(4096, vm_scheduler.EstimateVmMemory(None, None, 512,
+                                                         4096))
+
+  def testEstimateIsClamped(self):
+    self.assertEqual(512, vm_scheduler.EstimateVmMemory(1024, None, 512, 4096))
+    self.assertEqual(
+        4096, vm_scheduler.EstimateVmMemory(8 * 2 ** 20, None, 512, 4096))
+    self.assertEqual(
+        4096, vm_scheduler.EstimateVmMemory(None, 2 ** 32, 512, 4096))
+
+
+class VmSchedulerTest(unittest.TestCase):
+  def setUp(self):
+    self.proc_dir = tempfile.mkdtemp()
+    os.mkdir(os.path.join(self.proc_dir, 'pressure'))
+    self.scheduler = VmScheduler(4, 1024, proc_dir=self.proc_dir)
+    self.running_vms = [(0, 1024)]
+    self.mox = mox.Mox()
+
+  def tearDown(self):
+    self.mox.UnsetStubs()
+    shutil.rmtree(self.proc_dir)
+
+  def testAdmitVmWhenNoneIsRunning(self):
+    self._WriteMemAvailable(0)
+    self._WritePressure('memory', 100.0)
+    self.assertTrue(self.scheduler.CanStartVm(4096, [], 1000))
+
+  def testRefuseVmOverMaxVms(self):
+    self._WriteMemAvailable(64 * 2 ** 20)
+    self._WriteNoPressure()
+    self.assertFalse(self.scheduler.CanStartVm(1024, [(0, 1024)] * 4, 1000))
+
+  def testAdmitVm(self):
+    self._WriteMemAvailable(4096 * 1024)
+    self._WriteNoPressure()
+    self.assertTrue(self.scheduler.CanStartVm(2048, self.running_vms, 1000))
+
+  def testRefuseVmOnMemAvailable(self):
+    # 4096 MB are available, minus the reserve of 1024 MB.
+    self._WriteMemAvailable(4096 * 1024)
+    self._WriteNoPressure()
+    self.assertFalse(self.scheduler.CanStartVm(3072 + 1, self.running_vms,
+                                               1000))
+
+  def testRefuseVmOnMemoryOfVmsRampingUp(self):
+    self._WriteMemAvailable(4096 * 1024)
+    self._WriteNoPressure()
+    self.assertFalse(self.scheduler.CanStartVm(2048, [(990, 2048)], 1000))
+
+  def testRefuseVmOnPressure(self):
+    for resource in ('memory', 'io', 'cpu'):
+      scheduler = VmScheduler(4, 1024, proc_dir=self.proc_dir)
+      self._WriteMemAvailable(64 * 2 ** 20)
+      self._WriteNoPressure()
+      self._WritePressure(resource, 80.0)
+      self.assertFalse(scheduler.CanStartVm(1024, self.running_vms, 1000))
+
+  def testAdmitVmUnderPressureLimits(self):
+    self._WriteMemAvailable(64 * 2 ** 20)
+    self._WritePressure('memory', 9.0)
+    self._WritePressure('io', 29.0)
+    self._WritePressure('cpu', 49.0)
+    self.assertTrue(self.scheduler.CanStartVm(1024, self.running_vms, 1000))
+
+  def testLoadAverageWithoutPressure(self):
+    self._WriteMemAvailable(64 * 2 ** 20)
+    self.mox.StubOutWithMock(os, 'getloadavg')
+    os.getloadavg().AndReturn((self.scheduler._cpu_count - 0.5, 0, 0))
+    os.getloadavg().AndReturn((self.scheduler._cpu_count, 0, 0))
+    self.mox.ReplayAll()
+
+    self.assertTrue(self.scheduler.CanStartVm(1024, self.running_vms, 1000))
+    self.assertFalse(self.scheduler.CanStartVm(1024, self.running_vms, 1000))
+    self.mox.VerifyAll()
+
+  def testBackoffIsDoubled(self):
+    self._WriteMemAvailable(0)
+    self._WriteNoPressure()
+    now = 1000
+    backoffs = []
+    for unused_i in xrange(8):
+      self.assertFalse(self.scheduler.CanStartVm(1024, self.running_vms, now))
+      backoffs.append(self.scheduler._next_admission_time - now)
+      # No VM is admitted, nor is the host checked, until the backoff expires.
+      self._WriteMemAvailable(64 * 2 ** 20)
+      self.assertFalse(self.scheduler.CanStartVm(
+          1024, self.running_vms, self.scheduler._next_admission_time - 1))
+      self._WriteMemAvailable(0)
+      now = self.scheduler._next_admission_time
+    self.assertEqual([5, 10, 20, 40, 80, 120, 120, 120], backoffs)
+
+    self._WriteMemAvailable(64 * 2 ** 20)
+    self.assertTrue(self.scheduler.CanStartVm(1024, self.running_vms, now))
+    self._WriteMemAvailable(0)
+    self.assertFalse(self.scheduler.CanStartVm(1024, self.running_vms, now))
+    self.assertEqual(5, self.scheduler._next_admission_time - now)
+
+  def _WriteMemAvailable(self, mem_available):
+    with open(os.path.join(self.proc_dir, 'meminfo'), 'w') as mem_info_file:
+      mem_info_file.write('MemTotal:       %d kB\n' % (64 * 2 ** 20))
+      mem_info_file.write('MemAvailable:   %d kB\n' % mem_available)
+
+  def _WritePressure(self, resource, avg10):
+    with open(os.path.join(self.proc_dir, 'pressure', resource),
+              'w') as pressure_file:
+      pressure_file.write('some avg10=%.2f avg60=0.00 avg300=0.00 total=0\n'
+                          % avg10)
+      pressure_file.write('full avg10=%.2f avg60=0.00 avg300=0.00 total=0\n'
+                          % avg10)
+
+  def _WriteNoPressure(self):
+    for resource in ('memory', 'io', 'cpu'):
+      self._WritePressure(resource, 0.0)
+
+
+if __name__ == '__main__':
+  unittest.main()
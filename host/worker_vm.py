@@ -0,0 +1,118 @@
+#!/usr/bin/python
+#
+# Copyright 2013 Google Inc. All Rights Reserved.
+#
+# Author: octeau@cse.psu.edu (Damien Octeau)
+# Author: theinsecureroot@gmail.com (Cyrus Vesuna)
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""Long-lived worker VMs, which analyze several packages per boot.
+
+A worker VM runs host/launchers/nfs_worker_launcher.sh, which talks to the host
+over the first serial port (see VmController). When the VM first reports that
+it is ready, its state is saved in an internal snapshot. After each package,
+the VM is reverted to that snapshot, which restores both its memory and its
+disk. Every package is thus analyzed on a clean VM, without paying for a boot.
+
+A worker VM can also be restored from a warm state instead of being booted. The
+VM is then already waiting for its first command.
+"""
+
+import logging
+import os
+import socket
+import sys
+WHEELBARROW_HOME = os.getenv('WHEELBARROW_HOME', os.path.dirname(__file__))
+sys.path.append(WHEELBARROW_HOME)
+from host.vm_controller import VmController
+from host.vm_controller import VmControllerError
+
+
+class WorkerVm(object):
+  """A VM which analyzes packages until the queue is empty or a limit is hit."""
+
+  _SNAPSHOT_NAME = 'wheelbarrow-clean'
+  # The time to wait for the VM to power off, in seconds.
+  _SHUTDOWN_TIMEOUT = 60
+
+  def __init__(self, cmd, timeout, max_packages, input_dir, warm_state=None):
+    """Constructor.
+
+    Args:
+      cmd: A command to start a QEMU VM, as a list of strings.
+      timeout: The time allowed for the VM to boot and for each package, in
+               seconds.
+      max_packages: The maximum number of packages to analyze.
+      input_dir: The NFS input directory for package descriptors, on the host.
+      warm_state: The path to a warm state to restore the VM from, or None to
+                  boot it.
+    """
+
+    self._timeout = timeout
+    self._max_packages = max_packages
+    self._input_dir = input_dir
+    self._warm_state = warm_state
+    self._controller = VmController(cmd, warm_state)
+    self._usage = None
+
+  def Run(self):
+    """Run the VM.
+
+    Returns:
+      A (exit code, VmResourceUsage) tuple. The exit code of the VM process is
+      negative if it was killed, and None if it could not be started. The usage
+      is None if it could not be read.
+    """
+
+    try:
+      if self._controller.Start():
+        self._AnalyzePackages()
+    except (VmControllerError, socket.error) as err:
+      logging.error('Worker VM failed: %s', err)
+    exit_code = self._controller.Stop(WorkerVm._SHUTDOWN_TIMEOUT)
+    return (exit_code, self._usage)
+
+  def _AnalyzePackages(self):
+    """Let the VM analyze packages, reverting it after each one."""
+
+    if (self._warm_state is None
+        and self._controller.WaitForMessage('READY', self._timeout) is None):
+      raise VmControllerError('The VM did not boot in time.')
+    if self._max_packages > 1:
+      self._controller.SaveSnapshot(WorkerVm._SNAPSHOT_NAME)
+    package_count = 0
+    while True:
+      self._controller.SendCommand('GO')
+      message = self._controller.WaitForMessage('DONE', self._timeout)
+      package_count += 1
+      if message is None:
+        # The lease of the package expires and the host analyzes it again.
+        logging.warning('The analysis in the worker VM timed out.')
+      else:
+        logging.info('The worker VM reported %s.', message)
+      if (package_count >= self._max_packages
+          or not [file_name for file_name in os.listdir(self._input_dir)
+                  if not file_name.startswith('.')]):
+        break
+      self._controller.LoadSnapshot(WorkerVm._SNAPSHOT_NAME)
+    logging.info('Worker VM analyzed %d packages.', package_count)
+    self._usage = self._controller.GetResourceUsage()
+    logging.info('Worker VM resource usage: %s', self._usage)
+    self._controller.SendCommand('QUIT')
+
+
+def RunWorkerVm(cmd, timeout, max_packages, input_dir, warm_state=None):
+  """Run a worker VM. See WorkerVm."""
+
+  return WorkerVm(cmd, timeout, max_packages, input_dir, warm_state).Run()